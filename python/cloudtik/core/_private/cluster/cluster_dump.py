@@ -1,17 +1,21 @@
 import copy
+import io
 from typing import Any, Dict, Optional, List, Sequence, Tuple
 from shlex import quote
 import os
+import posixpath
 
 import re
+import shutil
 import subprocess
 import sys
 import tarfile
 import tempfile
 import threading
+import time
 import yaml
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 
 from cloudtik.core._private.utils import get_head_working_ip, get_node_cluster_ip, get_runtime_logs, \
@@ -25,6 +29,11 @@ from cloudtik.core._private.providers import _get_node_provider
 import psutil
 
 MAX_PARALLEL_SSH_WORKERS = 8
+DEFAULT_COMPRESS_THREADS = min(8, os.cpu_count() or 1)
+# The members streamed from remote nodes larger than this are spooled to disk
+STREAM_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+# The file in session dir recording the time of last dump for incremental dump
+LAST_DUMP_TIME_FILE = "last_dump_time"
 DEFAULT_SSH_USER = "ubuntu"
 DEFAULT_SSH_KEYS = [
     "~/cloudtik_bootstrap_key.pem"
@@ -51,7 +60,10 @@ class GetParameters:
                  processes: bool = True,
                  processes_verbose: bool = True,
                  processes_list: Optional[List[Tuple[str, bool, str, str]]] = None,
-                 runtimes: List[str] = None):
+                 runtimes: List[str] = None,
+                 max_bytes: Optional[int] = None,
+                 tail_bytes: Optional[int] = None,
+                 incremental: bool = False):
         self.logs = logs
         self.debug_state = debug_state
         self.pip = pip
@@ -59,6 +71,12 @@ class GetParameters:
         self.processes_verbose = processes_verbose
         self.processes_list = processes_list
         self.runtimes = runtimes
+        # The budget of the (uncompressed) bytes collected from a node
+        self.max_bytes = max_bytes
+        # Only the last bytes of each log file are collected if specified
+        self.tail_bytes = tail_bytes
+        # Only the logs changed since the last dump are collected
+        self.incremental = incremental
 
     def set_runtimes(self, runtimes):
         self.runtimes = runtimes
@@ -82,6 +100,17 @@ class Node:
         self.is_head = is_head
 
 
+def _get_parallel_compress_cmd(threads: Optional[int]) -> Optional[List[str]]:
+    if threads is None:
+        threads = DEFAULT_COMPRESS_THREADS
+    if threads <= 1:
+        return None
+    pigz = shutil.which("pigz")
+    if not pigz:
+        return None
+    return [pigz, "-p", str(threads), "-c"]
+
+
 class Archive:
     """Archive object to collect and compress files into a single file.
 
@@ -89,12 +118,28 @@ class Archive:
     functions. These functions can use the :meth:`subdir` method to add
     files to a sub directory of the archive.
 
+    The archive is written as a stream to the file or the file object (for
+    example, stdout). It is compressed with multiple threads by pigz if
+    available or with gzip otherwise. If max_bytes is specified, the files
+    exceeding the budget of bytes are skipped.
     """
 
-    def __init__(self, file: Optional[str] = None):
-        self.file = file or tempfile.mktemp(
-            prefix="cloudtik_logs_", suffix=".tar.gz")
+    def __init__(self, file: Optional[str] = None,
+                 fileobj=None,
+                 compress: bool = True,
+                 compress_threads: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.fileobj = fileobj
+        self.file = None if fileobj is not None else (file or tempfile.mktemp(
+            prefix="cloudtik_logs_", suffix=".tar.gz"))
+        self.compress = compress
+        self.compress_threads = compress_threads
+        self.max_bytes = max_bytes
+        self.bytes_added = 0
+        self.files_skipped = 0
         self.tar = None
+        self._out = None
+        self._compressor = None
         self._lock = threading.Lock()
 
     @property
@@ -102,11 +147,86 @@ class Archive:
         return bool(self.tar)
 
     def open(self):
-        self.tar = tarfile.open(self.file, "w:gz")
+        out = self.fileobj
+        if out is None:
+            out = self._out = open(self.file, "wb")
+        if not self.compress:
+            self.tar = tarfile.open(fileobj=out, mode="w|")
+            return
+
+        compress_cmd = _get_parallel_compress_cmd(self.compress_threads)
+        if compress_cmd:
+            out.flush()
+            self._compressor = subprocess.Popen(
+                compress_cmd, stdin=subprocess.PIPE, stdout=out)
+            self.tar = tarfile.open(fileobj=self._compressor.stdin, mode="w|")
+        else:
+            self.tar = tarfile.open(fileobj=out, mode="w|gz")
 
     def close(self):
         self.tar.close()
         self.tar = None
+        if self._compressor is not None:
+            self._compressor.stdin.close()
+            return_code = self._compressor.wait()
+            self._compressor = None
+            if return_code != 0:
+                raise LocalCommandFailed(
+                    f"Compressing the archive failed with code {return_code}.")
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        else:
+            self.fileobj.flush()
+
+    def add(self, path: str, arcname: str,
+            tail_bytes: Optional[int] = None) -> bool:
+        """Add a file to the archive with the budget of bytes applied.
+
+        Args:
+            path (str): The path of the file.
+            arcname (str): The name of the file in the archive.
+            tail_bytes (int): If specified, only the last bytes of the file
+                are added.
+
+        Returns:
+            False if the file is skipped because of the budget.
+        """
+        with self._lock:
+            tarinfo = self.tar.gettarinfo(path, arcname=arcname)
+            if not tarinfo.isreg():
+                self.tar.addfile(tarinfo)
+                return True
+
+            offset = 0
+            if tail_bytes is not None and tarinfo.size > tail_bytes:
+                offset = tarinfo.size - tail_bytes
+                tarinfo.size = tail_bytes
+            if self.max_bytes is not None and (
+                    self.bytes_added + tarinfo.size > self.max_bytes):
+                self.files_skipped += 1
+                return False
+
+            with open(path, "rb") as f:
+                f.seek(offset)
+                self.tar.addfile(tarinfo, f)
+            self.bytes_added += tarinfo.size
+            return True
+
+    def add_stream(self, tarinfo: tarfile.TarInfo, fileobj=None):
+        """Add a member with its data read from the file object."""
+        with self._lock:
+            self.tar.addfile(tarinfo, fileobj)
+            if tarinfo.isreg():
+                self.bytes_added += tarinfo.size
+
+    def add_bytes(self, data: bytes, arcname: str):
+        """Add a small generated file which is not counted in the budget."""
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = len(data)
+        tarinfo.mtime = int(time.time())
+        with self._lock:
+            self.tar.addfile(tarinfo, io.BytesIO(data))
 
     def __enter__(self):
         self.open()
@@ -142,14 +262,13 @@ class Archive:
 
         class _Context:
             @staticmethod
-            def add(path: str, arcname: Optional[str] = None):
+            def add(path: str, arcname: Optional[str] = None,
+                    tail_bytes: Optional[int] = None) -> bool:
                 path = os.path.abspath(path)
                 arcname = arcname or os.path.join(subdir,
                                                   os.path.relpath(path, root))
 
-                self._lock.acquire()
-                self.tar.add(path, arcname=arcname)
-                self._lock.release()
+                return self.add(path, arcname=arcname, tail_bytes=tail_bytes)
 
         yield _Context()
 
@@ -160,44 +279,62 @@ class Archive:
 def get_local_logs(
         archive: Archive,
         exclude: Optional[Sequence[str]] = None,
-        runtimes: List[str] = None) -> Archive:
+        runtimes: List[str] = None,
+        tail_bytes: Optional[int] = None,
+        since: Optional[float] = None) -> Archive:
     """Copy local log files into an archive.
         Args:
             archive (Archive): Archive object to add log files to.
             exclude (Sequence[str]): Sequence of regex patterns. Files that match
                 any of these patterns will not be included in the archive.
             runtimes: List of runtimes for collect logs from
+            tail_bytes: Only the last bytes of each log file if specified
+            since: Only the log files modified after this time if specified
         Returns:
             Open archive object.
     """
-    get_cloudtik_local_logs(archive, exclude)
-    get_runtime_local_logs(archive, exclude, runtimes=runtimes)
+    get_cloudtik_local_logs(
+        archive, exclude, tail_bytes=tail_bytes, since=since)
+    get_runtime_local_logs(
+        archive, exclude, runtimes=runtimes, tail_bytes=tail_bytes, since=since)
 
 
 def get_cloudtik_local_logs(
         archive: Archive,
         exclude: Optional[Sequence[str]] = None,
-        session_log_dir: str = "/tmp/cloudtik/session_latest") -> Archive:
+        session_log_dir: str = "/tmp/cloudtik/session_latest",
+        tail_bytes: Optional[int] = None,
+        since: Optional[float] = None) -> Archive:
     log_dir = os.path.join(session_log_dir, "logs")
-    get_local_logs_for(archive, "cloudtik", log_dir, exclude)
+    get_local_logs_for(
+        archive, "cloudtik", log_dir, exclude, tail_bytes=tail_bytes, since=since)
 
 
 def get_runtime_local_logs(
         archive: Archive,
         exclude: Optional[Sequence[str]] = None,
-        runtimes: List[str] = None) -> Archive:
+        runtimes: List[str] = None,
+        tail_bytes: Optional[int] = None,
+        since: Optional[float] = None) -> Archive:
     runtime_logs = get_runtime_logs(runtimes)
     for category in runtime_logs:
         log_dir = runtime_logs[category]
-        get_local_logs_for(archive, category, log_dir, exclude)
+        get_local_logs_for(
+            archive, category, log_dir, exclude, tail_bytes=tail_bytes, since=since)
 
 
 def get_local_logs_for(
         archive: Archive,
         category:str,
         log_dir: str,
-        exclude: Optional[Sequence[str]] = None) -> Archive:
+        exclude: Optional[Sequence[str]] = None,
+        tail_bytes: Optional[int] = None,
+        since: Optional[float] = None) -> Archive:
     """Copy local log files into an archive.
+
+    The most recently modified files are added first so that they are kept
+    when the budget of bytes of the archive is exceeded.
+
     Returns:
         Open archive object.
 
@@ -212,19 +349,52 @@ def get_local_logs_for(
 
     final_log_dir = os.path.expanduser(log_dir)
 
+    log_files = []
+    for root, dirs, files in os.walk(final_log_dir):
+        for file in files:
+            file_path = os.path.join(root, file)
+            rel_path = os.path.relpath(file_path, start=final_log_dir)
+            # Skip file if it matches any pattern in `exclude`
+            if any(re.match(pattern, rel_path) for pattern in exclude):
+                continue
+            try:
+                mtime = os.path.getmtime(file_path)
+            except OSError:
+                # The file may be removed by log rotation
+                continue
+            if since is not None and mtime <= since:
+                continue
+            log_files.append((mtime, file_path))
+
+    log_files.sort(reverse=True)
     with archive.subdir(category, root=final_log_dir) as sd:
-        for root, dirs, files in os.walk(final_log_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, start=final_log_dir)
-                # Skip file if it matches any pattern in `exclude`
-                if any(re.match(pattern, rel_path) for pattern in exclude):
-                    continue
-                sd.add(file_path)
+        for _, file_path in log_files:
+            sd.add(file_path, tail_bytes=tail_bytes)
 
     return archive
 
 
+def get_last_dump_time(
+        session_dir: str = "/tmp/cloudtik/session_latest") -> Optional[float]:
+    try:
+        with open(os.path.join(session_dir, LAST_DUMP_TIME_FILE), "r") as f:
+            return float(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def set_last_dump_time(
+        dump_time: float,
+        session_dir: str = "/tmp/cloudtik/session_latest"):
+    if not os.path.isdir(session_dir):
+        return
+    try:
+        with open(os.path.join(session_dir, LAST_DUMP_TIME_FILE), "w") as f:
+            f.write(str(dump_time))
+    except OSError as exc:
+        cli_logger.warning(f"Failed to record the time of the dump: {exc}")
+
+
 def get_local_debug_state(archive: Archive,
                           session_dir: str = "/tmp/cloudtik/session_latest"
                           ) -> Archive:
@@ -361,11 +531,9 @@ def get_all_local_data(archive: Archive, parameters: GetParameters):
     if not archive.is_open:
         archive.open()
 
-    if parameters.logs:
-        try:
-            get_local_logs(archive=archive, runtimes=parameters.runtimes)
-        except LocalCommandFailed as exc:
-            cli_logger.error(exc)
+    since = get_last_dump_time() if parameters.incremental else None
+    dump_time = time.time()
+
     if parameters.debug_state:
         try:
             get_local_debug_state(archive=archive)
@@ -385,6 +553,25 @@ def get_all_local_data(archive: Archive, parameters: GetParameters):
                 runtimes=parameters.runtimes)
         except LocalCommandFailed as exc:
             cli_logger.error(exc)
+    # The logs are collected last for the budget of bytes left by the small files
+    if parameters.logs:
+        try:
+            get_local_logs(
+                archive=archive, runtimes=parameters.runtimes,
+                tail_bytes=parameters.tail_bytes, since=since)
+        except LocalCommandFailed as exc:
+            cli_logger.error(exc)
+
+    dump_info = {
+        "dump_time": dump_time,
+        "since": since,
+        "bytes": archive.bytes_added,
+        "files_skipped": archive.files_skipped,
+    }
+    archive.add_bytes(
+        yaml.dump(dump_info).encode("utf-8"), "meta/dump_info.txt")
+    if parameters.incremental:
+        set_last_dump_time(dump_time)
 
     return archive
 
@@ -398,30 +585,14 @@ def _wrap(items: List[str], quotes="'"):
     return f"{quotes}{' '.join(items)}{quotes}"
 
 
-def create_and_get_archive_from_remote_node(remote_node: Node,
-                                            parameters: GetParameters,
-                                            script_path: str = "cloudtik"
-                                            ) -> Optional[str]:
-    """Create an archive containing logs on a remote node and transfer.
-
-    This will call ``cloudtik local-dump --stream`` on the remote
-    node. The resulting file will be saved locally in a temporary file and
-    returned.
-
-    Args:
-        remote_node (Node): Remote node to gather archive from.
-        script_path (str): Path to this script on the remote node.
-        parameters (GetParameters): Parameters (settings) for getting data.
-
-    Returns:
-        Path to a temporary file containing the node's collected data.
-
-    """
+def _get_ssh_command(remote_node: Node) -> List[str]:
     cmd = [
         "ssh",
         "-o StrictHostKeyChecking=no",
         "-o UserKnownHostsFile=/dev/null",
         "-o LogLevel=ERROR",
+        # The archive is streamed without compression, compress the channel
+        "-o Compression=yes",
         "-i",
         remote_node.ssh_key,
         f"{remote_node.ssh_user}@{remote_node.host}",
@@ -433,8 +604,11 @@ def create_and_get_archive_from_remote_node(remote_node: Node,
             "exec",
             remote_node.docker_container,
         ]
+    return cmd
 
-    collect_cmd = [script_path, "local-dump", "--verbosity=0", "--stream"]
+
+def _get_collect_options(parameters: GetParameters) -> List[str]:
+    collect_cmd = ["--verbosity=0", "--stream", "--no-compress"]
     collect_cmd += ["--logs"] if parameters.logs else ["--no-logs"]
     collect_cmd += ["--debug-state"] if parameters.debug_state else [
         "--no-debug-state"
@@ -445,53 +619,100 @@ def create_and_get_archive_from_remote_node(remote_node: Node,
     ]
     if parameters.processes:
         collect_cmd += ["--processes-verbose"] \
-            if parameters.processes_verbose else ["--no-proccesses-verbose"]
-
-    if parameters.runtimes and len(parameters.runtimes) > 0:
-        runtime_arg = ",".join(parameters.runtimes)
-        collect_cmd += ["--runtimes={}".format(quote(runtime_arg))]
-
+            if parameters.processes_verbose else ["--no-processes-verbose"]
+    if parameters.max_bytes is not None:
+        collect_cmd += ["--max-bytes={}".format(parameters.max_bytes)]
+    if parameters.tail_bytes is not None:
+        collect_cmd += ["--tail-bytes={}".format(parameters.tail_bytes)]
+    if parameters.incremental:
+        collect_cmd += ["--incremental"]
+    return collect_cmd
+
+
+def copy_archive_stream(archive: Archive, fileobj, arcname_prefix: str):
+    """Copy the members of a tar stream into the archive under the prefix.
+
+    The members are read one by one from the stream. The data of a member
+    is buffered in memory (or spooled to disk if large) before added so that
+    the archive is not locked while reading from a slow stream.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|*") as source:
+        for member in source:
+            member.name = posixpath.join(arcname_prefix, member.name)
+            if member.islnk():
+                member.linkname = posixpath.join(arcname_prefix, member.linkname)
+            if not member.isreg():
+                archive.add_stream(member)
+                continue
+            with tempfile.SpooledTemporaryFile(
+                    max_size=STREAM_SPOOL_MAX_BYTES) as spool:
+                shutil.copyfileobj(source.extractfile(member), spool)
+                spool.seek(0)
+                archive.add_stream(member, spool)
+
+
+def stream_remote_data_to_local_archive(archive: Archive,
+                                        remote_node: Node,
+                                        collect_cmd: List[str],
+                                        arcname_prefix: str):
+    """Run the collect command on a remote node and stream the result.
+
+    The collect command streams a tar archive to stdout. The members are
+    added to the archive under the prefix as they come through the SSH
+    channel without staging the archive of the node on local disk.
+    """
     # Specify --login and -i here to source bashrc and avoid command not found issue
+    cmd = _get_ssh_command(remote_node)
     cmd += ["/bin/bash", "--login", "-c", "-i", _wrap(collect_cmd, quotes="\"")]
     cmd += ["2>/dev/null"]
 
-    cat = "node" if not remote_node.is_head else "head"
-
-    cli_logger.verbose(f"Collecting data from remote node: {remote_node.host}")
-    tmp = tempfile.mktemp(
-        prefix=f"cloudtik_{cat}_{remote_node.host}_", suffix=".tar.gz")
-    with open(tmp, "wb") as fp:
-        try:
-            subprocess.check_call(cmd, stdout=fp, stderr=sys.stderr)
-        except subprocess.CalledProcessError as exc:
-            raise RemoteCommandFailed(
-                f"Gathering logs from remote node failed: {' '.join(cmd)}"
-            ) from exc
-
-    return tmp
+    cli_logger.verbose("Running `{}`", " ".join(collect_cmd))
+    cli_logger.verbose("Full command is `{}`", " ".join(cmd))
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=sys.stderr)
+    try:
+        copy_archive_stream(archive, process.stdout, arcname_prefix)
+    except tarfile.TarError as exc:
+        process.kill()
+        raise RemoteCommandFailed(
+            f"Gathering data from {remote_node.host} failed: {exc}") from exc
+    finally:
+        process.stdout.close()
+    if process.wait() != 0:
+        raise RemoteCommandFailed(
+            f"Gathering data from {remote_node.host} failed: {' '.join(cmd)}")
 
 
 def create_and_add_remote_data_to_local_archive(
-        archive: Archive, remote_node: Node, parameters: GetParameters):
+        archive: Archive, remote_node: Node, parameters: GetParameters,
+        script_path: str = "cloudtik"):
     """Create and get data from remote node and add to local archive.
 
+    This will call ``cloudtik local-dump --stream`` on the remote
+    node and add the data under the directory of the node.
+
     Args:
         archive (Archive): Archive object to add remote data to.
         remote_node (Node): Remote node to gather archive from.
         parameters (GetParameters): Parameters (settings) for getting data.
+        script_path (str): Path to this script on the remote node.
 
     Returns:
         Open archive object.
     """
-    tmp = create_and_get_archive_from_remote_node(remote_node, parameters)
+    collect_cmd = [script_path, "local-dump"] + _get_collect_options(parameters)
+    if parameters.runtimes and len(parameters.runtimes) > 0:
+        runtime_arg = ",".join(parameters.runtimes)
+        collect_cmd += ["--runtimes={}".format(quote(runtime_arg))]
 
     if not archive.is_open:
         archive.open()
 
     cat = "node" if not remote_node.is_head else "head"
 
-    with archive.subdir("", root=os.path.dirname(tmp)) as sd:
-        sd.add(tmp, arcname=f"cloudtik_{cat}_{remote_node.host}.tar.gz")
+    cli_logger.verbose(f"Collecting data from remote node: {remote_node.host}")
+    stream_remote_data_to_local_archive(
+        archive, remote_node, collect_cmd,
+        arcname_prefix=f"cloudtik_{cat}_{remote_node.host}")
 
     return archive
 
@@ -507,15 +728,15 @@ def create_and_add_local_data_to_local_archive(archive: Archive,
     Returns:
         Open archive object.
     """
-    with Archive() as local_data_archive:
+    with Archive(compress=False,
+                 max_bytes=parameters.max_bytes) as local_data_archive:
         get_all_local_data(local_data_archive, parameters)
 
     if not archive.is_open:
         archive.open()
 
-    with archive.subdir(
-            "", root=os.path.dirname(local_data_archive.file)) as sd:
-        sd.add(local_data_archive.file, arcname="local_node.tar.gz")
+    with open(local_data_archive.file, "rb") as fp:
+        copy_archive_stream(archive, fp, arcname_prefix="local_node")
 
     os.remove(local_data_archive.file)
 
@@ -525,7 +746,8 @@ def create_and_add_local_data_to_local_archive(archive: Archive,
 def create_archive_for_remote_nodes(config: Dict[str, Any],
                                     archive: Archive,
                                     remote_nodes: Sequence[Node],
-                                    parameters: GetParameters):
+                                    parameters: GetParameters,
+                                    max_parallel: int = MAX_PARALLEL_SSH_WORKERS):
     """Create an archive combining data from the remote nodes.
 
     This will parallelize calls to get data from remote nodes.
@@ -535,6 +757,7 @@ def create_archive_for_remote_nodes(config: Dict[str, Any],
         archive (Archive): Archive object to add remote data to.
         remote_nodes (Sequence[Node]): Sequence of remote nodes.
         parameters (GetParameters): Parameters (settings) for getting data.
+        max_parallel (int): The max number of nodes to collect in parallel.
 
     Returns:
         Open archive object.
@@ -543,17 +766,25 @@ def create_archive_for_remote_nodes(config: Dict[str, Any],
     if not archive.is_open:
         archive.open()
 
-    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_SSH_WORKERS) as executor:
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        futures = {}
         for remote_node in remote_nodes:
             # get node type specific runtimes
             node_parameters = copy.deepcopy(parameters)
             node_runtimes = _get_node_specific_runtime_types(config, remote_node.node_id)
             node_parameters.set_runtimes(node_runtimes)
-            executor.submit(
+            future = executor.submit(
                 create_and_add_remote_data_to_local_archive,
                 archive=archive,
                 remote_node=remote_node,
                 parameters=node_parameters)
+            futures[future] = remote_node
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except CommandFailed as exc:
+                cli_logger.error(exc)
 
     return archive
 
@@ -592,98 +823,38 @@ def create_archive_for_local_and_remote_nodes(config: Dict[str, Any],
     return archive
 
 
-def create_and_get_archive_from_head_node(head_node: Node,
-                                          parameters: GetParameters,
-                                          script_path: str = "cloudtik"
-                                          ) -> Optional[str]:
-    """Create an archive containing logs on a remote node and transfer.
-
-    This will call ``cloudtik local-dump --stream`` on the remote
-    node. The resulting file will be saved locally in a temporary file and
-    returned.
-
-    Args:
-        head_node (Node): Remote node to gather archive from.
-        script_path (str): Path to this script on the remote node.
-        parameters (GetParameters): Parameters (settings) for getting data.
-
-    Returns:
-        Path to a temporary file containing the node's collected data.
-
-    """
-    cmd = [
-        "ssh",
-        "-o StrictHostKeyChecking=no",
-        "-o UserKnownHostsFile=/dev/null",
-        "-o LogLevel=ERROR",
-        "-i",
-        head_node.ssh_key,
-        f"{head_node.ssh_user}@{head_node.host}",
-    ]
-
-    if head_node.docker_container:
-        cmd += [
-            "docker",
-            "exec",
-            head_node.docker_container,
-        ]
-
-    collect_cmd = [script_path, "head", "cluster-dump", "--verbosity=0", "--stream"]
-    collect_cmd += ["--logs"] if parameters.logs else ["--no-logs"]
-    collect_cmd += ["--debug-state"] if parameters.debug_state else [
-        "--no-debug-state"
-    ]
-    collect_cmd += ["--pip"] if parameters.pip else ["--no-pip"]
-    collect_cmd += ["--processes"] if parameters.processes else [
-        "--no-processes"
-    ]
-    if parameters.processes:
-        collect_cmd += ["--processes-verbose"] \
-            if parameters.processes_verbose else ["--no-proccesses-verbose"]
-
-    # Specify --login and -i here to source bashrc and avoid command not found issue
-    cmd += ["/bin/bash", "--login", "-c", "-i", _wrap(collect_cmd, quotes="\"")]
-    cmd += ["2>/dev/null"]
-
-    cat = "cluster"
-
-    cli_logger.print(f"Collecting cluster data from head node: {head_node.host}")
-    tmp = tempfile.mktemp(
-        prefix=f"cloudtik_{cat}_{head_node.host}_", suffix=".tar.gz")
-    with open(tmp, "wb") as fp:
-        try:
-            cli_logger.verbose("Running `{}`", " ".join(collect_cmd))
-            cli_logger.verbose("Full command is `{}`", " ".join(cmd))
-            subprocess.check_call(cmd, stdout=fp, stderr=sys.stderr)
-        except subprocess.CalledProcessError as exc:
-            raise RemoteCommandFailed(
-                f"Gathering logs from head node failed: {' '.join(cmd)}"
-            ) from exc
-
-    return tmp
-
-
 def create_and_add_workers_data_to_local_archive(
-        archive: Archive, head_node: Node, parameters: GetParameters):
-    """Create and get data from remote node and add to local archive.
+        archive: Archive, head_node: Node, parameters: GetParameters,
+        script_path: str = "cloudtik",
+        max_parallel: Optional[int] = None):
+    """Create and get data of workers through head and add to local archive.
+
+    This will call ``cloudtik head cluster-dump --stream`` on the head
+    node which collects the data of the workers in parallel.
 
     Args:
         archive (Archive): Archive object to add remote data to.
         head_node (Node): Remote node to gather archive from.
         parameters (GetParameters): Parameters (settings) for getting data.
+        script_path (str): Path to this script on the head node.
+        max_parallel (int): The max number of workers to collect in parallel.
 
     Returns:
         Open archive object.
     """
-    tmp = create_and_get_archive_from_head_node(head_node, parameters)
+    collect_cmd = [script_path, "head", "cluster-dump"] + _get_collect_options(parameters)
+    if max_parallel:
+        collect_cmd += ["--parallel={}".format(max_parallel)]
 
     if not archive.is_open:
         archive.open()
 
     cat = "workers"
 
-    with archive.subdir("", root=os.path.dirname(tmp)) as sd:
-        sd.add(tmp, arcname=f"cloudtik_{cat}.tar.gz")
+    cli_logger.print(f"Collecting cluster data from head node: {head_node.host}")
+    stream_remote_data_to_local_archive(
+        archive, head_node, collect_cmd,
+        arcname_prefix=f"cloudtik_{cat}")
 
     return archive
 
@@ -691,15 +862,19 @@ def create_and_add_workers_data_to_local_archive(
 def create_archive_for_cluster_nodes(archive: Archive,
                                      head_node: Node,
                                      parameters: GetParameters,
-                                     head_only: bool = False):
+                                     head_only: bool = False,
+                                     max_parallel: Optional[int] = None):
     """Create an archive combining data from the remote nodes.
 
-    This will parallelize calls to get data from remote nodes.
+    The data of the head and the data of workers (collected in parallel by
+    the head) are streamed in parallel.
 
     Args:
         archive (Archive): Archive object to add remote data to.
         head_node (Node): The head node.
         parameters (GetParameters): Parameters (settings) for getting data.
+        head_only (bool): Collect the data of head node only.
+        max_parallel (int): The max number of workers to collect in parallel.
 
     Returns:
         Open archive object.
@@ -708,14 +883,23 @@ def create_archive_for_cluster_nodes(archive: Archive,
     if not archive.is_open:
         archive.open()
 
-    # head node dump
-    create_and_add_remote_data_to_local_archive(
-        archive, head_node, parameters)
-
-    if not head_only:
-        # workers dump
-        create_and_add_workers_data_to_local_archive(
-            archive, head_node, parameters)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # head node dump
+        futures = [executor.submit(
+            create_and_add_remote_data_to_local_archive,
+            archive, head_node, parameters)]
+
+        if not head_only:
+            # workers dump
+            futures.append(executor.submit(
+                create_and_add_workers_data_to_local_archive,
+                archive, head_node, parameters, max_parallel=max_parallel))
+
+        for future in futures:
+            try:
+                future.result()
+            except CommandFailed as exc:
+                cli_logger.error(exc)
 
     return archive
 
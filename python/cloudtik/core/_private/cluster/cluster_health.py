@@ -0,0 +1,222 @@
+"""Health check of the core services and the node processes of a cluster.
+
+The node states reported by the node monitors are read with a pipelined scan
+of the node table and decoded with a safe decoder. The health of all the nodes
+is computed in a single pass with the expected processes resolved once for
+each node type. The result is a plain dict which can be output as JSON and
+cached in Redis for a short time so that frequent probes stay cheap.
+"""
+import ast
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import psutil
+
+from cloudtik.core._private import constants
+from cloudtik.core._private.cluster.node_inventory import NodeInventory
+from cloudtik.core._private.constants import CLOUDTIK_RUNTIME_NAME
+from cloudtik.core._private.runtime_factory import _get_runtime_cls
+from cloudtik.core._private.utils import is_alive_time, NODE_INFO_NODE_IP, \
+    HeadNotRunningError, RUNTIME_TYPES_CONFIG_KEY, _get_node_type_specific_runtime_config
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD, \
+    CLOUDTIK_TAG_USER_NODE_TYPE, STATUS_UP_TO_DATE
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_RESULT_KEY = "cloudtik:health_check:result"
+
+HEALTHY_PROCESS_STATUSES = {
+    psutil.STATUS_RUNNING,
+    psutil.STATUS_SLEEPING,
+    psutil.STATUS_IDLE,
+    psutil.STATUS_WAKING,
+}
+
+
+def decode_node_state(raw_node_state) -> Optional[Dict[str, Any]]:
+    """Decode a node state reported by the node monitor.
+
+    The node states are written as JSON. The Python literal form written by
+    the old versions is decoded without evaluating any code.
+    """
+    if isinstance(raw_node_state, bytes):
+        raw_node_state = raw_node_state.decode("utf-8")
+    try:
+        node_state = json.loads(raw_node_state)
+    except ValueError:
+        try:
+            node_state = ast.literal_eval(raw_node_state)
+        except (ValueError, SyntaxError):
+            logger.warning("Failed to decode the node state: {}".format(
+                raw_node_state[:64]))
+            return None
+    if not isinstance(node_state, dict) or "node_ip" not in node_state:
+        return None
+    return node_state
+
+
+def index_node_states(raw_node_states: Iterable) -> Dict[str, Dict[str, Any]]:
+    """Index the live node states by the node IP."""
+    node_states = {}
+    for raw_node_state in raw_node_states:
+        node_state = decode_node_state(raw_node_state)
+        if node_state is None or not is_alive_time(
+                node_state.get("last_heartbeat_time", 0)):
+            continue
+        node_states[node_state["node_ip"]] = node_state
+    return node_states
+
+
+def get_live_node_states(node_table) -> Dict[str, Dict[str, Any]]:
+    """Read the live node states with a pipelined scan of the node table."""
+    return index_node_states(
+        raw_node_state for _, raw_node_state in node_table.iter_all())
+
+
+def is_process_status_healthy(process_status):
+    return process_status in HEALTHY_PROCESS_STATUSES
+
+
+def _get_node_kind_processes(processes, node_kind):
+    # process meta: (keyword, filter by cmdline, name, node kind)
+    return [process_meta[2] for process_meta in processes
+            if process_meta[3] == node_kind or process_meta[3] == "node"]
+
+
+class _ExpectedProcesses:
+    """The expected processes of nodes resolved once for each node type."""
+
+    def __init__(self, config):
+        self.config = config
+        self._processes = {}
+
+    def get(self, node_kind, node_type):
+        key = (node_kind, node_type)
+        processes = self._processes.get(key)
+        if processes is None:
+            processes = self._resolve(node_kind, node_type)
+            self._processes[key] = processes
+        return processes
+
+    def _resolve(self, node_kind, node_type):
+        processes = [
+            (process_name, CLOUDTIK_RUNTIME_NAME) for process_name in
+            _get_node_kind_processes(constants.CLOUDTIK_PROCESSES, node_kind)]
+        runtime_config = _get_node_type_specific_runtime_config(
+            self.config, node_type) or {}
+        for runtime_type in runtime_config.get(RUNTIME_TYPES_CONFIG_KEY, []):
+            runtime_processes = _get_runtime_cls(runtime_type).get_processes()
+            if not runtime_processes:
+                continue
+            processes += [
+                (process_name, runtime_type) for process_name in
+                _get_node_kind_processes(runtime_processes, node_kind)]
+        return processes
+
+
+def check_node_health(node_info, node_state, expected_processes,
+                      with_details=False) -> Dict[str, Any]:
+    node_kind = node_info[CLOUDTIK_TAG_NODE_KIND]
+    node_health = {
+        "node": node_info["node"],
+        "node_ip": node_info[NODE_INFO_NODE_IP],
+        "node_kind": node_kind,
+        "healthy": True,
+    }
+    if not node_state:
+        node_health["healthy"] = False
+        node_health["reason"] = "No states reported."
+        return node_health
+
+    process_info = node_state.get("process") or {}
+    processes = expected_processes.get(
+        node_kind, node_info.get(CLOUDTIK_TAG_USER_NODE_TYPE))
+    unhealthy_processes = [
+        process_name for process_name, _ in processes
+        if not is_process_status_healthy(process_info.get(process_name))]
+    if unhealthy_processes:
+        node_health["healthy"] = False
+        node_health["reason"] = "{} processes are not running.".format(
+            len(unhealthy_processes))
+        node_health["unhealthy_processes"] = unhealthy_processes
+    if with_details:
+        node_health["processes"] = [
+            {"name": process_name,
+             "status": process_info.get(process_name, "-"),
+             "runtime": runtime_type}
+            for process_name, runtime_type in processes]
+    return node_health
+
+
+def check_nodes_health(config: Dict[str, Any],
+                       node_inventory: NodeInventory,
+                       node_states: Dict[str, Dict[str, Any]],
+                       with_details: bool = False) -> Dict[str, Any]:
+    """Check the processes of the head and the up-to-date workers in one pass.
+
+    Returns:
+        The result with the number of nodes, the number of the healthy nodes
+        and the unhealthy nodes. All the nodes are included in "details" with
+        the status of each process if with_details is True.
+    """
+    result = {
+        "healthy": True,
+        "total": 0,
+        "healthy_nodes": 0,
+        "unhealthy_nodes": [],
+    }
+    try:
+        head_node = node_inventory.get_head_node(config["cluster_name"])
+    except HeadNotRunningError:
+        result["healthy"] = False
+        result["unhealthy_nodes"].append(
+            {"node": None, "node_kind": NODE_KIND_HEAD, "healthy": False,
+             "reason": "Head node is not running."})
+        return result
+
+    nodes = [head_node] + node_inventory.get_worker_nodes(STATUS_UP_TO_DATE)
+    expected_processes = _ExpectedProcesses(config)
+    details = []
+    for node in nodes:
+        node_info = node_inventory.get_node_info(node)
+        node_health = check_node_health(
+            node_info, node_states.get(node_info[NODE_INFO_NODE_IP]),
+            expected_processes, with_details)
+        result["total"] += 1
+        if node_health["healthy"]:
+            result["healthy_nodes"] += 1
+        else:
+            result["healthy"] = False
+            result["unhealthy_nodes"].append(node_health)
+        if with_details:
+            details.append(node_health)
+    if with_details:
+        result["details"] = details
+    return result
+
+
+def get_cached_health_check_result(redis_client) -> Optional[Dict[str, Any]]:
+    cached = redis_client.get(HEALTH_CHECK_RESULT_KEY)
+    if not cached:
+        return None
+    try:
+        return json.loads(cached)
+    except ValueError:
+        return None
+
+
+def cache_health_check_result(redis_client, result: Dict[str, Any], ttl):
+    if ttl <= 0:
+        return
+    redis_client.set(HEALTH_CHECK_RESULT_KEY, json.dumps(result),
+                     ex=max(1, int(ttl)))
+
+
+def new_health_check_result() -> Dict[str, Any]:
+    return {
+        "healthy": True,
+        "time": time.time(),
+        "errors": [],
+    }
@@ -2,19 +2,32 @@ import json
 import logging
 import time
 import traceback
-from typing import Optional, Dict
+from dataclasses import dataclass
+from typing import Any, Optional, Dict, Tuple
 
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
 from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
 from cloudtik.core._private.constants import CLOUDTIK_RESOURCE_REQUESTS
 from cloudtik.core._private.state.kv_store import kv_initialized, kv_get
-from cloudtik.core._private.state.scaling_state import ScalingStateClient
+from cloudtik.core._private.state.scaling_state import ScalingStateClient, ClusterHeartbeatState
+from cloudtik.core.scaling_policy import ScalingState
 
 logger = logging.getLogger(__name__)
 
 MAX_FAILURES_FOR_LOGGING = 16
 
 
+@dataclass(frozen=True)
+class ScalingStateSnapshot:
+    """The scaling state collected at a time to update the cluster metrics."""
+    time: float
+    # None if failed to collect
+    cluster_heartbeat_state: Optional[ClusterHeartbeatState]
+    scaling_state: Optional[ScalingState]
+    # (request time, requested resources) or None
+    resource_requests: Optional[Tuple[float, Any]]
+
+
 class ClusterMetricsUpdater:
     def __init__(self,
                  cluster_metrics: ClusterMetrics,
@@ -27,36 +40,63 @@ class ClusterMetricsUpdater:
         self.cluster_metrics_failures = 0
 
     def update(self):
-        self._update_cluster_metrics()
-        self._update_resource_requests()
-        self._update_event_summary()
+        self.apply(self.collect())
 
-    def _update_cluster_metrics(self):
+    def collect(self) -> ScalingStateSnapshot:
+        """Collect the scaling state from the control state (with I/O only)."""
+        collect_time = time.time()
+        cluster_heartbeat_state = None
+        scaling_state = None
         try:
-            heartbeat_nodes = {}
-            self._update_node_heartbeats(heartbeat_nodes)
-            self._update_scaling_metrics(heartbeat_nodes)
+            cluster_heartbeat_state = self.scaling_state_client.get_cluster_heartbeat_state(timeout=60)
+            scaling_state = self.scaling_state_client.get_scaling_state(timeout=60)
 
             # reset if there is a success
             self.cluster_metrics_failures = 0
         except Exception as e:
-            if self.cluster_metrics_failures == 0 or self.cluster_metrics_failures == MAX_FAILURES_FOR_LOGGING:
-                # detailed form
-                error = traceback.format_exc()
-                logger.exception(f"Load metrics update failed with the following error:\n{error}")
-            elif self.cluster_metrics_failures < MAX_FAILURES_FOR_LOGGING:
-                # short form
-                logger.exception(f"Load metrics update failed with the following error:{str(e)}")
+            self._log_failure(e)
+            cluster_heartbeat_state = None
+        return ScalingStateSnapshot(
+            time=collect_time,
+            cluster_heartbeat_state=cluster_heartbeat_state,
+            scaling_state=scaling_state,
+            resource_requests=self._get_resource_requests())
+
+    def apply(self, snapshot: ScalingStateSnapshot):
+        """Update the cluster metrics with the snapshot (in memory only)."""
+        if snapshot.cluster_heartbeat_state is not None:
+            try:
+                heartbeat_nodes = {}
+                self._update_node_heartbeats(
+                    heartbeat_nodes, snapshot.cluster_heartbeat_state)
+                self._update_scaling_metrics(
+                    heartbeat_nodes, snapshot.scaling_state, snapshot.time)
+            except Exception as e:
+                self._log_failure(e)
+        if snapshot.resource_requests is not None:
+            request_time, request_resources = snapshot.resource_requests
+            self.cluster_metrics.set_resource_requests(
+                request_time, request_resources)
+        self._update_event_summary()
+
+    def _log_failure(self, e):
+        if self.cluster_metrics_failures == 0 or self.cluster_metrics_failures == MAX_FAILURES_FOR_LOGGING:
+            # detailed form
+            error = traceback.format_exc()
+            logger.exception(f"Load metrics update failed with the following error:\n{error}")
+        elif self.cluster_metrics_failures < MAX_FAILURES_FOR_LOGGING:
+            # short form
+            logger.exception(f"Load metrics update failed with the following error:{str(e)}")
 
-            if self.cluster_metrics_failures == MAX_FAILURES_FOR_LOGGING:
-                logger.exception(f"The above error has been showed consecutively"
-                                 f" for {self.cluster_metrics_failures} times. Stop showing.")
+        if self.cluster_metrics_failures == MAX_FAILURES_FOR_LOGGING:
+            logger.exception(f"The above error has been showed consecutively"
+                             f" for {self.cluster_metrics_failures} times. Stop showing.")
 
-            self.cluster_metrics_failures += 1
+        self.cluster_metrics_failures += 1
 
     def _update_node_heartbeats(
-            self, heartbeat_nodes: Dict[str, str]):
-        cluster_heartbeat_state = self.scaling_state_client.get_cluster_heartbeat_state(timeout=60)
+            self, heartbeat_nodes: Dict[str, str],
+            cluster_heartbeat_state: ClusterHeartbeatState):
         for node_id, node_heartbeat_state in cluster_heartbeat_state.node_heartbeat_states.items():
             ip = node_heartbeat_state.node_ip
             last_heartbeat_time = node_heartbeat_state.last_heartbeat_time
@@ -64,9 +104,9 @@ class ClusterMetricsUpdater:
             self.cluster_metrics.update_heartbeat(ip, node_id, last_heartbeat_time)
 
     def _update_scaling_metrics(
-            self, heartbeat_nodes: Dict[str, str]):
-        """Fetches resource usage data from control state and updates load metrics."""
-        scaling_state = self.scaling_state_client.get_scaling_state(timeout=60)
+            self, heartbeat_nodes: Dict[str, str],
+            scaling_state: ScalingState, collect_time: float):
+        """Updates load metrics with the resource usage data from control state."""
         self.cluster_metrics.update_autoscaling_instructions(
             scaling_state.autoscaling_instructions)
 
@@ -92,7 +132,7 @@ class ClusterMetricsUpdater:
 
         # All the nodes that shows in heartbeat but not in reported with node resources
         # We consider it is idle
-        resource_time = time.time()
+        resource_time = collect_time
         for node_id, ip in heartbeat_nodes.items():
             if node_id in node_resource_states:
                 continue
@@ -103,20 +143,20 @@ class ClusterMetricsUpdater:
                 ip, node_id, resource_time,
                 total_resources, available_resources, resource_load)
 
-    def _update_resource_requests(self):
-        """Fetches resource requests from the internal KV and updates load."""
+    @staticmethod
+    def _get_resource_requests():
+        """Fetches resource requests from the internal KV."""
         if not kv_initialized():
-            return
+            return None
         data = kv_get(CLOUDTIK_RESOURCE_REQUESTS)
         if data:
             try:
                 resource_requests = json.loads(data)
                 request_resources = resource_requests.get("requests")
-                self.cluster_metrics.set_resource_requests(
-                    resource_requests["request_time"],
-                    request_resources)
+                return resource_requests["request_time"], request_resources
             except Exception:
                 logger.exception("Error parsing resource requests")
+        return None
 
     def _update_event_summary(self):
         """Report the current size of the cluster.
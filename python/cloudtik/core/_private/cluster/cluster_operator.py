@@ -1,4 +1,5 @@
 import copy
+import hashlib
 import math
 import sys
 import urllib
@@ -8,6 +9,7 @@ import json
 import logging
 import os
 import random
+import shlex
 import shutil
 import subprocess
 import tempfile
@@ -17,7 +19,6 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import prettytable as pt
 from functools import partial
 import click
-import psutil
 import yaml
 
 from cloudtik.core import tags
@@ -26,11 +27,18 @@ from cloudtik.core._private.call_context import CallContext
 from cloudtik.core._private.cluster.cluster_config import _load_cluster_config, _bootstrap_config, try_logging_config
 from cloudtik.core._private.cluster.cluster_tunnel_request import request_tunnel_to_head
 from cloudtik.core._private.cluster.cluster_utils import create_node_updater_for_exec
+from cloudtik.core._private.cluster.cluster_health import get_live_node_states, check_nodes_health, \
+    new_health_check_result, get_cached_health_check_result, cache_health_check_result
+from cloudtik.core._private.cluster.node_inventory import NodeInventory
+from cloudtik.core._private.cluster.node_terminator import NodeTerminator, wait_for_nodes_terminated
 from cloudtik.core._private.core_utils import kill_process_tree, double_quote
+from cloudtik.core._private.job_waiter.job_event import with_job_exit_event, publish_job_exit, \
+    wait_for_job_exits_on_cluster
 from cloudtik.core._private.job_waiter.job_waiter_factory import create_job_waiter
 from cloudtik.core._private.runtime_factory import _get_runtime_cls
 from cloudtik.core._private.services import validate_redis_address
 from cloudtik.core._private.state import kv_store
+from cloudtik.core._private.state.job_queue import JobQueue, JOB_FILES_DIR, JOB_EXIT_CODE_CANCELLED
 from cloudtik.core.job_waiter import JobWaiter
 
 try:  # py3
@@ -45,7 +53,7 @@ from cloudtik.core._private.constants import \
     CLOUDTIK_RESOURCE_REQUESTS, \
     MAX_PARALLEL_SHUTDOWN_WORKERS, \
     CLOUDTIK_REDIS_DEFAULT_PASSWORD, CLOUDTIK_CLUSTER_STATUS_STOPPED, CLOUDTIK_CLUSTER_STATUS_RUNNING, \
-    CLOUDTIK_RUNTIME_NAME, CLOUDTIK_KV_NAMESPACE_HEALTHCHECK
+    CLOUDTIK_RUNTIME_NAME, CLOUDTIK_KV_NAMESPACE_HEALTHCHECK, RUN_ENV_TYPES
 from cloudtik.core._private.utils import hash_runtime_conf, \
     hash_launch_conf, get_free_port, \
     get_proxy_info_file, get_safe_proxy_process_info, \
@@ -59,7 +67,7 @@ from cloudtik.core._private.utils import hash_runtime_conf, \
     is_node_in_completed_status, check_for_single_worker_type, \
     get_node_specific_commands_of_runtimes, _get_node_specific_runtime_config, \
     RUNTIME_CONFIG_KEY, DOCKER_CONFIG_KEY, get_running_head_node, \
-    get_nodes_for_runtime, with_script_args, encrypt_config, get_resource_requests_for_cpu, convert_nodes_to_cpus, \
+    with_script_args, encrypt_config, get_resource_requests_for_cpu, convert_nodes_to_cpus, \
     HeadNotRunningError, get_cluster_head_ip, get_command_session_name, ParallelTaskSkipped, \
     CLOUDTIK_CLUSTER_SCALING_STATUS, decode_cluster_scaling_time, RUNTIME_TYPES_CONFIG_KEY, get_node_info, \
     NODE_INFO_NODE_IP, get_cpus_of_node_info, _sum_min_workers, get_memory_of_node_info
@@ -72,12 +80,15 @@ from cloudtik.core.tags import (
     CLOUDTIK_TAG_HEAD_NODE_NUMBER)
 from cloudtik.core._private.cli_logger import cli_logger, cf
 from cloudtik.core._private.node.node_updater import NodeUpdaterThread
+from cloudtik.core._private.node.node_agent import get_node_agent_client, NodeAgentConnectionError
+from cloudtik.core._private.subprocess_output_util import ProcessRunnerError
 from cloudtik.core._private.event_system import (CreateClusterEvent, global_event_system)
 from cloudtik.core._private.log_timer import LogTimer
+from cloudtik.core._private.tracing import format_trace_timeline
 from cloudtik.core._private.cluster.cluster_dump import Archive, \
     GetParameters, Node, _info_from_params, \
     create_archive_for_remote_nodes, get_all_local_data, \
-    create_archive_for_cluster_nodes
+    create_archive_for_cluster_nodes, MAX_PARALLEL_SSH_WORKERS
 from cloudtik.core._private.state.control_state import ControlState
 
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetricsSummary
@@ -86,7 +97,6 @@ from cloudtik.core._private.utils import format_info_string
 
 logger = logging.getLogger(__name__)
 
-RUN_ENV_TYPES = ["auto", "host", "docker"]
 
 POLL_INTERVAL = 5
 
@@ -125,6 +135,40 @@ def debug_status_string(status, error) -> str:
     return status
 
 
+def debug_timeline_string(timeline, limit: int = 10, node_ip: str = None) -> str:
+    """Return the bring-up timeline of the recent nodes with a phase summary."""
+    if not timeline:
+        return "No node timeline recorded."
+    traces = json.loads(timeline.decode("utf-8"))
+    if node_ip:
+        traces = [trace for trace in traces
+                  if trace["attributes"].get("node_ip") == node_ip]
+    traces = traces[-limit:] if limit else traces
+    if not traces:
+        return "No node timeline recorded."
+
+    lines = []
+    phase_times = {}
+    for trace in traces:
+        lines += format_trace_timeline(trace)
+        lines.append("")
+        for span in trace["spans"]:
+            if span["end_time"] is not None:
+                phase_times.setdefault(span["name"], []).append(
+                    span["end_time"] - span["start_time"])
+
+    tb = pt.PrettyTable()
+    tb.field_names = ["phase", "count", "mean (s)", "max (s)"]
+    tb.align = "l"
+    for phase, times in sorted(
+            phase_times.items(), key=lambda x: sum(x[1]), reverse=True):
+        tb.add_row([phase, len(times), "{:.1f}".format(sum(times) / len(times)),
+                    "{:.1f}".format(max(times))])
+    lines.append("Phase summary of {} traces:".format(len(traces)))
+    lines.append(tb.get_string())
+    return "\n".join(lines)
+
+
 def request_resources(num_cpus: Optional[int] = None,
                       bundles: Optional[List[dict]] = None,
                       config: Dict[str, Any] = None) -> None:
@@ -491,120 +535,156 @@ def teardown_cluster_nodes(config: Dict[str, Any],
 
         return head, head + workers
 
-    # Loop here to check that both the head and worker nodes are actually
-    #   really gone
     head, A = remaining_nodes()
 
-    current_step = 1
-    total_steps = 1
-
-    if not hard:
-        total_steps += 1
-        # first stop the services on the nodes
-        if on_head and len(head) > 0:
-            total_steps += 1
+    def nodes_not_terminated():
+        if keep_min_workers:
+            # Only the nodes selected at the beginning are to terminate
+            non_terminated_nodes = set(provider.non_terminated_nodes({}))
+            return [node for node in A if node in non_terminated_nodes]
+        workers = provider.non_terminated_nodes({
+            CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER
+        })
+        if workers_only:
+            return workers
+        return provider.non_terminated_nodes({
+            CLOUDTIK_TAG_NODE_KIND: NODE_KIND_HEAD
+        }) + workers
 
-            # Only do this for workers on head
-            head_node = head[0]
+    node_type = "workers" if workers_only else "nodes"
+    current_step = 1
+    total_steps = 2
 
-            # Step 1:
-            with _cli_logger.group(
-                    "Stopping services for worker nodes...",
-                    _numbered=("()", current_step, total_steps)):
-                current_step += 1
-                _do_stop_node_on_head(
+    # Step 1: stop the services and docker containers on each node and
+    # terminate the node right after, the nodes are terminated in batches
+    # in parallel while the others are still stopping.
+    step_str = "Terminating {}..." if hard else "Stopping and terminating {}..."
+    with _cli_logger.group(
+            step_str.format(node_type),
+            _numbered=("()", current_step, total_steps)):
+        current_step += 1
+        with NodeTerminator(provider) as terminator:
+            if hard:
+                for node_id in A:
+                    terminator.add(node_id)
+            else:
+                _stop_and_terminate_nodes(
                     config=config,
                     call_context=call_context,
                     provider=provider,
-                    head_node=head_node,
-                    node_head=None,
-                    node_workers=A,
-                    parallel=True
-                )
+                    terminator=terminator,
+                    workers_only=workers_only,
+                    on_head=on_head,
+                    head=head,
+                    nodes=A)
 
-        # Step 2: stop docker containers
-        with _cli_logger.group(
-                "Stopping docker container for nodes...",
-                _numbered=("()", current_step, total_steps)):
-            current_step += 1
-            _stop_docker_on_nodes(
-                config=config,
-                call_context=call_context,
-                provider=provider,
-                workers_only=workers_only,
-                on_head=on_head,
-                head=head,
-                nodes=A
-            )
-
-    # Step 3
-    node_type = "workers" if workers_only else "nodes"
+        _cli_logger.print(
+            "Requested {} {} to shut down in {} requests.",
+            cf.bold(len(A)), node_type, terminator.num_requests)
+
+    # Step 2: wait for the nodes terminated
     with _cli_logger.group(
-            "Terminating {}...".format(node_type),
+            "Waiting for {} to terminate...".format(node_type),
             _numbered=("()", current_step, total_steps)):
         current_step += 1
-        with LogTimer("teardown_cluster: done."):
-            while A:
-                provider.terminate_nodes(A)
 
-                _cli_logger.print(
-                    "Requested {} {} to shut down.",
-                    cf.bold(len(A)), node_type,
-                    _tags=dict(interval="1s"))
-
-                time.sleep(POLL_INTERVAL)  # todo: interval should be a variable
-                head, A = remaining_nodes()
-                _cli_logger.print("{} {} remaining after {} second(s).",
-                                 cf.bold(len(A)), node_type, POLL_INTERVAL)
+        def on_waiting(nodes, elapsed):
+            _cli_logger.print("{} {} remaining after {:.1f} second(s).",
+                              cf.bold(len(nodes)), node_type, elapsed)
+
+        with LogTimer("teardown_cluster: done."):
+            wait_for_nodes_terminated(
+                provider, nodes_not_terminated, on_waiting=on_waiting,
+                requested=terminator.requested)
             _cli_logger.print(cf.bold("No {} remaining."), node_type)
 
 
-def _stop_docker_on_nodes(
+def _stop_and_terminate_nodes(
         config: Dict[str, Any],
         call_context: CallContext,
         provider: NodeProvider,
+        terminator: NodeTerminator,
         workers_only: bool,
         on_head: bool,
         head: List[str],
         nodes: List[str]):
-    use_internal_ip = True if on_head else False
-    container_name = config.get(DOCKER_CONFIG_KEY, {}).get("container_name")
+    _cli_logger = call_context.cli_logger
+
+    # Only stop the services for workers on head
+    head_node = head[0] if on_head and len(head) > 0 else None
+    head_node_ip = provider.internal_ip(head_node) if head_node else None
+
+    docker_nodes = set()
+    if is_docker_enabled(config) and (on_head or not workers_only):
+        # Stop the docker containers of the workers on head
+        # or the docker container of head otherwise
+        docker_nodes = set(nodes) if on_head else set(head)
 
-    def run_docker_stop(node_id, call_context):
+    def stop_and_terminate_node(node_id, call_context):
         try:
-            updater = create_node_updater_for_exec(
-                config=config,
-                call_context=call_context,
-                node_id=node_id,
-                provider=provider,
-                start_commands=[],
-                is_head_node=False,
-                use_internal_ip=use_internal_ip)
-
-            _exec(
-                updater,
-                f"docker stop {container_name}",
-                with_output=False,
-                run_env="host")
-        except Exception:
-            raise RuntimeError(f"Docker stop failed on {node_id}") from None
+            if head_node:
+                try:
+                    _stop_services_of_node_on_head(
+                        config=config,
+                        call_context=call_context,
+                        provider=provider,
+                        head_node=head_node,
+                        head_node_ip=head_node_ip,
+                        node_id=node_id)
+                except ParallelTaskSkipped as e:
+                    call_context.cli_logger.verbose(str(e))
+            if node_id in docker_nodes:
+                _stop_docker_on_node(
+                    config=config,
+                    call_context=call_context,
+                    provider=provider,
+                    node_id=node_id,
+                    use_internal_ip=on_head)
+        finally:
+            terminator.add(node_id)
+
+    if not head_node and not docker_nodes:
+        for node_id in nodes:
+            terminator.add(node_id)
+        return
+
+    _cli_logger.print(
+        "Stopping {} on {} nodes...",
+        "services and docker containers" if head_node and docker_nodes else (
+            "services" if head_node else "docker containers"),
+        len(nodes) if head_node else len(docker_nodes))
+    # No retries: the node is terminated anyway once the stop is attempted
+    run_in_parallel_on_nodes(stop_and_terminate_node,
+                             call_context=call_context,
+                             nodes=nodes,
+                             max_workers=MAX_PARALLEL_SHUTDOWN_WORKERS,
+                             retries=0)
 
-    _cli_logger = call_context.cli_logger
-    docker_enabled = is_docker_enabled(config)
-    if docker_enabled and (on_head or not workers_only):
-        if on_head:
-            _cli_logger.print("Stopping docker containers on workers...")
-            container_nodes = nodes
-        else:
-            _cli_logger.print("Stopping docker container on head...")
-            container_nodes = head
-        # This is to ensure that the parallel SSH calls below do not mess with
-        # the users terminal.
-        run_in_parallel_on_nodes(run_docker_stop,
-                                 call_context=call_context,
-                                 nodes=container_nodes,
-                                 max_workers=MAX_PARALLEL_SHUTDOWN_WORKERS)
-        _cli_logger.print(cf.bold("Done stopping docker containers."))
+
+def _stop_docker_on_node(
+        config: Dict[str, Any],
+        call_context: CallContext,
+        provider: NodeProvider,
+        node_id: str,
+        use_internal_ip: bool):
+    container_name = config.get(DOCKER_CONFIG_KEY, {}).get("container_name")
+    try:
+        updater = create_node_updater_for_exec(
+            config=config,
+            call_context=call_context,
+            node_id=node_id,
+            provider=provider,
+            start_commands=[],
+            is_head_node=False,
+            use_internal_ip=use_internal_ip)
+
+        _exec(
+            updater,
+            f"docker stop {container_name}",
+            with_output=False,
+            run_env="host")
+    except Exception:
+        raise RuntimeError(f"Docker stop failed on {node_id}") from None
 
 
 def kill_node_from_head(config_file: str, yes: bool, hard: bool,
@@ -1204,17 +1284,18 @@ def _exec(updater: NodeUpdaterThread,
           session_name: str = None,
           hold_session: bool = True) -> str:
     if cmd:
+        if (screen or tmux) and not session_name:
+            session_name = get_command_session_name(cmd, time.time_ns())
+        if (screen or tmux) and not hold_session:
+            # Publish the exit event for the job waiters
+            cmd = with_job_exit_event(cmd, session_name)
         if screen:
-            if not session_name:
-                session_name = get_command_session_name(cmd, time.time_ns())
             wrapped_cmd = [
                 "screen", "-S", session_name, "-L", "-dm", "bash", "-c",
                 quote(cmd + "; exec bash") if hold_session else quote(cmd)
             ]
             cmd = " ".join(wrapped_cmd)
         elif tmux:
-            if not session_name:
-                session_name = get_command_session_name(cmd, time.time_ns())
             wrapped_cmd = [
                 "tmux", "new", "-s", session_name, "-d", "bash", "-c",
                 quote(cmd + "; exec bash") if hold_session else quote(cmd)
@@ -1384,7 +1465,7 @@ def rsync_node_on_head(config: Dict[str, Any],
                 is_file_mount = True
                 break
 
-    def rsync_to_node(node_id, source, target):
+    def rsync_to_node(node_id, call_context):
         updater = create_node_updater_for_exec(
             config=config,
             call_context=call_context,
@@ -1402,16 +1483,16 @@ def rsync_node_on_head(config: Dict[str, Any],
         if source and target:
             if down:
                 # rsync down, expand user for target (on head) if it is not handled
-                target = os.path.expanduser(target)
+                rsync_source, rsync_target = source, os.path.expanduser(target)
             else:
                 # rsync up, expand user for source (on head) if it is not handled
-                source = os.path.expanduser(source)
+                rsync_source, rsync_target = os.path.expanduser(source), target
 
             # print rsync progress for single file rsync
-            if cli_logger.verbosity > 0:
+            if cli_logger.verbosity > 0 and len(nodes) == 1:
                 call_context.set_output_redirected(False)
                 call_context.set_rsync_silent(False)
-            rsync(source, target, is_file_mount)
+            rsync(rsync_source, rsync_target, is_file_mount)
         else:
             updater.sync_file_mounts(rsync)
 
@@ -1423,19 +1504,29 @@ def rsync_node_on_head(config: Dict[str, Any],
         if all_workers:
             nodes.extend(_get_worker_nodes(config))
 
-    for node_id in nodes:
-        rsync_to_node(node_id, source, target)
+    if len(nodes) > 1:
+        # rsync is safe to retry for any errors
+        cli_logger.print("Syncing with {} nodes in parallel...", len(nodes))
+        run_in_parallel_on_nodes(rsync_to_node,
+                                 call_context=call_context,
+                                 nodes=nodes,
+                                 retry_on=None)
+    else:
+        for node_id in nodes:
+            rsync_to_node(node_id=node_id, call_context=call_context)
 
 
 def get_worker_cpus(config, provider):
-    workers = _get_worker_nodes(config)
-    workers_info = get_nodes_info(provider, workers, True, config["available_node_types"])
+    node_inventory = NodeInventory(provider)
+    workers_info = node_inventory.get_nodes_info(
+        node_inventory.get_worker_nodes(), True, config["available_node_types"])
     return sum_worker_cpus(workers_info)
 
 
 def get_worker_memory(config, provider):
-    workers = _get_worker_nodes(config)
-    workers_info = get_nodes_info(provider, workers, True, config["available_node_types"])
+    node_inventory = NodeInventory(provider)
+    workers_info = node_inventory.get_nodes_info(
+        node_inventory.get_worker_nodes(), True, config["available_node_types"])
     return sum_worker_memory(workers_info)
 
 
@@ -1500,24 +1591,18 @@ def _get_head_node_ip(config: Dict[str, Any], public: bool = False) -> str:
 
 def _get_worker_node_ips(
         config: Dict[str, Any], runtime: str = None,
-        node_status: str = None) -> List[str]:
-    provider = _get_node_provider(config["provider"], config["cluster_name"])
-    nodes = provider.non_terminated_nodes({
-        CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER
-    })
+        node_status: str = None,
+        node_inventory: Optional[NodeInventory] = None) -> List[str]:
+    if node_inventory is None:
+        provider = _get_node_provider(config["provider"], config["cluster_name"])
+        node_inventory = NodeInventory(provider)
+    nodes = node_inventory.get_worker_nodes(node_status)
 
     if runtime is not None:
         # Filter the nodes for the specific runtime only
-        nodes = get_nodes_for_runtime(config, nodes, runtime)
-
-    if node_status:
-        nodes = _get_nodes_in_status(provider, nodes, node_status)
-
-    return [get_node_cluster_ip(provider, node) for node in nodes]
+        nodes = node_inventory.get_nodes_for_runtime(config, nodes, runtime)
 
-
-def _get_nodes_in_status(provider, nodes: List[str], node_status: str) -> List[str]:
-    return [node for node in nodes if is_node_in_status(provider, node, node_status)]
+    return [node_inventory.get_node_cluster_ip(node) for node in nodes]
 
 
 def is_node_in_status(provider, node: str, node_status: str):
@@ -1622,7 +1707,12 @@ def get_local_dump_archive(stream: bool = False,
                            processes: bool = True,
                            processes_verbose: bool = False,
                            tempfile: Optional[str] = None,
-                           runtimes: str = None) -> Optional[str]:
+                           runtimes: str = None,
+                           max_bytes: Optional[int] = None,
+                           tail_bytes: Optional[int] = None,
+                           incremental: bool = False,
+                           compress: bool = True,
+                           compress_threads: Optional[int] = None) -> Optional[str]:
     if stream and output:
         raise ValueError(
             "You can only use either `--output` or `--stream`, but not both.")
@@ -1633,19 +1723,26 @@ def get_local_dump_archive(stream: bool = False,
         pip=pip,
         processes=processes,
         processes_verbose=processes_verbose,
-        runtimes=runtime_list)
+        runtimes=runtime_list,
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental)
 
-    with Archive(file=tempfile) as archive:
+    if stream:
+        # Stream the archive to stdout as it is created
+        with Archive(fileobj=sys.stdout.buffer, compress=compress,
+                     compress_threads=compress_threads,
+                     max_bytes=max_bytes) as archive:
+            get_all_local_data(archive, parameters)
+        return None
+
+    with Archive(file=tempfile, compress=compress,
+                 compress_threads=compress_threads,
+                 max_bytes=max_bytes) as archive:
         get_all_local_data(archive, parameters)
 
     tmp = archive.file
 
-    if stream:
-        with open(tmp, "rb") as fp:
-            os.write(1, fp.read())
-        os.remove(tmp)
-        return None
-
     target = output or os.path.join(os.getcwd(), os.path.basename(tmp))
     shutil.move(tmp, target)
     cli_logger.print(f"Created local data archive at {target}")
@@ -1662,7 +1759,13 @@ def get_cluster_dump_archive_on_head(
                              pip: bool = True,
                              processes: bool = True,
                              processes_verbose: bool = False,
-                             tempfile: Optional[str] = None) -> Optional[str]:
+                             tempfile: Optional[str] = None,
+                             max_bytes: Optional[int] = None,
+                             tail_bytes: Optional[int] = None,
+                             incremental: bool = False,
+                             compress: bool = True,
+                             compress_threads: Optional[int] = None,
+                             parallel: Optional[int] = None) -> Optional[str]:
     if stream and output:
         raise ValueError(
             "You can only use either `--output` or `--stream`, but not both.")
@@ -1693,20 +1796,29 @@ def get_cluster_dump_archive_on_head(
         pip=pip,
         processes=processes,
         processes_verbose=processes_verbose,
-        runtimes=get_enabled_runtimes(config))
+        runtimes=get_enabled_runtimes(config),
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental)
+    max_parallel = parallel if parallel else MAX_PARALLEL_SSH_WORKERS
+
+    if stream:
+        # Stream the archive to stdout as the data of nodes comes
+        with Archive(fileobj=sys.stdout.buffer, compress=compress,
+                     compress_threads=compress_threads) as archive:
+            create_archive_for_remote_nodes(
+                config, archive, remote_nodes=nodes, parameters=parameters,
+                max_parallel=max_parallel)
+        return None
 
-    with Archive(file=tempfile) as archive:
+    with Archive(file=tempfile, compress=compress,
+                 compress_threads=compress_threads) as archive:
         create_archive_for_remote_nodes(
-            config, archive, remote_nodes=nodes, parameters=parameters)
+            config, archive, remote_nodes=nodes, parameters=parameters,
+            max_parallel=max_parallel)
 
     tmp = archive.file
 
-    if stream:
-        with open(tmp, "rb") as fp:
-            os.write(1, fp.read())
-        os.remove(tmp)
-        return None
-
     target = output or os.path.join(os.getcwd(), os.path.basename(tmp))
     shutil.move(tmp, target)
     cli_logger.print(f"Created local data archive at {target}")
@@ -1727,7 +1839,12 @@ def get_cluster_dump_archive(config_file: Optional[str] = None,
                              pip: bool = True,
                              processes: bool = True,
                              processes_verbose: bool = False,
-                             tempfile: Optional[str] = None) -> Optional[str]:
+                             tempfile: Optional[str] = None,
+                             max_bytes: Optional[int] = None,
+                             tail_bytes: Optional[int] = None,
+                             incremental: bool = False,
+                             compress_threads: Optional[int] = None,
+                             parallel: Optional[int] = None) -> Optional[str]:
     # Inform the user what kind of logs are collected (before actually
     # collecting, so they can abort)
     content_str = ""
@@ -1785,11 +1902,15 @@ def get_cluster_dump_archive(config_file: Optional[str] = None,
         pip=pip,
         processes=processes,
         processes_verbose=processes_verbose,
-        runtimes=get_enabled_runtimes(config))
+        runtimes=get_enabled_runtimes(config),
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental)
 
-    with Archive(file=tempfile) as archive:
+    with Archive(file=tempfile, compress_threads=compress_threads) as archive:
         create_archive_for_cluster_nodes(
-            archive, head_node=head_node, parameters=parameters, head_only=head_only)
+            archive, head_node=head_node, parameters=parameters, head_only=head_only,
+            max_parallel=parallel)
 
     if not output:
         if cluster_name:
@@ -2038,15 +2159,19 @@ def _get_nodes_info_in_status(node_info_list, status):
     return [node_info for node_info in node_info_list if status == node_info.get(CLOUDTIK_TAG_NODE_STATUS)]
 
 
-def _get_cluster_nodes_info(config: Dict[str, Any]):
-    provider = _get_node_provider(config["provider"], config["cluster_name"])
-    nodes = provider.non_terminated_nodes({})
-    return _get_sorted_nodes_info(provider, nodes)
+def _get_cluster_nodes_info(config: Dict[str, Any],
+                            node_inventory: Optional[NodeInventory] = None):
+    if node_inventory is None:
+        provider = _get_node_provider(config["provider"], config["cluster_name"])
+        node_inventory = NodeInventory(provider)
+    return _sort_nodes_info(node_inventory.get_nodes_info(node_inventory.nodes))
 
 
 def _get_sorted_nodes_info(provider, nodes):
-    nodes_info = get_nodes_info(provider, nodes)
+    return _sort_nodes_info(get_nodes_info(provider, nodes))
 
+
+def _sort_nodes_info(nodes_info):
     # sort nodes info based on node type and then node ip for workers
     def node_info_sort(node_info):
         node_ip = node_info[NODE_INFO_NODE_IP]
@@ -2061,9 +2186,12 @@ def _get_sorted_nodes_info(provider, nodes):
 
 def _get_cluster_info(config: Dict[str, Any],
                       provider: NodeProvider = None,
-                      simple_config: bool = False) -> Dict[str, Any]:
+                      simple_config: bool = False,
+                      node_inventory: Optional[NodeInventory] = None) -> Dict[str, Any]:
     if provider is None:
         provider = _get_node_provider(config["provider"], config["cluster_name"])
+    if node_inventory is None:
+        node_inventory = NodeInventory(provider)
 
     cluster_info = {
         "name": config["cluster_name"]
@@ -2074,7 +2202,7 @@ def _get_cluster_info(config: Dict[str, Any],
 
     # Check whether the head node is running
     try:
-        head_node = _get_running_head_node(config)
+        head_node = node_inventory.get_head_node(config["cluster_name"])
     except HeadNotRunningError:
         head_node = None
 
@@ -2085,18 +2213,18 @@ def _get_cluster_info(config: Dict[str, Any],
     cluster_info["status"] = CLOUDTIK_CLUSTER_STATUS_RUNNING
     cluster_info["head-id"] = head_node
 
-    head_ssh_ip = get_head_working_ip(config, provider, head_node)
+    head_ssh_ip = node_inventory.get_node_working_ip(config, head_node)
     cluster_info["head-ssh-ip"] = head_ssh_ip
 
     # Check the running worker nodes
-    workers = _get_worker_nodes(config)
+    workers = node_inventory.get_worker_nodes()
     worker_count = len(workers)
 
     if not simple_config:
-        workers_info = get_nodes_info(provider, workers,
-                                      True, config["available_node_types"])
+        workers_info = node_inventory.get_nodes_info(
+            workers, True, config["available_node_types"])
     else:
-        workers_info = get_nodes_info(provider, workers)
+        workers_info = node_inventory.get_nodes_info(workers)
 
     # get working nodes which are ready
     worker_nodes_ready = _get_nodes_info_in_status(workers_info, STATUS_UP_TO_DATE)
@@ -2301,12 +2429,15 @@ def cluster_debug_status(config_file: str,
 def cluster_health_check(config_file: str,
                          override_cluster_name: Optional[str],
                          no_config_cache: bool = False,
-                         with_details=False) -> None:
+                         with_details=False,
+                         output_format=None) -> None:
     """Do a health check on head node and return the results"""
 
     cmd = f"cloudtik head health-check"
     if with_details:
         cmd += " --with-details"
+    if output_format == "json":
+        cmd += " --output-format=json"
     exec_cmd_on_cluster(config_file, cmd,
                         override_cluster_name, no_config_cache)
 
@@ -2385,9 +2516,7 @@ def cluster_process_status_on_head(
     _, redis_ip_address, redis_port = validate_redis_address(redis_address)
     control_state.initialize_control_state(redis_ip_address, redis_port,
                                            redis_password)
-    node_table = control_state.get_node_table()
-    raw_node_states = node_table.get_all().values()
-    node_states = _index_node_states(raw_node_states)
+    node_states = get_live_node_states(control_state.get_node_table())
     cli_logger.print(cf.bold("Total {} live nodes reported."), len(node_states))
 
     # checking worker node process
@@ -2664,6 +2793,52 @@ def exec_cmd_on_head(config,
     job_waiter = _create_job_waiter(
         config, call_context, job_waiter_name)
 
+    result, session_name = _exec_cmd_on_head(
+        config,
+        call_context=call_context,
+        provider=provider,
+        node_id=node_id,
+        cmd=cmd,
+        run_env=run_env,
+        screen=screen,
+        tmux=tmux,
+        port_forward=port_forward,
+        with_output=with_output,
+        job_waiter=job_waiter)
+
+    # if a job waiter is specified, we always wait for its completion.
+    if job_waiter is not None:
+        job_waiter.wait_for_completion(node_id, cmd, session_name)
+
+    return result
+
+
+def _exec_cmd_on_head(config,
+                      call_context: CallContext,
+                      provider,
+                      node_id: str,
+                      cmd: str = None,
+                      run_env: str = "auto",
+                      screen: bool = False,
+                      tmux: bool = False,
+                      port_forward: Optional[Port_forward] = None,
+                      with_output: bool = False,
+                      job_waiter: Optional[JobWaiter] = None):
+    """Runs a command on the specified node from head without waiting for the job.
+    Returns the result and the session name of the command."""
+    if (job_waiter is None and not screen and not tmux and not port_forward
+            and run_env != "host" and not call_context.does_allow_interactive()):
+        # Non-interactive commands can be executed through the node agent
+        # which avoids the SSH connection and process spawn for each node.
+        # Fallback to SSH only if the command was not sent to the node agent
+        # so that the command doesn't run twice.
+        try:
+            return _exec_with_node_agent(
+                call_context, provider.internal_ip(node_id), cmd, with_output), None
+        except NodeAgentConnectionError as e:
+            logger.debug("Failed to execute with node agent: {}. "
+                         "Fallback to SSH.".format(str(e)))
+
     updater = create_node_updater_for_exec(
         config=config,
         call_context=call_context,
@@ -2686,12 +2861,31 @@ def exec_cmd_on_head(config,
         shutdown_after_run=False,
         session_name=session_name,
         hold_session=hold_session)
+    return result, session_name
+
+
+def _exec_with_node_agent(call_context: CallContext,
+                          node_ip: str,
+                          cmd: str,
+                          with_output: bool = False):
+    node_agent_client = get_node_agent_client(node_ip)
+    exit_code, output = node_agent_client.exec(cmd)
+    if exit_code != 0:
+        raise ProcessRunnerError(
+            "Command failed",
+            "node_agent_command_failed",
+            code=exit_code,
+            command=cmd,
+            output=output)
+    if with_output:
+        return output
 
-    # if a job waiter is specified, we always wait for its completion.
-    if job_waiter is not None:
-        job_waiter.wait_for_completion(node_id, cmd, session_name)
-
-    return result
+    _cli_logger = call_context.cli_logger
+    if call_context.is_output_redirected():
+        _cli_logger.verbose("Command output on {}:\n{}", node_ip, output)
+    else:
+        _cli_logger.print(output, _no_format=True)
+    return None
 
 
 def attach_node_on_head(node_ip: str,
@@ -2761,6 +2955,16 @@ def _exec_node_on_head(
     nodes = [node_head] if node_head else []
     nodes += node_workers
 
+    total_nodes = len(nodes)
+    if job_waiter_name and (screen or tmux) and total_nodes > 1:
+        # Start the jobs on all the nodes and wait for them at once
+        _exec_jobs_node_on_head(
+            config, call_context, provider, nodes,
+            cmd=cmd, run_env=run_env, screen=screen, tmux=tmux,
+            port_forward=port_forward, with_output=with_output,
+            parallel=parallel, job_waiter_name=job_waiter_name)
+        return
+
     def run_exec_cmd_on_head(node_id, call_context):
         exec_cmd_on_head(
             config,
@@ -2773,7 +2977,6 @@ def _exec_node_on_head(
             with_output=with_output,
             job_waiter_name=job_waiter_name)
 
-    total_nodes = len(nodes)
     if parallel and total_nodes > 1:
         cli_logger.print("Executing on {} nodes in parallel...", total_nodes)
         run_in_parallel_on_nodes(run_exec_cmd_on_head,
@@ -2788,6 +2991,54 @@ def _exec_node_on_head(
                 run_exec_cmd_on_head(node_id=node_id, call_context=call_context)
 
 
+def _exec_jobs_node_on_head(
+        config: Dict[str, Any],
+        call_context: CallContext,
+        provider,
+        nodes: List[str],
+        cmd: str = None,
+        run_env: str = "auto",
+        screen: bool = False,
+        tmux: bool = False,
+        port_forward: Optional[Port_forward] = None,
+        with_output: bool = False,
+        parallel: bool = True,
+        job_waiter_name: Optional[str] = None):
+    job_waiter = _create_job_waiter(
+        config, call_context, job_waiter_name)
+    jobs = {}
+
+    def run_exec_cmd_on_head(node_id, call_context):
+        _, session_name = _exec_cmd_on_head(
+            config,
+            call_context=call_context,
+            provider=provider,
+            node_id=node_id, cmd=cmd,
+            run_env=run_env,
+            screen=screen, tmux=tmux,
+            port_forward=port_forward,
+            with_output=with_output,
+            job_waiter=job_waiter)
+        jobs[node_id] = session_name
+
+    total_nodes = len(nodes)
+    if parallel:
+        cli_logger.print("Executing on {} nodes in parallel...", total_nodes)
+        run_in_parallel_on_nodes(run_exec_cmd_on_head,
+                                 call_context=call_context,
+                                 nodes=nodes)
+    else:
+        for i, node_id in enumerate(nodes):
+            node_ip = provider.internal_ip(node_id)
+            with cli_logger.group(
+                    "Executing on node: {}", node_ip,
+                    _numbered=("()", i + 1, total_nodes)):
+                run_exec_cmd_on_head(node_id=node_id, call_context=call_context)
+
+    job_waiter.wait_for_completion_of_jobs(
+        [(node_id, cmd, session_name) for node_id, session_name in jobs.items()])
+
+
 def start_node_on_head(node_ip: str = None,
                        all_nodes: bool = False,
                        runtimes: str = None,
@@ -3112,6 +3363,58 @@ def _stop_node_on_head(config: Dict[str, Any],
     )
 
 
+def _stop_services_of_node_on_head(
+        config: Dict[str, Any],
+        call_context: CallContext,
+        provider: NodeProvider,
+        head_node: str,
+        head_node_ip: str,
+        node_id: str,
+        runtimes: Optional[List[str]] = None):
+    if not is_node_in_completed_status(provider, node_id):
+        node_ip = provider.internal_ip(node_id)
+        raise ParallelTaskSkipped("Skip stopping node {} as it is in setting up.".format(node_ip))
+
+    runtime_config = _get_node_specific_runtime_config(
+        config, provider, node_id)
+    node_envs = with_runtime_environment_variables(
+        runtime_config, config=config, provider=provider, node_id=node_id)
+
+    is_head_node = False
+    if node_id == head_node:
+        is_head_node = True
+
+    if is_head_node:
+        stop_commands = get_commands_of_runtimes(config, "head_stop_commands",
+                                                 runtimes=runtimes)
+        node_runtime_envs = with_node_ip_environment_variables(
+            call_context, head_node_ip, provider, node_id)
+    else:
+        stop_commands = get_node_specific_commands_of_runtimes(
+            config, provider, node_id=node_id,
+            command_key="worker_stop_commands", runtimes=runtimes)
+        node_runtime_envs = with_node_ip_environment_variables(
+            call_context, None, provider, node_id)
+        node_runtime_envs = with_head_node_ip_environment_variables(
+            head_node_ip, node_runtime_envs)
+
+    if not stop_commands:
+        return
+
+    updater = create_node_updater_for_exec(
+        config=config,
+        call_context=call_context,
+        node_id=node_id,
+        provider=provider,
+        start_commands=[],
+        is_head_node=is_head_node,
+        use_internal_ip=True,
+        runtime_config=runtime_config)
+
+    node_envs.update(node_runtime_envs)
+    updater.exec_commands("Stopping", stop_commands, node_envs)
+
+
 def _do_stop_node_on_head(
         config: Dict[str, Any],
         call_context: CallContext,
@@ -3124,48 +3427,14 @@ def _do_stop_node_on_head(
     head_node_ip = provider.internal_ip(head_node)
 
     def stop_single_node_on_head(node_id, call_context):
-        if not is_node_in_completed_status(provider, node_id):
-            node_ip = provider.internal_ip(node_id)
-            raise ParallelTaskSkipped("Skip stopping node {} as it is in setting up.".format(node_ip))
-
-        runtime_config = _get_node_specific_runtime_config(
-            config, provider, node_id)
-        node_envs = with_runtime_environment_variables(
-            runtime_config, config=config, provider=provider, node_id=node_id)
-
-        is_head_node = False
-        if node_id == head_node:
-            is_head_node = True
-
-        if is_head_node:
-            stop_commands = get_commands_of_runtimes(config, "head_stop_commands",
-                                                     runtimes=runtimes)
-            node_runtime_envs = with_node_ip_environment_variables(
-                call_context, head_node_ip, provider, node_id)
-        else:
-            stop_commands = get_node_specific_commands_of_runtimes(
-                config, provider, node_id=node_id,
-                command_key="worker_stop_commands", runtimes=runtimes)
-            node_runtime_envs = with_node_ip_environment_variables(
-                call_context, None, provider, node_id)
-            node_runtime_envs = with_head_node_ip_environment_variables(
-                head_node_ip, node_runtime_envs)
-
-        if not stop_commands:
-            return
-
-        updater = create_node_updater_for_exec(
+        _stop_services_of_node_on_head(
             config=config,
             call_context=call_context,
-            node_id=node_id,
             provider=provider,
-            start_commands=[],
-            is_head_node=is_head_node,
-            use_internal_ip=True,
-            runtime_config=runtime_config)
-
-        node_envs.update(node_runtime_envs)
-        updater.exec_commands("Stopping", stop_commands, node_envs)
+            head_node=head_node,
+            head_node_ip=head_node_ip,
+            node_id=node_id,
+            runtimes=runtimes)
 
     _cli_logger = call_context.cli_logger
 
@@ -3392,8 +3661,9 @@ def submit_and_exec(config: Dict[str, Any],
         cmd=cmd_mkdir
     )
     command_parts = []
-    if urllib.parse.urlparse(script).scheme in ("http", "https"):
-        command_parts = ["wget", quote(script), "-O", f"~/user/jobs/{target_name};"]
+    if _is_script_url(script):
+        # Download to the directory of the job to not clobber the others
+        command_parts, target = _get_script_download_command_parts(script)
     else:
         # upload the script to cluster
         _rsync(
@@ -3403,23 +3673,10 @@ def submit_and_exec(config: Dict[str, Any],
             target=target,
             down=False)
 
-    # Use new target with $HOME instead of ~ for exec
-    target = os.path.join("$HOME", "user", "jobs", target_name)
-    if runtime is not None:
-        runtime_commands = get_runnable_command(
-            config.get(RUNTIME_CONFIG_KEY), target, runtime, runtime_options)
-        if runtime_commands is None:
-            cli_logger.abort("Runtime {} doesn't how to execute your file: {}", runtime, script)
-        command_parts += runtime_commands
-    elif target_name.endswith(".py"):
-        command_parts += ["python", double_quote(target)]
-    elif target_name.endswith(".sh"):
-        command_parts += ["bash", double_quote(target)]
-    else:
-        runtime_commands = get_runnable_command(config.get(RUNTIME_CONFIG_KEY), target)
-        if runtime_commands is None:
-            cli_logger.abort("We don't how to execute your file: {}", script)
-        command_parts += runtime_commands
+        # Use new target with $HOME instead of ~ for exec
+        target = os.path.join("$HOME", "user", "jobs", target_name)
+    command_parts += _get_script_command_parts(
+        config, script, target, runtime, runtime_options)
 
     with_script_args(command_parts, script_args)
 
@@ -3446,13 +3703,288 @@ def submit_and_exec(config: Dict[str, Any],
         session_name=session_name)
 
 
-def _get_workers_ready(config: Dict[str, Any], provider):
-    workers = _get_worker_nodes(config)
-    workers_info = get_nodes_info(provider, workers)
+def _get_script_command_parts(config: Dict[str, Any],
+                              script: str,
+                              target: str,
+                              runtime: Optional[str] = None,
+                              runtime_options: Optional[List[str]] = None):
+    target_name = os.path.basename(target)
+    if runtime is not None:
+        runtime_commands = get_runnable_command(
+            config.get(RUNTIME_CONFIG_KEY), target, runtime, runtime_options)
+        if runtime_commands is None:
+            cli_logger.abort("Runtime {} doesn't how to execute your file: {}", runtime, script)
+        return runtime_commands
+    elif target_name.endswith(".py"):
+        return ["python", double_quote(target)]
+    elif target_name.endswith(".sh"):
+        return ["bash", double_quote(target)]
+    else:
+        runtime_commands = get_runnable_command(config.get(RUNTIME_CONFIG_KEY), target)
+        if runtime_commands is None:
+            cli_logger.abort("We don't how to execute your file: {}", script)
+        return runtime_commands
+
 
+def _is_script_url(script: str) -> bool:
+    return urllib.parse.urlparse(script).scheme in ("http", "https")
+
+
+def _get_script_download_command_parts(script: str):
+    """Return the command parts downloading the script to a temporary
+    directory of the job removed when the job exits, and the target path.
+    The parts end with "&&" so that the job doesn't run if the download fails."""
+    target = os.path.join(
+        "$__cloudtik_job_dir", os.path.basename(urllib.parse.urlparse(script).path))
+    command_parts = [
+        "__cloudtik_job_dir=$(mktemp -d)", "&&",
+        "trap", quote('rm -rf "$__cloudtik_job_dir"'), "EXIT", "&&",
+        "wget", "-q", quote(script), "-O", double_quote(target), "&&"]
+    return command_parts, target
+
+
+def _get_file_hash(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _stage_job_script(script: str, staging_dir: str) -> str:
+    """Stage the script file for upload by its content hash so that the same
+    file used by many jobs is uploaded once and the files already uploaded
+    are skipped by rsync. Return the target path relative to the files dir."""
+    file_hash = _get_file_hash(script)
+    target_name = os.path.basename(script)
+    staging_file = os.path.join(staging_dir, file_hash, target_name)
+    if not os.path.exists(staging_file):
+        os.makedirs(os.path.dirname(staging_file), exist_ok=True)
+        shutil.copy2(script, staging_file)
+    return os.path.join(file_hash, target_name)
+
+
+def _get_queued_job_command(config: Dict[str, Any],
+                            job: Dict[str, Any],
+                            staging_dir: str) -> str:
+    command = job.get("command")
+    script = job.get("script")
+    if bool(command) == bool(script):
+        raise ValueError(
+            "Job must specify either the command or the script: {}".format(job))
+    if command:
+        command_parts = [command]
+    else:
+        command_parts = []
+        if _is_script_url(script):
+            command_parts, target = _get_script_download_command_parts(script)
+        else:
+            target = os.path.join(
+                JOB_FILES_DIR, _stage_job_script(script, staging_dir))
+        runtime_options = job.get("runtime_options")
+        if isinstance(runtime_options, str):
+            runtime_options = shlex.split(runtime_options)
+        command_parts += _get_script_command_parts(
+            config, script, target, job.get("runtime"), runtime_options)
+    with_script_args(command_parts, job.get("args"))
+    return " ".join(command_parts)
+
+
+def submit_many_and_exec(config: Dict[str, Any],
+                         call_context: CallContext,
+                         jobs: List[Dict[str, Any]],
+                         max_concurrency: Optional[int] = None,
+                         wait: bool = False,
+                         timeout: Optional[int] = None) -> List[str]:
+    """Submit a batch of jobs to the job queue of the cluster.
+
+    Each job spec specifies either a "command" or a "script" (local file or
+    http/https url) with optional "args", "runtime", "runtime_options",
+    "name" and "priority". The script files are deduplicated by content hash
+    and uploaded together with the batch in one rsync. The batch is submitted
+    with a single command on head regardless of the number of jobs.
+
+    Returns:
+        The ids of the jobs in the order of the specs.
+    """
+    if not jobs:
+        return []
+
+    staging_dir = tempfile.mkdtemp(prefix="cloudtik-jobs-")
+    try:
+        queued_jobs = []
+        for job in jobs:
+            queued_jobs.append({
+                "name": job.get("name"),
+                "priority": int(job.get("priority", 0)),
+                "command": _get_queued_job_command(config, job, staging_dir),
+            })
+
+        batch_name = "batch-{}.json".format(time.time_ns())
+        with open(os.path.join(staging_dir, batch_name), "w") as f:
+            json.dump(queued_jobs, f)
+
+        _exec_cmd_on_cluster(
+            config,
+            call_context=call_context,
+            cmd="mkdir -p {}".format(double_quote(JOB_FILES_DIR)))
+        _rsync(
+            config,
+            call_context=call_context,
+            source=staging_dir + "/",
+            target=JOB_FILES_DIR.replace("$HOME", "~") + "/",
+            down=False)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    cmd = "cloudtik head job submit --jobs-file={} --remove-jobs-file".format(
+        double_quote(os.path.join(JOB_FILES_DIR, batch_name)))
+    if max_concurrency:
+        cmd += " --max-concurrency={}".format(max_concurrency)
+    output = _exec_cluster(
+        config,
+        call_context=call_context,
+        cmd=cmd,
+        with_output=True)
+    job_ids = _parse_job_ids(output)
+    cli_logger.print("Submitted {} jobs: {} - {}.",
+                     len(job_ids), job_ids[0], job_ids[-1])
+
+    if wait:
+        _wait_for_queued_jobs(config, call_context, job_ids, timeout)
+    return job_ids
+
+
+def _parse_job_ids(output: str) -> List[str]:
+    # The JSON result is the last line of the output
+    for line in reversed(output.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("["):
+            return json.loads(line)
+    raise RuntimeError("Failed to submit jobs: {}".format(output))
+
+
+def _wait_for_queued_jobs(config: Dict[str, Any],
+                          call_context: CallContext,
+                          job_ids: List[str],
+                          timeout: Optional[int] = None):
+    start_time = time.time()
+    if timeout is None:
+        timeout = constants.CLOUDTIK_JOB_WAITER_TIMEOUT_MAX
+    pending_jobs = set(job_ids)
+    failed_jobs = 0
+    while pending_jobs:
+        remaining = timeout - (time.time() - start_time)
+        if remaining <= 0:
+            raise TimeoutError(
+                "Timed out while waiting for {} jobs to finish.".format(
+                    len(pending_jobs)))
+        job_exits = wait_for_job_exits_on_cluster(
+            config, call_context, sorted(pending_jobs),
+            min(constants.CLOUDTIK_JOB_EVENT_WAIT_S, remaining))
+        if job_exits is None:
+            raise RuntimeError("Failed to wait for the jobs to finish.")
+        for job_id, exit_code in job_exits.items():
+            pending_jobs.discard(job_id)
+            if exit_code != 0:
+                failed_jobs += 1
+        if job_exits:
+            cli_logger.print("{} jobs finished ({} failed). {} jobs remaining...",
+                             len(job_ids) - len(pending_jobs), failed_jobs,
+                             len(pending_jobs))
+    return failed_jobs
+
+
+def _get_job_queue(address: Optional[str] = None,
+                   redis_password: Optional[str] = None) -> JobQueue:
+    if not address:
+        address = services.get_address_to_use_or_die()
+    redis_client = services.create_redis_client(address, redis_password)
+    return JobQueue(redis_client)
+
+
+def submit_jobs_on_head(jobs_file: str,
+                        max_concurrency: Optional[int] = None,
+                        address: Optional[str] = None,
+                        redis_password: Optional[str] = None,
+                        remove_jobs_file: bool = False) -> List[str]:
+    job_queue = _get_job_queue(address, redis_password)
+    jobs_file = os.path.expanduser(jobs_file)
+    with open(jobs_file, "r") as f:
+        jobs = _load_job_specs(f.read())
+    if remove_jobs_file:
+        # The jobs are in the job queue after submitted
+        os.remove(jobs_file)
+    if max_concurrency:
+        job_queue.set_max_concurrency(max_concurrency)
+    return job_queue.submit_jobs(jobs)
+
+
+def _load_job_specs(content: str) -> List[Dict[str, Any]]:
+    """Load the job specs from a JSON list or JSON lines."""
+    content = content.strip()
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def list_jobs_on_head(job_ids: Optional[List[str]] = None,
+                      status: Optional[str] = None,
+                      limit: Optional[int] = None,
+                      output_format: Optional[str] = None,
+                      address: Optional[str] = None,
+                      redis_password: Optional[str] = None):
+    job_queue = _get_job_queue(address, redis_password)
+    if job_ids:
+        jobs = job_queue.get_jobs(job_ids)
+        if status:
+            jobs = [job for job in jobs if job["status"] == status]
+    else:
+        jobs = job_queue.list_jobs(status=status, limit=limit)
+
+    if output_format == "json":
+        click.echo(json.dumps(jobs))
+        return
+
+    tb = pt.PrettyTable()
+    tb.field_names = ["job-id", "name", "priority", "status", "exit-code",
+                      "log-offset", "submit-time", "duration"]
+    for job in jobs:
+        duration = None
+        if job.get("start_time"):
+            duration = round(
+                (job.get("end_time") or time.time()) - job["start_time"], 1)
+        tb.add_row([
+            job["id"], job.get("name") or "-", job.get("priority"),
+            job["status"], _none_to_dash(job.get("exit_code")),
+            _none_to_dash(job.get("log_offset")),
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["submit_time"])),
+            _none_to_dash(duration)])
+    cli_logger.print(tb)
+    cli_logger.print("Total {} jobs. {} jobs pending. {} jobs running.",
+                     len(jobs), job_queue.get_num_pending_jobs(),
+                     len(job_queue.get_running_job_ids()))
+
+
+def _none_to_dash(value):
+    return "-" if value is None else value
+
+
+def cancel_jobs_on_head(job_ids: List[str],
+                        address: Optional[str] = None,
+                        redis_password: Optional[str] = None):
+    job_queue = _get_job_queue(address, redis_password)
+    cancelled = job_queue.cancel_jobs(job_ids)
+    for job_id in cancelled:
+        # Notify the waiters of the cancelled jobs
+        publish_job_exit(job_queue.redis, job_id, JOB_EXIT_CODE_CANCELLED)
+    cli_logger.print("{} jobs cancelled. {} jobs not pending.",
+                     len(cancelled), len(job_ids) - len(cancelled))
+
+
+def _get_workers_ready(config: Dict[str, Any], provider):
     # get working nodes which are ready
-    workers_ready = _get_node_number_in_status(workers_info, STATUS_UP_TO_DATE)
-    return workers_ready
+    return len(NodeInventory(provider).get_worker_nodes(STATUS_UP_TO_DATE))
 
 
 def _wait_for_ready(config: Dict[str, Any],
@@ -3496,7 +4028,8 @@ def get_default_cloud_storage(
 
 
 def do_health_check(
-        address, redis_password, component, with_details):
+        address, redis_password, component, with_details,
+        json_output=False, cache_ttl=None):
     if not address:
         redis_address = services.get_address_to_use_or_die()
     else:
@@ -3504,223 +4037,167 @@ def do_health_check(
 
     if not component:
         do_core_health_check(
-            redis_address, redis_password, with_details)
+            redis_address, redis_password, with_details,
+            json_output=json_output, cache_ttl=cache_ttl)
     else:
         do_component_health_check(
-            redis_address, redis_password, component, with_details)
+            redis_address, redis_password, component, with_details,
+            json_output=json_output)
+
+
+def _exit_with_health_check_result(result, json_output):
+    if json_output:
+        click.echo(json.dumps(result))
+    sys.exit(0 if result["healthy"] else 1)
 
 
 def do_component_health_check(
-        redis_address, redis_password, component, with_details=False):
+        redis_address, redis_password, component, with_details=False,
+        json_output=False):
+    result = new_health_check_result()
+    result["component"] = component
     kv_initialize_with_address(redis_address, redis_password)
     report_str = kv_store.kv_get(
         component, namespace=CLOUDTIK_KV_NAMESPACE_HEALTHCHECK)
     if not report_str:
         # Status was never updated
-        cli_logger.print("{} is not healthy! No status reported.", component)
-        sys.exit(1)
-
-    report = json.loads(report_str)
-    report_time = float(report["time"])
-    time_ok = is_alive_time(report_time)
-    if not time_ok:
-        cli_logger.print("{} is not healthy! Last status time {}",
-                         component, report_time)
-        sys.exit(1)
-
-    cli_logger.print("{} is healthy.", component)
-    sys.exit(0)
-
+        result["errors"].append("No status reported.")
+    else:
+        report = json.loads(report_str)
+        report_time = float(report["time"])
+        result["report_time"] = report_time
+        time_ok = is_alive_time(report_time)
+        if not time_ok:
+            result["errors"].append(
+                "Last status time {}".format(report_time))
+
+    result["healthy"] = not result["errors"]
+    if not json_output:
+        if result["healthy"]:
+            cli_logger.print("{} is healthy.", component)
+        else:
+            cli_logger.print("{} is not healthy! {}",
+                             component, result["errors"][0])
+    _exit_with_health_check_result(result, json_output)
 
-def do_core_health_check(redis_address, redis_password, with_details=False):
-    redis_client = kv_initialize_with_address(redis_address, redis_password)
 
-    check_ok = True
+def do_core_health_check(redis_address, redis_password, with_details=False,
+                         json_output=False, cache_ttl=None):
+    if cache_ttl is None:
+        cache_ttl = constants.CLOUDTIK_HEALTH_CHECK_CACHE_TTL_S
+    result = None
     try:
+        redis_client = kv_initialize_with_address(redis_address, redis_password)
         # We are health checking the core. If
         # client creation or ping fails, we will still exit with a non-zero
         # exit code.
         redis_client.ping()
 
-        # check cluster controller live status through scaling status time
-        status = kv_store.kv_get(CLOUDTIK_CLUSTER_SCALING_STATUS)
-        if not status:
-            cli_logger.warning("No scaling status reported from the Cluster Controller.")
-            check_ok = False
-        else:
-            report_time = decode_cluster_scaling_time(status)
-            time_ok = is_alive_time(report_time)
-            if not time_ok:
-                cli_logger.warning("Last scaling status is too old. Status time: {}", report_time)
-                check_ok = False
-
-        # check the process status
-        failed_nodes = do_nodes_health_check(
-            redis_address, redis_password, with_details)
-        if failed_nodes:
-            cli_logger.warning("{} nodes are not healthy.", len(failed_nodes))
-            check_ok = False
+        # The details are not cached and always checked
+        use_cache = cache_ttl > 0 and not with_details
+        if use_cache:
+            result = get_cached_health_check_result(redis_client)
+        if result is None:
+            result = _check_core_health(
+                redis_address, redis_password, with_details)
+            if use_cache:
+                cache_health_check_result(redis_client, result, cache_ttl)
     except Exception as e:
-        cli_logger.error("Health check failed." + str(e))
-        check_ok = False
-        pass
+        result = new_health_check_result()
+        result["healthy"] = False
+        result["errors"].append("Health check failed. " + str(e))
 
-    if check_ok:
-        cli_logger.success("Cluster is healthy.")
-        sys.exit(0)
-    else:
-        cli_logger.error("Cluster is not healthy. Please check the details above.")
-        sys.exit(1)
+    if not json_output:
+        _show_core_health_check_result(result, with_details)
+    _exit_with_health_check_result(result, json_output)
 
 
-def _index_node_states(raw_node_states):
-    node_states = {}
-    if raw_node_states:
-        for raw_node_state in raw_node_states:
-            node_state = eval(raw_node_state)
-            if not is_alive_time(node_state.get("last_heartbeat_time", 0)):
-                continue
-            node_states[node_state["node_ip"]] = node_state
-    return node_states
+def _check_core_health(redis_address, redis_password, with_details=False):
+    result = new_health_check_result()
 
+    # check cluster controller live status through scaling status time
+    status = kv_store.kv_get(CLOUDTIK_CLUSTER_SCALING_STATUS)
+    if not status:
+        result["errors"].append(
+            "No scaling status reported from the Cluster Controller.")
+    else:
+        report_time = decode_cluster_scaling_time(status)
+        time_ok = is_alive_time(report_time)
+        if not time_ok:
+            result["errors"].append(
+                "Last scaling status is too old. Status time: {}".format(report_time))
 
-def do_nodes_health_check(redis_address, redis_password, with_details=False):
+    # check the process status
     config = load_head_cluster_config()
     provider = _get_node_provider(config["provider"], config["cluster_name"])
-
-    failed_nodes = {}
-    # Check whether the head node is running
-    try:
-        head_node = _get_running_head_node(config)
-    except HeadNotRunningError:
-        head_node = None
-
-    if head_node is None:
-        cli_logger.warning("Head node is not running.")
-        failed_nodes[head_node] = head_node
-        return failed_nodes
+    node_inventory = NodeInventory(provider)
 
     control_state = ControlState()
     _, redis_ip_address, redis_port = validate_redis_address(redis_address)
     control_state.initialize_control_state(redis_ip_address, redis_port,
                                            redis_password)
-    node_table = control_state.get_node_table()
-    raw_node_states = node_table.get_all().values()
-    node_states = _index_node_states(raw_node_states)
-
-    # checking head node processes
-    head_node_info = get_node_info(provider, head_node)
-    node_process_ok = check_node_processes(
-        config, provider, head_node_info,
-        node_states, with_details)
-    if not node_process_ok:
-        cli_logger.warning("Head node is not healthy. One or more process are not running.")
-        failed_nodes[head_node] = head_node
-
-    # checking worker node process
-    workers = provider.non_terminated_nodes({
-        CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER,
-        CLOUDTIK_TAG_NODE_STATUS: STATUS_UP_TO_DATE
-    })
-    workers_info = _get_sorted_nodes_info(provider, workers)
-    for worker_info in workers_info:
-        worker = worker_info["node"]
-        node_process_ok = check_node_processes(
-            config, provider, worker_info,
-            node_states, with_details)
-        if not node_process_ok:
-            cli_logger.warning("Worker node {} is not healthy. One or more process are not running.",
-                             worker_info[NODE_INFO_NODE_IP])
-            failed_nodes[worker] = worker
-
-    return failed_nodes
-
-
-def is_process_status_healthy(process_status):
-    if process_status and (
-            process_status == psutil.STATUS_RUNNING or
-            process_status == psutil.STATUS_SLEEPING or
-            process_status == psutil.STATUS_IDLE or
-            process_status == psutil.STATUS_WAKING):
-        return True
-    return False
-
-
-def check_node_processes(
-        config, provider, node_info, node_states, with_details=False):
-    node_process_ok = True
-    node_ip = node_info[NODE_INFO_NODE_IP]
-    node_kind = node_info[CLOUDTIK_TAG_NODE_KIND]
-    node_kind_name = "Worker"
-    if node_kind == NODE_KIND_HEAD:
-        node_kind_name = "Head"
-    node_state = node_states.get(node_ip)
-    if not node_state:
-        cli_logger.warning("No states reported for {} node: {}.",
-                         node_kind, node_ip)
-        return False
-
-    process_info = node_state["process"]
-    unhealthy_processes = []
-
-    tb = pt.PrettyTable()
-    tb.field_names = ["process-name", "process-status", "runtime"]
-    tb.align = "l"
-
-    # Check core processes
-    runtime_type = CLOUDTIK_RUNTIME_NAME
-    core_processes = constants.CLOUDTIK_PROCESSES
-    for process_meta in core_processes:
-        process_name = process_meta[2]
-        process_kind = process_meta[3]
-        if process_kind != node_kind and process_kind != "node":
-            continue
+    node_states = get_live_node_states(control_state.get_node_table())
 
-        process_status = process_info.get(process_name)
-        if not is_process_status_healthy(process_status):
-            unhealthy_processes.append(process_name)
-        tb.add_row(
-            [process_name, process_info.get(process_name, "-"), runtime_type])
+    nodes_health = check_nodes_health(
+        config, node_inventory, node_states, with_details)
+    result["nodes"] = nodes_health
+    if not nodes_health["healthy"]:
+        result["errors"].append("{} nodes are not healthy.".format(
+            len(nodes_health["unhealthy_nodes"])))
 
-    runtime_config = _get_node_specific_runtime_config(
-        config, provider, node_info["node"])
+    result["healthy"] = not result["errors"]
+    return result
 
-    runtime_types = runtime_config.get(RUNTIME_TYPES_CONFIG_KEY, [])
-    for runtime_type in runtime_types:
-        runtime_cls = _get_runtime_cls(runtime_type)
-        runtime_processes = runtime_cls.get_processes()
-        if not runtime_processes:
-            continue
 
-        for process_meta in runtime_processes:
-            process_name = process_meta[2]
-            process_kind = process_meta[3]
-            if process_kind != node_kind and process_kind != "node":
-                continue
-
-            process_status = process_info.get(process_name)
-            if not is_process_status_healthy(process_status):
-                unhealthy_processes.append(process_name)
-            tb.add_row(
-                [process_name, process_info.get(process_name, "-"), runtime_type])
-
-    if unhealthy_processes:
-        cli_logger.warning(
-            "{} ({}) has {} unhealthy processes: {}.",
-            node_kind_name, node_ip,
-            len(unhealthy_processes), unhealthy_processes)
-        node_process_ok = False
+def _show_core_health_check_result(result, with_details=False):
+    nodes_health = result.get("nodes")
+    if nodes_health:
+        for node_health in nodes_health["unhealthy_nodes"]:
+            node_kind_name = "Head" if node_health[
+                "node_kind"] == NODE_KIND_HEAD else "Worker"
+            unhealthy_processes = node_health.get("unhealthy_processes")
+            if unhealthy_processes:
+                cli_logger.warning(
+                    "{} ({}) has {} unhealthy processes: {}.",
+                    node_kind_name, node_health.get("node_ip"),
+                    len(unhealthy_processes), unhealthy_processes)
+            else:
+                cli_logger.warning(
+                    "{} ({}) is not healthy. {}",
+                    node_kind_name, node_health.get("node_ip"),
+                    node_health["reason"])
+
+        if with_details:
+            for node_health in nodes_health.get("details", []):
+                node_kind_name = "Head" if node_health[
+                    "node_kind"] == NODE_KIND_HEAD else "Worker"
+                if node_health["healthy"]:
+                    cli_logger.success(
+                        "{} ({}) is healthy.",
+                        node_kind_name, node_health["node_ip"])
+                processes = node_health.get("processes")
+                if not processes:
+                    continue
+                tb = pt.PrettyTable()
+                tb.field_names = ["process-name", "process-status", "runtime"]
+                tb.align = "l"
+                for process in processes:
+                    tb.add_row(
+                        [process["name"], process["status"], process["runtime"]])
+                cli_logger.print("Process details:")
+                cli_logger.print(tb)
+                cli_logger.newline()
+
+        cli_logger.print("{} of {} nodes are healthy.",
+                         nodes_health["healthy_nodes"], nodes_health["total"])
+
+    for error in result["errors"]:
+        cli_logger.warning(error)
+
+    if result["healthy"]:
+        cli_logger.success("Cluster is healthy.")
     else:
-        cli_logger.success(
-            "{} ({}) is healthy.",
-            node_kind_name, node_ip)
-
-    if with_details:
-        cli_logger.print("Process details:", node_kind_name, node_ip)
-        cli_logger.print(tb)
-        cli_logger.newline()
-
-    return node_process_ok
+        cli_logger.error("Cluster is not healthy. Please check the details above.")
 
 
 def cluster_resource_metrics(
@@ -14,15 +14,17 @@ import threading
 import time
 import yaml
 from enum import Enum
-from six.moves import queue
 
 from cloudtik.core._private import constants
 from cloudtik.core._private.call_context import CallContext
 from cloudtik.core._private.cluster.cluster_metrics_updater import ClusterMetricsUpdater
+from cloudtik.core._private.cluster.controller_profiler import StepTimer
 from cloudtik.core._private.cluster.resource_scaling_policy import ResourceScalingPolicy
+from cloudtik.core._private.cluster.scaling_state_producer import ScalingStateProducer
 from cloudtik.core._private.core_utils import ConcurrentCounter
 from cloudtik.core._private.crypto import AESCipher
 from cloudtik.core._private.state.kv_store import kv_put, kv_del, kv_initialized
+from cloudtik.core._private.tracing import TraceRecorder
 
 try:
     from urllib3.exceptions import MaxRetryError
@@ -34,14 +36,17 @@ from cloudtik.core.tags import (
     CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_RUNTIME_CONFIG,
     CLOUDTIK_TAG_FILE_MOUNTS_CONTENTS, CLOUDTIK_TAG_NODE_STATUS, CLOUDTIK_TAG_NODE_KIND,
     CLOUDTIK_TAG_USER_NODE_TYPE, STATUS_UP_TO_DATE, STATUS_UPDATE_FAILED,
-    NODE_KIND_WORKER, NODE_KIND_UNMANAGED, NODE_KIND_HEAD, CLOUDTIK_TAG_NODE_NUMBER, CLOUDTIK_TAG_HEAD_NODE_NUMBER)
+    NODE_KIND_WORKER, NODE_KIND_UNMANAGED, NODE_KIND_HEAD, CLOUDTIK_TAG_NODE_NUMBER, CLOUDTIK_TAG_HEAD_NODE_NUMBER,
+    CLOUDTIK_TAG_WARM_POOL, WARM_POOL_FILLING)
 from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
 from cloudtik.core._private.prometheus_metrics import ClusterPrometheusMetrics
 from cloudtik.core._private.providers import _get_node_provider
 from cloudtik.core._private.node.node_updater import NodeUpdaterThread
+from cloudtik.core._private.cluster.launch_scheduler import LaunchScheduler
 from cloudtik.core._private.cluster.node_launcher import NodeLauncher
 from cloudtik.core._private.cluster.node_tracker import NodeTracker
+from cloudtik.core._private.cluster.warm_pool import WarmPool, get_warm_pool_sizes
 from cloudtik.core._private.cluster.resource_demand_scheduler import \
     get_bin_pack_residual, ResourceDemandScheduler, NodeType, NodeID, NodeIP, \
     ResourceDict
@@ -52,10 +57,12 @@ from cloudtik.core._private.utils import validate_config, \
     _get_node_specific_docker_config, _get_node_specific_runtime_config, \
     _has_node_type_specific_runtime_config, get_runtime_config_key, RUNTIME_CONFIG_KEY, \
     _get_minimal_nodes_before_update, CLOUDTIK_CLUSTER_NODES_INFO_NODE_TYPE, _notify_minimal_nodes_reached, \
-    process_config_with_privacy, decrypt_config, CLOUDTIK_CLUSTER_SCALING_STATUS
+    process_config_with_privacy, decrypt_config, CLOUDTIK_CLUSTER_SCALING_STATUS, CLOUDTIK_NODE_TIMELINE
 from cloudtik.core._private.constants import CLOUDTIK_MAX_NUM_FAILURES, \
     CLOUDTIK_MAX_LAUNCH_BATCH, CLOUDTIK_MAX_CONCURRENT_LAUNCHES, \
-    CLOUDTIK_UPDATE_INTERVAL_S, CLOUDTIK_HEARTBEAT_TIMEOUT_S, CLOUDTIK_RUNTIME_ENV_SECRETS
+    CLOUDTIK_UPDATE_INTERVAL_S, CLOUDTIK_HEARTBEAT_TIMEOUT_S, CLOUDTIK_RUNTIME_ENV_SECRETS, \
+    CLOUDTIK_SCALING_STATE_TIMEOUT_S, CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN
+from cloudtik.core._private.node.node_agent import get_node_agent_token
 
 logger = logging.getLogger(__name__)
 
@@ -88,13 +95,23 @@ class NonTerminatedNodes:
         self.worker_ids: List[NodeID] = []
         # The head node (node kind "head")
         self.head_id: Optional[NodeID] = None
+        # The worker nodes being set up for the warm pool which are
+        # not regarded as the nodes of the cluster
+        self.warm_pool_ids: List[NodeID] = []
 
         for node in self.all_node_ids:
-            node_kind = provider.node_tags(node)[CLOUDTIK_TAG_NODE_KIND]
+            node_tags = provider.node_tags(node)
+            node_kind = node_tags[CLOUDTIK_TAG_NODE_KIND]
             if node_kind == NODE_KIND_WORKER:
-                self.worker_ids.append(node)
+                if node_tags.get(CLOUDTIK_TAG_WARM_POOL) == WARM_POOL_FILLING:
+                    self.warm_pool_ids.append(node)
+                else:
+                    self.worker_ids.append(node)
             elif node_kind == NODE_KIND_HEAD:
                 self.head_id = node
+        if self.warm_pool_ids:
+            self.all_node_ids = [node for node in self.all_node_ids
+                                 if node not in self.warm_pool_ids]
 
         # Note: For typical use-cases,
         # self.all_node_ids == self.worker_ids + [self.head_id]
@@ -109,6 +126,7 @@ class NonTerminatedNodes:
 
         self.worker_ids = list(filter(not_terminating, self.worker_ids))
         self.all_node_ids = list(filter(not_terminating, self.all_node_ids))
+        self.warm_pool_ids = list(filter(not_terminating, self.warm_pool_ids))
 
 
 # Whether a worker should be kept based on the min_workers and
@@ -147,6 +165,7 @@ class ClusterScaler:
             update_interval_s: int = CLOUDTIK_UPDATE_INTERVAL_S,
             event_summarizer: Optional[EventSummarizer] = None,
             prometheus_metrics: Optional[ClusterPrometheusMetrics] = None,
+            scaling_state_producer: Optional[ScalingStateProducer] = None,
     ):
         """Create a ClusterScaler.
 
@@ -165,6 +184,8 @@ class ClusterScaler:
             update_interval_s: Seconds between running the autoscaling loop.
             event_summarizer: Utility to consolidate duplicated messages.
             prometheus_metrics: Prometheus metrics for cluster scaler related operations.
+            scaling_state_producer: Collects the scaling state in background. The
+                scaling state is collected in the scaler loop if not specified.
         """
 
         if isinstance(config_reader, str):
@@ -218,6 +239,9 @@ class ClusterScaler:
         self.cluster_metrics = cluster_metrics
         self.cluster_metrics_updater = cluster_metrics_updater
         self.resource_scaling_policy = resource_scaling_policy
+        self.scaling_state_producer = scaling_state_producer
+        # The time of the scaling state snapshot applied to the cluster metrics
+        self.scaling_state_time = None
 
         self.reset(errors_fatal=True)
 
@@ -257,24 +281,39 @@ class ClusterScaler:
         self.disable_node_number = self.config.get(
             "disable_node_number", False)
 
+        # The recent traces of launching and updating nodes
+        self.trace_recorder = TraceRecorder()
+        # The time of each step in the controller loop
+        self.step_timer = StepTimer(self.prometheus_metrics)
+
         # Node launchers
-        self.launch_queue = queue.Queue()
+        self.launch_scheduler = LaunchScheduler(
+            self.provider, max_launch_batch=max_launch_batch)
         self.pending_launches = ConcurrentCounter()
         max_batches = math.ceil(
             max_concurrent_launches / float(max_launch_batch))
         for i in range(int(max_batches)):
             node_launcher = NodeLauncher(
                 provider=self.provider,
-                queue=self.launch_queue,
+                scheduler=self.launch_scheduler,
                 index=i,
                 pending=self.pending_launches,
                 event_summarizer=self.event_summarizer,
                 session_name=session_name,
                 node_types=self.available_node_types,
-                prometheus_metrics=self.prometheus_metrics)
+                prometheus_metrics=self.prometheus_metrics,
+                trace_recorder=self.trace_recorder)
             node_launcher.daemon = True
             node_launcher.start()
 
+        # The warm pool of the stopped nodes which are set up
+        self.warm_pool = None
+        if self.provider.supports_warm_pool():
+            self.warm_pool = WarmPool(
+                self.provider, self.event_summarizer,
+                is_node_up_to_date=self._is_node_up_to_date,
+                session_name=session_name)
+
         # NodeTracker maintains soft state to track the number of recently
         # failed nodes. It is best effort only.
         self.node_tracker = NodeTracker()
@@ -294,10 +333,17 @@ class ClusterScaler:
         logger.info("Cluster Controller: {}".format(config_to_log))
 
     def run(self):
-        self.reset(errors_fatal=False)
+        step_timer = self.step_timer
+        step_timer.reset()
+        with step_timer.step("reset"):
+            self.reset(errors_fatal=False)
 
-        self.resource_scaling_policy.update()
-        self.cluster_metrics_updater.update()
+        if self.scaling_state_producer is not None:
+            self._apply_latest_scaling_state()
+        else:
+            self.resource_scaling_policy.update(step_timer)
+            with step_timer.step("update_cluster_metrics"):
+                self.cluster_metrics_updater.update()
 
         status = {
             "cluster_metrics_report": asdict(self.cluster_metrics.summary()),
@@ -306,7 +352,29 @@ class ClusterScaler:
         }
 
         self.update()
-        self.update_status(status)
+        with step_timer.step("update_status"):
+            self.update_status(status)
+
+    def _apply_latest_scaling_state(self):
+        # Wait for the first snapshot only, so that the nodes are not
+        # regarded as lost before any heartbeats are collected
+        snapshot = self.scaling_state_producer.get_latest(
+            timeout=None if self.scaling_state_time else CLOUDTIK_SCALING_STATE_TIMEOUT_S)
+        if snapshot is None:
+            return
+        if snapshot.time != self.scaling_state_time:
+            with self.step_timer.step("update_cluster_metrics"):
+                self.cluster_metrics_updater.apply(snapshot)
+            self.scaling_state_time = snapshot.time
+
+        staleness = time.time() - snapshot.time
+        self.prometheus_metrics.scaling_state_staleness.set(staleness)
+        if staleness > self.update_interval_s + CLOUDTIK_SCALING_STATE_TIMEOUT_S:
+            self.event_summarizer.add_once_per_interval(
+                message="The scaling state is {:.0f} seconds old. "
+                        "Collecting the scaling state may be slow.".format(staleness),
+                key="Stale scaling state",
+                interval_s=60)
 
     def update_status(self, status):
         status["cluster_scaler_report"] = asdict(self.summary())
@@ -321,6 +389,12 @@ class ClusterScaler:
         as_json = json.dumps(status)
         if kv_initialized():
             kv_put(CLOUDTIK_CLUSTER_SCALING_STATUS, as_json, overwrite=True)
+            self.publish_node_timeline()
+
+    def publish_node_timeline(self):
+        traces = self.trace_recorder.get_changed_traces()
+        if traces is not None:
+            kv_put(CLOUDTIK_NODE_TIMELINE, json.dumps(traces), overwrite=True)
 
     def update(self):
         try:
@@ -349,9 +423,16 @@ class ClusterScaler:
             return
 
         self.last_update_time = now
+        step_timer = self.step_timer
+        # The decisions based on heartbeats and idle time are made as of the
+        # time of the scaling state, so a stale state doesn't make the nodes
+        # regarded as lost or idle
+        metrics_now = min(now, self.scaling_state_time) if (
+            self.scaling_state_time is not None) else now
 
         # Query the provider to update the list of non-terminated nodes
-        self.non_terminated_nodes = NonTerminatedNodes(self.provider)
+        with step_timer.step("list_nodes"):
+            self.non_terminated_nodes = NonTerminatedNodes(self.provider)
 
         # This will accumulate the nodes we need to terminate.
         self.nodes_to_terminate = []
@@ -361,28 +442,38 @@ class ClusterScaler:
         self.prometheus_metrics.running_workers.set(num_workers)
 
         # Remove from LoadMetrics the ips unknown to the NodeProvider.
-        self.cluster_metrics.prune_active_ips(active_ips=[
-            self.provider.internal_ip(node_id)
-            for node_id in self.non_terminated_nodes.all_node_ids
-        ])
+        with step_timer.step("prune_metrics"):
+            self.cluster_metrics.prune_active_ips(active_ips=[
+                self.provider.internal_ip(node_id)
+                for node_id in self.non_terminated_nodes.all_node_ids
+            ])
 
         # Update status strings
-        logger.info(self.info_string())
+        with step_timer.step("info_string"):
+            logger.info(self.info_string())
 
-        self.terminate_nodes_to_enforce_config_constraints(now)
+        with step_timer.step("enforce_config_constraints"):
+            self.terminate_nodes_to_enforce_config_constraints(metrics_now)
 
         if not self.disable_node_number:
             # Assign node number to new nodes
-            self.assign_node_number_to_new_nodes()
+            with step_timer.step("assign_node_number"):
+                self.assign_node_number_to_new_nodes()
 
         wait_for_update = self.wait_for_minimal_nodes_before_update()
         if not wait_for_update:
             if self.disable_node_updaters:
-                self.terminate_unhealthy_nodes(now)
+                with step_timer.step("terminate_unhealthy_nodes"):
+                    self.terminate_unhealthy_nodes(metrics_now)
             else:
-                self.process_completed_updates()
-                self.update_nodes()
-                self.attempt_to_recover_unhealthy_nodes(now)
+                with step_timer.step("process_completed_updates"):
+                    self.process_completed_updates()
+                with step_timer.step("update_nodes"):
+                    self.update_nodes()
+                with step_timer.step("recover_unhealthy_nodes"):
+                    self.attempt_to_recover_unhealthy_nodes(metrics_now)
+                with step_timer.step("update_warm_pool"):
+                    self.update_warm_pool()
                 self.set_prometheus_updater_data()
 
         # The key place to scale up the nodes based on resource metrics
@@ -395,18 +486,20 @@ class ClusterScaler:
         # 4. The total resources of each node reported by runtime is used to update the node type resource information.
         #    (get_static_node_resources_by_ip)
         # Dict[NodeType, int], List[ResourceDict]
-        to_launch, unfulfilled = (
-            self.resource_demand_scheduler.get_nodes_to_launch(
-                self.non_terminated_nodes.all_node_ids,
-                self.pending_launches.breakdown(),
-                self.cluster_metrics.get_resource_demands(),
-                self.cluster_metrics.get_resource_utilization(),
-                self.cluster_metrics.get_static_node_resources_by_ip(),
-                ensure_min_cluster_size=self.cluster_metrics.
-                get_resource_requests()))
-        self._report_pending_infeasible(unfulfilled)
-
-        self.launch_required_nodes(to_launch)
+        with step_timer.step("get_nodes_to_launch"):
+            to_launch, unfulfilled = (
+                self.resource_demand_scheduler.get_nodes_to_launch(
+                    self.non_terminated_nodes.all_node_ids,
+                    self.pending_launches.breakdown(),
+                    self.cluster_metrics.get_resource_demands(),
+                    self.cluster_metrics.get_resource_utilization(),
+                    self.cluster_metrics.get_static_node_resources_by_ip(),
+                    ensure_min_cluster_size=self.cluster_metrics.
+                    get_resource_requests()))
+            self._report_pending_infeasible(unfulfilled)
+
+        with step_timer.step("launch_nodes"):
+            self.launch_required_nodes(to_launch)
 
         # Record the amount of time the cluster scaler took for
         # this _update() iteration.
@@ -573,9 +666,11 @@ class ClusterScaler:
         # problems. They should at a minimum be spawned as daemon threads.
         # See pull #5903 for more info.
         T = []
+        node_ids = (self.non_terminated_nodes.worker_ids +
+                    self.non_terminated_nodes.warm_pool_ids)
         for node_id, setup_commands, start_commands, docker_config in (
                 self.should_update(node_id)
-                for node_id in self.non_terminated_nodes.worker_ids):
+                for node_id in node_ids):
             if node_id is not None:
                 resources = self._node_resources(node_id)
                 call_context = self.call_context.new_call_context()
@@ -601,6 +696,7 @@ class ClusterScaler:
             failed_nodes = []
             for node_id in completed_nodes:
                 updater = self.updaters[node_id]
+                self._record_node_trace(node_id, updater)
                 if updater.exitcode == 0:
                     self.num_successful_updates[node_id] += 1
                     self.prometheus_metrics.successful_updates.inc()
@@ -629,7 +725,8 @@ class ClusterScaler:
                 # Update the list of non-terminated workers.
                 for node_id in failed_nodes:
                     # Check if the node has already been terminated.
-                    if node_id in self.non_terminated_nodes.worker_ids:
+                    if (node_id in self.non_terminated_nodes.worker_ids
+                            or node_id in self.non_terminated_nodes.warm_pool_ids):
                         self.schedule_node_termination(
                             node_id, "launch failed", logger.error)
                     else:
@@ -638,6 +735,21 @@ class ClusterScaler:
                                        " Node has already been terminated.")
                 self.terminate_scheduled_nodes()
 
+    def _record_node_trace(self, node_id, updater):
+        """Record the phase times of the update for the node timeline and metrics."""
+        tracer = updater.tracer
+        node_type = tracer.root.attributes.get("node_type") or "unknown_node_type"
+        try:
+            tracer.set_attribute("node_ip", self.provider.internal_ip(node_id))
+        except Exception:
+            # The node may have been terminated
+            pass
+        for phase, phase_time in tracer.get_phase_durations().items():
+            self.prometheus_metrics.node_phase_time.labels(
+                SessionName=self.prometheus_metrics.session_name,
+                phase=phase, node_type=node_type).observe(phase_time)
+        self.trace_recorder.add(tracer.to_dict())
+
     def set_prometheus_updater_data(self):
         """Record total number of active NodeUpdaterThreads and how many of
         these are being run to recover nodes.
@@ -1011,12 +1123,17 @@ class ClusterScaler:
     def _with_cluster_secrets(self, environment_variables: Dict[str, Any]):
         encoded_secrets = encode_cluster_secrets(self.secrets)
         environment_variables[CLOUDTIK_RUNTIME_ENV_SECRETS] = encoded_secrets
+        # The workers start the node agents with the token of head
+        node_agent_token = get_node_agent_token()
+        if node_agent_token:
+            environment_variables[CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN] = node_agent_token
         return environment_variables
 
-    def launch_config_ok(self, node_id):
+    def launch_config_ok(self, node_id, node_tags=None):
         if self.disable_launch_config_check:
             return True
-        node_tags = self.provider.node_tags(node_id)
+        if node_tags is None:
+            node_tags = self.provider.node_tags(node_id)
         tag_launch_conf = node_tags.get(CLOUDTIK_TAG_LAUNCH_CONFIG)
         node_type = node_tags.get(CLOUDTIK_TAG_USER_NODE_TYPE)
         if node_type not in self.available_node_types:
@@ -1046,8 +1163,9 @@ class ClusterScaler:
         # If there is no node specific, use global runtime hash
         return self.runtime_hash
 
-    def files_up_to_date(self, node_id):
-        node_tags = self.provider.node_tags(node_id)
+    def files_up_to_date(self, node_id, node_tags=None):
+        if node_tags is None:
+            node_tags = self.provider.node_tags(node_id)
         applied_config_hash = node_tags.get(CLOUDTIK_TAG_RUNTIME_CONFIG)
         applied_file_mounts_contents_hash = node_tags.get(
             CLOUDTIK_TAG_FILE_MOUNTS_CONTENTS)
@@ -1204,6 +1322,12 @@ class ClusterScaler:
             start_commands = self._get_node_specific_commands(
                 node_id, "worker_start_commands")
 
+        if self.provider.node_tags(node_id).get(
+                CLOUDTIK_TAG_WARM_POOL) == WARM_POOL_FILLING:
+            # The nodes for the warm pool are stopped once set up. The
+            # services are started by the update when resumed from the pool.
+            start_commands = []
+
         docker_config = self._get_node_specific_docker_config(node_id)
         return UpdateInstructions(
             node_id=node_id,
@@ -1271,6 +1395,28 @@ class ClusterScaler:
                      "passes config check (can_update=True).")
         return True
 
+    def _is_node_up_to_date(self, node_id, node_tags):
+        return (self.launch_config_ok(node_id, node_tags)
+                and self.files_up_to_date(node_id, node_tags))
+
+    def update_warm_pool(self):
+        """Stop the set up nodes into the warm pool and fill the warm pool."""
+        if self.warm_pool is None:
+            if get_warm_pool_sizes(self.config):
+                self.event_summarizer.add_once_per_interval(
+                    message="Warm pool is not supported by the provider or "
+                            "not enabled with cache_stopped_nodes.",
+                    key="Warm pool not supported.",
+                    interval_s=600)
+            return
+
+        stopped = self.warm_pool.update(
+            self.config, self.non_terminated_nodes.warm_pool_ids, self.updaters)
+        if stopped:
+            for node_id in stopped:
+                self.node_tracker.untrack(node_id)
+            self.non_terminated_nodes.remove_terminating_nodes(stopped)
+
     def launch_new_node(self, count: int, node_type: Optional[str]) -> None:
         logger.info(
             "Cluster Controller: Queue {} new nodes for launch".format(count))
@@ -1281,11 +1427,9 @@ class ClusterScaler:
         self.pending_launches.inc(node_type, count)
         self.prometheus_metrics.pending_nodes.set(self.pending_launches.value)
         config = copy.deepcopy(self.config)
-        # Split into individual launch requests of the max batch size.
-        while count > 0:
-            self.launch_queue.put((config, min(count, self.max_launch_batch),
-                                   node_type))
-            count -= self.max_launch_batch
+        # Merged with the pending launches of the node type and split
+        # into launch requests of the max batch size by the scheduler.
+        self.launch_scheduler.add(config, count, node_type)
 
     def workers(self):
         return self.non_terminated_nodes.worker_ids
@@ -0,0 +1,133 @@
+"""Timing and profiling of the controller loop.
+
+StepTimer observes the time of each step of a controller cycle into the
+controller step histogram and keeps the step times of the current cycle.
+
+ControllerProfiler is an opt-in mode (CLOUDTIK_CONTROLLER_PROFILE) which runs
+a sample of the cycles under cProfile and keeps the profiles of the N slowest
+cycles in the logs dir. Each profile is dumped as a pstats file with a text
+summary of the step times and the top functions by cumulative time.
+"""
+import contextlib
+import cProfile
+import heapq
+import io
+import logging
+import os
+import pstats
+import time
+from typing import Dict, Optional
+
+from cloudtik.core._private.constants import CLOUDTIK_CONTROLLER_PROFILE, \
+    CLOUDTIK_CONTROLLER_PROFILE_SAMPLE_INTERVAL, CLOUDTIK_CONTROLLER_PROFILE_TOP_N
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE_PREFIX = "cluster_controller_profile"
+# The number of functions in the text summary of a profile
+PROFILE_SUMMARY_LINES = 50
+
+
+class StepTimer:
+    """Time the steps of the controller cycles."""
+
+    def __init__(self, prometheus_metrics=None):
+        self.prometheus_metrics = prometheus_metrics
+        self.step_times: Dict[str, float] = {}
+
+    def reset(self):
+        self.step_times = {}
+
+    def observe(self, step: str, step_time: float):
+        self.step_times[step] = self.step_times.get(step, 0.0) + step_time
+        if self.prometheus_metrics is not None:
+            self.prometheus_metrics.controller_step_time.labels(
+                SessionName=self.prometheus_metrics.session_name,
+                step=step).observe(step_time)
+
+    @contextlib.contextmanager
+    def step(self, step: str):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.observe(step, time.time() - start_time)
+
+
+class ControllerProfiler:
+    """Profile a sample of the controller cycles and keep the slowest ones."""
+
+    def __init__(self, logs_dir: Optional[str],
+                 enabled: bool = CLOUDTIK_CONTROLLER_PROFILE,
+                 sample_interval: int = CLOUDTIK_CONTROLLER_PROFILE_SAMPLE_INTERVAL,
+                 top_n: int = CLOUDTIK_CONTROLLER_PROFILE_TOP_N):
+        self.logs_dir = logs_dir
+        self.enabled = enabled and bool(logs_dir) and top_n > 0
+        self.sample_interval = max(1, sample_interval)
+        self.top_n = top_n
+        self.num_cycles = 0
+        # The min heap of (cycle time, cycle number, profile file)
+        self._slowest = []
+        if enabled and not self.enabled:
+            logger.warning("Controller profiling is not enabled "
+                           "because no logs dir specified.")
+
+    @contextlib.contextmanager
+    def cycle(self, step_timer: Optional[StepTimer] = None):
+        self.num_cycles += 1
+        if not self.enabled or self.num_cycles % self.sample_interval != 0:
+            yield
+            return
+
+        profile = cProfile.Profile()
+        start_time = time.time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            cycle_time = time.time() - start_time
+            try:
+                self._keep_if_slow(
+                    profile, cycle_time,
+                    step_timer.step_times if step_timer is not None else None)
+            except Exception as e:
+                logger.warning("Failed to dump the controller profile: {}".format(e))
+
+    def _keep_if_slow(self, profile, cycle_time, step_times):
+        if len(self._slowest) >= self.top_n:
+            if cycle_time <= self._slowest[0][0]:
+                return
+            _, _, evicted = heapq.heappop(self._slowest)
+            self._remove_profile(evicted)
+
+        profile_file = os.path.join(self.logs_dir, "{}_{}.prof".format(
+            PROFILE_FILE_PREFIX, self.num_cycles))
+        self._dump_profile(profile, profile_file, cycle_time, step_times)
+        heapq.heappush(self._slowest, (cycle_time, self.num_cycles, profile_file))
+        logger.info("Controller cycle {} took {:.3f}s, profile saved to {}.".format(
+            self.num_cycles, cycle_time, profile_file))
+
+    def _dump_profile(self, profile, profile_file, cycle_time, step_times):
+        stats = pstats.Stats(profile)
+        stats.dump_stats(profile_file)
+
+        output = io.StringIO()
+        output.write("Cycle {} took {:.3f}s.\n".format(self.num_cycles, cycle_time))
+        if step_times:
+            output.write("Step times:\n")
+            for step, step_time in sorted(
+                    step_times.items(), key=lambda x: x[1], reverse=True):
+                output.write("  {}: {:.3f}s\n".format(step, step_time))
+        stats.stream = output
+        stats.sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+        with open(profile_file[:-len(".prof")] + ".txt", "w") as f:
+            f.write(output.getvalue())
+
+    @staticmethod
+    def _remove_profile(profile_file):
+        for path in [profile_file, profile_file[:-len(".prof")] + ".txt"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
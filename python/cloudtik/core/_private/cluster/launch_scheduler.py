@@ -0,0 +1,169 @@
+"""Schedule the node launches for the node launchers.
+
+The launch requests are merged by node type and handed to the node launchers
+in batches of at most max_launch_batch nodes:
+
+- The node types are served fairly: the next batch is of the node type with
+  the fewest nodes launching (the least recently served on ties), so a large
+  request of one node type doesn't delay the launches of the others.
+- If the provider supports placements (for example, the subnets in different
+  availability zones), the batches of a node type are spread across them.
+- A launch failed for insufficient capacity is merged back and retried with
+  exponential backoff on the next placement, up to the max number of retries.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from cloudtik.core._private.constants import CLOUDTIK_MAX_LAUNCH_BATCH, \
+    CLOUDTIK_LAUNCH_CAPACITY_RETRIES, CLOUDTIK_LAUNCH_RETRY_BACKOFF_S
+from cloudtik.core._private.parallel_executor import get_retry_delay
+
+logger = logging.getLogger(__name__)
+
+
+class LaunchBatch:
+    """A batch of nodes of a node type to launch in one request."""
+
+    def __init__(self, node_type: Optional[str], count: int,
+                 config: Dict[str, Any],
+                 placement: Optional[Dict[str, Any]] = None,
+                 attempt: int = 1):
+        self.node_type = node_type
+        self.count = count
+        self.config = config
+        self.placement = placement
+        self.attempt = attempt
+
+
+class _NodeTypeLaunches:
+    def __init__(self, node_type):
+        self.node_type = node_type
+        self.config = None
+        self.pending = 0
+        self.launching = 0
+        # The number of consecutive launches failed for capacity
+        self.failures = 0
+        self.ready_time = 0.0
+        self.placement_index = 0
+        self.last_served = 0
+
+
+class LaunchScheduler:
+    """Merge, batch and order the launch requests of the node types (thread safe)."""
+
+    def __init__(self,
+                 provider,
+                 max_launch_batch: int = CLOUDTIK_MAX_LAUNCH_BATCH,
+                 capacity_retries: int = CLOUDTIK_LAUNCH_CAPACITY_RETRIES,
+                 retry_backoff_s: float = CLOUDTIK_LAUNCH_RETRY_BACKOFF_S):
+        self.provider = provider
+        self.max_launch_batch = max(1, max_launch_batch)
+        self.capacity_retries = capacity_retries
+        self.retry_backoff_s = retry_backoff_s
+        self._launches: Dict[Optional[str], _NodeTypeLaunches] = {}
+        self._served = 0
+        self._cond = threading.Condition()
+
+    def add(self, config: Dict[str, Any], count: int,
+            node_type: Optional[str]) -> None:
+        """Add a request to launch count nodes of the node type."""
+        if count <= 0:
+            return
+        with self._cond:
+            launches = self._launches.get(node_type)
+            if launches is None:
+                launches = self._launches[node_type] = _NodeTypeLaunches(node_type)
+            # Launch with the latest config for the merged requests
+            launches.config = config
+            launches.pending += count
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[LaunchBatch]:
+        """Wait for the next batch to launch. Return None if timed out."""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                now = time.time()
+                launches, wait_time = self._select(now)
+                if launches is not None:
+                    return self._take_batch(launches)
+                if deadline is not None:
+                    if now >= deadline:
+                        return None
+                    wait_time = deadline - now if wait_time is None else min(
+                        deadline - now, wait_time)
+                self._cond.wait(wait_time)
+
+    def complete(self, batch: LaunchBatch,
+                 error: Optional[Exception] = None) -> bool:
+        """Complete a batch. Return True if it will be retried for the error."""
+        with self._cond:
+            launches = self._launches[batch.node_type]
+            launches.launching -= batch.count
+            if error is None:
+                launches.failures = 0
+                return False
+            if not self._is_capacity_error(error):
+                return False
+
+            launches.failures += 1
+            # Back off the node type. The next batch goes to the next placement.
+            launches.ready_time = time.time() + get_retry_delay(
+                launches.failures, self.retry_backoff_s)
+            if batch.attempt > self.capacity_retries:
+                return False
+            launches.pending += batch.count
+            self._cond.notify_all()
+            return True
+
+    def _is_capacity_error(self, error):
+        try:
+            return self.provider.is_capacity_error(error)
+        except Exception as e:
+            logger.debug("Failed to check the launch error: {}".format(e))
+            return False
+
+    def _select(self, now):
+        # Return the node type to launch or the seconds to wait for one ready
+        selected = None
+        wait_time = None
+        for launches in self._launches.values():
+            if launches.pending <= 0:
+                continue
+            if launches.ready_time > now:
+                delay = launches.ready_time - now
+                wait_time = delay if wait_time is None else min(wait_time, delay)
+                continue
+            if selected is None or (
+                    launches.launching, launches.last_served) < (
+                    selected.launching, selected.last_served):
+                selected = launches
+        return selected, wait_time
+
+    def _take_batch(self, launches):
+        count = min(launches.pending, self.max_launch_batch)
+        launches.pending -= count
+        launches.launching += count
+        self._served += 1
+        launches.last_served = self._served
+
+        placement = None
+        placements = self._get_placements(launches.config, launches.node_type)
+        if placements:
+            placement = placements[launches.placement_index % len(placements)]
+            launches.placement_index += 1
+        return LaunchBatch(
+            launches.node_type, count, launches.config,
+            placement=placement, attempt=launches.failures + 1)
+
+    def _get_placements(self, config, node_type) -> Optional[List[Dict[str, Any]]]:
+        if not node_type:
+            return None
+        node_config = config["available_node_types"][node_type]["node_config"]
+        try:
+            return self.provider.get_launch_placements(node_config)
+        except Exception as e:
+            logger.debug("Failed to get the launch placements: {}".format(e))
+            return None
@@ -0,0 +1,124 @@
+"""Node inventory of a cluster gathered in one provider sweep.
+
+The non-terminated nodes are listed once and the node information (which
+includes the node tags) of all the nodes is fetched in parallel. The queries
+of the head, the workers, the node status and the node IPs are then served
+from the inventory instead of calling the provider for each of them.
+
+The inventory is a snapshot. It is meant to be created and shared by the
+operations of one invocation and not to be kept for long.
+"""
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from cloudtik.core._private.cli_logger import cli_logger
+from cloudtik.core._private.constants import MAX_PARALLEL_NODE_INFO_QUERIES
+from cloudtik.core._private.utils import HeadNotRunningError, NODE_INFO_NODE_IP, \
+    NODE_INFO_PUBLIC_IP, with_node_info_extras, is_node_type_for_runtime, is_use_internal_ip
+from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD, NODE_KIND_WORKER, \
+    CLOUDTIK_TAG_NODE_STATUS, STATUS_UP_TO_DATE, CLOUDTIK_TAG_USER_NODE_TYPE
+
+logger = logging.getLogger(__name__)
+
+
+class NodeInventory:
+    """The non-terminated nodes and their information of a cluster."""
+
+    def __init__(self, provider: NodeProvider,
+                 max_parallel_queries: Optional[int] = None):
+        self.provider = provider
+        if max_parallel_queries is None:
+            max_parallel_queries = MAX_PARALLEL_NODE_INFO_QUERIES
+        nodes = provider.non_terminated_nodes({})
+        self._nodes_info = self._get_nodes_info(nodes, max_parallel_queries)
+
+    def _get_node_info(self, node):
+        try:
+            node_info = self.provider.get_node_info(node)
+        except Exception as e:
+            # The node may be terminated after listed
+            logger.debug("Failed to get the information of node {}: {}".format(
+                node, str(e)))
+            return None
+        node_info["node"] = node
+        return node_info
+
+    def _get_nodes_info(self, nodes, max_parallel_queries):
+        if len(nodes) <= 1 or max_parallel_queries <= 1:
+            nodes_info = [self._get_node_info(node) for node in nodes]
+        else:
+            with ThreadPoolExecutor(
+                    max_workers=min(max_parallel_queries, len(nodes))) as executor:
+                nodes_info = list(executor.map(self._get_node_info, nodes))
+        return {node: node_info for node, node_info in zip(nodes, nodes_info)
+                if node_info is not None}
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes_info.keys())
+
+    def get_nodes(self, tag_filters: Optional[Dict[str, str]] = None) -> List[str]:
+        """Return the nodes matching the tag filters, in the listed order."""
+        if not tag_filters:
+            return self.nodes
+        return [node for node, node_info in self._nodes_info.items()
+                if all(node_info.get(k) == v for k, v in tag_filters.items())]
+
+    def get_worker_nodes(self, node_status: Optional[str] = None) -> List[str]:
+        tag_filters = {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER}
+        if node_status:
+            tag_filters[CLOUDTIK_TAG_NODE_STATUS] = node_status
+        return self.get_nodes(tag_filters)
+
+    def get_nodes_for_runtime(self, config: Dict[str, Any],
+                              nodes: List[str], runtime: str) -> List[str]:
+        return [node for node in nodes if is_node_type_for_runtime(
+            config, self._nodes_info[node].get(CLOUDTIK_TAG_USER_NODE_TYPE), runtime)]
+
+    def get_head_node(self, cluster_name: str,
+                      allow_uninitialized_state: bool = False) -> str:
+        """Get a valid, running head node. Raise error if no running head."""
+        head_node = None
+        _backup_head_node = None
+        for node in self.get_nodes({CLOUDTIK_TAG_NODE_KIND: NODE_KIND_HEAD}):
+            node_state = self._nodes_info[node].get(CLOUDTIK_TAG_NODE_STATUS)
+            if node_state == STATUS_UP_TO_DATE:
+                head_node = node
+            else:
+                _backup_head_node = node
+                cli_logger.warning(f"Head node ({node}) is in state {node_state}.")
+
+        if head_node is not None:
+            return head_node
+        if allow_uninitialized_state and _backup_head_node is not None:
+            cli_logger.warning(
+                f"The head node being returned: {_backup_head_node} is not "
+                "`up-to-date`. If you are not debugging a startup issue "
+                "it is recommended to restart this cluster.")
+            return _backup_head_node
+        raise HeadNotRunningError("Head node of cluster {} not found!".format(
+            cluster_name))
+
+    def get_node_info(self, node: str, extras: bool = False,
+                      available_node_types: Dict[str, Any] = None) -> Dict[str, Any]:
+        # A copy for the caller to change
+        node_info = copy.copy(self._nodes_info[node])
+        if extras:
+            with_node_info_extras(node_info, available_node_types)
+        return node_info
+
+    def get_nodes_info(self, nodes: List[str], extras: bool = False,
+                       available_node_types: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        return [self.get_node_info(
+            node, extras, available_node_types) for node in nodes]
+
+    def get_node_cluster_ip(self, node: str) -> str:
+        return self._nodes_info[node].get(NODE_INFO_NODE_IP)
+
+    def get_node_working_ip(self, config: Dict[str, Any], node: str) -> str:
+        if is_use_internal_ip(config):
+            return self.get_node_cluster_ip(node)
+        return self._nodes_info[node].get(NODE_INFO_PUBLIC_IP)
@@ -11,6 +11,7 @@ from cloudtik.core.tags import (CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_NODE_ST
                                 CLOUDTIK_TAG_USER_NODE_TYPE, STATUS_UNINITIALIZED,
                                 NODE_KIND_WORKER)
 from cloudtik.core._private.prometheus_metrics import ClusterPrometheusMetrics
+from cloudtik.core._private.tracing import Tracer
 from cloudtik.core._private.utils import hash_launch_conf
 
 logger = logging.getLogger(__name__)
@@ -21,27 +22,33 @@ class NodeLauncher(threading.Thread):
 
     def __init__(self,
                  provider,
-                 queue,
+                 scheduler,
                  pending,
                  event_summarizer,
                  session_name: Optional[str] = None,
                  prometheus_metrics=None,
                  node_types=None,
                  index=None,
+                 trace_recorder=None,
+                 node_tags=None,
                  *args,
                  **kwargs):
-        self.queue = queue
+        self.scheduler = scheduler
         self.pending = pending
         self.prometheus_metrics = prometheus_metrics or ClusterPrometheusMetrics(
             session_name=session_name)
         self.provider = provider
         self.node_types = node_types
         self.index = str(index) if index is not None else ""
+        self.trace_recorder = trace_recorder
+        # The additional tags for the nodes launched
+        self.node_tags = node_tags
         self.event_summarizer = event_summarizer
         super(NodeLauncher, self).__init__(*args, **kwargs)
 
     def _launch_node(self, config: Dict[str, Any], count: int,
-                     node_type: Optional[str]):
+                     node_type: Optional[str],
+                     placement: Optional[Dict[str, Any]] = None):
         if self.node_types:
             assert node_type, node_type
 
@@ -60,6 +67,8 @@ class NodeLauncher(threading.Thread):
             CLOUDTIK_TAG_NODE_STATUS: STATUS_UNINITIALIZED,
             CLOUDTIK_TAG_LAUNCH_CONFIG: launch_hash,
         }
+        if self.node_tags:
+            node_tags.update(self.node_tags)
         # A custom node type is specified; set the tag in this case, and also
         # merge the configs. We merge the configs instead of overriding, so
         # that the bootstrapped per-cloud properties are preserved.
@@ -67,25 +76,56 @@ class NodeLauncher(threading.Thread):
         if node_type:
             node_tags[CLOUDTIK_TAG_USER_NODE_TYPE] = node_type
             node_config.update(launch_config)
+        if placement:
+            # Not part of the launch hash, so the nodes of a type share the hash
+            node_config.update(placement)
+        tracer = Tracer("launch_nodes", {"node_type": node_type, "count": count})
         launch_start_time = time.time()
-        self.provider.create_node_with_resources(node_config, node_tags, count,
-                                                 resources)
+        try:
+            with tracer.span("create_node"):
+                self.provider.create_node_with_resources(
+                    node_config, node_tags, count, resources)
+            tracer.finish()
+        except Exception as e:
+            tracer.finish(e)
+            raise
+        finally:
+            if self.trace_recorder is not None:
+                self.trace_recorder.add(tracer.to_dict())
         launch_time = time.time() - launch_start_time
+        node_phase_time = self.prometheus_metrics.node_phase_time.labels(
+            SessionName=self.prometheus_metrics.session_name,
+            phase="create_node", node_type=node_type)
         for _ in range(count):
             # Note: when launching multiple nodes we observe the time it
             # took all nodes to launch for each node. For example, if 4
             # nodes were created in 25 seconds, we would observe the 25
             # second create time 4 times.
             self.prometheus_metrics.worker_create_node_time.observe(launch_time)
+            node_phase_time.observe(launch_time)
         self.prometheus_metrics.started_nodes.inc(count)
 
     def run(self):
         while True:
-            config, count, node_type = self.queue.get()
+            batch = self.scheduler.get()
+            node_type, count = batch.node_type, batch.count
             self.log("Got {} nodes to launch.".format(count))
+            retrying = False
             try:
-                self._launch_node(config, count, node_type)
-            except Exception:
+                self._launch_node(batch.config, count, node_type, batch.placement)
+                self.scheduler.complete(batch)
+            except Exception as e:
+                retrying = self.scheduler.complete(batch, e)
+                if retrying:
+                    self.prometheus_metrics.node_launch_retries.inc()
+                    self.event_summarizer.add_once_per_interval(
+                        message="Insufficient capacity to launch nodes of type {}."
+                                " Retrying with backoff.".format(node_type),
+                        key="Insufficient capacity for {}.".format(node_type),
+                        interval_s=60)
+                    self.log("Launching {} nodes of type {} failed for capacity (attempt {}),"
+                             " retrying: {}".format(count, node_type, batch.attempt, e))
+                    continue
                 self.prometheus_metrics.node_launch_exceptions.inc()
                 self.prometheus_metrics.failed_create_nodes.inc(count)
                 self.event_summarizer.add(
@@ -102,8 +142,9 @@ class NodeLauncher(threading.Thread):
                     interval_s=60)
                 logger.exception("Launch failed")
             finally:
-                self.pending.dec(node_type, count)
-                self.prometheus_metrics.pending_nodes.set(self.pending.value)
+                if not retrying:
+                    self.pending.dec(node_type, count)
+                    self.prometheus_metrics.pending_nodes.set(self.pending.value)
 
     def log(self, statement):
         prefix = "NodeLauncher{}:".format(self.index)
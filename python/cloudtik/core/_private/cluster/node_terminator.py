@@ -0,0 +1,161 @@
+"""Terminating nodes with batched and parallel provider requests.
+
+The nodes are added to the terminator when they are ready to terminate (for
+example, after the services and the docker containers on them are stopped).
+The terminator collects them into batches of the max number of nodes which
+the provider can terminate in one request and issues the requests in
+parallel, so that the termination overlaps with stopping the other nodes.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from cloudtik.core._private.constants import MAX_PARALLEL_TERMINATE_REQUESTS
+from cloudtik.core.node_provider import NodeProvider
+
+logger = logging.getLogger(__name__)
+
+# The seconds to wait for more nodes before terminating a partial batch
+TERMINATE_BATCH_LINGER_S = 1
+TERMINATE_POLL_MIN_INTERVAL_S = 0.5
+TERMINATE_POLL_MAX_INTERVAL_S = 5
+
+
+def get_terminate_batch_size(provider: NodeProvider) -> Optional[int]:
+    """The number of nodes to terminate in one request (None for unlimited)."""
+    max_terminate_nodes = provider.max_terminate_nodes
+    if max_terminate_nodes is not None:
+        return max(1, max_terminate_nodes)
+    if type(provider).terminate_nodes is NodeProvider.terminate_nodes:
+        # The default terminate_nodes terminates nodes one by one,
+        # terminate each node in a request of its own in parallel.
+        return 1
+    return None
+
+
+def split_batches(nodes: List[str], batch_size: Optional[int]) -> List[List[str]]:
+    if not batch_size:
+        return [nodes] if nodes else []
+    return [nodes[start:start + batch_size]
+            for start in range(0, len(nodes), batch_size)]
+
+
+class NodeTerminator:
+    """Terminate the nodes added in batches with parallel requests."""
+
+    def __init__(self, provider: NodeProvider,
+                 max_parallel_requests: Optional[int] = None,
+                 linger: float = TERMINATE_BATCH_LINGER_S):
+        self.provider = provider
+        self.batch_size = get_terminate_batch_size(provider)
+        self.linger = linger
+        self.num_requests = 0
+        self.num_failed_requests = 0
+        # The nodes requested to terminate
+        self.requested = set()
+        self._pending = []
+        self._lock = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_parallel_requests or MAX_PARALLEL_TERMINATE_REQUESTS)
+        self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+        self._flusher.start()
+
+    def add(self, node_id: str):
+        with self._lock:
+            self._pending.append(node_id)
+            if self.batch_size and len(self._pending) >= self.batch_size:
+                self._submit_batches(full_only=True)
+
+    def close(self):
+        """Terminate the pending nodes and wait for all the requests done."""
+        with self._lock:
+            self._closed = True
+            self._submit_batches()
+            self._lock.notify_all()
+        self._flusher.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run_flusher(self):
+        with self._lock:
+            while not self._closed:
+                self._lock.wait(timeout=self.linger)
+                if self._pending:
+                    self._submit_batches()
+
+    def _submit_batches(self, full_only=False):
+        batches = split_batches(self._pending, self.batch_size)
+        if full_only and batches and len(batches[-1]) < self.batch_size:
+            self._pending = batches.pop()
+        else:
+            self._pending = []
+        for batch in batches:
+            self.num_requests += 1
+            self.requested.update(batch)
+            self._executor.submit(self._terminate_batch, batch)
+
+    def _terminate_batch(self, batch):
+        try:
+            self.provider.terminate_nodes(batch)
+        except Exception as e:
+            # The nodes left are terminated again when polling
+            with self._lock:
+                self.num_failed_requests += 1
+            logger.warning("Failed to terminate {} nodes: {}".format(
+                len(batch), str(e)))
+
+
+def terminate_nodes_in_batches(provider: NodeProvider, nodes: List[str],
+                               max_parallel_requests: Optional[int] = None):
+    with NodeTerminator(
+            provider, max_parallel_requests=max_parallel_requests) as terminator:
+        for node_id in nodes:
+            terminator.add(node_id)
+
+
+def wait_for_nodes_terminated(
+        provider: NodeProvider,
+        remaining_nodes: Callable[[], List[str]],
+        on_waiting: Optional[Callable[[List[str], float], None]] = None,
+        requested: Optional[Iterable[str]] = None,
+        min_interval: float = TERMINATE_POLL_MIN_INTERVAL_S,
+        max_interval: float = TERMINATE_POLL_MAX_INTERVAL_S) -> Tuple[int, float]:
+    """Wait until no nodes remaining with exponential backoff polling.
+
+    The nodes remaining are requested to terminate again once the polling
+    interval has reached the max (in case some requests were lost) and the
+    nodes newly found are requested right away. The nodes already requested
+    by the caller (for example, by a NodeTerminator) are passed in with
+    requested so that they are not requested again right away.
+
+    Returns:
+        The number of the polls and the seconds waited.
+    """
+    start = time.time()
+    num_polls = 0
+    interval = min_interval
+    requested = set(requested) if requested else set()
+    nodes = remaining_nodes()
+    while nodes:
+        to_terminate = nodes if interval >= max_interval else [
+            node for node in nodes if node not in requested]
+        if to_terminate:
+            terminate_nodes_in_batches(provider, to_terminate)
+            requested.update(to_terminate)
+
+        if provider.wait_for_terminated(nodes, timeout=interval) is None:
+            time.sleep(interval)
+        num_polls += 1
+        nodes = remaining_nodes()
+        if on_waiting is not None:
+            on_waiting(nodes, time.time() - start)
+        interval = min(interval * 2, max_interval)
+    return num_polls, time.time() - start
@@ -1,6 +1,7 @@
 import logging
 from typing import Optional
 
+from cloudtik.core._private.cluster.controller_profiler import StepTimer
 from cloudtik.core._private.cluster.scaling_policies import _create_scaling_policy, ScalingWithResources
 from cloudtik.core._private.state.scaling_state import ScalingStateClient, ScalingState
 from cloudtik.core._private.utils import merge_scaling_state, RUNTIME_CONFIG_KEY, \
@@ -8,6 +9,9 @@ from cloudtik.core._private.utils import merge_scaling_state, RUNTIME_CONFIG_KEY
 
 logger = logging.getLogger(__name__)
 
+# The step timer without metrics for updating without a step timer
+_NULL_STEP_TIMER = StepTimer()
+
 
 class ResourceScalingPolicy:
     def __init__(self,
@@ -42,12 +46,16 @@ class ResourceScalingPolicy:
 
         return self._get_default_scaling_policy(config, self.head_ip)
 
-    def update(self):
+    def update(self, step_timer=None):
         # Pulling data from resource management system
-        scaling_state = self.get_scaling_state()
+        if step_timer is None:
+            step_timer = _NULL_STEP_TIMER
+        with step_timer.step("fetch_scaling_state"):
+            scaling_state = self.get_scaling_state()
         if scaling_state is not None:
-            self.scaling_state_client.update_scaling_state(
-                scaling_state)
+            with step_timer.step("update_scaling_state"):
+                self.scaling_state_client.update_scaling_state(
+                    scaling_state)
 
     def get_scaling_state(self) -> Optional[ScalingState]:
         if self.scaling_policy is None:
@@ -0,0 +1,609 @@
+"""Offline scaling simulation and benchmark of the cluster scaler.
+
+A real ClusterScaler is driven against an in-process simulated node provider
+on a virtual clock. The nodes boot with scripted delays and may fail to boot.
+The resource demands come from a synthetic demand trace and are placed on the
+running workers. The unplaced demands and the node resources are fed to the
+scaler as the scaling state snapshots which are otherwise collected from the
+control state by the ScalingStateClient.
+
+The virtual clock runs in the past of the wall clock so that the scaler makes
+the heartbeat and idle decisions as of the time of the snapshots.
+
+Run the benchmark with:
+    python -m cloudtik.core._private.cluster.scaling_simulator --nodes 10 100 1000
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
+from cloudtik.core._private.cluster.cluster_metrics_updater import ClusterMetricsUpdater, \
+    ScalingStateSnapshot
+from cloudtik.core._private.cluster.cluster_scaler import ClusterScaler
+from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
+from cloudtik.core._private.cluster.resource_scaling_policy import ResourceScalingPolicy
+from cloudtik.core._private.state.scaling_state import ClusterHeartbeatState, \
+    NodeHeartbeatState
+from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.scaling_policy import ScalingState
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD, NODE_KIND_WORKER, \
+    CLOUDTIK_TAG_USER_NODE_TYPE, CLOUDTIK_TAG_NODE_STATUS, STATUS_UP_TO_DATE
+
+logger = logging.getLogger(__name__)
+
+ResourceDict = Dict[str, float]
+# The demand trace: the resource bundles demanded from a virtual time (in
+# seconds from the start) until the next entry
+DemandTrace = List[Tuple[float, List[ResourceDict]]]
+
+SIMULATED_HEAD_NODE_TYPE = "head.simulated"
+SIMULATED_WORKER_NODE_TYPE = "worker.simulated"
+
+DEFAULT_CYCLE_INTERVAL_S = 5
+DEFAULT_BOOT_DELAY_S = 60
+# The time for scaling down the idle nodes at the end of the benchmark
+SCALE_DOWN_TIME_S = 180
+
+
+class SimulatedClock:
+    """The virtual clock of a simulation."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.now = start
+
+    def elapsed(self) -> float:
+        return self.now - self.start
+
+
+class SimulatedNodeProvider(NodeProvider):
+    """An in-process node provider with the nodes booting on a virtual clock.
+
+    The nodes are running and up-to-date once booted as the node updaters are
+    disabled in the simulation. The calls to the provider are counted by method.
+    """
+
+    def __init__(self,
+                 clock: SimulatedClock,
+                 boot_delay_s: Union[float, Callable[[str, random.Random], float]]
+                 = DEFAULT_BOOT_DELAY_S,
+                 boot_failure_rate: float = 0.0,
+                 create_failures: int = 0,
+                 seed: int = 0):
+        """
+        Args:
+            clock: The virtual clock.
+            boot_delay_s: The seconds to boot a node, or a function of the
+                node type and the random generator returning the seconds.
+            boot_failure_rate: The fraction of the nodes which fail to boot
+                and are terminated.
+            create_failures: The number of the first create calls to fail.
+            seed: The seed of the random generator.
+        """
+        super().__init__({"type": "simulated"}, "simulated")
+        self.clock = clock
+        self.boot_delay_s = boot_delay_s
+        self.boot_failure_rate = boot_failure_rate
+        self.create_failures = create_failures
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.num_launched = 0
+        self.num_boot_failures = 0
+        self.lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._next_id = 0
+
+    def _count(self, method):
+        with self.lock:
+            self.calls[method] += 1
+
+    def _new_node(self, tags, boot_time, fails=False):
+        node_id = "sim-{}".format(self._next_id)
+        self._nodes[node_id] = {
+            "tags": dict(tags),
+            "state": "pending",
+            "ip": "10.{}.{}.{}".format(
+                self._next_id >> 16 & 255, self._next_id >> 8 & 255, self._next_id & 255),
+            "boot_time": boot_time,
+            "fails": fails,
+        }
+        self._next_id += 1
+        return node_id
+
+    def _get_boot_delay(self, node_type):
+        if callable(self.boot_delay_s):
+            return self.boot_delay_s(node_type, self.random)
+        return self.boot_delay_s
+
+    def add_head_node(self):
+        """Add the running head node of the simulated cluster."""
+        with self.lock:
+            node_id = self._new_node({
+                CLOUDTIK_TAG_NODE_KIND: NODE_KIND_HEAD,
+                CLOUDTIK_TAG_USER_NODE_TYPE: SIMULATED_HEAD_NODE_TYPE,
+                CLOUDTIK_TAG_NODE_STATUS: STATUS_UP_TO_DATE}, self.clock.now)
+        self.advance()
+        return node_id
+
+    def advance(self):
+        """Boot or fail the nodes which are due on the virtual clock."""
+        with self.lock:
+            for node in self._nodes.values():
+                if node["state"] != "pending" or node["boot_time"] > self.clock.now:
+                    continue
+                if node["fails"]:
+                    node["state"] = "terminated"
+                    self.num_boot_failures += 1
+                else:
+                    node["state"] = "running"
+                    node["tags"][CLOUDTIK_TAG_NODE_STATUS] = STATUS_UP_TO_DATE
+
+    def get_nodes(self, states) -> Dict[str, Dict[str, Any]]:
+        """The nodes in the states (without counting as a provider call)."""
+        with self.lock:
+            return {node_id: dict(node, tags=dict(node["tags"]))
+                    for node_id, node in self._nodes.items() if node["state"] in states}
+
+    def non_terminated_nodes(self, tag_filters):
+        self._count("non_terminated_nodes")
+        with self.lock:
+            return [node_id for node_id, node in self._nodes.items()
+                    if node["state"] != "terminated" and all(
+                        node["tags"].get(k) == v for k, v in tag_filters.items())]
+
+    def is_running(self, node_id):
+        self._count("is_running")
+        with self.lock:
+            return self._nodes[node_id]["state"] == "running"
+
+    def is_terminated(self, node_id):
+        self._count("is_terminated")
+        with self.lock:
+            return self._nodes[node_id]["state"] == "terminated"
+
+    def node_tags(self, node_id):
+        self._count("node_tags")
+        with self.lock:
+            return dict(self._nodes[node_id]["tags"])
+
+    def internal_ip(self, node_id):
+        self._count("internal_ip")
+        with self.lock:
+            return self._nodes[node_id]["ip"]
+
+    def external_ip(self, node_id):
+        self._count("external_ip")
+        return None
+
+    def create_node(self, node_config, tags, count):
+        self._count("create_node")
+        with self.lock:
+            if self.create_failures > 0:
+                self.create_failures -= 1
+                raise RuntimeError("Simulated failure of creating nodes.")
+            node_type = tags.get(CLOUDTIK_TAG_USER_NODE_TYPE)
+            for _ in range(count):
+                boot_time = self.clock.now + self._get_boot_delay(node_type)
+                fails = self.random.random() < self.boot_failure_rate
+                self._new_node(tags, boot_time, fails)
+            self.num_launched += count
+
+    def set_node_tags(self, node_id, tags):
+        self._count("set_node_tags")
+        with self.lock:
+            self._nodes[node_id]["tags"].update(tags)
+
+    def terminate_node(self, node_id):
+        self._count("terminate_node")
+        with self.lock:
+            self._nodes[node_id]["state"] = "terminated"
+
+    def terminate_nodes(self, node_ids):
+        self._count("terminate_nodes")
+        with self.lock:
+            for node_id in node_ids:
+                self._nodes[node_id]["state"] = "terminated"
+
+    def with_environment_variables(self, node_type_config, node_id):
+        return {}
+
+    def get_node_info(self, node_id):
+        self._count("get_node_info")
+        with self.lock:
+            node = self._nodes[node_id]
+            return {
+                "node_id": node_id,
+                "instance_type": "simulated",
+                "private_ip": node["ip"],
+                "public_ip": None,
+                "instance_status": node["state"],
+            }
+
+
+class SimulatedScalingStateProducer:
+    """Serve the scaling state snapshot of the current simulation cycle."""
+
+    def __init__(self):
+        self.snapshot: Optional[ScalingStateSnapshot] = None
+
+    def get_latest(self, timeout: Optional[float] = None) -> Optional[ScalingStateSnapshot]:
+        return self.snapshot
+
+
+class SimulatedClusterScaler(ClusterScaler):
+    """The cluster scaler with the simulated provider and no runtime to publish to."""
+
+    def __init__(self, simulated_provider: SimulatedNodeProvider, *args, **kwargs):
+        self.simulated_provider = simulated_provider
+        super().__init__(*args, **kwargs)
+
+    def _apply_config(self, new_config):
+        if not self.provider:
+            self.provider = self.simulated_provider
+        super()._apply_config(new_config)
+
+    def _publish_runtime_configs(self):
+        return
+
+    def _publish_nodes_info(self, node_type, nodes_info, minimal_nodes_info):
+        return
+
+
+def get_simulation_config(max_workers: int,
+                          worker_resources: ResourceDict,
+                          idle_timeout_minutes: float = 1,
+                          upscaling_speed: float = 1.0) -> Dict[str, Any]:
+    """A cluster config of one worker node type for the simulation."""
+    return {
+        "cluster_name": "simulated",
+        "max_workers": max_workers,
+        "upscaling_speed": upscaling_speed,
+        "idle_timeout_minutes": idle_timeout_minutes,
+        "provider": {
+            "type": "simulated",
+            "disable_node_updaters": True,
+        },
+        "auth": {},
+        "head_node_type": SIMULATED_HEAD_NODE_TYPE,
+        "available_node_types": {
+            SIMULATED_HEAD_NODE_TYPE: {
+                "resources": {},
+                "node_config": {},
+                "max_workers": 0,
+            },
+            SIMULATED_WORKER_NODE_TYPE: {
+                "resources": dict(worker_resources),
+                "node_config": {},
+                "min_workers": 0,
+                "max_workers": max_workers,
+            },
+        },
+        "file_mounts": {},
+        "cluster_synced_files": [],
+        "file_mounts_sync_continuously": False,
+        "initialization_commands": [],
+        "setup_commands": [],
+        "head_setup_commands": [],
+        "worker_setup_commands": [],
+        "head_start_commands": [],
+        "worker_start_commands": [],
+        "merged_commands": {},
+    }
+
+
+def step_demand_trace(num_nodes: int,
+                      worker_resources: ResourceDict,
+                      hold_s: float,
+                      num_steps: int = 1) -> DemandTrace:
+    """Ramp up the demand for num_nodes workers in steps, hold and drop to none."""
+    trace = []
+    for step in range(1, num_steps + 1):
+        num_bundles = num_nodes * step // num_steps
+        trace.append(((step - 1) * hold_s, [dict(worker_resources)] * num_bundles))
+    trace.append((num_steps * hold_s, []))
+    return trace
+
+
+def _get_demand(trace: DemandTrace, elapsed: float) -> Tuple[int, List[ResourceDict]]:
+    """Return the index of the trace entry and the demands at the time."""
+    index, demands = -1, []
+    for i, (start, bundles) in enumerate(trace):
+        if start > elapsed:
+            break
+        index, demands = i, bundles
+    return index, demands
+
+
+def _fits(available: ResourceDict, bundle: ResourceDict) -> bool:
+    return all(available.get(k, 0) >= v for k, v in bundle.items())
+
+
+def _place_demands(available_by_node: Dict[str, ResourceDict],
+                   demands: List[ResourceDict]) -> List[ResourceDict]:
+    """Place the demands on the nodes (first fit). Return the unplaced."""
+    unplaced = []
+    node_ids = list(available_by_node)
+    next_node = 0
+    for bundle in demands:
+        # The demands are mostly of the same shape, start from the last fit
+        for i in range(len(node_ids)):
+            node_id = node_ids[(next_node + i) % len(node_ids)]
+            available = available_by_node[node_id]
+            if _fits(available, bundle):
+                for k, v in bundle.items():
+                    available[k] -= v
+                next_node = (next_node + i) % len(node_ids)
+                break
+        else:
+            unplaced.append(bundle)
+    return unplaced
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+@dataclass
+class ScalingSimulationReport:
+    num_nodes: int
+    num_cycles: int
+    cycle_latency_p50_s: float
+    cycle_latency_p99_s: float
+    cycle_latency_max_s: float
+    # Virtual seconds from each increase of the demands to all placed
+    # (None if not reached)
+    time_to_capacity_s: List[Optional[float]]
+    # The fraction of the worker resources over the demands
+    over_provisioning_avg: float
+    over_provisioning_peak: float
+    peak_workers: int
+    num_launched: int
+    num_boot_failures: int
+    provider_calls: Dict[str, int]
+    # The total seconds of the scaler steps
+    step_times: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def num_provider_calls(self) -> int:
+        return sum(self.provider_calls.values())
+
+    def summary(self) -> str:
+        ttc = [("{:.0f}".format(t) if t is not None else "never")
+               for t in self.time_to_capacity_s]
+        return ("{} nodes: cycle latency p50 {:.3f}s p99 {:.3f}s max {:.3f}s, "
+                "time to capacity {}s, over-provisioning avg {:.1%} peak {:.1%}, "
+                "peak workers {}, launched {} ({} failed to boot), {} provider calls".format(
+                    self.num_nodes, self.cycle_latency_p50_s, self.cycle_latency_p99_s,
+                    self.cycle_latency_max_s, "/".join(ttc), self.over_provisioning_avg,
+                    self.over_provisioning_peak, self.peak_workers, self.num_launched,
+                    self.num_boot_failures, self.num_provider_calls))
+
+
+class ScalingSimulator:
+    """Drive a cluster scaler with a demand trace on a simulated provider."""
+
+    def __init__(self,
+                 config: Dict[str, Any],
+                 provider: SimulatedNodeProvider,
+                 trace: DemandTrace,
+                 cycle_interval_s: float = DEFAULT_CYCLE_INTERVAL_S,
+                 launch_timeout_s: float = 60):
+        """
+        Args:
+            config: The cluster config. See get_simulation_config.
+            provider: The simulated provider with its virtual clock.
+            trace: The demand trace.
+            cycle_interval_s: The virtual seconds between the scaler cycles.
+            launch_timeout_s: The wall seconds to wait for the launches of a cycle.
+        """
+        self.config = config
+        self.provider = provider
+        self.clock = provider.clock
+        self.trace = trace
+        self.cycle_interval_s = cycle_interval_s
+        self.launch_timeout_s = launch_timeout_s
+        self.head_id = provider.add_head_node()
+        self.producer = SimulatedScalingStateProducer()
+        cluster_metrics = ClusterMetrics()
+        event_summarizer = EventSummarizer()
+        self.scaler = SimulatedClusterScaler(
+            provider,
+            lambda config_hash: (None, None) if config_hash else (
+                config, "simulated"),
+            cluster_metrics,
+            ClusterMetricsUpdater(cluster_metrics, event_summarizer, None),
+            ResourceScalingPolicy(None, None),
+            session_name="simulated",
+            update_interval_s=0,
+            event_summarizer=event_summarizer,
+            scaling_state_producer=self.producer)
+
+    def _worker_resources(self, node) -> ResourceDict:
+        node_type = node["tags"].get(CLOUDTIK_TAG_USER_NODE_TYPE)
+        return self.config["available_node_types"][node_type]["resources"]
+
+    def _get_snapshot(self, demands) -> Tuple[ScalingStateSnapshot, List[ResourceDict]]:
+        now = self.clock.now
+        running = self.provider.get_nodes(["running"])
+        heartbeat_state = ClusterHeartbeatState()
+        available_by_node = {}
+        for node_id, node in running.items():
+            heartbeat_state.add_heartbeat_state(
+                node_id, NodeHeartbeatState(node_id, node["ip"], now))
+            if node["tags"][CLOUDTIK_TAG_NODE_KIND] == NODE_KIND_WORKER:
+                available_by_node[node_id] = dict(self._worker_resources(node))
+        unplaced = _place_demands(available_by_node, demands)
+
+        scaling_state = ScalingState()
+        for node_id, available in available_by_node.items():
+            node = running[node_id]
+            total = self._worker_resources(node)
+            scaling_state.add_node_resource_state(node_id, {
+                "node_id": node_id,
+                "node_ip": node["ip"],
+                "resource_time": now,
+                "total_resources": total,
+                "available_resources": available,
+                "resource_load": {"in_use": available != total},
+            })
+        scaling_state.set_autoscaling_instructions({
+            "scaling_time": now,
+            "resource_demands": unplaced,
+        })
+        snapshot = ScalingStateSnapshot(
+            time=now,
+            cluster_heartbeat_state=heartbeat_state,
+            scaling_state=scaling_state,
+            resource_requests=None)
+        return snapshot, unplaced
+
+    def _wait_for_launches(self):
+        deadline = time.time() + self.launch_timeout_s
+        while self.scaler.pending_launches.value > 0 and time.time() < deadline:
+            time.sleep(0.001)
+
+    def _get_worker_capacity(self) -> Tuple[int, ResourceDict]:
+        num_workers = 0
+        capacity = {}
+        for node in self.provider.get_nodes(["pending", "running"]).values():
+            if node["tags"][CLOUDTIK_TAG_NODE_KIND] != NODE_KIND_WORKER:
+                continue
+            num_workers += 1
+            for k, v in self._worker_resources(node).items():
+                capacity[k] = capacity.get(k, 0) + v
+        return num_workers, capacity
+
+    def run(self, duration_s: float) -> ScalingSimulationReport:
+        """Run the scaler cycles for the virtual seconds."""
+        latencies = []
+        step_times = Counter()
+        over_provisioning = []
+        peak_workers = 0
+        # The trace index and the start time of the unmet demand increases
+        increases = {}
+        time_to_capacity = {}
+        last_demand = 0
+        last_index = -1
+        num_cycles = int(duration_s // self.cycle_interval_s)
+        self.provider.calls.clear()
+        for _ in range(num_cycles):
+            self.provider.advance()
+            elapsed = self.clock.elapsed()
+            index, demands = _get_demand(self.trace, elapsed)
+            if index != last_index:
+                if len(demands) > last_demand:
+                    increases[index] = elapsed
+                    time_to_capacity[index] = None
+                last_demand = len(demands)
+                last_index = index
+
+            snapshot, unplaced = self._get_snapshot(demands)
+            if not unplaced and index in increases:
+                time_to_capacity[index] = elapsed - increases.pop(index)
+
+            self.producer.snapshot = snapshot
+            start = time.perf_counter()
+            self.scaler.run()
+            latencies.append(time.perf_counter() - start)
+            step_times.update(self.scaler.step_timer.step_times)
+            self._wait_for_launches()
+
+            num_workers, capacity = self._get_worker_capacity()
+            peak_workers = max(peak_workers, num_workers)
+            demanded = {}
+            for bundle in demands:
+                for k, v in bundle.items():
+                    demanded[k] = demanded.get(k, 0) + v
+            ratios = [capacity.get(k, 0) / v - 1 for k, v in demanded.items() if v > 0]
+            if ratios:
+                over_provisioning.append(max(0.0, min(ratios)))
+            self.clock.now += self.cycle_interval_s
+
+        return ScalingSimulationReport(
+            num_nodes=self.config["max_workers"],
+            num_cycles=num_cycles,
+            cycle_latency_p50_s=_percentile(latencies, 50),
+            cycle_latency_p99_s=_percentile(latencies, 99),
+            cycle_latency_max_s=max(latencies, default=0.0),
+            time_to_capacity_s=[time_to_capacity[i] for i in sorted(time_to_capacity)],
+            over_provisioning_avg=(sum(over_provisioning) / len(over_provisioning)
+                                   if over_provisioning else 0.0),
+            over_provisioning_peak=max(over_provisioning, default=0.0),
+            peak_workers=peak_workers,
+            num_launched=self.provider.num_launched,
+            num_boot_failures=self.provider.num_boot_failures,
+            provider_calls=dict(self.provider.calls),
+            step_times=dict(step_times))
+
+
+def run_benchmark(num_nodes: int,
+                  worker_resources: Optional[ResourceDict] = None,
+                  boot_delay_s: float = DEFAULT_BOOT_DELAY_S,
+                  boot_failure_rate: float = 0.0,
+                  num_steps: int = 1,
+                  hold_s: Optional[float] = None,
+                  cycle_interval_s: float = DEFAULT_CYCLE_INTERVAL_S,
+                  seed: int = 0) -> ScalingSimulationReport:
+    """Scale a simulated cluster up to num_nodes workers and down to none."""
+    if worker_resources is None:
+        worker_resources = {"CPU": 4}
+    if hold_s is None:
+        # Long enough to reach the capacity with the upscaling speed
+        hold_s = 20 * (boot_delay_s + cycle_interval_s)
+    # Started in the past so that the virtual clock stays behind the wall clock
+    duration_s = num_steps * hold_s + SCALE_DOWN_TIME_S
+    clock = SimulatedClock(time.time() - duration_s - 1)
+    provider = SimulatedNodeProvider(
+        clock, boot_delay_s=boot_delay_s,
+        boot_failure_rate=boot_failure_rate, seed=seed)
+    simulator = ScalingSimulator(
+        get_simulation_config(num_nodes, worker_resources),
+        provider,
+        step_demand_trace(num_nodes, worker_resources, hold_s, num_steps),
+        cycle_interval_s=cycle_interval_s)
+    return simulator.run(duration_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the cluster scaler on a simulated cluster.")
+    parser.add_argument(
+        "--nodes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+        help="The cluster sizes to scale up to.")
+    parser.add_argument(
+        "--boot-delay", type=float, default=DEFAULT_BOOT_DELAY_S,
+        help="The virtual seconds to boot a node.")
+    parser.add_argument(
+        "--boot-failure-rate", type=float, default=0.0,
+        help="The fraction of the nodes failing to boot.")
+    parser.add_argument(
+        "--steps", type=int, default=1,
+        help="The number of the steps to ramp up the demands.")
+    parser.add_argument(
+        "--json", action="store_true", default=False,
+        help="Print the reports in json.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    for num_nodes in args.nodes:
+        report = run_benchmark(
+            num_nodes, boot_delay_s=args.boot_delay,
+            boot_failure_rate=args.boot_failure_rate, num_steps=args.steps)
+        if args.json:
+            print(json.dumps(asdict(report)))
+        else:
+            print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
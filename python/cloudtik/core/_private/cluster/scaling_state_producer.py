@@ -0,0 +1,70 @@
+"""Collect the scaling state in background for the cluster scaler.
+
+Fetching the scaling state from the scaling policy (for example, the REST API
+of YARN), publishing it and reading the heartbeats and resource states from
+Redis all block on I/O. The producer runs them in a background thread and
+publishes an immutable, timestamped snapshot after each round. The cluster
+scaler applies the latest snapshot without waiting, so a slow endpoint no
+longer stalls the scaler loop such as terminating the failed nodes.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from cloudtik.core._private.cluster.cluster_metrics_updater import ClusterMetricsUpdater, \
+    ScalingStateSnapshot
+from cloudtik.core._private.cluster.controller_profiler import StepTimer
+from cloudtik.core._private.cluster.resource_scaling_policy import ResourceScalingPolicy
+from cloudtik.core._private.constants import CLOUDTIK_UPDATE_INTERVAL_S
+
+logger = logging.getLogger(__name__)
+
+
+class ScalingStateProducer(threading.Thread):
+    """Produce the scaling state snapshots in a background thread."""
+
+    def __init__(self,
+                 resource_scaling_policy: ResourceScalingPolicy,
+                 cluster_metrics_updater: ClusterMetricsUpdater,
+                 update_interval_s: float = CLOUDTIK_UPDATE_INTERVAL_S,
+                 prometheus_metrics=None):
+        super().__init__(name="ScalingStateProducer", daemon=True)
+        self.resource_scaling_policy = resource_scaling_policy
+        self.cluster_metrics_updater = cluster_metrics_updater
+        self.update_interval_s = update_interval_s
+        self.step_timer = StepTimer(prometheus_metrics)
+        self._latest: Optional[ScalingStateSnapshot] = None
+        self._lock = threading.Lock()
+        self._published = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            start_time = time.time()
+            self.produce()
+            self._stop_event.wait(
+                max(0.0, self.update_interval_s - (time.time() - start_time)))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def produce(self):
+        self.step_timer.reset()
+        try:
+            self.resource_scaling_policy.update(self.step_timer)
+        except Exception:
+            logger.exception("Error in updating the scaling state of the scaling policy.")
+
+        with self.step_timer.step("collect_scaling_state"):
+            snapshot = self.cluster_metrics_updater.collect()
+        with self._lock:
+            self._latest = snapshot
+        self._published.set()
+
+    def get_latest(self, timeout: Optional[float] = None) -> Optional[ScalingStateSnapshot]:
+        """Return the latest snapshot. Wait for the first one up to timeout if specified."""
+        if timeout:
+            self._published.wait(timeout)
+        with self._lock:
+            return self._latest
@@ -0,0 +1,164 @@
+"""Keep a warm pool of stopped nodes which are set up for scale-out.
+
+For a node type with `warm_pool_size` in the config, the nodes for the pool
+are launched with the warm pool tag "filling". They are set up by the node
+updaters as the other workers (without the start commands) but are not
+regarded as workers of the cluster. Once up-to-date, they are stopped and
+tagged "warm". When scaling up, the provider resumes the stopped nodes first
+in create_node() removing the warm pool tags, and the node updater skips the
+setup since the runtime hash is already applied and runs the start commands.
+
+The warm nodes older than `warm_pool_max_age` seconds or with an outdated
+launch or runtime config are terminated and replaced.
+"""
+import logging
+import time
+from typing import Any, Callable, Dict, List
+
+from cloudtik.core._private.cluster.launch_scheduler import LaunchScheduler
+from cloudtik.core._private.cluster.node_launcher import NodeLauncher
+from cloudtik.core._private.core_utils import ConcurrentCounter
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_WORKER, \
+    CLOUDTIK_TAG_USER_NODE_TYPE, CLOUDTIK_TAG_NODE_STATUS, STATUS_UP_TO_DATE, \
+    CLOUDTIK_TAG_WARM_POOL, WARM_POOL_FILLING, WARM_POOL_WARM, CLOUDTIK_TAG_WARM_POOL_TIME
+
+logger = logging.getLogger(__name__)
+
+
+def get_warm_pool_sizes(config: Dict[str, Any]) -> Dict[str, int]:
+    return {node_type: node_type_config["warm_pool_size"]
+            for node_type, node_type_config in config["available_node_types"].items()
+            if node_type_config.get("warm_pool_size", 0) > 0}
+
+
+def _get_warm_time(node_tags):
+    try:
+        return float(node_tags[CLOUDTIK_TAG_WARM_POOL_TIME])
+    except (KeyError, ValueError):
+        return None
+
+
+class WarmPool:
+    """Maintain the warm pool nodes of the node types."""
+
+    def __init__(self,
+                 provider,
+                 event_summarizer,
+                 is_node_up_to_date: Callable[[str, Dict[str, str]], bool],
+                 session_name=None):
+        """
+        Args:
+            provider: The node provider which supports the warm pool.
+            event_summarizer: The event summarizer of the cluster scaler.
+            is_node_up_to_date: Check the launch and runtime config of a node
+                with the node id and the node tags.
+        """
+        self.provider = provider
+        self.event_summarizer = event_summarizer
+        self.is_node_up_to_date = is_node_up_to_date
+        self.session_name = session_name
+        # The nodes launching for the pool (not in the pending launches of
+        # the cluster scaler as they are not for the resource demands)
+        self.pending = ConcurrentCounter()
+        self.launch_scheduler = LaunchScheduler(provider)
+        self.launcher = None
+
+    def _launch(self, config, count, node_type):
+        if self.launcher is None:
+            self.launcher = NodeLauncher(
+                provider=self.provider,
+                scheduler=self.launch_scheduler,
+                pending=self.pending,
+                event_summarizer=self.event_summarizer,
+                session_name=self.session_name,
+                node_types=config["available_node_types"],
+                index="WarmPool",
+                node_tags={CLOUDTIK_TAG_WARM_POOL: WARM_POOL_FILLING})
+            self.launcher.daemon = True
+            self.launcher.start()
+        logger.info("Cluster Controller: Launching {} nodes of type {} "
+                    "for the warm pool.".format(count, node_type))
+        self.pending.inc(node_type, count)
+        self.launch_scheduler.add(config, count, node_type)
+
+    def update(self, config: Dict[str, Any], filling_node_ids: List[str],
+               updating_node_ids, now: float = None) -> List[str]:
+        """Stop the filled nodes and launch the nodes to fill the pool.
+
+        Returns the ids of the filling nodes which are stopped.
+        """
+        if now is None:
+            now = time.time()
+        stopped = self._stop_filled_nodes(filling_node_ids, updating_node_ids, now)
+
+        filling = {}
+        for node_id in filling_node_ids:
+            if node_id in stopped:
+                continue
+            node_type = self.provider.node_tags(node_id).get(CLOUDTIK_TAG_USER_NODE_TYPE)
+            filling[node_type] = filling.get(node_type, 0) + 1
+
+        pending = self.pending.breakdown()
+        for node_type, size in get_warm_pool_sizes(config).items():
+            max_age = config["available_node_types"][node_type].get(
+                "warm_pool_max_age", 0)
+            num_warm = self._prune_warm_nodes(node_type, size, max_age, now)
+            num_nodes = num_warm + filling.get(node_type, 0) + pending.get(node_type, 0)
+            if num_nodes < size:
+                self._launch(config, size - num_nodes, node_type)
+        return stopped
+
+    def _stop_filled_nodes(self, filling_node_ids, updating_node_ids, now):
+        filled_node_ids = []
+        for node_id in filling_node_ids:
+            if node_id in updating_node_ids:
+                continue
+            node_tags = self.provider.node_tags(node_id)
+            if node_tags.get(CLOUDTIK_TAG_NODE_STATUS) == STATUS_UP_TO_DATE:
+                filled_node_ids.append(node_id)
+        if not filled_node_ids:
+            return []
+
+        logger.info("Cluster Controller: Stopping {} set up nodes "
+                    "into the warm pool.".format(len(filled_node_ids)))
+        for node_id in filled_node_ids:
+            self.provider.set_node_tags(node_id, {
+                CLOUDTIK_TAG_WARM_POOL: WARM_POOL_WARM,
+                CLOUDTIK_TAG_WARM_POOL_TIME: str(int(now))})
+        self.provider.stop_nodes(filled_node_ids)
+        return filled_node_ids
+
+    def _prune_warm_nodes(self, node_type, size, max_age, now) -> int:
+        """Terminate the expired, outdated or extra warm nodes. Return the number left."""
+        stopped_nodes = self.provider.stopped_nodes({
+            CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER,
+            CLOUDTIK_TAG_USER_NODE_TYPE: node_type})
+
+        to_terminate = []
+        # The nodes stopped by the warm pool (by the warm time)
+        warm_nodes = []
+        num_warm = 0
+        for node_id, node_tags in stopped_nodes.items():
+            warm_time = _get_warm_time(node_tags)
+            if not self.is_node_up_to_date(node_id, node_tags):
+                to_terminate.append(node_id)
+            elif warm_time is not None and max_age and now - warm_time > max_age:
+                to_terminate.append(node_id)
+            else:
+                num_warm += 1
+                if warm_time is not None:
+                    warm_nodes.append((warm_time, node_id))
+
+        # The nodes stopped at scaling down are resumable as well and are
+        # left to the provider
+        num_extra = min(num_warm - size, len(warm_nodes))
+        if num_extra > 0:
+            warm_nodes.sort()
+            to_terminate += [node_id for _, node_id in warm_nodes[:num_extra]]
+            num_warm -= num_extra
+
+        if to_terminate:
+            logger.info("Cluster Controller: Terminating {} expired or outdated "
+                        "warm pool nodes of type {}.".format(len(to_terminate), node_type))
+            self.provider.terminate_stopped_nodes(to_terminate)
+        return num_warm
@@ -1,7 +1,7 @@
 import copy
 from getpass import getuser
 from shlex import quote
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 import click
 import hashlib
 import json
@@ -22,7 +22,9 @@ from cloudtik.core._private.docker import check_bind_mounts_cmd, \
     check_docker_running_cmd, \
     check_docker_image, \
     docker_start_cmds, \
-    with_docker_exec, get_configured_docker_image
+    with_docker_exec, get_configured_docker_image, docker_pull_cmd, \
+    docker_pull_if_needed_cmd, docker_pre_pull_cmd, docker_status_script, \
+    parse_docker_status
 from cloudtik.core._private.log_timer import LogTimer
 
 from cloudtik.core._private.subprocess_output_util import (
@@ -852,22 +854,25 @@ class DockerCommandExecutor(CommandExecutor):
             with_output=True)
         cleaned_output = output.decode().strip()
         if no_exist in cleaned_output or "docker" not in cleaned_output:
-            if self.docker_cmd == "docker":
-                install_commands = [
-                    "curl -fsSL https://get.docker.com -o get-docker.sh",
-                    "sudo sh get-docker.sh", "sudo usermod -aG docker $USER",
-                    "sudo systemctl restart docker -f"
-                ]
-            else:
-                install_commands = [
-                    "sudo apt-get update", "sudo apt-get -y install podman"
-                ]
+            self._report_docker_not_installed()
+
+    def _report_docker_not_installed(self):
+        if self.docker_cmd == "docker":
+            install_commands = [
+                "curl -fsSL https://get.docker.com -o get-docker.sh",
+                "sudo sh get-docker.sh", "sudo usermod -aG docker $USER",
+                "sudo systemctl restart docker -f"
+            ]
+        else:
+            install_commands = [
+                "sudo apt-get update", "sudo apt-get -y install podman"
+            ]
 
-            logger.error(
-                f"{self.docker_cmd.capitalize()} not installed. You can "
-                f"install {self.docker_cmd.capitalize()} by adding the "
-                "following commands to 'initialization_commands':\n" +
-                "\n".join(install_commands))
+        logger.error(
+            f"{self.docker_cmd.capitalize()} not installed. You can "
+            f"install {self.docker_cmd.capitalize()} by adding the "
+            "following commands to 'initialization_commands':\n" +
+            "\n".join(install_commands))
 
     def _check_container_status(self):
         if self.initialized:
@@ -897,21 +902,28 @@ class DockerCommandExecutor(CommandExecutor):
         return string
 
     def _check_if_container_restart_is_needed(
-            self, image: str, cleaned_bind_mounts: Dict[str, str]) -> bool:
+            self, image: str, cleaned_bind_mounts: Dict[str, str],
+            docker_status: Optional[Dict[str, Any]] = None) -> bool:
         re_init_required = False
-        running_image = self.run(
-            check_docker_image(self.container_name, self.docker_cmd),
-            with_output=True,
-            run_env="host").decode("utf-8").strip()
+        if docker_status is not None:
+            running_image = docker_status["running_image"]
+        else:
+            running_image = self.run(
+                check_docker_image(self.container_name, self.docker_cmd),
+                with_output=True,
+                run_env="host").decode("utf-8").strip()
         if running_image != image:
             self.cli_logger.error(
                 "A container with name {} is running image {} instead " +
                 "of {} (which was provided in the YAML)", self.container_name,
                 running_image, image)
-        mounts = self.run(
-            check_bind_mounts_cmd(self.container_name, self.docker_cmd),
-            with_output=True,
-            run_env="host").decode("utf-8").strip()
+        if docker_status is not None:
+            mounts = docker_status["mounts"]
+        else:
+            mounts = self.run(
+                check_bind_mounts_cmd(self.container_name, self.docker_cmd),
+                with_output=True,
+                run_env="host").decode("utf-8").strip()
         try:
             active_mounts = json.loads(mounts)
             active_remote_mounts = {
@@ -945,19 +957,19 @@ class DockerCommandExecutor(CommandExecutor):
         ]
 
         specific_image = get_configured_docker_image(self.docker_config, as_head)
-
-        self._check_docker_installed()
-        if self.docker_config.get("pull_before_run", True):
-            assert specific_image, "Image must be included in config if " + \
-                "pull_before_run is specified"
-            self.run(
-                "{} pull {}".format(self.docker_cmd, specific_image),
-                run_env="host")
-        else:
-
-            self.run(f"{self.docker_cmd} image inspect {specific_image} "
-                     "1> /dev/null  2>&1 || "
-                     f"{self.docker_cmd} pull {specific_image}")
+        pull_cmd = self._get_pull_cmd(specific_image, file_mounts)
+
+        # The status of docker checked by one remote call if fast init enabled
+        docker_status = None
+        if self.docker_config.get("fast_init", True):
+            docker_status = self._get_docker_status(specific_image, pull_cmd)
+        if docker_status is None:
+            self._check_docker_installed()
+            self.run(pull_cmd, run_env="host")
+        elif not docker_status["installed"]:
+            self._report_docker_not_installed()
+            # This fails in the same way as without fast init
+            self.run(pull_cmd, run_env="host")
 
         # Bootstrap files cannot be bind mounted because docker opens the
         # underlying inode. When the file is switched, docker becomes outdated.
@@ -967,15 +979,20 @@ class DockerCommandExecutor(CommandExecutor):
 
         docker_run_executed = False
 
-        container_running = self._check_container_status()
+        if docker_status is not None:
+            container_running = docker_status["running"] == "true"
+        else:
+            container_running = self._check_container_status()
         requires_re_init = False
         if container_running:
             requires_re_init = self._check_if_container_restart_is_needed(
-                specific_image, cleaned_bind_mounts)
+                specific_image, cleaned_bind_mounts, docker_status)
             if requires_re_init:
                 self.run(
                     f"{self.docker_cmd} stop {self.container_name}",
                     run_env="host")
+            elif docker_status is not None and docker_status["home"]:
+                self.home_dir = docker_status["home"]
 
         if (not container_running) or requires_re_init:
             if not sync_run_yet:
@@ -985,10 +1002,13 @@ class DockerCommandExecutor(CommandExecutor):
                 # `root` as the owner.
                 return True
             # Get home directory
-            image_env = self.ssh_command_executor.run(
-                f"{self.docker_cmd} " + "inspect -f '{{json .Config.Env}}' " +
-                specific_image,
-                with_output=True).decode().strip()
+            if docker_status is not None:
+                image_env = docker_status["image_env"]
+            else:
+                image_env = self.ssh_command_executor.run(
+                    f"{self.docker_cmd} " + "inspect -f '{{json .Config.Env}}' " +
+                    specific_image,
+                    with_output=True).decode().strip()
             home_directory = "/root"
             try:
                 for env_var in json.loads(image_env):
@@ -1002,7 +1022,7 @@ class DockerCommandExecutor(CommandExecutor):
                 )
                 raise e
 
-            host_data_disks = self._get_host_data_disks()
+            host_data_disks = self._get_host_data_disks(docker_status)
             user_docker_run_options = self.docker_config.get(
                 "run_options", []) + self.docker_config.get(
                     f"{'head' if as_head else 'worker'}_run_options", [])
@@ -1011,7 +1031,9 @@ class DockerCommandExecutor(CommandExecutor):
                 cleaned_bind_mounts, host_data_disks, self.container_name,
                 self._configure_runtime(
                     self._auto_configure_shm(user_docker_run_options,
-                                             shared_memory_ratio)),
+                                             shared_memory_ratio,
+                                             docker_status),
+                    docker_status),
                 self.ssh_command_executor.cluster_name, home_directory,
                 self.docker_cmd)
             self.run(start_command, run_env="host")
@@ -1062,15 +1084,76 @@ class DockerCommandExecutor(CommandExecutor):
         self.initialized = True
         return docker_run_executed
 
+    def run_pre_init(self, *, as_head: bool) -> None:
+        if not self.docker_config.get("pre_pull", False):
+            return
+        if self.docker_config.get("image_tarball"):
+            # The image tarball is available after the file mounts synced
+            return
+        specific_image = get_configured_docker_image(self.docker_config, as_head)
+        if not specific_image:
+            return
+        pull_cmd = self._get_pull_cmd(specific_image, {})
+        if not self.docker_config.get("pull_before_run", True):
+            pull_cmd = docker_pull_if_needed_cmd(
+                specific_image, self.docker_cmd, pull_cmd)
+        try:
+            self.ssh_command_executor.run(
+                docker_pre_pull_cmd(self.container_name, pull_cmd))
+        except Exception as e:
+            logger.warning(
+                f"Failed to start pulling image {specific_image} in background: {e}")
+
     def bootstrap_data_disks(self) -> None:
         """Used to format and mount data disks on host."""
         # For docker command executor, call directly on host command executor
         self.ssh_command_executor.bootstrap_data_disks()
 
-    def _configure_runtime(self, run_options: List[str]) -> List[str]:
+    def _get_pull_cmd(self, image: str, file_mounts: Dict[str, str]) -> str:
+        assert image, "Image must be included in config"
+        image_tarball = self.docker_config.get("image_tarball")
+        if image_tarball and image_tarball in file_mounts:
+            # The tarball is synced from head as file mounts
+            image_tarball = os.path.join(
+                self._get_docker_host_mount_location(
+                    self.ssh_command_executor.cluster_name),
+                image_tarball.lstrip("/"))
+        pull_cmd = docker_pull_cmd(
+            image, self.docker_cmd,
+            image_mirror=self.docker_config.get("image_mirror"),
+            image_tarball=image_tarball)
+        if self.docker_config.get("pull_before_run", True):
+            return pull_cmd
+        return docker_pull_if_needed_cmd(image, self.docker_cmd, pull_cmd)
+
+    def _get_docker_status(self, image: str,
+                           pull_cmd: str) -> Optional[Dict[str, Any]]:
+        # Get the image and check all the status in one call
+        output = self.ssh_command_executor.run(
+            docker_status_script(
+                image, self.container_name, self.docker_cmd,
+                pull_cmd, CLOUDTIK_DATA_DISK_MOUNT_POINT),
+            with_output=True,
+            cmd_to_print="{} status check".format(self.docker_cmd))
+        docker_status = parse_docker_status(output.decode("utf-8", errors="replace"))
+        if docker_status is None:
+            logger.debug("Failed to get docker status. Check one by one.")
+        return docker_status
+
+    def _configure_runtime(self, run_options: List[str],
+                           docker_status: Optional[Dict[str, Any]] = None) -> List[str]:
         if self.docker_config.get("disable_automatic_runtime_detection"):
             return run_options
 
+        if docker_status is not None:
+            if "nvidia-container-runtime" not in docker_status["runtimes"]:
+                return run_options
+            if docker_status["gpu_available"]:
+                return run_options + ["--runtime=nvidia"]
+            logger.warning(
+                "Nvidia Container Runtime is present, but no GPUs found.")
+            return run_options
+
         runtime_output = self.ssh_command_executor.run(
             f"{self.docker_cmd} " + "info -f '{{.Runtimes}}' ",
             with_output=True).decode().strip()
@@ -1087,7 +1170,8 @@ class DockerCommandExecutor(CommandExecutor):
         return run_options
 
     def _auto_configure_shm(self, run_options: List[str],
-                            shared_memory_ratio: float) -> List[str]:
+                            shared_memory_ratio: float,
+                            docker_status: Optional[Dict[str, Any]] = None) -> List[str]:
         if self.docker_config.get("disable_shm_size_detection"):
             return run_options
         for run_opt in run_options:
@@ -1099,12 +1183,15 @@ class DockerCommandExecutor(CommandExecutor):
         if shared_memory_ratio == 0:
             return run_options
         try:
-            shm_output = self.ssh_command_executor.run(
-                "cat /proc/meminfo || true",
-                with_output=True).decode().strip()
-            available_memory = int([
-                ln for ln in shm_output.split("\n") if "MemAvailable" in ln
-            ][0].split()[1])
+            if docker_status is not None:
+                available_memory = int(docker_status["mem_available"])
+            else:
+                shm_output = self.ssh_command_executor.run(
+                    "cat /proc/meminfo || true",
+                    with_output=True).decode().strip()
+                available_memory = int([
+                    ln for ln in shm_output.split("\n") if "MemAvailable" in ln
+                ][0].split()[1])
             available_memory_bytes = available_memory * 1024
             # Overestimate SHM size by 10%
             shm_size = int(min((available_memory_bytes *
@@ -1125,12 +1212,15 @@ class DockerCommandExecutor(CommandExecutor):
         from cloudtik.core.api import get_docker_host_mount_location
         return get_docker_host_mount_location(cluster_name)
 
-    def _get_host_data_disks(self):
+    def _get_host_data_disks(self, docker_status: Optional[Dict[str, Any]] = None):
         mount_point = CLOUDTIK_DATA_DISK_MOUNT_POINT
-        data_disks_string = self.run(
-            "([ -d {} ] && ls --color=no {}) || true".format(mount_point, mount_point),
-            with_output=True,
-            run_env="host").decode("utf-8").strip()
+        if docker_status is not None:
+            data_disks_string = docker_status["data_disks"].strip()
+        else:
+            data_disks_string = self.run(
+                "([ -d {} ] && ls --color=no {}) || true".format(mount_point, mount_point),
+                with_output=True,
+                run_env="host").decode("utf-8").strip()
         if data_disks_string is None or data_disks_string == "":
             return []
 
@@ -1,21 +1,107 @@
 import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class _Loading:
+    """The loading of a key which the other getters of the key wait for."""
+    def __init__(self, generation):
+        self.generation = generation
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
 
 
 class ConcurrentObjectCache:
     """An object cache which is thread safe.
+
+    The value of a key is loaded once by the first getter while the getters
+    of the same key wait for it. The loading doesn't block the other keys.
+    Optionally, the least recently used entries are evicted beyond max_size
+    and the entries expire after ttl_s seconds.
     """
-    def __init__(self):
-        self._lock = threading.RLock()
-        self._cache = {}
+    def __init__(self, max_size: Optional[int] = None, ttl_s: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        # key -> (value, load time)
+        self._cache = OrderedDict()
+        self._loading: Dict[Any, _Loading] = {}
+        # Increased on clear so that the loads started before are not cached
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _is_expired(self, load_time, now):
+        return self.ttl_s is not None and now - load_time >= self.ttl_s
 
     def get(self, key, load_function, **load_args):
         with self._lock:
-            if key in self._cache:
-                return self._cache[key]
-            value = load_function(**load_args)
-            self._cache[key] = value
-            return value
+            entry = self._cache.get(key)
+            if entry is not None:
+                value, load_time = entry
+                if not self._is_expired(load_time, time.time()):
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._cache[key]
+                self._expirations += 1
+            self._misses += 1
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = _Loading(self._generation)
+                self._loading[key] = loading
+                is_loader = True
+            else:
+                is_loader = False
+
+        if not is_loader:
+            loading.done.wait()
+            if loading.error is not None:
+                raise loading.error
+            return loading.value
+
+        try:
+            loading.value = load_function(**load_args)
+        except BaseException as e:
+            loading.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._loading.get(key) is loading:
+                    del self._loading[key]
+                if loading.error is None and loading.generation == self._generation:
+                    self._put(key, loading.value)
+            loading.done.set()
+        return loading.value
+
+    def _put(self, key, value):
+        self._cache[key] = (value, time.time())
+        self._cache.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
 
     def clear(self):
         with self._lock:
-            self._cache = {}
+            self._cache = OrderedDict()
+            self._loading = {}
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
@@ -28,6 +28,8 @@ CLOUDTIK_DEFAULT_PORT = 6789
 
 # The environment variable name for specify the address
 CLOUDTIK_ADDRESS_ENV = "CLOUDTIK_ADDRESS"
+# The environment variable name for specify the redis password
+CLOUDTIK_REDIS_PASSWORD_ENV = "CLOUDTIK_REDIS_PASSWORD"
 
 # The default password to prevent redis port scanning attack.
 CLOUDTIK_REDIS_DEFAULT_PASSWORD = "434C4F554454494B"
@@ -57,6 +59,14 @@ LOGGING_ROTATE_MAX_BYTES = 512 * 1024 * 1024  # 512MB.
 LOGGING_ROTATE_BACKUP_COUNT = 5  # 5 Backup files at max.
 
 HEALTHCHECK_EXPIRATION_S = os.environ.get("CLOUDTIK_HEALTHCHECK_EXPIRATION_S", 10)
+# The seconds to cache the result of the cluster health check (0 to disable)
+CLOUDTIK_HEALTH_CHECK_CACHE_TTL_S = env_integer("CLOUDTIK_HEALTH_CHECK_CACHE_TTL_S", 5)
+
+# The maximum numbers of the provider and runtime instances, and the runtime
+# hashes cached in a process. The least recently used are evicted beyond.
+CLOUDTIK_PROVIDER_CACHE_MAX_SIZE = env_integer("CLOUDTIK_PROVIDER_CACHE_MAX_SIZE", 32)
+CLOUDTIK_RUNTIME_CACHE_MAX_SIZE = env_integer("CLOUDTIK_RUNTIME_CACHE_MAX_SIZE", 64)
+CLOUDTIK_HASH_CACHE_MAX_SIZE = env_integer("CLOUDTIK_HASH_CACHE_MAX_SIZE", 256)
 
 # The KV namespace of health check
 CLOUDTIK_KV_NAMESPACE_HEALTHCHECK = "healthcheck"
@@ -123,9 +133,22 @@ CLOUDTIK_MAX_LAUNCH_BATCH = env_integer("CLOUDTIK_MAX_LAUNCH_BATCH", 5)
 CLOUDTIK_MAX_CONCURRENT_LAUNCHES = env_integer(
     "CLOUDTIK_MAX_CONCURRENT_LAUNCHES", 10)
 
+# The max number of retries for a launch failed for insufficient capacity
+CLOUDTIK_LAUNCH_CAPACITY_RETRIES = env_integer("CLOUDTIK_LAUNCH_CAPACITY_RETRIES", 3)
+# The base seconds of the backoff to retry a launch failed for insufficient capacity
+CLOUDTIK_LAUNCH_RETRY_BACKOFF_S = env_integer("CLOUDTIK_LAUNCH_RETRY_BACKOFF_S", 10)
+
 # Interval at which to perform autoscaling updates.
 CLOUDTIK_UPDATE_INTERVAL_S = env_integer("CLOUDTIK_UPDATE_INTERVAL_S", 5)
 
+# Whether to profile the controller loop and dump the profiles of the slowest cycles
+CLOUDTIK_CONTROLLER_PROFILE = env_bool("CLOUDTIK_CONTROLLER_PROFILE", False)
+# Profile one in this number of controller cycles
+CLOUDTIK_CONTROLLER_PROFILE_SAMPLE_INTERVAL = env_integer(
+    "CLOUDTIK_CONTROLLER_PROFILE_SAMPLE_INTERVAL", 1)
+# The number of the slowest controller cycles to keep the profiles
+CLOUDTIK_CONTROLLER_PROFILE_TOP_N = env_integer("CLOUDTIK_CONTROLLER_PROFILE_TOP_N", 5)
+
 # We will attempt to restart on nodes it hasn't heard from
 # in more than this interval.
 CLOUDTIK_HEARTBEAT_TIMEOUT_S = env_integer("CLOUDTIK_HEARTBEAT_TIMEOUT_S", 30)
@@ -150,6 +173,24 @@ CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE = 1000
 CLOUDTIK_METRIC_PORT = env_integer("CLOUDTIK_METRIC_PORT", 44217)
 CLOUDTIK_METRIC_ADDRESS_KEY = "ControllerMetricsAddress"
 
+# Port of the node agent running on each node for executing commands
+# and querying node information without SSH and CLI process overhead
+CLOUDTIK_NODE_AGENT_PORT = env_integer("CLOUDTIK_NODE_AGENT_PORT", 6790)
+# Timeout for connecting and sending requests to the node agent
+CLOUDTIK_NODE_AGENT_TIMEOUT_S = env_integer("CLOUDTIK_NODE_AGENT_TIMEOUT_S", 10)
+# The file on head of the random token of the cluster for authenticating
+# the requests to the node agents
+CLOUDTIK_NODE_AGENT_TOKEN_FILE = "~/cloudtik_node_agent_token"
+
+# The default max number of jobs in the job queue running concurrently
+CLOUDTIK_JOB_QUEUE_MAX_CONCURRENCY = env_integer("CLOUDTIK_JOB_QUEUE_MAX_CONCURRENCY", 8)
+# The interval of the job scheduler to update the log offsets of running jobs
+CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S = env_integer("CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S", 5)
+# The time to keep the finished jobs in the job queue
+CLOUDTIK_JOB_QUEUE_RETENTION_S = env_integer("CLOUDTIK_JOB_QUEUE_RETENTION_S", 7 * 24 * 3600)
+# The interval of the job scheduler to prune the expired jobs
+CLOUDTIK_JOB_SCHEDULER_PRUNE_INTERVAL_S = env_integer("CLOUDTIK_JOB_SCHEDULER_PRUNE_INTERVAL_S", 600)
+
 CLOUDTIK_RESOURCE_REQUESTS = b"cloudtik_resource_requests"
 
 # Number of attempts to ping the Redis server. See
@@ -171,6 +212,8 @@ CLOUDTIK_PROCESSES = [
     ["cloudtik_cluster_controller.py", False, "ClusterController", "head"],
     ["cloudtik_node_monitor_service.py", False, "NodeMonitor", "node"],
     ["cloudtik_log_monitor_service.py", False, "LogMonitor", "node"],
+    ["cloudtik_node_agent_service.py", False, "NodeAgent", "node"],
+    ["cloudtik_job_scheduler.py", False, "JobScheduler", "head"],
     ["cloudtik-redis-server", False, "RedisServer", "head"],
 ]
 
@@ -180,11 +223,26 @@ MAX_PARALLEL_SHUTDOWN_WORKERS = env_integer("MAX_PARALLEL_SHUTDOWN_WORKERS",
                                          50)
 # Max Concurrent SSH Calls to run on nodes
 MAX_PARALLEL_EXEC_NODES = env_integer("MAX_PARALLEL_EXEC_NODES", 50)
+# Max Concurrent provider calls to get the node information
+MAX_PARALLEL_NODE_INFO_QUERIES = env_integer("MAX_PARALLEL_NODE_INFO_QUERIES", 32)
+# Max Concurrent provider requests to terminate nodes
+MAX_PARALLEL_TERMINATE_REQUESTS = env_integer("MAX_PARALLEL_TERMINATE_REQUESTS", 8)
+# The seconds for a task to complete on a node when running on nodes in parallel (0 for no timeout)
+PARALLEL_EXEC_NODE_TIMEOUT_S = env_integer("PARALLEL_EXEC_NODE_TIMEOUT_S", 0)
+# The max retries of a task on a node failed to connect when running on nodes in parallel
+PARALLEL_EXEC_NODE_RETRIES = env_integer("PARALLEL_EXEC_NODE_RETRIES", 2)
+# The seconds between the progress reports when running on nodes in parallel
+PARALLEL_EXEC_PROGRESS_INTERVAL_S = env_integer("PARALLEL_EXEC_PROGRESS_INTERVAL_S", 5)
+
+# The environment types to run a command: on host or in docker container
+RUN_ENV_TYPES = ["auto", "host", "docker"]
 
 # Constants used to define the different process types.
 PROCESS_TYPE_CLUSTER_CONTROLLER = "cloudtik_cluster_controller"
 PROCESS_TYPE_NODE_MONITOR = "cloudtik_node_monitor"
 PROCESS_TYPE_LOG_MONITOR = "cloudtik_log_monitor"
+PROCESS_TYPE_NODE_AGENT = "cloudtik_node_agent"
+PROCESS_TYPE_JOB_SCHEDULER = "cloudtik_job_scheduler"
 PROCESS_TYPE_REAPER = "cloudtik_process_reaper"
 PROCESS_TYPE_REDIS_SERVER = "redis_server"
 
@@ -192,6 +250,8 @@ PROCESS_TYPE_REDIS_SERVER = "redis_server"
 LOG_FILE_NAME_CLUSTER_CONTROLLER = f"{PROCESS_TYPE_CLUSTER_CONTROLLER}.log"
 LOG_FILE_NAME_NODE_MONITOR = f"{PROCESS_TYPE_NODE_MONITOR}.log"
 LOG_FILE_NAME_LOG_MONITOR = f"{PROCESS_TYPE_LOG_MONITOR}.log"
+LOG_FILE_NAME_NODE_AGENT = f"{PROCESS_TYPE_NODE_AGENT}.log"
+LOG_FILE_NAME_JOB_SCHEDULER = f"{PROCESS_TYPE_JOB_SCHEDULER}.log"
 
 # Cluster Scaler events are denoted by the ":event_summary:" magic token.
 LOG_PREFIX_EVENT_SUMMARY = ":event_summary:"
@@ -229,12 +289,19 @@ CLOUDTIK_CLUSTER_STATUS_RUNNING = "RUNNING"
 CLOUDTIK_WAIT_FOR_CLUSTER_READY_TIMEOUT_S = env_integer("CLOUDTIK_WAIT_FOR_CLUSTER_READY_TIMEOUT_S", 600)
 CLOUDTIK_WAIT_FOR_CLUSTER_READY_INTERVAL_S = env_integer("CLOUDTIK_WAIT_FOR_CLUSTER_READY_INTERVAL_S", 5)
 CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S = env_integer("CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S", 5)
+# The max time of a single blocking wait for the job exit events.
+# The session and Spark job waiters also check the job status in
+# CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S in case the event is lost.
+CLOUDTIK_JOB_EVENT_WAIT_S = env_integer("CLOUDTIK_JOB_EVENT_WAIT_S", 60)
+# The time to keep the job exit events in Redis
+CLOUDTIK_JOB_EVENT_TTL_S = env_integer("CLOUDTIK_JOB_EVENT_TTL_S", 24 * 3600)
 
 # Cloudtik env exported for running commands
 CLOUDTIK_RUNTIME_ENV_RUNTIMES = "CLOUDTIK_RUNTIMES"
 CLOUDTIK_RUNTIME_ENV_HEAD_IP = "CLOUDTIK_HEAD_IP"
 CLOUDTIK_RUNTIME_ENV_NODE_IP = "CLOUDTIK_NODE_IP"
 CLOUDTIK_RUNTIME_ENV_SECRETS = "CLOUDTIK_SECRETS"
+CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN = "CLOUDTIK_NODE_AGENT_TOKEN"
 CLOUDTIK_RUNTIME_ENV_NODE_NUMBER = "CLOUDTIK_NODE_NUMBER"
 CLOUDTIK_RUNTIME_ENV_NODE_TYPE = "CLOUDTIK_NODE_TYPE"
 CLOUDTIK_RUNTIME_ENV_PROVIDER_TYPE = "CLOUDTIK_PROVIDER_TYPE"
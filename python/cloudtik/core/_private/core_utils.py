@@ -82,6 +82,11 @@ def double_quote(s):
     return '"' + s.replace('"', '"\'"\'"') + '"'
 
 
+def with_script_args(cmds, script_args):
+    if script_args:
+        cmds += [double_quote(script_arg) for script_arg in list(script_args)]
+
+
 def try_make_directory_shared(directory_path):
     try:
         os.chmod(directory_path, 0o0777)
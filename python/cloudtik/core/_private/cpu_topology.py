@@ -0,0 +1,125 @@
+"""Discover the CPU topology of a node from sysfs.
+
+The topology is returned in the lines of 'lscpu --parse=CPU,Core,Socket,Node'
+output so that it can be used in place of lscpu. The node monitor publishes
+the topology of each node to the cluster state once so that the topology of
+remote nodes can be read without a command round trip for each node.
+"""
+import json
+import logging
+import os
+import re
+import subprocess
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYSFS_SYSTEM_PATH = "/sys/devices/system"
+LSCPU_PARSE_COMMAND = ["lscpu", "--parse=CPU,Core,Socket,Node"]
+LSCPU_PARSE_HEADER = "# CPU,Core,Socket,Node"
+
+# The user state table of the CPU topology of the nodes by node ip
+CPU_TOPOLOGY_TABLE = "cpu_topology"
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """Parse the cpu list format of sysfs such as '0-3,8,10-11'."""
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _read(path) -> str:
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _get_online_cpus(cpu_path):
+    online_path = os.path.join(cpu_path, "online")
+    if os.path.exists(online_path):
+        return parse_cpu_list(_read(online_path))
+    return sorted(int(name[3:]) for name in os.listdir(cpu_path)
+                  if re.match(r"^cpu\d+$", name))
+
+
+def _get_cpu_numa_nodes(node_path) -> Dict[int, int]:
+    cpu_nodes = {}
+    if not os.path.isdir(node_path):
+        return cpu_nodes
+    for name in os.listdir(node_path):
+        if not re.match(r"^node\d+$", name):
+            continue
+        cpu_list_path = os.path.join(node_path, name, "cpulist")
+        if not os.path.exists(cpu_list_path):
+            continue
+        for cpu in parse_cpu_list(_read(cpu_list_path)):
+            cpu_nodes[cpu] = int(name[4:])
+    return cpu_nodes
+
+
+def get_sysfs_cpu_topology(sysfs_path: str = SYSFS_SYSTEM_PATH) -> Optional[List[str]]:
+    """Read the CPU topology from sysfs. Return None if not available.
+
+    The core ids of sysfs are unique in a socket only. The cores are numbered
+    across the sockets in the order of the CPUs as lscpu does.
+    """
+    cpu_path = os.path.join(sysfs_path, "cpu")
+    try:
+        cpus = _get_online_cpus(cpu_path)
+        cpu_nodes = _get_cpu_numa_nodes(os.path.join(sysfs_path, "node"))
+        core_ids = {}
+        lines = [LSCPU_PARSE_HEADER]
+        for cpu in cpus:
+            topology_path = os.path.join(cpu_path, "cpu{}".format(cpu), "topology")
+            socket = int(_read(os.path.join(topology_path, "physical_package_id")))
+            core_key = (socket, int(_read(os.path.join(topology_path, "core_id"))))
+            core = core_ids.setdefault(core_key, len(core_ids))
+            node = cpu_nodes.get(cpu)
+            lines.append("{},{},{},{}".format(
+                cpu, core, socket, "" if node is None else node))
+    except (OSError, ValueError) as e:
+        logger.debug("Failed to read CPU topology from sysfs: {}".format(str(e)))
+        return None
+    if not cpus:
+        return None
+    return lines
+
+
+def get_lscpu_cpu_topology() -> List[str]:
+    env = os.environ.copy()
+    env["LANG"] = "C"
+    output = subprocess.check_output(
+        LSCPU_PARSE_COMMAND, env=env, universal_newlines=True)
+    return output.split("\n")
+
+
+def get_cpu_topology() -> List[str]:
+    """Return the CPU topology of this node from sysfs or lscpu as fallback."""
+    lines = get_sysfs_cpu_topology()
+    if lines is None:
+        lines = get_lscpu_cpu_topology()
+    return lines
+
+
+def publish_cpu_topology(control_state, node_ip: str, lines: List[str]):
+    cpu_topology_table = control_state.get_user_state_table(CPU_TOPOLOGY_TABLE)
+    cpu_topology_table.put(node_ip, json.dumps(lines))
+
+
+def get_published_cpu_topologies(
+        control_state, node_ips: List[str]) -> Dict[str, List[str]]:
+    """Return the published CPU topology of the nodes which are available."""
+    cpu_topology_table = control_state.get_user_state_table(CPU_TOPOLOGY_TABLE)
+    cpu_topologies = {}
+    for node_ip in node_ips:
+        value = cpu_topology_table.get(node_ip)
+        if value is not None:
+            cpu_topologies[node_ip] = json.loads(value)
+    return cpu_topologies
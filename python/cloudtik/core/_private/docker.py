@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from typing import Any, Dict
 
@@ -146,3 +147,138 @@ def get_versioned_image(image):
         return image
 
     return "{}:{}".format(image, cloudtik.__version__)
+
+
+def get_mirrored_image(image, image_mirror):
+    """Return the name of the image in the registry mirror.
+
+    The registry host of the image (if any) is replaced by the mirror and
+    the official images of Docker Hub are in the 'library' namespace.
+    """
+    if not image_mirror:
+        return image
+    parts = image.split("/", 1)
+    if len(parts) == 1:
+        image = "library/" + image
+    elif "." in parts[0] or ":" in parts[0] or parts[0] == "localhost":
+        image = parts[1]
+    return "{}/{}".format(image_mirror.rstrip("/"), image)
+
+
+def docker_pull_cmd(image, docker_cmd, image_mirror=None, image_tarball=None):
+    """The command to get the image with fallbacks in the order of the image
+    tarball on host, the registry mirror and the registry of the image."""
+    pull_cmd = "{} pull {}".format(docker_cmd, image)
+    if image_mirror:
+        mirrored_image = get_mirrored_image(image, image_mirror)
+        pull_cmd = "({docker} pull {mirrored} && {docker} tag {mirrored} {image}) || {pull}".format(
+            docker=docker_cmd, mirrored=mirrored_image, image=image, pull=pull_cmd)
+    if image_tarball:
+        pull_cmd = "([ -f {tarball} ] && {docker} load -i {tarball}) || {pull}".format(
+            docker=docker_cmd, tarball=quote(image_tarball), pull=pull_cmd)
+    return pull_cmd
+
+
+def docker_pull_if_needed_cmd(image, docker_cmd, pull_cmd):
+    return "{docker} image inspect {image} 1> /dev/null  2>&1 || ({pull})".format(
+        docker=docker_cmd, image=image, pull=pull_cmd)
+
+
+def _get_pre_pull_file_prefix(container_name):
+    return "/tmp/cloudtik-docker-pull-{}".format(container_name)
+
+
+def docker_pre_pull_cmd(container_name, pull_cmd):
+    """The command to start pulling the image in background.
+
+    The process id and the exit status of the pulling are written to files
+    for the docker status script to wait and check.
+    """
+    file_prefix = _get_pre_pull_file_prefix(container_name)
+    pull_script = "{pull}; echo $? > {prefix}.status.tmp && " \
+                  "mv {prefix}.status.tmp {prefix}.status".format(
+                      pull=pull_cmd, prefix=file_prefix)
+    return "rm -f {prefix}.status && nohup bash -c {script} " \
+           "> {prefix}.log 2>&1 < /dev/null & echo $! > {prefix}.pid".format(
+               prefix=file_prefix, script=quote(pull_script))
+
+
+DOCKER_STATUS_MARKER = "CLOUDTIK_DOCKER_STATUS:"
+
+# The variables and the _pull function are defined before this script.
+# The output of pulling goes to stderr and the status is printed as a JSON
+# line with the marker at the end.
+DOCKER_STATUS_SCRIPT = r"""
+_json_str() {
+    printf '"%s"' "$(printf '%s' "$1" | tr -d '\r' | sed -e 's/\\/\\\\/g' -e 's/"/\\"/g' -e 's/\t/\\t/g' | awk '{printf "%s%s", (NR > 1 ? "\\n" : ""), $0}')"
+}
+if [ -f "$PRE_PULL_FILE_PREFIX.pid" ]; then
+    pre_pull_pid=$(cat "$PRE_PULL_FILE_PREFIX.pid")
+    while kill -0 "$pre_pull_pid" 2>/dev/null; do sleep 1; done
+fi
+pre_pull_status=$(cat "$PRE_PULL_FILE_PREFIX.status" 2>/dev/null)
+rm -f "$PRE_PULL_FILE_PREFIX.pid" "$PRE_PULL_FILE_PREFIX.status"
+if ! command -v "$DOCKER" >/dev/null 2>&1; then
+    echo "$STATUS_MARKER{\"installed\": false}"
+    exit 0
+fi
+if [ "$pre_pull_status" != "0" ]; then
+    _pull 1>&2 || exit $?
+fi
+running=$("$DOCKER" inspect -f '{{.State.Running}}' "$CONTAINER" 2>/dev/null)
+running_image=""
+mounts=""
+home=""
+if [ "$running" = "true" ]; then
+    running_image=$("$DOCKER" inspect -f '{{.Config.Image}}' "$CONTAINER" 2>/dev/null)
+    mounts=$("$DOCKER" inspect -f '{{json .Mounts}}' "$CONTAINER" 2>/dev/null)
+    home=$("$DOCKER" exec "$CONTAINER" printenv HOME 2>/dev/null)
+fi
+image_env=$("$DOCKER" inspect -f '{{json .Config.Env}}' "$IMAGE" 2>/dev/null)
+data_disks=""
+if [ -d "$DATA_DISK_MOUNT_POINT" ]; then
+    data_disks=$(ls --color=no "$DATA_DISK_MOUNT_POINT")
+fi
+runtimes=$("$DOCKER" info -f '{{.Runtimes}}' 2>/dev/null)
+gpu_available=false
+case "$runtimes" in
+    *nvidia-container-runtime*) nvidia-smi >/dev/null 2>&1 && gpu_available=true ;;
+esac
+mem_available=$(awk '/^MemAvailable:/ {print $2}' /proc/meminfo 2>/dev/null)
+echo "$STATUS_MARKER{\"installed\": true, \"running\": $(_json_str "$running"), \"running_image\": $(_json_str "$running_image"), \"mounts\": $(_json_str "$mounts"), \"home\": $(_json_str "$home"), \"image_env\": $(_json_str "$image_env"), \"data_disks\": $(_json_str "$data_disks"), \"runtimes\": $(_json_str "$runtimes"), \"gpu_available\": $gpu_available, \"mem_available\": $(_json_str "$mem_available")}"
+"""
+
+
+def docker_status_script(image, container_name, docker_cmd,
+                         pull_cmd, data_disk_mount_point):
+    """The script getting the image and checking all the docker status
+    needed for starting the container in one remote call."""
+    variables = [
+        "DOCKER={}".format(quote(docker_cmd)),
+        "IMAGE={}".format(quote(image)),
+        "CONTAINER={}".format(quote(container_name)),
+        "DATA_DISK_MOUNT_POINT={}".format(quote(data_disk_mount_point)),
+        "PRE_PULL_FILE_PREFIX={}".format(
+            quote(_get_pre_pull_file_prefix(container_name))),
+        "STATUS_MARKER={}".format(quote(DOCKER_STATUS_MARKER)),
+        "_pull() {{ {}; }}".format(pull_cmd),
+    ]
+    return "\n".join(variables) + DOCKER_STATUS_SCRIPT
+
+
+def parse_docker_status(output):
+    """Parse the status from the output of the docker status script.
+
+    Returns:
+        The status dict or None if the status is not found or invalid.
+    """
+    for line in reversed(output.splitlines()):
+        pos = line.find(DOCKER_STATUS_MARKER)
+        if pos < 0:
+            continue
+        try:
+            status = json.loads(line[pos + len(DOCKER_STATUS_MARKER):].strip())
+        except ValueError:
+            return None
+        return status if isinstance(status, dict) else None
+    return None
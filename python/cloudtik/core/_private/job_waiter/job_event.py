@@ -0,0 +1,157 @@
+"""Job exit events published to the Redis of head.
+
+The command of an async job (running in a tmux or screen session) is wrapped
+to publish its exit code when it finishes. A job waiter blocks on the events
+with a timeout instead of polling the session status in a fixed interval.
+
+For each job (identified by the session name), there are two keys:
+- The exit key storing the exit code which can be checked at any time.
+- The notify list key which the waiters block on with BLPOP for wakeup.
+"""
+import json
+import logging
+import math
+from shlex import quote
+from typing import Any, Dict, List, Optional
+
+from cloudtik.core._private.constants import CLOUDTIK_JOB_EVENT_TTL_S, \
+    CLOUDTIK_REDIS_DEFAULT_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+JOB_EXIT_KEY_PREFIX = "cloudtik:job:exit:"
+JOB_NOTIFY_KEY_PREFIX = "cloudtik:job:notify:"
+
+JOB_EXIT_NOTIFY_VALUE = "exit"
+
+
+def _get_job_exit_key(session_name: str) -> str:
+    return JOB_EXIT_KEY_PREFIX + session_name
+
+
+def _get_job_notify_key(session_name: str) -> str:
+    return JOB_NOTIFY_KEY_PREFIX + session_name
+
+
+def with_job_exit_event(cmd: str, session_name: str) -> str:
+    """Wrap the command to publish the job exit event with its exit code.
+
+    The command runs in a subshell so that an exit or a failure with errexit
+    in the command doesn't skip the publishing which is done in the EXIT trap.
+    The hangup, interrupt and termination (for example, the session is killed)
+    exit with the conventional exit codes to be published. The exit code of
+    the command is kept as the exit code of the wrapped command and the failure
+    of the publishing is ignored.
+    """
+    return "__cloudtik_session_name={session_name}; " \
+           "trap 'cloudtik job-exit --session-name=\"$__cloudtik_session_name\" " \
+           "--exit-code=$? >/dev/null 2>&1' EXIT; " \
+           "trap 'exit 129' HUP; trap 'exit 130' INT; trap 'exit 143' TERM; " \
+           "__cloudtik_cmd={cmd}; " \
+           "( eval \"$__cloudtik_cmd\" )".format(
+               cmd=quote(cmd), session_name=quote(session_name))
+
+
+def publish_job_exit(redis_client, session_name: str, exit_code: int,
+                     ttl: Optional[int] = None):
+    if ttl is None:
+        ttl = CLOUDTIK_JOB_EVENT_TTL_S
+    exit_key = _get_job_exit_key(session_name)
+    notify_key = _get_job_notify_key(session_name)
+    pipe = redis_client.pipeline()
+    pipe.set(exit_key, str(exit_code), ex=ttl)
+    pipe.rpush(notify_key, JOB_EXIT_NOTIFY_VALUE)
+    pipe.expire(notify_key, ttl)
+    pipe.execute()
+
+
+def get_job_exits(redis_client, session_names: List[str]) -> Dict[str, int]:
+    """Get the exit codes of the jobs already exited."""
+    if not session_names:
+        return {}
+    exit_keys = [_get_job_exit_key(session_name)
+                 for session_name in session_names]
+    values = redis_client.mget(exit_keys)
+    job_exits = {}
+    for session_name, value in zip(session_names, values):
+        if value is None:
+            continue
+        try:
+            job_exits[session_name] = int(value)
+        except ValueError:
+            logger.warning("Invalid exit code of job {}: {}".format(
+                session_name, value))
+    return job_exits
+
+
+def wait_for_job_exits(redis_client, session_names: List[str],
+                       timeout: float) -> Dict[str, int]:
+    """Wait until any of the jobs exit or timeout.
+
+    Returns:
+        The exit codes of the jobs which have exited. Empty if timed out.
+    """
+    job_exits = get_job_exits(redis_client, session_names)
+    if job_exits or timeout <= 0:
+        return job_exits
+
+    notify_keys = [_get_job_notify_key(session_name)
+                   for session_name in session_names]
+    # Zero timeout for BLPOP means block forever
+    popped = redis_client.blpop(notify_keys, timeout=max(1, math.ceil(timeout)))
+    if popped is None:
+        return {}
+
+    # Push back the notification to wake up the other waiters of the job
+    notify_key, value = popped
+    pipe = redis_client.pipeline()
+    pipe.rpush(notify_key, value)
+    pipe.expire(notify_key, CLOUDTIK_JOB_EVENT_TTL_S)
+    pipe.execute()
+    return get_job_exits(redis_client, session_names)
+
+
+def _parse_job_exits(output: str) -> Optional[Dict[str, int]]:
+    # The JSON result is the last line of the output
+    for line in reversed(output.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return {session_name: int(exit_code)
+                        for session_name, exit_code in json.loads(line).items()}
+            except ValueError:
+                return None
+    return None
+
+
+def wait_for_job_exits_on_cluster(
+        config: Dict[str, Any], call_context,
+        session_names: List[str],
+        timeout: float) -> Optional[Dict[str, int]]:
+    """Wait until any of the jobs exit or timeout through the Redis of head.
+
+    On head, the Redis is accessed directly. Otherwise, the waiting is
+    executed on head through the 'cloudtik head wait-jobs' command.
+
+    Returns:
+        The exit codes of the jobs which have exited. Empty if timed out.
+        None if the job exit events are not available.
+    """
+    from cloudtik.core._private import services
+    from cloudtik.core._private.cluster.cluster_utils import run_on_cluster
+
+    try:
+        if config.get("bootstrapped", False):
+            redis_address = services.get_address_to_use_or_die()
+            redis_client = services.create_redis_client(
+                redis_address, CLOUDTIK_REDIS_DEFAULT_PASSWORD)
+            return wait_for_job_exits(redis_client, session_names, timeout)
+
+        cmd = "cloudtik head wait-jobs --session-names={} --timeout={}".format(
+            quote(",".join(session_names)), max(1, math.ceil(timeout)))
+        output = run_on_cluster(
+            config, call_context=call_context, cmd=cmd, with_output=True)
+        return _parse_job_exits(output) if output else None
+    except Exception as e:
+        logger.debug("Failed to wait for job exit events: {}".format(str(e)))
+        return None
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, List, Tuple
 
 from cloudtik.core.job_waiter import JobWaiter
 
@@ -16,5 +16,11 @@ class JobWaiterChain(JobWaiter):
         for job_waiter in self.job_waiters_in_chain:
             job_waiter.wait_for_completion(node_id, cmd, session_name, timeout)
 
+    def wait_for_completion_of_jobs(
+            self, jobs: List[Tuple[str, str, str]], timeout: Optional[int] = None):
+        # Each job waiter in the chain waits for all the jobs at once
+        for job_waiter in self.job_waiters_in_chain:
+            job_waiter.wait_for_completion_of_jobs(jobs, timeout)
+
     def append_job_waiter(self, job_waiter: JobWaiter):
         self.job_waiters_in_chain.append(job_waiter)
@@ -1,12 +1,17 @@
 import logging
 import os
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, List, Tuple
 
 from cloudtik.core._private.call_context import CallContext
 from cloudtik.core._private.cli_logger import cli_logger
 from cloudtik.core._private.cluster.cluster_utils import run_on_node
-from cloudtik.core._private.constants import CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S, CLOUDTIK_JOB_WAITER_TIMEOUT_MAX
+from cloudtik.core._private.constants import CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S, CLOUDTIK_JOB_WAITER_TIMEOUT_MAX, \
+    CLOUDTIK_JOB_EVENT_WAIT_S
+from cloudtik.core._private.job_waiter.job_event import wait_for_job_exits_on_cluster
+from cloudtik.core._private.node.node_agent import get_node_agent_client, NodeAgentError, \
+    SESSION_TYPE_TMUX, SESSION_TYPE_SCREEN
+from cloudtik.core._private.providers import _get_node_provider
 from cloudtik.core.job_waiter import JobWaiter
 
 logger = logging.getLogger(__name__)
@@ -20,13 +25,34 @@ CHECK_SESSION_RETRY_DELAY_S = 5
 
 class SessionJobWaiter(JobWaiter):
     def __init__(self,
-                 config: Dict[str, Any], session_check_script: str) -> None:
+                 config: Dict[str, Any], session_check_script: str,
+                 session_type: str) -> None:
         JobWaiter.__init__(self, config)
         self.session_check_script = session_check_script
+        self.session_type = session_type
         self.call_context = CallContext()
         self.call_context.set_call_from_api(True)
 
+    def _check_session_with_agent(self, node_id: str, session_name) -> Optional[bool]:
+        # The node agent is reachable only within the cluster (on head)
+        if not self.config.get("bootstrapped", False):
+            return None
+        try:
+            provider = _get_node_provider(
+                self.config["provider"], self.config["cluster_name"])
+            node_ip = provider.internal_ip(node_id)
+            node_agent_client = get_node_agent_client(node_ip)
+            return node_agent_client.session_exists(
+                session_name, self.session_type)
+        except NodeAgentError as e:
+            logger.debug("Failed to check session with node agent: {}".format(str(e)))
+            return None
+
     def _check_session(self, node_id: str, session_name):
+        session_exists = self._check_session_with_agent(node_id, session_name)
+        if session_exists is not None:
+            return session_exists
+
         cmd = "cloudtik run-script "
         cmd += self.session_check_script
         cmd += " "
@@ -56,34 +82,70 @@ class SessionJobWaiter(JobWaiter):
         return False
 
     def wait_for_completion(self, node_id: str, cmd: str, session_name: str, timeout: Optional[int] = None):
+        self.wait_for_completion_of_jobs([(node_id, cmd, session_name)], timeout)
+
+    def wait_for_completion_of_jobs(
+            self, jobs: List[Tuple[str, str, str]], timeout: Optional[int] = None):
         start_time = time.time()
         if timeout is None:
             timeout = CLOUDTIK_JOB_WAITER_TIMEOUT_MAX
         interval = CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S
 
-        session_exists = self._check_session(node_id, session_name)
-        while time.time() - start_time < timeout:
-            if not session_exists:
-                cli_logger.print("Session {} finished.", session_name)
+        # session name to node id of the jobs not finished
+        pending_jobs = {session_name: node_id for node_id, _, session_name in jobs}
+        event_enabled = True
+        while True:
+            if event_enabled:
+                # Block on the job exit events and check the sessions in the
+                # interval in case the event is lost (for example, the node is lost)
+                wait_time = min(
+                    CLOUDTIK_JOB_EVENT_WAIT_S, interval,
+                    max(0, timeout - (time.time() - start_time)))
+                job_exits = wait_for_job_exits_on_cluster(
+                    self.config, self.call_context,
+                    list(pending_jobs.keys()), wait_time)
+                if job_exits is None:
+                    logger.debug("Job exit events are not available. "
+                                 "Fallback to polling the sessions.")
+                    event_enabled = False
+                else:
+                    for session_name, exit_code in job_exits.items():
+                        if pending_jobs.pop(session_name, None) is not None:
+                            cli_logger.print(
+                                "Session {} finished with exit code {}.",
+                                session_name, exit_code)
+                    if not pending_jobs:
+                        return
+
+            for session_name, node_id in list(pending_jobs.items()):
+                if not self._check_session(node_id, session_name):
+                    pending_jobs.pop(session_name)
+                    cli_logger.print("Session {} finished.", session_name)
+            if not pending_jobs:
                 return
-            else:
+
+            if time.time() - start_time >= timeout:
+                break
+            if not event_enabled:
                 cli_logger.print(
                     "Waiting for session {} to finish: ({} seconds)...".format(
-                        session_name,
+                        ",".join(pending_jobs.keys()),
                         interval))
                 time.sleep(interval)
-                session_exists = self._check_session(node_id, session_name)
         raise TimeoutError(
-            "Timed out while waiting for session {} to finish.".format(session_name))
+            "Timed out while waiting for session {} to finish.".format(
+                ",".join(pending_jobs.keys())))
 
 
 class TmuxJobWaiter(SessionJobWaiter):
     def __init__(self,
                  config: Dict[str, Any]) -> None:
-        SessionJobWaiter.__init__(self, config, TMUX_SESSION_CHECK_SCRIPT)
+        SessionJobWaiter.__init__(
+            self, config, TMUX_SESSION_CHECK_SCRIPT, SESSION_TYPE_TMUX)
 
 
 class ScreenJobWaiter(SessionJobWaiter):
     def __init__(self,
                  config: Dict[str, Any]) -> None:
-        SessionJobWaiter.__init__(self, config, SCREEN_SESSION_CHECK_SCRIPT)
+        SessionJobWaiter.__init__(
+            self, config, SCREEN_SESSION_CHECK_SCRIPT, SESSION_TYPE_SCREEN)
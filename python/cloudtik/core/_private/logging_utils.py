@@ -6,8 +6,6 @@ from logging.handlers import RotatingFileHandler
 
 from typing import Callable
 
-from cloudtik.core._private.core_utils import open_log
-
 _default_handler = None
 
 
@@ -171,6 +169,9 @@ def configure_log_file(out_file, err_file):
     # configure since we're redirecting all output to stdout and stderr.
     if out_file is None or err_file is None:
         return
+    # Import here to keep this module light for the CLI logger setup
+    from cloudtik.core._private.core_utils import open_log
+
     stdout_fileno = sys.stdout.fileno()
     stderr_fileno = sys.stderr.fileno()
     # C++ logging requires redirecting the stdout file descriptor. Note that
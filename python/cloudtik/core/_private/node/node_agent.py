@@ -0,0 +1,256 @@
+import http.client
+import json
+import logging
+import os
+import secrets
+import select
+import threading
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from cloudtik.core._private.constants import CLOUDTIK_NODE_AGENT_PORT, \
+    CLOUDTIK_NODE_AGENT_TIMEOUT_S, CLOUDTIK_NODE_AGENT_TOKEN_FILE, \
+    CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN
+
+logger = logging.getLogger(__name__)
+
+NODE_AGENT_TOKEN_HEADER = "X-CloudTik-Token"
+
+# The request types served by the node agent
+NODE_AGENT_REQUEST_PING = "ping"
+NODE_AGENT_REQUEST_EXEC = "exec"
+NODE_AGENT_REQUEST_SESSION_EXISTS = "session_exists"
+NODE_AGENT_REQUEST_CPU_TOPOLOGY = "cpu_topology"
+NODE_AGENT_REQUEST_FILE_STAT = "file_stat"
+
+NODE_AGENT_REQUESTS = [
+    NODE_AGENT_REQUEST_PING,
+    NODE_AGENT_REQUEST_EXEC,
+    NODE_AGENT_REQUEST_SESSION_EXISTS,
+    NODE_AGENT_REQUEST_CPU_TOPOLOGY,
+    NODE_AGENT_REQUEST_FILE_STAT,
+]
+
+SESSION_TYPE_TMUX = "tmux"
+SESSION_TYPE_SCREEN = "screen"
+
+
+class NodeAgentError(RuntimeError):
+    """Raised when the node agent cannot be reached or fails a request."""
+    pass
+
+
+class NodeAgentConnectionError(NodeAgentError):
+    """Raised when the request is not sent because the connection to
+    the node agent cannot be established. It is safe to do it other ways."""
+    pass
+
+
+class NodeAgentRequestError(NodeAgentError):
+    """Raised when the request fails after it may have been sent to the
+    node agent. The request may have been executed by the node agent."""
+    pass
+
+
+def _is_connection_dropped(connection) -> bool:
+    """Check whether an idle keep-alive connection was closed by the peer.
+
+    An idle connection is readable only when the peer closed it.
+    """
+    if connection.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def get_node_agent_token() -> Optional[str]:
+    """The token of the cluster from the environment (workers) or the token file (head).
+
+    Returns None if the token is not available in which case the node agent
+    is not started and the clients fallback to the other ways.
+    """
+    token = os.environ.get(CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN)
+    if token:
+        return token
+    token_file = os.path.expanduser(CLOUDTIK_NODE_AGENT_TOKEN_FILE)
+    try:
+        with open(token_file) as f:
+            token = f.read().strip()
+    except OSError:
+        return None
+    return token if token else None
+
+
+def get_or_create_node_agent_token() -> str:
+    """Get the token of the cluster or generate a random one on head.
+
+    The token file is kept across the restarts of the head so that the
+    node agents of the running workers keep working with the head.
+    """
+    token_file = os.path.expanduser(CLOUDTIK_NODE_AGENT_TOKEN_FILE)
+    if os.path.exists(token_file):
+        with open(token_file) as f:
+            token = f.read().strip()
+        if token:
+            return token
+    token = secrets.token_hex(32)
+    # Make sure to create the file to owner only rw permissions.
+    with open(token_file, "w", opener=partial(os.open, mode=0o600)) as f:
+        f.write(token)
+    return token
+
+
+class NodeAgentClient:
+    """Client to the node agent with a persistent (keep-alive) connection.
+
+    The requests from the same client are serialized on the connection.
+    Use different clients (one for each node) for parallel requests.
+    """
+
+    def __init__(self,
+                 node_ip: str,
+                 port: Optional[int] = None,
+                 token: Optional[str] = None,
+                 timeout: Optional[int] = None):
+        self.node_ip = node_ip
+        self.port = port if port else CLOUDTIK_NODE_AGENT_PORT
+        self.token = token if token else get_node_agent_token()
+        self.timeout = timeout if timeout else CLOUDTIK_NODE_AGENT_TIMEOUT_S
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(
+                self.node_ip, self.port, timeout=self.timeout)
+        return self._connection
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def close(self):
+        with self._lock:
+            self._close_connection()
+
+    def _request(self, request_type: str, *args, **kwargs):
+        # The socket timeout of the request, None for no timeout
+        request_timeout = kwargs.get("request_timeout", self.timeout)
+        # A request which is not idempotent is never sent again
+        idempotent = kwargs.get("idempotent", True)
+        if not self.token:
+            raise NodeAgentConnectionError(
+                "No node agent token available for requesting {}:{}.".format(
+                    self.node_ip, self.port))
+        request_message = json.dumps(
+            {"type": request_type, "args": list(args)}).encode()
+        headers = {
+            "Content-Type": "application/json",
+            NODE_AGENT_TOKEN_HEADER: self.token,
+        }
+        with self._lock:
+            # An idle keep-alive connection may have been closed by the agent.
+            # Such a connection is replaced before sending the request, while
+            # an idempotent request is retried once with a new connection
+            # if the connection is closed in between.
+            while True:
+                if self._connection is not None and (
+                        _is_connection_dropped(self._connection)):
+                    self._close_connection()
+                reused = self._connection is not None
+                connection = self._get_connection()
+                try:
+                    connection.timeout = request_timeout
+                    if connection.sock is None:
+                        connection.connect()
+                    else:
+                        connection.sock.settimeout(request_timeout)
+                except OSError as e:
+                    self._close_connection()
+                    raise NodeAgentConnectionError(
+                        "Failed to connect node agent at {}:{}: {}".format(
+                            self.node_ip, self.port, str(e))) from e
+                try:
+                    connection.request(
+                        "POST", "/", body=request_message, headers=headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    self._close_connection()
+                    if idempotent and reused and isinstance(e, (
+                            http.client.RemoteDisconnected,
+                            ConnectionResetError, BrokenPipeError)):
+                        continue
+                    raise NodeAgentRequestError(
+                        "Failed to request node agent at {}:{}: {}".format(
+                            self.node_ip, self.port, str(e))) from e
+
+        try:
+            response_data = json.loads(data)
+        except ValueError as e:
+            raise NodeAgentRequestError(
+                "Invalid response from node agent at {}:{}.".format(
+                    self.node_ip, self.port)) from e
+        if response.status != 200 or "error" in response_data:
+            raise NodeAgentRequestError(
+                "Node agent at {}:{} failed request {}: {}".format(
+                    self.node_ip, self.port, request_type,
+                    response_data.get("error", response.status)))
+        return response_data.get("result")
+
+    def ping(self) -> Dict[str, Any]:
+        return self._request(NODE_AGENT_REQUEST_PING)
+
+    def exec(self, cmd: str, timeout: Optional[int] = None) -> Tuple[int, str]:
+        """Execute the command on the node and return exit code and output.
+
+        The command is not sent again on failures because it may have been
+        executed. NodeAgentConnectionError is raised if it was not sent.
+        """
+        request_timeout = None if timeout is None else timeout + self.timeout
+        result = self._request(
+            NODE_AGENT_REQUEST_EXEC, cmd, timeout,
+            request_timeout=request_timeout, idempotent=False)
+        return result["exit_code"], result["output"]
+
+    def session_exists(self, session_name: str,
+                       session_type: str = SESSION_TYPE_TMUX) -> bool:
+        return self._request(
+            NODE_AGENT_REQUEST_SESSION_EXISTS, session_name, session_type)
+
+    def get_cpu_topology(self) -> List[str]:
+        """Return the CPU topology in the lines of 'lscpu --parse=CPU,Core,Socket,Node'
+        output (read from sysfs if available)."""
+        return self._request(NODE_AGENT_REQUEST_CPU_TOPOLOGY)
+
+    def file_stat(self, path: str) -> Optional[Dict[str, Any]]:
+        return self._request(NODE_AGENT_REQUEST_FILE_STAT, path)
+
+
+_node_agent_clients = {}
+_node_agent_clients_lock = threading.Lock()
+
+
+def get_node_agent_client(node_ip: str,
+                          port: Optional[int] = None,
+                          token: Optional[str] = None) -> NodeAgentClient:
+    """Get the shared client of the node agent so that the connection is reused.
+
+    The token of the cluster is used if token is not specified.
+    """
+    key = (node_ip, port if port else CLOUDTIK_NODE_AGENT_PORT)
+    with _node_agent_clients_lock:
+        client = _node_agent_clients.get(key)
+        if client is None:
+            client = NodeAgentClient(
+                node_ip, port=port, token=token)
+            _node_agent_clients[key] = client
+        return client
@@ -25,6 +25,7 @@ from cloudtik.core._private import utils
 from cloudtik.core._private import core_utils
 from cloudtik.core._private.state import kv_store
 from cloudtik.core._private.resource_spec import ResourceSpec
+from cloudtik.core._private.node.node_agent import get_node_agent_token, get_or_create_node_agent_token
 
 from cloudtik.core._private.core_utils import try_to_create_directory, try_to_symlink, open_log, \
     detect_fate_sharing_support, set_sigterm_handler
@@ -588,6 +589,23 @@ class NodeServicesStarter:
         assert constants.PROCESS_TYPE_CLUSTER_CONTROLLER not in self.all_processes
         self.all_processes[constants.PROCESS_TYPE_CLUSTER_CONTROLLER] = [process_info]
 
+    def start_job_scheduler(self):
+        """Start the job scheduler running the jobs in the job queue."""
+        stdout_file, stderr_file = self.get_log_file_handles(
+            "cloudtik_job_scheduler", unique=True)
+        process_info = services.start_job_scheduler(
+            self._redis_address,
+            self._logs_dir,
+            stdout_file=stdout_file,
+            stderr_file=stderr_file,
+            redis_password=self._start_params.redis_password,
+            fate_share=self.kernel_fate_share,
+            logging_level=self.logging_level,
+            max_bytes=self.max_bytes,
+            backup_count=self.backup_count)
+        assert constants.PROCESS_TYPE_JOB_SCHEDULER not in self.all_processes
+        self.all_processes[constants.PROCESS_TYPE_JOB_SCHEDULER] = [process_info]
+
     def start_node_monitor(self):
         """Start the Node Monitor.
 
@@ -626,6 +644,7 @@ class NodeServicesStarter:
 
         if not self._start_params.no_controller:
             self.start_cluster_controller()
+        self.start_job_scheduler()
 
     def start_node_processes(self):
         """Start all of the processes on the node."""
@@ -635,6 +654,7 @@ class NodeServicesStarter:
         self.start_node_monitor()
         if self._start_params.include_log_monitor:
             self.start_log_monitor()
+        self.start_node_agent()
 
     def _write_cluster_info_to_state(self):
         # Make sure redis is up
@@ -894,4 +914,32 @@ class NodeServicesStarter:
         assert constants.PROCESS_TYPE_LOG_MONITOR not in self.all_processes
         self.all_processes[constants.PROCESS_TYPE_LOG_MONITOR] = [
             process_info,
-        ]
\ No newline at end of file
+        ]
+
+    def start_node_agent(self):
+        """Start the node agent."""
+        if self.head:
+            token = get_or_create_node_agent_token()
+            head_ip = self._node_ip_address
+        else:
+            token = get_node_agent_token()
+            head_ip = services.address_to_ip(self._redis_address).split(":")[0]
+        if not token:
+            # The workers get the token through the environment from head
+            logger.info("Node agent is not started without the node agent token.")
+            return
+        stdout_file, stderr_file = self.get_log_file_handles(
+            "cloudtik_node_agent", unique=True)
+        process_info = services.start_node_agent(
+            self._node_ip_address,
+            self._logs_dir,
+            token,
+            head_ip=head_ip,
+            stdout_file=stdout_file,
+            stderr_file=stderr_file,
+            fate_share=self.kernel_fate_share,
+            logging_level=self.logging_level,
+            max_bytes=self.max_bytes,
+            backup_count=self.backup_count)
+        assert constants.PROCESS_TYPE_NODE_AGENT not in self.all_processes
+        self.all_processes[constants.PROCESS_TYPE_NODE_AGENT] = [process_info]
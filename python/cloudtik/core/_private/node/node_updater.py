@@ -17,6 +17,7 @@ from cloudtik.core._private.command_executor import \
     CLOUDTIK_NODE_START_WAIT_S, \
     ProcessRunnerError
 from cloudtik.core._private.log_timer import LogTimer
+from cloudtik.core._private.tracing import Tracer
 from cloudtik.core._private.cli_logger import cf, CliLogger
 import cloudtik.core._private.subprocess_output_util as cmd_output_util
 from cloudtik.core._private.constants import CLOUDTIK_RESOURCES_ENV, CLOUDTIK_RUNTIME_ENV_NODE_NUMBER, \
@@ -129,6 +130,10 @@ class NodeUpdater:
         self.docker_config = docker_config
         self.restart_only = restart_only
         self.update_time = None
+        # The spans of the phases for the bring-up timeline
+        self.tracer = Tracer("update_node", {
+            "node_id": node_id, "is_head_node": is_head_node,
+            "for_recovery": for_recovery})
         self.for_recovery = for_recovery
         self.runtime_config = runtime_config
         self.cluster_uri = _get_cluster_uri(self.provider_type, cluster_name)
@@ -154,6 +159,7 @@ class NodeUpdater:
                           "Applied config {}".format(self.runtime_hash)):
                 self.do_update()
         except Exception as e:
+            self.tracer.finish(e)
             self.provider.set_node_tags(
                 self.node_id, {CLOUDTIK_TAG_NODE_STATUS: STATUS_UPDATE_FAILED})
             self.cli_logger.error("New status: {}", cf.bold(STATUS_UPDATE_FAILED))
@@ -188,6 +194,7 @@ class NodeUpdater:
         self.cli_logger.labeled_value("New status", STATUS_UP_TO_DATE)
 
         self.update_time = time.time() - update_start_time
+        self.tracer.finish()
         self.exitcode = 0
 
     def sync_file_mounts(self, sync_cmd, step_numbers=(1, 2)):
@@ -234,34 +241,36 @@ class NodeUpdater:
                     self.cli_logger.print("{} from {}", cf.bold(remote_path),
                                      cf.bold(local_path))
 
-        # Rsync file mounts
-        with self.cli_logger.group(
-                "Processing file mounts",
-                _numbered=("[]", current_step, total_steps)):
-            for remote_path, local_path in self.file_mounts.items():
-                do_sync(remote_path, local_path)
-            current_step += 1
-
-        if self.cluster_synced_files:
+        with self.tracer.span("sync_file_mounts"):
+            # Rsync file mounts
             with self.cli_logger.group(
-                    "Processing worker file mounts",
+                    "Processing file mounts",
                     _numbered=("[]", current_step, total_steps)):
-                self.cli_logger.print("synced files: {}",
-                                 str(self.cluster_synced_files))
-                for path in self.cluster_synced_files:
-                    do_sync(path, path, allow_non_existing_paths=True)
+                for remote_path, local_path in self.file_mounts.items():
+                    do_sync(remote_path, local_path)
                 current_step += 1
-        else:
-            with self.cli_logger.group(
-                    "No worker file mounts to sync",
-                    _numbered=("[]", current_step, total_steps)):
-                pass
+
+            if self.cluster_synced_files:
+                with self.cli_logger.group(
+                        "Processing worker file mounts",
+                        _numbered=("[]", current_step, total_steps)):
+                    self.cli_logger.print("synced files: {}",
+                                     str(self.cluster_synced_files))
+                    for path in self.cluster_synced_files:
+                        do_sync(path, path, allow_non_existing_paths=True)
+                    current_step += 1
+            else:
+                with self.cli_logger.group(
+                        "No worker file mounts to sync",
+                        _numbered=("[]", current_step, total_steps)):
+                    pass
 
     def wait_ready(self, deadline):
         with self.cli_logger.group(
                 "Waiting for SSH to become available",
                 _numbered=("[]", 1, NUM_SETUP_STEPS)):
-            with LogTimer(self.log_prefix + "Got remote shell"):
+            with LogTimer(self.log_prefix + "Got remote shell"), \
+                    self.tracer.span("wait_for_ssh"):
 
                 self.cli_logger.print("Running `{}` as a test.", cf.bold("uptime"))
                 first_conn_refused_time = None
@@ -316,11 +325,13 @@ class NodeUpdater:
         current_step, total_steps = step_numbers
         with self.cli_logger.group(
                 "Preparing data disks",
-                _numbered=("[]", current_step, total_steps)):
+                _numbered=("[]", current_step, total_steps)), \
+                self.tracer.span("bootstrap_data_disks"):
             self.cmd_executor.bootstrap_data_disks()
 
     def get_update_environment_variables(self):
         node_type = get_node_type(self.provider, self.node_id)
+        self.tracer.set_attribute("node_type", node_type)
         node_envs = with_runtime_environment_variables(
             self.runtime_config, config=self.config, provider=self.provider, node_id=self.node_id)
 
@@ -366,6 +377,11 @@ class NodeUpdater:
             {"node_id": self.node_id}
         )
 
+        # Start the preparations such as pulling the image in background
+        # to overlap with syncing files and running initialization commands
+        with self.tracer.span("pre_init"):
+            self.cmd_executor.run_pre_init(as_head=self.is_head_node)
+
         node_tags = self.provider.node_tags(self.node_id)
         logger.debug("Node tags: {}".format(str(node_tags)))
 
@@ -375,11 +391,12 @@ class NodeUpdater:
         if node_tags.get(CLOUDTIK_TAG_RUNTIME_CONFIG) == self.runtime_hash:
             # When resuming from a stopped instance the runtime_hash may be the
             # same, but the container will not be started.
-            init_required = self.cmd_executor.run_init(
-                as_head=self.is_head_node,
-                file_mounts=self.file_mounts,
-                shared_memory_ratio=shared_memory_ratio,
-                sync_run_yet=False)
+            with self.tracer.span("init_command_runner"):
+                init_required = self.cmd_executor.run_init(
+                    as_head=self.is_head_node,
+                    file_mounts=self.file_mounts,
+                    shared_memory_ratio=shared_memory_ratio,
+                    sync_run_yet=False)
             if init_required:
                 node_tags[CLOUDTIK_TAG_RUNTIME_CONFIG] += "-invalidate"
                 # This ensures that `setup_commands` are not removed
@@ -439,7 +456,8 @@ class NodeUpdater:
                         _numbered=("[]", 5, NUM_SETUP_STEPS))
                 with self.cli_logger.group(
                         "Initializing command runner",
-                        _numbered=("[]", 6, NUM_SETUP_STEPS)):
+                        _numbered=("[]", 6, NUM_SETUP_STEPS)), \
+                        self.tracer.span("init_command_runner"):
                     self.cmd_executor.run_init(
                         as_head=self.is_head_node,
                         file_mounts=self.file_mounts,
@@ -489,7 +507,8 @@ class NodeUpdater:
             {"node_id": self.node_id})
         with LogTimer(
                 self.log_prefix + "Initialization commands",
-                show_status=True):
+                show_status=True), \
+                self.tracer.span("initialization_commands"):
             for command_group in self.initialization_commands:
                 commands = command_group.get("commands", [])
                 for cmd in commands:
@@ -531,7 +550,8 @@ class NodeUpdater:
             {"node_id": self.node_id})
         with LogTimer(
                 self.log_prefix + "Setup commands",
-                show_status=True):
+                show_status=True), \
+                self.tracer.span("setup_commands"):
 
             total = len(self.setup_commands)
             for i, command_group in enumerate(self.setup_commands):
@@ -578,7 +598,8 @@ class NodeUpdater:
             CreateClusterEvent.start_cloudtik_runtime,
             {"node_id": self.node_id})
         with LogTimer(
-                self.log_prefix + "Start commands", show_status=True):
+                self.log_prefix + "Start commands", show_status=True), \
+                self.tracer.span("start_commands"):
             total = len(self.start_commands)
             for i, command_group in enumerate(self.start_commands):
                 command_group_name = command_group.get("group_name", "")
@@ -628,7 +649,8 @@ class NodeUpdater:
 
     def exec_commands(self, action_name, commands, envs):
         with LogTimer(
-                self.log_prefix + "Exec commands", show_status=True):
+                self.log_prefix + "Exec commands", show_status=True), \
+                self.tracer.span("exec_commands", action=action_name):
             total = len(commands)
             for i, command_group in enumerate(commands):
                 command_group_name = command_group.get("group_name", "")
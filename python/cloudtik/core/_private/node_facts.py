@@ -0,0 +1,109 @@
+"""Measured facts of a node for sizing the runtimes.
+
+The facts are the physical and logical cores, sockets and NUMA nodes from the
+CPU topology, the total memory and the number of local data disks. The node
+monitor publishes the facts of each node to the cluster state once so that
+the runtimes can size their processes for the nodes they actually run on.
+"""
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import psutil
+
+from cloudtik.core._private.constants import CLOUDTIK_DATA_DISK_MOUNT_POINT
+from cloudtik.core._private.cpu_topology import get_cpu_topology
+
+logger = logging.getLogger(__name__)
+
+# The user state table of the node facts by node ip
+NODE_FACTS_TABLE = "node_facts"
+
+NODE_FACT_KEYS = [
+    "logical_cores", "physical_cores", "sockets", "numa_nodes", "memory_mb", "data_disks"]
+
+
+def get_cpu_facts(cpu_topology: List[str]) -> Dict[str, int]:
+    """Count the cores, sockets and NUMA nodes of lscpu parse format lines."""
+    logical_cores = 0
+    cores = set()
+    sockets = set()
+    numa_nodes = set()
+    for line in cpu_topology:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        cpu, core, socket, node = (line.split(",") + [""] * 4)[:4]
+        logical_cores += 1
+        cores.add((socket, core))
+        sockets.add(socket)
+        if node:
+            numa_nodes.add(node)
+    return {
+        "logical_cores": logical_cores,
+        "physical_cores": len(cores),
+        "sockets": len(sockets),
+        "numa_nodes": max(len(numa_nodes), 1),
+    }
+
+
+def get_data_disk_count(mount_point: str = CLOUDTIK_DATA_DISK_MOUNT_POINT) -> int:
+    if not os.path.isdir(mount_point):
+        return 0
+    return len([name for name in os.listdir(mount_point)
+                if os.path.isdir(os.path.join(mount_point, name))])
+
+
+def get_node_facts(cpu_topology: Optional[List[str]] = None) -> Dict[str, int]:
+    """Measure the facts of this node."""
+    if cpu_topology is None:
+        cpu_topology = get_cpu_topology()
+    node_facts = get_cpu_facts(cpu_topology)
+    node_facts["memory_mb"] = int(psutil.virtual_memory().total / (1024 * 1024))
+    node_facts["data_disks"] = get_data_disk_count()
+    return node_facts
+
+
+def publish_node_facts(control_state, node_ip: str, node_type: str,
+                       node_facts: Dict[str, int]):
+    node_facts_table = control_state.get_user_state_table(NODE_FACTS_TABLE)
+    node_facts_table.put(node_ip, json.dumps(
+        {"node_type": node_type, "facts": node_facts}))
+
+
+def get_published_node_facts(
+        control_state,
+        get_node_ips: Optional[Callable[[], Set[str]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Return the published facts by node type.
+
+    The nodes of the same type may differ slightly. For example, the memory
+    reported for the same instance type. The minimum of each fact over
+    the nodes of a type is returned so that the sizing fits all of them.
+
+    If get_node_ips is specified, the facts of the nodes not in the non-terminated
+    node ips it returns are deleted. The node ips are got after reading the facts
+    so that a node publishing its facts after the reading is not deleted.
+    """
+    node_facts_table = control_state.get_user_state_table(NODE_FACTS_TABLE)
+    all_node_facts = node_facts_table.get_all()
+    if get_node_ips is not None:
+        node_ips = get_node_ips()
+        for node_ip in [node_ip for node_ip in all_node_facts if node_ip not in node_ips]:
+            node_facts_table.delete(node_ip)
+            del all_node_facts[node_ip]
+
+    node_type_facts = {}
+    for value in all_node_facts.values():
+        published = json.loads(value)
+        node_type = published.get("node_type")
+        if node_type is None:
+            continue
+        facts = published["facts"]
+        if node_type not in node_type_facts:
+            node_type_facts[node_type] = dict(facts)
+        else:
+            type_facts = node_type_facts[node_type]
+            for key, fact in facts.items():
+                type_facts[key] = min(type_facts.get(key, fact), fact)
+    return node_type_facts
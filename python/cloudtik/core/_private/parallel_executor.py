@@ -0,0 +1,252 @@
+"""Adaptive parallel executor for running a task on many nodes.
+
+The concurrency is adjusted with the observed latency and error rate of the
+tasks (in the way of AIMD congestion control):
+
+- It starts small and doubles each round (slow start) while the tasks
+  succeed with stable latency, then grows by one for each round.
+- It is halved when the error rate rises above a threshold and cut by a
+  quarter when the latency degrades, at most once for each round.
+
+The tasks are handled as they complete, so a slow node doesn't delay the
+reporting of the others. A task which fails with a retryable error is
+retried after a backoff with jitter. A task exceeding the timeout is reported
+as failed. Note that its thread cannot be interrupted and keeps running in
+the background until the task returns.
+"""
+import collections
+import heapq
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_CONCURRENCY = 8
+# The error rate above which the concurrency is halved
+ERROR_RATE_THRESHOLD = 0.2
+# The latency is regarded degraded if this times of the baseline
+LATENCY_DEGRADE_FACTOR = 2.0
+# The weight of the new sample for the moving average of latency and error rate
+MOVING_AVERAGE_ALPHA = 0.3
+DEFAULT_RETRY_BACKOFF_S = 1.0
+MAX_RETRY_BACKOFF_S = 30.0
+# The max seconds to wait for a completion before checking the timeouts
+POLL_INTERVAL_S = 1.0
+
+TASK_SUCCEEDED = "succeeded"
+TASK_FAILED = "failed"
+TASK_TIMEOUT = "timeout"
+TASK_RETRYING = "retrying"
+
+
+class TaskResult:
+    """The result of a task on an item (for example, a node)."""
+
+    def __init__(self, item, status, result=None, error=None,
+                 elapsed=0.0, attempts=1):
+        self.item = item
+        self.status = status
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+        self.attempts = attempts
+
+    @property
+    def succeeded(self):
+        return self.status == TASK_SUCCEEDED
+
+
+class ConcurrencyController:
+    """Adjust the concurrency with the latency and the result of each task."""
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1,
+                 initial_concurrency: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        if initial_concurrency is None:
+            initial_concurrency = DEFAULT_INITIAL_CONCURRENCY
+        self.concurrency = max(self.min_concurrency, min(
+            initial_concurrency, self.max_concurrency))
+        self.slow_start = True
+        self.latency = None
+        self.baseline_latency = None
+        self.error_rate = 0.0
+        self._increase_credit = 0.0
+        self._completed_since_decrease = 0
+
+    def _decrease(self, factor):
+        self.slow_start = False
+        self.concurrency = max(
+            self.min_concurrency, int(self.concurrency * factor))
+        self._completed_since_decrease = 0
+        self._increase_credit = 0.0
+
+    def _increase(self):
+        if self.slow_start:
+            # Doubling each round with one more for each completion
+            self._increase_credit += 1
+        else:
+            self._increase_credit += 1.0 / self.concurrency
+        if self._increase_credit >= 1:
+            self._increase_credit = 0.0
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+    def on_complete(self, latency: float, failed: bool):
+        self._completed_since_decrease += 1
+        self.error_rate = (MOVING_AVERAGE_ALPHA * (1.0 if failed else 0.0) +
+                           (1 - MOVING_AVERAGE_ALPHA) * self.error_rate)
+        if not failed:
+            self.latency = latency if self.latency is None else (
+                MOVING_AVERAGE_ALPHA * latency +
+                (1 - MOVING_AVERAGE_ALPHA) * self.latency)
+            if self.baseline_latency is None or self.latency < self.baseline_latency:
+                self.baseline_latency = self.latency
+
+        # Decrease at most once in a round of the current concurrency
+        can_decrease = self._completed_since_decrease >= self.concurrency
+        if failed:
+            if self.error_rate > ERROR_RATE_THRESHOLD and can_decrease:
+                self._decrease(0.5)
+        elif self.latency > self.baseline_latency * LATENCY_DEGRADE_FACTOR:
+            if can_decrease:
+                self._decrease(0.75)
+        else:
+            self._increase()
+
+
+def get_retry_delay(attempt: int, backoff: float = DEFAULT_RETRY_BACKOFF_S) -> float:
+    """The exponential backoff with full jitter for the attempt (from 1)."""
+    delay = min(MAX_RETRY_BACKOFF_S, backoff * (2 ** (attempt - 1)))
+    return random.uniform(delay / 2, delay)
+
+
+class AdaptiveParallelExecutor:
+    """Run a task on each of the items with adaptive concurrency."""
+
+    def __init__(self,
+                 max_workers: int,
+                 min_workers: int = 1,
+                 initial_workers: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 retries: int = 0,
+                 retry_on: Optional[Callable[[Exception], bool]] = None,
+                 retry_backoff: float = DEFAULT_RETRY_BACKOFF_S,
+                 on_progress: Optional[Callable[[TaskResult], None]] = None):
+        """
+        Args:
+            max_workers: The max number of tasks running concurrently.
+            min_workers: The min concurrency when decreased for errors.
+            initial_workers: The concurrency to start with.
+            timeout: The seconds for a task to complete. No timeout if None.
+            retries: The max number of retries for a task.
+            retry_on: Whether to retry for an error. Retry for all if None.
+            retry_backoff: The base seconds of the backoff for retries.
+            on_progress: Called with the result when a task completes
+                (including the attempts to retry).
+        """
+        self.controller = ConcurrencyController(
+            max_workers, min_workers, initial_workers)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout if timeout else None
+        self.retries = max(0, retries or 0)
+        self.retry_on = retry_on
+        self.retry_backoff = retry_backoff
+        self.on_progress = on_progress
+        self.max_concurrency_used = 0
+
+    def _should_retry(self, error, attempt):
+        if attempt > self.retries:
+            return False
+        return self.retry_on is None or self.retry_on(error)
+
+    def _report(self, task_result):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(task_result)
+            except Exception as e:
+                logger.debug("Error in reporting progress: {}".format(e))
+
+    def run(self, fn: Callable[[Any], Any],
+            items: List[Hashable]) -> Dict[Hashable, TaskResult]:
+        """Run fn for each of the items and return the results by item."""
+        results = {}
+        pending = collections.deque((item, 1) for item in items)
+        # (ready time, sequence, item, attempt)
+        retrying = []
+        retry_seq = 0
+        # future to (item, attempt, start time)
+        running = {}
+        first_start = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        abandoned = False
+        try:
+            while pending or retrying or running:
+                now = time.time()
+                while retrying and retrying[0][0] <= now:
+                    _, _, item, attempt = heapq.heappop(retrying)
+                    pending.append((item, attempt))
+
+                while pending and len(running) < self.controller.concurrency:
+                    item, attempt = pending.popleft()
+                    start = time.time()
+                    first_start.setdefault(item, start)
+                    running[executor.submit(fn, item)] = (item, attempt, start)
+                self.max_concurrency_used = max(
+                    self.max_concurrency_used, len(running))
+
+                wait_timeout = POLL_INTERVAL_S
+                if retrying:
+                    wait_timeout = min(wait_timeout, max(0.0, retrying[0][0] - now))
+                if not running:
+                    time.sleep(wait_timeout)
+                    continue
+
+                done, _ = wait(list(running), timeout=wait_timeout,
+                               return_when=FIRST_COMPLETED)
+                now = time.time()
+                for future in done:
+                    item, attempt, start = running.pop(future)
+                    latency = now - start
+                    error = future.exception()
+                    self.controller.on_complete(latency, failed=error is not None)
+                    if error is None:
+                        results[item] = TaskResult(
+                            item, TASK_SUCCEEDED, result=future.result(),
+                            elapsed=now - first_start[item], attempts=attempt)
+                        self._report(results[item])
+                    elif self._should_retry(error, attempt):
+                        retry_seq += 1
+                        heapq.heappush(retrying, (
+                            now + get_retry_delay(attempt, self.retry_backoff),
+                            retry_seq, item, attempt + 1))
+                        self._report(TaskResult(
+                            item, TASK_RETRYING, error=error,
+                            elapsed=now - first_start[item], attempts=attempt))
+                    else:
+                        results[item] = TaskResult(
+                            item, TASK_FAILED, error=error,
+                            elapsed=now - first_start[item], attempts=attempt)
+                        self._report(results[item])
+
+                if self.timeout:
+                    for future, (item, attempt, start) in list(running.items()):
+                        if now - start < self.timeout:
+                            continue
+                        # The task cannot be interrupted, leave it running
+                        running.pop(future)
+                        future.cancel()
+                        abandoned = True
+                        self.controller.on_complete(now - start, failed=True)
+                        results[item] = TaskResult(
+                            item, TASK_TIMEOUT,
+                            error=TimeoutError(
+                                "Timed out after {} seconds.".format(self.timeout)),
+                            elapsed=now - first_start[item], attempts=attempt)
+                        self._report(results[item])
+        finally:
+            executor.shutdown(wait=not abandoned)
+        return results
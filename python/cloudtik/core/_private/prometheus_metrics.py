@@ -81,6 +81,40 @@ try:
                 registry=self.registry,
                 buckets=update_time_buckets,
             ).labels(SessionName=session_name)
+            # Buckets: .1 seconds to 30 minutes.
+            # Used for the time of each phase of node bring-up.
+            phase_time_buckets = [
+                .1, .5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800
+            ]
+            # Not bound to the labels since phase and node type vary
+            self.node_phase_time: Histogram = Histogram(
+                "node_phase_time_seconds",
+                "Node bring-up phase time. This is the time of each phase "
+                "such as creating the node, waiting for SSH, syncing files, "
+                "running setup or start commands for each node type.",
+                labelnames=("SessionName", "phase", "node_type"),
+                unit="seconds",
+                namespace="cloudtik",
+                registry=self.registry,
+                buckets=phase_time_buckets,
+            )
+            # Buckets: 1 millisecond to 1 minute.
+            # Used for the time of each step of the controller loop.
+            step_time_buckets = [
+                .001, .005, .01, .05, .1, .5, 1, 5, 10, 30, 60
+            ]
+            # Not bound to the labels since the step varies
+            self.controller_step_time: Histogram = Histogram(
+                "controller_step_time_seconds",
+                "Controller step time. This is the time of each step in the "
+                "controller loop such as listing nodes, updating nodes, "
+                "getting the nodes to launch or fetching the scaling state.",
+                labelnames=("SessionName", "step"),
+                unit="seconds",
+                namespace="cloudtik",
+                registry=self.registry,
+                buckets=step_time_buckets,
+            )
             self.pending_nodes: Gauge = Gauge(
                 "pending_nodes",
                 "Number of nodes pending to be started.",
@@ -105,6 +139,16 @@ try:
                 namespace="cloudtik",
                 registry=self.registry,
             ).labels(SessionName=session_name)
+            self.scaling_state_staleness: Gauge = Gauge(
+                "scaling_state_staleness",
+                "The age of the scaling state snapshot used by the cluster "
+                "scaler. This is the time since the snapshot was collected "
+                "in background.",
+                labelnames=("SessionName",),
+                unit="seconds",
+                namespace="cloudtik",
+                registry=self.registry,
+            ).labels(SessionName=session_name)
             self.updating_nodes: Gauge = Gauge(
                 "updating_nodes",
                 "Number of nodes in the process of updating.",
@@ -186,6 +230,14 @@ try:
                 namespace="cloudtik",
                 registry=self.registry,
             ).labels(SessionName=session_name)
+            self.node_launch_retries: Counter = Counter(
+                "node_launch_retries",
+                "Number of node launches retried for insufficient capacity.",
+                labelnames=("SessionName",),
+                unit="retries",
+                namespace="cloudtik",
+                registry=self.registry,
+            ).labels(SessionName=session_name)
             self.reset_exceptions: Counter = Counter(
                 "reset_exceptions",
                 "Number of exceptions raised while resetting the scaler.",
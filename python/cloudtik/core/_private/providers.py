@@ -7,12 +7,14 @@ from typing import Any, Dict
 import yaml
 
 from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+from cloudtik.core._private.constants import CLOUDTIK_PROVIDER_CACHE_MAX_SIZE
 from cloudtik.core._private.core_utils import _load_class
 
 logger = logging.getLogger(__name__)
 
 # For caching provider instantiations across API calls of one python session
-_node_provider_instances = ConcurrentObjectCache()
+_node_provider_instances = ConcurrentObjectCache(
+    max_size=CLOUDTIK_PROVIDER_CACHE_MAX_SIZE)
 
 # Minimal config for compatibility with legacy-style external configs.
 MINIMAL_EXTERNAL_CONFIG = {
@@ -173,7 +175,8 @@ _DEFAULT_CONFIGS = {
 }
 
 # For caching workspace provider instantiations across API calls of one python session
-_workspace_provider_instances = ConcurrentObjectCache()
+_workspace_provider_instances = ConcurrentObjectCache(
+    max_size=CLOUDTIK_PROVIDER_CACHE_MAX_SIZE)
 
 
 def _import_aws_workspace(provider_config):
@@ -4,12 +4,14 @@ import os
 from typing import Any, Dict
 
 from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+from cloudtik.core._private.constants import CLOUDTIK_RUNTIME_CACHE_MAX_SIZE
 from cloudtik.core.runtime import Runtime
 
 logger = logging.getLogger(__name__)
 
 # For caching runtime instantiations across API calls of one python session
-_runtime_instances = ConcurrentObjectCache()
+_runtime_instances = ConcurrentObjectCache(
+    max_size=CLOUDTIK_RUNTIME_CACHE_MAX_SIZE)
 
 RUNTIME_MINIMAL_EXTERNAL_CONFIG = {}
 
@@ -11,7 +11,9 @@ from multiprocessing.synchronize import Event
 from typing import Optional
 
 from cloudtik.core._private.cluster.cluster_metrics_updater import ClusterMetricsUpdater
+from cloudtik.core._private.cluster.controller_profiler import ControllerProfiler
 from cloudtik.core._private.cluster.resource_scaling_policy import ResourceScalingPolicy
+from cloudtik.core._private.cluster.scaling_state_producer import ScalingStateProducer
 from cloudtik.core._private.state.scaling_state import ScalingStateClient
 
 try:
@@ -54,7 +56,8 @@ class ClusterController:
                  redis_password=None,
                  controller_ip=None,
                  stop_event: Optional[Event] = None,
-                 retry_on_failure: bool = True):
+                 retry_on_failure: bool = True,
+                 logs_dir: Optional[str] = None):
 
         self.controller_ip = controller_ip
         # Initialize the Redis clients.
@@ -91,6 +94,8 @@ class ClusterController:
         self.retry_on_failure = retry_on_failure
         self.cluster_scaling_config = cluster_scaling_config
         self.cluster_scaler = None
+        # Opt-in profiling of the slowest controller cycles
+        self.profiler = ControllerProfiler(logs_dir)
         self.resource_scaling_policy = ResourceScalingPolicy(
             self.head_ip, self.scaling_state_client)
         self.cluster_metrics_updater = ClusterMetricsUpdater(
@@ -130,24 +135,35 @@ class ClusterController:
         return session_name
 
     def _initialize_cluster_scaler(self):
+        # Collect the scaling state in background without blocking the scaler
+        scaling_state_producer = ScalingStateProducer(
+            self.resource_scaling_policy,
+            self.cluster_metrics_updater,
+            prometheus_metrics=self.prometheus_metrics)
         self.cluster_scaler = ClusterScaler(
             self.cluster_scaling_config,
             self.cluster_metrics,
             cluster_metrics_updater=self.cluster_metrics_updater,
             resource_scaling_policy=self.resource_scaling_policy,
             event_summarizer=self.event_summarizer,
-            prometheus_metrics=self.prometheus_metrics)
+            prometheus_metrics=self.prometheus_metrics,
+            scaling_state_producer=scaling_state_producer)
+        # Start after the scaling policy is created with the config
+        scaling_state_producer.start()
 
     def _run(self):
         """Run the controller loop."""
         while True:
             try:
                 if self.stop_event and self.stop_event.is_set():
+                    if self.cluster_scaler and self.cluster_scaler.scaling_state_producer:
+                        self.cluster_scaler.scaling_state_producer.stop()
                     break
 
                 # Process autoscaling actions
                 if self.cluster_scaler:
-                    self.cluster_scaler.run()
+                    with self.profiler.cycle(self.cluster_scaler.step_timer):
+                        self.cluster_scaler.run()
             except Exception:
                 # By default, do not exit the controller on failure.
                 if self.retry_on_failure:
@@ -320,10 +336,15 @@ if __name__ == "__main__":
     else:
         cluster_scaling_config = None
 
+    if args.redis_password:
+        # For the clients of the cluster state in the runtimes
+        os.environ[constants.CLOUDTIK_REDIS_PASSWORD_ENV] = args.redis_password
+
     controller = ClusterController(
         args.redis_address,
         cluster_scaling_config,
         redis_password=args.redis_password,
-        controller_ip=args.controller_ip)
+        controller_ip=args.controller_ip,
+        logs_dir=args.logs_dir)
 
     controller.run()
@@ -0,0 +1,300 @@
+"""Job scheduler daemon running the jobs in the job queue on head.
+
+The scheduler starts the pending jobs in the order of priorities when there
+are free slots of the concurrency limit. It is driven by the events of the
+job submission (through Redis) and the job process exits instead of polling.
+The exit code and the log offset of each job are recorded in the job queue
+and the job exit event is published for the job waiters.
+"""
+
+import argparse
+import logging.handlers
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+import cloudtik
+from cloudtik.core._private import constants, services
+from cloudtik.core._private.job_waiter.job_event import publish_job_exit
+from cloudtik.core._private.logging_utils import setup_component_logger
+from cloudtik.core._private.state.job_queue import JobQueue, JOB_STATUS_LOST, \
+    JOB_EXIT_CODE_LOST
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_LOGS_DIR = "~/user/logs/jobs"
+
+# The event types for the scheduler loop
+EVENT_JOB_SUBMITTED = "submitted"
+EVENT_JOB_EXITED = "exited"
+
+
+class JobScheduler:
+    """Job scheduler running the jobs submitted to the job queue."""
+
+    def __init__(self,
+                 redis_address,
+                 redis_password=None,
+                 max_concurrency: Optional[int] = None,
+                 job_logs_dir: Optional[str] = None):
+        self.redis_address = redis_address
+        self.redis_password = redis_password
+        self.redis = services.create_redis_client(
+            redis_address, password=redis_password)
+        self.job_queue = JobQueue(self.redis)
+        self.default_max_concurrency = max_concurrency \
+            if max_concurrency else constants.CLOUDTIK_JOB_QUEUE_MAX_CONCURRENCY
+        self.job_logs_dir = os.path.expanduser(
+            job_logs_dir if job_logs_dir else DEFAULT_JOB_LOGS_DIR)
+        os.makedirs(self.job_logs_dir, exist_ok=True)
+
+        # job id to the process of the running jobs
+        self.running_jobs = {}
+        self._events = queue.Queue()
+        self._stopped = threading.Event()
+        self._last_update_time = 0
+        self._last_prune_time = 0
+        logger.info("Job Scheduler: Started")
+
+    def _get_max_concurrency(self):
+        max_concurrency = self.job_queue.get_max_concurrency()
+        return max_concurrency if max_concurrency else self.default_max_concurrency
+
+    def _recover_jobs(self):
+        # The jobs left running by a previous scheduler cannot be waited
+        for job_id in self.job_queue.get_running_job_ids():
+            logger.warning("Job {} is lost after the scheduler restarted.".format(job_id))
+            self._finish_job(job_id, JOB_EXIT_CODE_LOST, status=JOB_STATUS_LOST)
+
+    def _listen_submission(self):
+        # A separate connection is used for the blocking wait
+        redis_client = services.create_redis_client(
+            self.redis_address, password=self.redis_password)
+        job_queue = JobQueue(redis_client)
+        while not self._stopped.is_set():
+            try:
+                if job_queue.wait_for_submit(
+                        constants.CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S):
+                    self._events.put((EVENT_JOB_SUBMITTED, None))
+            except Exception:
+                logger.exception("Error when waiting for job submission.")
+                time.sleep(constants.CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S)
+
+    def _wait_job_process(self, job_id, process):
+        process.wait()
+        self._events.put((EVENT_JOB_EXITED, job_id))
+
+    def _get_log_file(self, job_id):
+        return os.path.join(self.job_logs_dir, job_id + ".log")
+
+    @staticmethod
+    def _get_log_offset(log_file):
+        try:
+            return os.path.getsize(log_file)
+        except OSError:
+            return 0
+
+    def _start_job(self, job):
+        job_id = job["id"]
+        log_file = self._get_log_file(job_id)
+        env = os.environ.copy()
+        env["CLOUDTIK_JOB_ID"] = job_id
+        if self.redis_password:
+            # For the clients of the cluster state in the job
+            env[constants.CLOUDTIK_REDIS_PASSWORD_ENV] = self.redis_password
+        with open(log_file, "ab") as f:
+            process = subprocess.Popen(
+                ["/bin/bash", "--login", "-c", job["command"]],
+                stdin=subprocess.DEVNULL,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                cwd=os.path.expanduser("~"),
+                env=env,
+                start_new_session=True)
+        self.running_jobs[job_id] = process
+        self.job_queue.start_job(job_id, process.pid, log_file)
+        threading.Thread(
+            target=self._wait_job_process, args=(job_id, process),
+            daemon=True).start()
+        logger.info("Job {} started with pid {}.".format(job_id, process.pid))
+
+    def _start_jobs(self):
+        max_concurrency = self._get_max_concurrency()
+        while len(self.running_jobs) < max_concurrency:
+            job = self.job_queue.claim_pending_job()
+            if job is None:
+                break
+            try:
+                self._start_job(job)
+            except Exception:
+                logger.exception("Failed to start job {}.".format(job["id"]))
+                self._finish_job(job["id"], JOB_EXIT_CODE_LOST)
+
+    def _finish_job(self, job_id, exit_code, status=None):
+        self.running_jobs.pop(job_id, None)
+        log_offset = self._get_log_offset(self._get_log_file(job_id))
+        self.job_queue.finish_job(
+            job_id, exit_code, log_offset=log_offset, status=status)
+        publish_job_exit(self.redis, job_id, exit_code)
+        logger.info("Job {} finished with exit code {}.".format(job_id, exit_code))
+
+    def _update_log_offsets(self):
+        now = time.time()
+        if now - self._last_update_time < constants.CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S:
+            return
+        self._last_update_time = now
+        self.job_queue.update_log_offsets({
+            job_id: self._get_log_offset(self._get_log_file(job_id))
+            for job_id in self.running_jobs})
+
+    def _prune_jobs(self):
+        now = time.time()
+        if now - self._last_prune_time < constants.CLOUDTIK_JOB_SCHEDULER_PRUNE_INTERVAL_S:
+            return
+        self._last_prune_time = now
+        pruned = self.job_queue.prune_jobs()
+        if pruned:
+            logger.info("Pruned {} expired jobs.".format(pruned))
+
+    def _handle_event(self, event):
+        event_type, job_id = event
+        if event_type == EVENT_JOB_EXITED:
+            process = self.running_jobs.get(job_id)
+            if process is not None:
+                self._finish_job(job_id, process.returncode)
+
+    def _run(self):
+        self._recover_jobs()
+        threading.Thread(target=self._listen_submission, daemon=True).start()
+        while True:
+            try:
+                self._start_jobs()
+                try:
+                    event = self._events.get(
+                        timeout=constants.CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S)
+                    self._handle_event(event)
+                    # Handle all the events available at once
+                    while True:
+                        self._handle_event(self._events.get_nowait())
+                except queue.Empty:
+                    pass
+                self._update_log_offsets()
+                self._prune_jobs()
+            except Exception:
+                logger.exception("Job Scheduler: Execution exception. Trying again...")
+                time.sleep(constants.CLOUDTIK_JOB_SCHEDULER_UPDATE_INTERVAL_S)
+
+    def _handle_failure(self, error):
+        logger.exception(f"The job scheduler failed with the following error:\n{error}")
+
+    def _signal_handler(self, sig, frame):
+        self._stopped.set()
+        self._handle_failure(f"Terminated with signal {sig}\n" +
+                             "".join(traceback.format_stack(frame)))
+        sys.exit(sig + 128)
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+        try:
+            self._run()
+        except Exception:
+            self._handle_failure(traceback.format_exc())
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parse the arguments of the Job Scheduler")
+    parser.add_argument(
+        "--redis-address",
+        required=True,
+        type=str,
+        help="the address to use for Redis")
+    parser.add_argument(
+        "--redis-password",
+        required=False,
+        type=str,
+        default=None,
+        help="the password to use for Redis")
+    parser.add_argument(
+        "--max-concurrency",
+        required=False,
+        type=int,
+        default=None,
+        help="The default max number of jobs running concurrently.")
+    parser.add_argument(
+        "--job-logs-dir",
+        required=False,
+        type=str,
+        default=None,
+        help="The directory of the job log files, default is "
+        f"\"{DEFAULT_JOB_LOGS_DIR}\".")
+    parser.add_argument(
+        "--logging-level",
+        required=False,
+        type=str,
+        default=constants.LOGGER_LEVEL_INFO,
+        choices=constants.LOGGER_LEVEL_CHOICES,
+        help=constants.LOGGER_LEVEL_HELP)
+    parser.add_argument(
+        "--logging-format",
+        required=False,
+        type=str,
+        default=constants.LOGGER_FORMAT,
+        help=constants.LOGGER_FORMAT_HELP)
+    parser.add_argument(
+        "--logging-filename",
+        required=False,
+        type=str,
+        default=constants.LOG_FILE_NAME_JOB_SCHEDULER,
+        help="Specify the name of log file, "
+        "log to stdout if set empty, default is "
+        f"\"{constants.LOG_FILE_NAME_JOB_SCHEDULER}\"")
+    parser.add_argument(
+        "--logs-dir",
+        required=True,
+        type=str,
+        help="Specify the path of the temporary directory "
+        "processes.")
+    parser.add_argument(
+        "--logging-rotate-bytes",
+        required=False,
+        type=int,
+        default=constants.LOGGING_ROTATE_MAX_BYTES,
+        help="Specify the max bytes for rotating "
+        "log file, default is "
+        f"{constants.LOGGING_ROTATE_MAX_BYTES} bytes.")
+    parser.add_argument(
+        "--logging-rotate-backup-count",
+        required=False,
+        type=int,
+        default=constants.LOGGING_ROTATE_BACKUP_COUNT,
+        help="Specify the backup count of rotated log file, default is "
+        f"{constants.LOGGING_ROTATE_BACKUP_COUNT}.")
+    args = parser.parse_args()
+    setup_component_logger(
+        logging_level=args.logging_level,
+        logging_format=args.logging_format,
+        log_dir=args.logs_dir,
+        filename=args.logging_filename,
+        max_bytes=args.logging_rotate_bytes,
+        backup_count=args.logging_rotate_backup_count)
+
+    logger.info(f"Starting Job Scheduler using CloudTik installation: {cloudtik.__file__}")
+    logger.info(f"CloudTik version: {cloudtik.__version__}")
+    logger.info(f"CloudTik commit: {cloudtik.__commit__}")
+    logger.info(f"Job Scheduler started with command: {sys.argv}")
+
+    job_scheduler = JobScheduler(
+        args.redis_address,
+        redis_password=args.redis_password,
+        max_concurrency=args.max_concurrency,
+        job_logs_dir=args.job_logs_dir)
+    job_scheduler.run()
@@ -0,0 +1,281 @@
+"""Node agent daemon serving lightweight requests of the node.
+
+The node agent runs on each node and serves command execution, session status,
+CPU topology and file stat requests through HTTP with keep-alive connections.
+This avoids the overhead of SSH, process spawn and the CLI import for each call.
+
+The agent listens on the internal IP of the node. The requests are accepted
+only from the head and the node itself and must carry the random token of
+the cluster which is generated on head and passed to the workers through
+the environment of the start commands.
+"""
+
+import argparse
+import hmac
+import json
+import logging.handlers
+import os
+import signal
+import subprocess
+import sys
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cloudtik
+from cloudtik.core._private import constants
+from cloudtik.core._private.cpu_topology import get_cpu_topology
+from cloudtik.core._private.logging_utils import setup_component_logger
+from cloudtik.core._private.node.node_agent import NODE_AGENT_TOKEN_HEADER, \
+    NODE_AGENT_REQUESTS, SESSION_TYPE_TMUX, SESSION_TYPE_SCREEN
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_IPS = ["127.0.0.1", "::1"]
+
+
+def _session_check_command(session_name, session_type):
+    if session_type == SESSION_TYPE_TMUX:
+        return ["tmux", "has-session", "-t", session_name]
+    elif session_type == SESSION_TYPE_SCREEN:
+        return ["screen", "-S", session_name, "-Q", "select", "."]
+    raise ValueError("Unknown session type: {}".format(session_type))
+
+
+class NodeAgent:
+    """Node agent serving the requests through a threading HTTP server."""
+
+    def __init__(self,
+                 node_ip,
+                 token,
+                 port=None,
+                 head_ip=None):
+        if not token:
+            raise ValueError("The node agent requires a token.")
+        self.node_ip = node_ip
+        self.token = token
+        # The clients are the head and the node itself
+        self.allowed_ips = set(LOOPBACK_IPS + [node_ip])
+        if head_ip:
+            self.allowed_ips.add(head_ip)
+        if port is None:
+            port = constants.CLOUDTIK_NODE_AGENT_PORT
+        self._server = ThreadingHTTPServer(
+            (self.node_ip, port), _request_handler(self))
+        self._server.daemon_threads = True
+        # The actual port in case of port 0 for an available port
+        self.port = self._server.server_address[1]
+        logger.info("Node Agent: Listening on {}:{}".format(
+            self.node_ip, self.port))
+
+    def is_authorized(self, client_ip, token):
+        if client_ip not in self.allowed_ips:
+            return False
+        if not token:
+            return False
+        return hmac.compare_digest(token.encode(), self.token.encode())
+
+    def handle_request(self, request_type, args):
+        if request_type not in NODE_AGENT_REQUESTS:
+            raise ValueError("Unknown request type: {}".format(request_type))
+        return getattr(self, request_type)(*args)
+
+    def ping(self):
+        return {
+            "pid": os.getpid(),
+            "version": cloudtik.__version__,
+        }
+
+    def exec(self, cmd, timeout=None):
+        # Use login shell to get the same environment as the SSH execution
+        try:
+            result = subprocess.run(
+                ["/bin/bash", "--login", "-c", cmd],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            output = e.output.decode("utf-8", errors="replace") if e.output else ""
+            return {
+                "exit_code": -1,
+                "output": output + "\nCommand timed out after {} seconds.".format(timeout)
+            }
+        return {
+            "exit_code": result.returncode,
+            "output": result.stdout.decode("utf-8", errors="replace")
+        }
+
+    def session_exists(self, session_name, session_type=SESSION_TYPE_TMUX):
+        cmd = _session_check_command(session_name, session_type)
+        try:
+            return subprocess.call(
+                cmd, stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
+        except FileNotFoundError:
+            return False
+
+    def cpu_topology(self):
+        return get_cpu_topology()
+
+    def file_stat(self, path):
+        path = os.path.expanduser(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": stat.st_size,
+            "mode": stat.st_mode,
+            "mtime": stat.st_mtime,
+            "is_dir": os.path.isdir(path),
+        }
+
+    def _handle_failure(self, error):
+        logger.exception(f"The node agent failed with the following error:\n{error}")
+
+    def _signal_handler(self, sig, frame):
+        self._handle_failure(f"Terminated with signal {sig}\n" +
+                             "".join(traceback.format_stack(frame)))
+        sys.exit(sig + 128)
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+        try:
+            self._server.serve_forever()
+        except Exception:
+            self._handle_failure(traceback.format_exc())
+            raise
+
+    def shutdown(self):
+        """Shutdown the underlying server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _request_handler(node_agent):
+    class Handler(BaseHTTPRequestHandler):
+        """Handles the JSON requests in the form of {"type": ..., "args": [...]}
+        with persistent connections."""
+        protocol_version = "HTTP/1.1"
+
+        def _send_response(self, response_code, response):
+            message = json.dumps(response).encode()
+            self.send_response(response_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(message)))
+            self.end_headers()
+            self.wfile.write(message)
+
+        def do_POST(self):
+            content_length = int(self.headers.get("Content-Length", 0))
+            raw_data = self.rfile.read(content_length)
+            if not node_agent.is_authorized(
+                    self.client_address[0], self.headers.get(NODE_AGENT_TOKEN_HEADER)):
+                self._send_response(403, {"error": "Not authorized."})
+                return
+            try:
+                request = json.loads(raw_data)
+                request_type = request["type"]
+                args = request.get("args", [])
+            except (ValueError, KeyError) as e:
+                self._send_response(400, {"error": "Invalid request: {}".format(e)})
+                return
+
+            try:
+                result = node_agent.handle_request(request_type, args)
+            except Exception as e:
+                logger.exception("Failed to handle request: {}".format(request_type))
+                self._send_response(500, {"error": str(e)})
+                return
+            self._send_response(200, {"result": result})
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parse the arguments of the Node Agent")
+    parser.add_argument(
+        "--node-ip",
+        required=True,
+        type=str,
+        help="The IP address of the node to listen on.")
+    parser.add_argument(
+        "--port",
+        required=False,
+        type=int,
+        default=constants.CLOUDTIK_NODE_AGENT_PORT,
+        help="The port to listen on.")
+    parser.add_argument(
+        "--head-ip",
+        required=False,
+        type=str,
+        default=None,
+        help="The IP address of the head which is allowed to request.")
+    parser.add_argument(
+        "--logging-level",
+        required=False,
+        type=str,
+        default=constants.LOGGER_LEVEL_INFO,
+        choices=constants.LOGGER_LEVEL_CHOICES,
+        help=constants.LOGGER_LEVEL_HELP)
+    parser.add_argument(
+        "--logging-format",
+        required=False,
+        type=str,
+        default=constants.LOGGER_FORMAT,
+        help=constants.LOGGER_FORMAT_HELP)
+    parser.add_argument(
+        "--logging-filename",
+        required=False,
+        type=str,
+        default=constants.LOG_FILE_NAME_NODE_AGENT,
+        help="Specify the name of log file, "
+        "log to stdout if set empty, default is "
+        f"\"{constants.LOG_FILE_NAME_NODE_AGENT}\"")
+    parser.add_argument(
+        "--logs-dir",
+        required=True,
+        type=str,
+        help="Specify the path of the temporary directory "
+        "processes.")
+    parser.add_argument(
+        "--logging-rotate-bytes",
+        required=False,
+        type=int,
+        default=constants.LOGGING_ROTATE_MAX_BYTES,
+        help="Specify the max bytes for rotating "
+        "log file, default is "
+        f"{constants.LOGGING_ROTATE_MAX_BYTES} bytes.")
+    parser.add_argument(
+        "--logging-rotate-backup-count",
+        required=False,
+        type=int,
+        default=constants.LOGGING_ROTATE_BACKUP_COUNT,
+        help="Specify the backup count of rotated log file, default is "
+        f"{constants.LOGGING_ROTATE_BACKUP_COUNT}.")
+    args = parser.parse_args()
+    setup_component_logger(
+        logging_level=args.logging_level,
+        logging_format=args.logging_format,
+        log_dir=args.logs_dir,
+        filename=args.logging_filename,
+        max_bytes=args.logging_rotate_bytes,
+        backup_count=args.logging_rotate_backup_count)
+
+    logger.info(f"Starting Node Agent using CloudTik installation: {cloudtik.__file__}")
+    logger.info(f"CloudTik version: {cloudtik.__version__}")
+    logger.info(f"CloudTik commit: {cloudtik.__commit__}")
+    logger.info(f"Node Agent started with command: {sys.argv}")
+
+    # The token is passed through the environment instead of the command line
+    node_agent = NodeAgent(
+        args.node_ip,
+        os.environ.get(constants.CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN),
+        port=args.port,
+        head_ip=args.head_ip)
+    node_agent.run()
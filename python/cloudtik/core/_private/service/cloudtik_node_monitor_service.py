@@ -15,8 +15,10 @@ import subprocess
 
 import cloudtik
 from cloudtik.core._private import constants
+from cloudtik.core._private.cpu_topology import get_cpu_topology, publish_cpu_topology
 from cloudtik.core._private.logging_utils import setup_component_logger
 from cloudtik.core._private.metrics.metrics_collector import MetricsCollector
+from cloudtik.core._private.node_facts import get_node_facts, publish_node_facts
 from cloudtik.core._private.state.control_state import ControlState
 from cloudtik.core._private.utils import get_runtime_processes, make_node_id
 
@@ -80,6 +82,7 @@ class NodeMonitor:
 
     def _run(self):
         """Run the monitor loop."""
+        self._publish_node_facts()
         self.create_heart_beat_thread()
         while True:
             if self.stop_event and self.stop_event.is_set():
@@ -104,6 +107,18 @@ class NodeMonitor:
                              "".join(traceback.format_stack(frame)))
         sys.exit(sig + 128)
 
+    def _publish_node_facts(self):
+        # The topology and facts don't change for the life of the node
+        try:
+            cpu_topology = get_cpu_topology()
+            publish_cpu_topology(
+                self.control_state, self.node_ip, cpu_topology)
+            publish_node_facts(
+                self.control_state, self.node_ip, self.node_type,
+                get_node_facts(cpu_topology))
+        except Exception as e:
+            logger.warning("Failed to publish CPU topology and node facts: " + str(e))
+
     def create_heart_beat_thread(self):
         thread = threading.Thread(target=self.send_heart_beat)
         # ensure when node_monitor exits, the thread will stop automatically.
@@ -211,6 +211,17 @@ def get_address_to_use_or_die():
                           find_redis_address_or_die())
 
 
+def get_redis_password_to_use():
+    """
+    Get the redis password of the cluster from the environment variable
+    or use the default password.
+    Returns:
+        A string to redis password
+    """
+    return os.environ.get(constants.CLOUDTIK_REDIS_PASSWORD_ENV,
+                          constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD)
+
+
 def find_redis_address_or_die():
 
     redis_addresses = find_redis_address()
@@ -1136,6 +1147,115 @@ def start_log_monitor(redis_address,
     return process_info
 
 
+def start_node_agent(node_ip,
+                     logs_dir,
+                     token,
+                     head_ip=None,
+                     port=None,
+                     stdout_file=None,
+                     stderr_file=None,
+                     fate_share=None,
+                     logging_level=None,
+                     max_bytes=0,
+                     backup_count=0):
+    """Start a node agent process.
+
+    Args:
+        node_ip (str): The IP address of the node for the agent to listen on.
+        logs_dir (str): The directory of logging files.
+        token (str): The token of the cluster for authenticating the requests.
+        head_ip (str): The IP address of the head allowed to request the agent.
+        port (int): The port for the agent to listen on.
+        stdout_file: A file handle opened for writing to redirect stdout to. If
+            no redirection should happen, then this should be None.
+        stderr_file: A file handle opened for writing to redirect stderr to. If
+            no redirection should happen, then this should be None.
+        logging_level (str): The logging level to use for the process.
+        max_bytes (int): Log rotation parameter. Corresponding to
+            RotatingFileHandler's maxBytes.
+        backup_count (int): Log rotation parameter. Corresponding to
+            RotatingFileHandler's backupCount.
+
+    Returns:
+        ProcessInfo for the process that was started.
+    """
+    node_agent_filepath = os.path.join(CLOUDTIK_PATH, CLOUDTIK_CORE_PRIVATE_SERVICE,
+                                       "cloudtik_node_agent_service.py")
+    command = [
+        sys.executable, "-u", node_agent_filepath,
+        f"--node-ip={node_ip}", f"--logs-dir={logs_dir}",
+        f"--logging-rotate-bytes={max_bytes}",
+        f"--logging-rotate-backup-count={backup_count}",
+    ]
+    if port:
+        command.append(f"--port={port}")
+    if logging_level:
+        command.append("--logging-level=" + logging_level)
+    if head_ip:
+        command.append(f"--head-ip={head_ip}")
+    # Not in the command line which is visible to the other users
+    env_updates = {constants.CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN: token}
+    process_info = start_cloudtik_process(
+        command,
+        constants.PROCESS_TYPE_NODE_AGENT,
+        env_updates=env_updates,
+        stdout_file=stdout_file,
+        stderr_file=stderr_file,
+        fate_share=fate_share)
+    return process_info
+
+
+def start_job_scheduler(redis_address,
+                        logs_dir,
+                        stdout_file=None,
+                        stderr_file=None,
+                        redis_password=None,
+                        fate_share=None,
+                        logging_level=None,
+                        max_bytes=0,
+                        backup_count=0):
+    """Run a process to schedule the jobs in the job queue on head.
+
+    Args:
+        redis_address (str): The address that the Redis server is listening on.
+        logs_dir(str): The path to the log directory.
+        stdout_file: A file handle opened for writing to redirect stdout to. If
+            no redirection should happen, then this should be None.
+        stderr_file: A file handle opened for writing to redirect stderr to. If
+            no redirection should happen, then this should be None.
+        redis_password (str): The password of the redis server.
+        logging_level (str): The logging level to use for the process.
+        max_bytes (int): Log rotation parameter. Corresponding to
+            RotatingFileHandler's maxBytes.
+        backup_count (int): Log rotation parameter. Corresponding to
+            RotatingFileHandler's backupCount.
+    Returns:
+        ProcessInfo for the process that was started.
+    """
+    job_scheduler_path = os.path.join(CLOUDTIK_PATH, CLOUDTIK_CORE_PRIVATE_SERVICE,
+                                      "cloudtik_job_scheduler.py")
+    command = [
+        sys.executable,
+        "-u",
+        job_scheduler_path,
+        f"--logs-dir={logs_dir}",
+        f"--redis-address={redis_address}",
+        f"--logging-rotate-bytes={max_bytes}",
+        f"--logging-rotate-backup-count={backup_count}",
+    ]
+    if logging_level:
+        command.append("--logging-level=" + logging_level)
+    if redis_password:
+        command.append("--redis-password=" + redis_password)
+    process_info = start_cloudtik_process(
+        command,
+        constants.PROCESS_TYPE_JOB_SCHEDULER,
+        stdout_file=stdout_file,
+        stderr_file=stderr_file,
+        fate_share=fate_share)
+    return process_info
+
+
 def start_cluster_controller(redis_address,
                              logs_dir,
                              stdout_file=None,
@@ -0,0 +1,321 @@
+"""Job queue stored in the Redis of head.
+
+The jobs are submitted in batches and run on head by the job scheduler with
+a concurrency limit and in the order of priorities (higher first) and the
+submission sequence.
+
+Keys of the queue:
+- The job hash keeps the spec and the status of a job.
+- The pending sorted set is scored by the priority and the sequence.
+- The running set keeps the jobs claimed by the scheduler to run.
+- The jobs sorted set is scored by the sequence for listing all the jobs.
+- The notify list wakes up the scheduler when jobs are submitted.
+
+The job hashes of the finished jobs expire after the retention time and
+the jobs sorted set is pruned of the expired jobs by the scheduler.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from cloudtik.core._private.constants import CLOUDTIK_JOB_QUEUE_RETENTION_S
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_KEY_PREFIX = "cloudtik:job_queue:"
+JOB_SEQ_KEY = JOB_QUEUE_KEY_PREFIX + "seq"
+JOB_KEY_PREFIX = JOB_QUEUE_KEY_PREFIX + "job:"
+JOB_PENDING_KEY = JOB_QUEUE_KEY_PREFIX + "pending"
+JOB_RUNNING_KEY = JOB_QUEUE_KEY_PREFIX + "running"
+JOB_ALL_KEY = JOB_QUEUE_KEY_PREFIX + "jobs"
+JOB_NOTIFY_KEY = JOB_QUEUE_KEY_PREFIX + "notify"
+JOB_MAX_CONCURRENCY_KEY = JOB_QUEUE_KEY_PREFIX + "max_concurrency"
+
+JOB_STATUS_PENDING = "PENDING"
+JOB_STATUS_RUNNING = "RUNNING"
+JOB_STATUS_SUCCEEDED = "SUCCEEDED"
+JOB_STATUS_FAILED = "FAILED"
+JOB_STATUS_CANCELLED = "CANCELLED"
+# The job was running when the scheduler restarted
+JOB_STATUS_LOST = "LOST"
+
+JOB_STATUSES = [
+    JOB_STATUS_PENDING,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_SUCCEEDED,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_CANCELLED,
+    JOB_STATUS_LOST,
+]
+
+# The exit codes for the jobs not run to the end
+JOB_EXIT_CODE_LOST = -1
+JOB_EXIT_CODE_CANCELLED = -2
+
+# The directory on head for the files of the jobs (deduplicated by hash)
+JOB_FILES_DIR = "$HOME/user/jobs/files"
+
+# The sequence is below this in the score of pending jobs
+JOB_PRIORITY_SCORE_BASE = 10 ** 12
+
+# The number of jobs checked in a round trip when pruning
+JOB_PRUNE_BATCH_SIZE = 100
+
+# Move the pending job with the highest priority to the running set in one
+# step so that a job is never in neither of them. The jobs without the hash
+# are dropped.
+# KEYS: pending key, running key
+# ARGV: job key prefix, running status, start time
+CLAIM_PENDING_JOB_SCRIPT = """
+while true do
+    local popped = redis.call('ZPOPMIN', KEYS[1])
+    if #popped == 0 then
+        return false
+    end
+    local job_key = ARGV[1] .. popped[1]
+    if redis.call('EXISTS', job_key) == 1 then
+        redis.call('SADD', KEYS[2], popped[1])
+        redis.call('HSET', job_key, 'status', ARGV[2], 'start_time', ARGV[3])
+        return popped[1]
+    end
+end
+"""
+
+JOB_INT_FIELDS = ["seq", "priority", "exit_code", "log_offset", "pid"]
+JOB_FLOAT_FIELDS = ["submit_time", "start_time", "end_time"]
+
+
+def get_job_id(seq: int) -> str:
+    return "job-{:08d}".format(seq)
+
+
+def _get_job_key(job_id: str) -> str:
+    return JOB_KEY_PREFIX + job_id
+
+
+def _get_pending_score(priority: int, seq: int) -> int:
+    # Lower score pops first: higher priority, then earlier submission
+    return -priority * JOB_PRIORITY_SCORE_BASE + seq
+
+
+def _decode_job(job_data) -> Optional[Dict[str, Any]]:
+    if not job_data:
+        return None
+    job = {}
+    for key, value in job_data.items():
+        if isinstance(key, bytes):
+            key = key.decode()
+        if isinstance(value, bytes):
+            value = value.decode()
+        if value == "":
+            value = None
+        elif key in JOB_INT_FIELDS:
+            value = int(value)
+        elif key in JOB_FLOAT_FIELDS:
+            value = float(value)
+        job[key] = value
+    return job
+
+
+def _decode_ids(values) -> List[str]:
+    return [value.decode() if isinstance(value, bytes) else value
+            for value in values]
+
+
+class JobQueue:
+    """The job queue operations on the Redis of head."""
+
+    def __init__(self, redis_client, retention_s: Optional[int] = None):
+        self.redis = redis_client
+        self.retention_s = retention_s \
+            if retention_s else CLOUDTIK_JOB_QUEUE_RETENTION_S
+        self._claim_pending_job = self.redis.register_script(
+            CLAIM_PENDING_JOB_SCRIPT)
+
+    def submit_jobs(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """Submit a batch of jobs in one round trip.
+
+        Args:
+            jobs: The job specs with the "command" to run and optional
+                "name" and "priority".
+
+        Returns:
+            The ids of the jobs in the order of the specs.
+        """
+        if not jobs:
+            return []
+        for job in jobs:
+            if not job.get("command"):
+                raise ValueError("Command of the job is not specified.")
+
+        last_seq = self.redis.incrby(JOB_SEQ_KEY, len(jobs))
+        first_seq = last_seq - len(jobs) + 1
+        submit_time = time.time()
+        job_ids = []
+        pipe = self.redis.pipeline(transaction=False)
+        for i, job in enumerate(jobs):
+            seq = first_seq + i
+            job_id = get_job_id(seq)
+            priority = int(job.get("priority", 0))
+            pipe.hset(_get_job_key(job_id), mapping={
+                "id": job_id,
+                "seq": seq,
+                "name": job.get("name") or "",
+                "command": job["command"],
+                "priority": priority,
+                "status": JOB_STATUS_PENDING,
+                "submit_time": submit_time,
+            })
+            pipe.zadd(JOB_PENDING_KEY, {job_id: _get_pending_score(priority, seq)})
+            pipe.zadd(JOB_ALL_KEY, {job_id: seq})
+            job_ids.append(job_id)
+        pipe.rpush(JOB_NOTIFY_KEY, last_seq)
+        pipe.execute()
+        return job_ids
+
+    def wait_for_submit(self, timeout: int) -> bool:
+        """Block until new jobs are submitted or timeout."""
+        if self.redis.blpop([JOB_NOTIFY_KEY], timeout=max(1, timeout)) is None:
+            return False
+        # One wakeup is enough for all the batches submitted
+        self.redis.delete(JOB_NOTIFY_KEY)
+        return True
+
+    def claim_pending_job(self) -> Optional[Dict[str, Any]]:
+        """Claim the pending job with the highest priority to run.
+
+        The job is moved from pending to running atomically. The job claimed
+        is left in running if the scheduler dies before finishing it and
+        will be recovered as lost by the next scheduler.
+        """
+        job_id = self._claim_pending_job(
+            keys=[JOB_PENDING_KEY, JOB_RUNNING_KEY],
+            args=[JOB_KEY_PREFIX, JOB_STATUS_RUNNING, time.time()])
+        if not job_id:
+            return None
+        return self.get_job(_decode_ids([job_id])[0])
+
+    def start_job(self, job_id: str, pid: int, log_file: str):
+        self.redis.hset(_get_job_key(job_id), mapping={
+            "pid": pid,
+            "log_file": log_file,
+            "log_offset": 0,
+        })
+
+    def update_log_offsets(self, log_offsets: Dict[str, int]):
+        if not log_offsets:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id, log_offset in log_offsets.items():
+            pipe.hset(_get_job_key(job_id), "log_offset", log_offset)
+        pipe.execute()
+
+    def finish_job(self, job_id: str, exit_code: int,
+                   log_offset: Optional[int] = None,
+                   status: Optional[str] = None):
+        if status is None:
+            status = JOB_STATUS_SUCCEEDED if exit_code == 0 else JOB_STATUS_FAILED
+        job_data = {
+            "status": status,
+            "exit_code": exit_code,
+            "end_time": time.time(),
+        }
+        if log_offset is not None:
+            job_data["log_offset"] = log_offset
+        job_key = _get_job_key(job_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(job_key, mapping=job_data)
+        pipe.expire(job_key, self.retention_s)
+        pipe.srem(JOB_RUNNING_KEY, job_id)
+        pipe.execute()
+
+    def cancel_jobs(self, job_ids: List[str]) -> List[str]:
+        """Cancel the jobs which are still pending.
+
+        Returns:
+            The ids of the jobs cancelled.
+        """
+        cancelled = []
+        for job_id in job_ids:
+            # Only the one removed from pending owns the cancellation
+            if self.redis.zrem(JOB_PENDING_KEY, job_id):
+                job_key = _get_job_key(job_id)
+                pipe = self.redis.pipeline()
+                pipe.hset(job_key, mapping={
+                    "status": JOB_STATUS_CANCELLED,
+                    "exit_code": JOB_EXIT_CODE_CANCELLED,
+                    "end_time": time.time(),
+                })
+                pipe.expire(job_key, self.retention_s)
+                pipe.execute()
+                cancelled.append(job_id)
+        return cancelled
+
+    def prune_jobs(self) -> int:
+        """Remove the jobs expired from the jobs sorted set.
+
+        The jobs finish roughly in the order of submission so the expired
+        ones are checked from the oldest until a batch has none of them.
+
+        Returns:
+            The number of the jobs removed.
+        """
+        pruned = 0
+        start = 0
+        while True:
+            job_ids = _decode_ids(self.redis.zrange(
+                JOB_ALL_KEY, start, start + JOB_PRUNE_BATCH_SIZE - 1))
+            if not job_ids:
+                break
+            pipe = self.redis.pipeline(transaction=False)
+            for job_id in job_ids:
+                pipe.exists(_get_job_key(job_id))
+            expired = [job_id for job_id, exists in zip(
+                job_ids, pipe.execute()) if not exists]
+            if not expired:
+                break
+            self.redis.zrem(JOB_ALL_KEY, *expired)
+            pruned += len(expired)
+            # The ones left in the batch shift to the front
+            start += len(job_ids) - len(expired)
+        return pruned
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return _decode_job(self.redis.hgetall(_get_job_key(job_id)))
+
+    def get_jobs(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the jobs in one round trip. The jobs not found are skipped."""
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(_get_job_key(job_id))
+        jobs = [_decode_job(job_data) for job_data in pipe.execute()]
+        return [job for job in jobs if job is not None]
+
+    def list_jobs(self, status: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List the jobs (the latest if limit specified) in the order of submission."""
+        start = -limit if limit else 0
+        job_ids = _decode_ids(self.redis.zrange(JOB_ALL_KEY, start, -1))
+        jobs = self.get_jobs(job_ids)
+        if status:
+            jobs = [job for job in jobs if job["status"] == status]
+        return jobs
+
+    def get_running_job_ids(self) -> List[str]:
+        return _decode_ids(self.redis.smembers(JOB_RUNNING_KEY))
+
+    def get_num_pending_jobs(self) -> int:
+        return self.redis.zcard(JOB_PENDING_KEY)
+
+    def get_max_concurrency(self) -> Optional[int]:
+        max_concurrency = self.redis.get(JOB_MAX_CONCURRENCY_KEY)
+        return int(max_concurrency) if max_concurrency else None
+
+    def set_max_concurrency(self, max_concurrency: int):
+        if max_concurrency <= 0:
+            raise ValueError("Max concurrency must be a positive number.")
+        pipe = self.redis.pipeline()
+        pipe.set(JOB_MAX_CONCURRENCY_KEY, max_concurrency)
+        # Wake up the scheduler for the change
+        pipe.rpush(JOB_NOTIFY_KEY, 0)
+        pipe.execute()
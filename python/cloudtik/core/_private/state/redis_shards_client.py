@@ -55,6 +55,22 @@ class RedisShard:
     def scan(self, cursor, match_pattern, batch_size):
         return self._redis_client.scan(cursor, match_pattern, batch_size)
 
+    def scan_values(self, match_pattern, batch_size):
+        """Scan the keys and get the values in batches. The MGET of a batch
+        is pipelined with the SCAN of the next batch in one round trip."""
+        cursor, keys = self._redis_client.scan(0, match_pattern, batch_size)
+        while cursor != 0:
+            pipe = self._redis_client.pipeline(transaction=False)
+            if keys:
+                pipe.mget(keys)
+            pipe.scan(cursor, match_pattern, batch_size)
+            results = pipe.execute()
+            if keys:
+                yield keys, results[0]
+            cursor, keys = results[-1]
+        if keys:
+            yield keys, self._redis_client.mget(keys)
+
     def lrange(self, key, start=0, stop=-1):
         return self._redis_client.lrange(key, start, stop)
 
@@ -26,6 +26,18 @@ class RedisShardsScanner:
         self.scan_keys(match_pattern, keys_callback)
         return all_key_value
 
+    def iter_keys_and_values(self, match_pattern):
+        """Iterate the keys and values in batches without loading all."""
+        batch_size = SCAN_BATCH_SIZE
+        shard_size = self._redis_shards_client.get_shards_size()
+        for shard_index in range(shard_size):
+            # The keys scanned from a shard are stored in the shard
+            shard_context = self._redis_shards_client.get_shard_by_index(shard_index)
+            for keys, values in shard_context.scan_values(match_pattern, batch_size):
+                for k, v in zip(keys, values):
+                    if v is not None:
+                        yield get_real_key(k, self._table_name).decode("utf-8"), v.decode("utf-8")
+
     def scan_keys(self, match_pattern, keys_callback):
         batch_size = SCAN_BATCH_SIZE
         shard_size = self._redis_shards_client.get_shards_size()
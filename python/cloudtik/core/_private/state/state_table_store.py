@@ -20,6 +20,10 @@ class StateTable:
     def get_all(self):
         return self._store_client.get_all(self._table_name)
 
+    def iter_all(self):
+        """Iterate the (key, value) of the table in the order of scanning."""
+        return self._store_client.iter_all(self._table_name)
+
     def delete(self, key):
         self._store_client.delete(self._table_name, key)
 
@@ -31,5 +31,10 @@ class StoreClient:
         scanner = RedisShardsScanner(self._redis_shards_client, table_name)
         return scanner.scan_keys_and_values(match_pattern)
 
+    def iter_all(self, table_name):
+        match_pattern = generate_match_pattern(table_name)
+        scanner = RedisShardsScanner(self._redis_shards_client, table_name)
+        return scanner.iter_keys_and_values(match_pattern)
+
 
 
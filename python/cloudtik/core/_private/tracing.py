@@ -0,0 +1,219 @@
+"""Lightweight structured spans for timing the phases of an operation.
+
+A Tracer records a trace of a root span and its nested child spans (similar
+to OpenTelemetry spans but with no external dependency). The finished traces
+are plain dicts which can be kept in a TraceRecorder, published through the
+KV store and rendered as a timeline.
+"""
+import contextlib
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SPAN_STATUS_OK = "ok"
+SPAN_STATUS_ERROR = "error"
+
+DEFAULT_MAX_TRACES = 100
+TIMELINE_BAR_WIDTH = 40
+
+
+def _new_id():
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """A timed operation with attributes and the status."""
+
+    def __init__(self, name: str, trace_id: str,
+                 parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes) if attributes else {}
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.end_time is not None
+
+    @property
+    def duration(self) -> float:
+        end_time = self.end_time if self.finished else time.time()
+        return end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.finished:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.status = SPAN_STATUS_ERROR
+            self.error = str(error) or type(error).__name__
+        else:
+            self.status = SPAN_STATUS_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Record the spans of one trace.
+
+    The spans started with span() are nested under the innermost span which
+    is still open in the same thread, or under the root span.
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = _new_id()
+        self.root = Span(name, self.trace_id, attributes=attributes)
+        self.spans: List[Span] = [self.root]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def set_attribute(self, key: str, value: Any):
+        self.root.set_attribute(key, value)
+
+    def start_span(self, name: str, **attributes) -> Span:
+        stack = self._stack()
+        parent = stack[-1] if stack else self.root
+        span = Span(name, self.trace_id, parent.span_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+        stack.append(span)
+        return span
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end(error)
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, e)
+            raise
+        self.end_span(span)
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.root.end(error)
+
+    def get_phase_durations(self) -> Dict[str, float]:
+        """The total seconds of the finished spans by name (the root excluded)."""
+        durations = {}
+        with self._lock:
+            spans = list(self.spans[1:])
+        for span in spans:
+            if span.finished:
+                durations[span.name] = durations.get(
+                    span.name, 0.0) + span.duration
+        return durations
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        trace = self.root.to_dict()
+        trace["trace_id"] = self.trace_id
+        trace["spans"] = [span.to_dict() for span in spans[1:]]
+        return trace
+
+
+class TraceRecorder:
+    """Keep the most recent finished traces in memory (thread safe)."""
+
+    def __init__(self, max_traces: int = DEFAULT_MAX_TRACES):
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._changed = False
+
+    def add(self, trace: Dict[str, Any]):
+        with self._lock:
+            self._traces.append(trace)
+            self._changed = True
+
+    def get_traces(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._traces)
+
+    def get_changed_traces(self) -> Optional[List[Dict[str, Any]]]:
+        """Return all the traces if any trace added since the last call."""
+        with self._lock:
+            if not self._changed:
+                return None
+            self._changed = False
+            return list(self._traces)
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _get_span_depths(trace):
+    # The spans under the root are at depth 0
+    depths = {trace["span_id"]: -1}
+    for span in trace["spans"]:
+        depths[span["span_id"]] = depths.get(span["parent_id"], 0) + 1
+    return depths
+
+
+def format_trace_timeline(trace: Dict[str, Any],
+                          bar_width: int = TIMELINE_BAR_WIDTH) -> List[str]:
+    """Format a trace as the lines of a timeline with a bar for each span."""
+    start_time = trace["start_time"]
+    end_time = trace["end_time"] or max(
+        [span["end_time"] or span["start_time"] for span in trace["spans"]] +
+        [start_time])
+    total = max(end_time - start_time, 1e-6)
+    attributes = trace.get("attributes") or {}
+    title = " ".join(
+        "{}={}".format(k, v) for k, v in attributes.items() if v is not None)
+    lines = ["{} {} [{}] {:.1f}s at {}".format(
+        trace["name"], title, trace["status"] or "running",
+        end_time - start_time, _format_time(start_time))]
+    if trace.get("error"):
+        lines.append("  error: {}".format(trace["error"]))
+
+    depths = _get_span_depths(trace)
+    name_width = max([len(span["name"]) + 2 * depths[span["span_id"]]
+                      for span in trace["spans"]] + [8])
+    for span in trace["spans"]:
+        span_end = span["end_time"] or end_time
+        offset = span["start_time"] - start_time
+        duration = span_end - span["start_time"]
+        begin = int(offset / total * bar_width)
+        length = max(1, int(round(duration / total * bar_width)))
+        bar = (" " * begin + "#" * length)[:bar_width].ljust(bar_width)
+        name = "  " * depths[span["span_id"]] + span["name"]
+        status = "" if span["status"] == SPAN_STATUS_OK else " " + (
+            span["status"] or "running")
+        lines.append("  {} {:>8.1f}s {:>8.1f}s |{}|{}".format(
+            name.ljust(name_width), offset, duration, bar, status))
+    return lines
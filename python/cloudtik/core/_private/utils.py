@@ -20,7 +20,6 @@ import ipaddr
 import socket
 import re
 from contextlib import closing
-from concurrent.futures import ThreadPoolExecutor
 from shlex import quote
 
 import yaml
@@ -36,9 +35,13 @@ from cloudtik.core._private.constants import CLOUDTIK_WHEELS, CLOUDTIK_CLUSTER_P
     CLOUDTIK_CLUSTER_URI_TEMPLATE, CLOUDTIK_RUNTIME_NAME, CLOUDTIK_RUNTIME_ENV_NODE_IP, CLOUDTIK_RUNTIME_ENV_HEAD_IP, \
     CLOUDTIK_RUNTIME_ENV_SECRETS, CLOUDTIK_DEFAULT_PORT, CLOUDTIK_REDIS_DEFAULT_PASSWORD, \
     CLOUDTIK_RUNTIME_ENV_NODE_TYPE, PRIVACY_REPLACEMENT_TEMPLATE, PRIVACY_REPLACEMENT, CLOUDTIK_CONFIG_SECRET, \
-    CLOUDTIK_ENCRYPTION_PREFIX
-from cloudtik.core._private.core_utils import _load_class, double_quote, check_process_exists
+    CLOUDTIK_ENCRYPTION_PREFIX, PARALLEL_EXEC_NODE_TIMEOUT_S, PARALLEL_EXEC_NODE_RETRIES, \
+    PARALLEL_EXEC_PROGRESS_INTERVAL_S, CLOUDTIK_HASH_CACHE_MAX_SIZE
+from cloudtik.core._private.core_utils import _load_class, check_process_exists, \
+    with_script_args
 from cloudtik.core._private.crypto import AESCipher
+from cloudtik.core._private.parallel_executor import AdaptiveParallelExecutor, TaskResult, \
+    TASK_SUCCEEDED, TASK_RETRYING, TASK_TIMEOUT
 from cloudtik.core._private.runtime_factory import _get_runtime, _get_runtime_cls, DEFAULT_RUNTIMES
 from cloudtik.core.node_provider import NodeProvider
 from cloudtik.core._private.providers import _get_default_config, _get_node_provider, _get_provider_config_object, \
@@ -59,6 +62,7 @@ CLOUDTIK_WORKSPACE_SCHEMA_PATH = os.path.join(
 # Internal kv keys for storing debug status.
 CLOUDTIK_CLUSTER_SCALING_ERROR = "__cluster_scaling_error"
 CLOUDTIK_CLUSTER_SCALING_STATUS = "__cluster_scaling_status"
+CLOUDTIK_NODE_TIMELINE = "__node_timeline"
 
 # Internal kv key for publish runtime config.
 CLOUDTIK_CLUSTER_RUNTIME_CONFIG = "__cluster_runtime_config"
@@ -146,11 +150,6 @@ def run_system_command(cmd: str):
         raise RuntimeError(f"Error happened in running: {cmd}")
 
 
-def with_script_args(cmds, script_args):
-    if script_args:
-        cmds += [double_quote(script_arg) for script_arg in list(script_args)]
-
-
 def run_bash_scripts(command: str, script_path, script_args):
     cmds = [
         "bash",
@@ -245,10 +244,75 @@ def publish_error(error_type,
             "redis_client needs to be specified!")
 
 
+def is_node_connection_error(error) -> bool:
+    """Whether the error is failing to connect to the node and the command was not run."""
+    return getattr(error, "special_case", None) in ["ssh_timeout", "ssh_conn_refused"]
+
+
+class _NodeTaskProgress:
+    """Stream the progress of the tasks on the nodes to the CLI as they complete."""
+
+    def __init__(self, _cli_logger, total, interval=PARALLEL_EXEC_PROGRESS_INTERVAL_S):
+        self._cli_logger = _cli_logger
+        self.total = total
+        self.interval = interval
+        self.succeeded = 0
+        self.failures = 0
+        self.skipped = 0
+        self.executor = None
+        self._last_report_time = time.time()
+
+    @property
+    def completed(self):
+        return self.succeeded + self.failures + self.skipped
+
+    def __call__(self, task_result: TaskResult):
+        node_id = task_result.item
+        if task_result.status == TASK_SUCCEEDED:
+            self.succeeded += 1
+            self._cli_logger.verbose(
+                "Task succeeded on node {} in {:.1f}s.", node_id, task_result.elapsed)
+        elif task_result.status == TASK_RETRYING:
+            self._cli_logger.verbose(
+                "Task failed on node {} (attempt {}), retrying: {}",
+                node_id, task_result.attempts, str(task_result.error))
+            return
+        elif isinstance(task_result.error, ParallelTaskSkipped):
+            self.skipped += 1
+            self._cli_logger.warning(
+                "Task skipped on node {}: {}", node_id, str(task_result.error))
+        else:
+            self.failures += 1
+            if task_result.status == TASK_TIMEOUT:
+                self._cli_logger.error(
+                    "Task timed out on node {}: {}", node_id, str(task_result.error))
+            else:
+                self._cli_logger.error(
+                    "Task failed on node {}: {}", node_id, str(task_result.error))
+
+        now = time.time()
+        if self.completed < self.total and now - self._last_report_time >= self.interval:
+            self._last_report_time = now
+            self._cli_logger.print(
+                "Progress: {}/{} nodes completed, {} failed, {} skipped (concurrency {}).",
+                self.completed, self.total, self.failures, self.skipped,
+                self.executor.controller.concurrency if self.executor else "-")
+
+
 def run_in_parallel_on_nodes(run_exec,
                              call_context: CallContext,
                              nodes,
-                             max_workers=MAX_PARALLEL_EXEC_NODES) -> Tuple[int, int, int]:
+                             max_workers=MAX_PARALLEL_EXEC_NODES,
+                             timeout=None,
+                             retries=None,
+                             retry_on=is_node_connection_error) -> Tuple[int, int, int]:
+    """Run on the nodes in parallel with the concurrency adapted to the
+    latency and error rate observed. The tasks failed to connect to the
+    node are retried with jitter by default.
+
+    Returns:
+        The number of nodes succeeded, failed and skipped.
+    """
     # This is to ensure that the parallel SSH calls below do not mess with
     # the users terminal.
     output_redir = call_context.is_output_redirected()
@@ -257,29 +321,36 @@ def run_in_parallel_on_nodes(run_exec,
     call_context.set_allow_interactive(False)
 
     _cli_logger = call_context.cli_logger
+    if timeout is None:
+        timeout = PARALLEL_EXEC_NODE_TIMEOUT_S
+    if retries is None:
+        retries = PARALLEL_EXEC_NODE_RETRIES
 
-    failures = 0
-    skipped = 0
-    with ThreadPoolExecutor(
-            max_workers=max_workers) as executor:
-        futures = {}
-        for node_id in nodes:
-            futures[node_id] = executor.submit(
-                run_exec, node_id=node_id, call_context=call_context.new_call_context())
-
-        for node_id, future in futures.items():
-            try:
-                result = future.result()
-            except ParallelTaskSkipped as se:
-                skipped += 1
-                _cli_logger.warning("Task skipped on node {}: {}", node_id, str(se)),
-            except Exception as e:
-                failures += 1
-                _cli_logger.error("Task failed on node {}: {}", node_id, str(e))
-
-    call_context.set_output_redirected(output_redir)
-    call_context.set_allow_interactive(allow_interactive)
+    def run_on_node(node_id):
+        # A new call context for each attempt
+        return run_exec(node_id=node_id, call_context=call_context.new_call_context())
 
+    def should_retry(error):
+        if isinstance(error, ParallelTaskSkipped):
+            return False
+        return retry_on is None or retry_on(error)
+
+    progress = _NodeTaskProgress(_cli_logger, len(nodes))
+    executor = AdaptiveParallelExecutor(
+        max_workers=max_workers,
+        timeout=timeout,
+        retries=retries,
+        retry_on=should_retry,
+        on_progress=progress)
+    progress.executor = executor
+    try:
+        executor.run(run_on_node, list(nodes))
+    finally:
+        call_context.set_output_redirected(output_redir)
+        call_context.set_allow_interactive(allow_interactive)
+
+    failures = progress.failures
+    skipped = progress.skipped
     if failures > 1 or skipped > 1:
         _cli_logger.print("Total {} tasks failed. Total {} tasks skipped.", failures, skipped)
 
@@ -888,6 +959,15 @@ def combine_commands_from_docker(config, merged_commands, command_key):
 def _get_node_specific_runtime_types(config, node_id: str):
     provider = _get_node_provider(config["provider"], config["cluster_name"])
     node_type_config = _get_node_specific_config(config, provider, node_id)
+    return _get_runtime_types_of_node_type_config(config, node_type_config)
+
+
+def _get_node_type_specific_runtime_types(config, node_type: str):
+    node_type_config = _get_node_type_config(config, node_type)
+    return _get_runtime_types_of_node_type_config(config, node_type_config)
+
+
+def _get_runtime_types_of_node_type_config(config, node_type_config):
     if (node_type_config is not None) and (
             RUNTIME_CONFIG_KEY in node_type_config) and (
             RUNTIME_TYPES_CONFIG_KEY in node_type_config[RUNTIME_CONFIG_KEY]):
@@ -1219,8 +1299,9 @@ def hash_launch_conf(node_conf, auth):
 # Cache the file hashes to avoid rescanning it each time. Also, this avoids
 # inadvertently restarting workers if the file mount content is mutated on the
 # head node.
-# This global cache needs to be protected for thread concurrency for future cases
-_hash_cache = ConcurrentObjectCache()
+# The least recently used hashes are evicted for the config changes of a
+# long-running controller. No expiry since rehashing may restart the workers.
+_hash_cache = ConcurrentObjectCache(max_size=CLOUDTIK_HASH_CACHE_MAX_SIZE)
 
 HASH_CONTEXT_HEAD_NODE_CONTENTS_HASH = "head_node_contents_hash"
 HASH_CONTEXT_CONTENTS_HASHER = "contents_hasher"
@@ -1932,14 +2013,19 @@ def get_node_info(provider, node, extras: bool = False,
     node_info["node"] = node
 
     if extras:
-        node_type = node_info.get(CLOUDTIK_TAG_USER_NODE_TYPE)
-        if node_type is not None and node_type in available_node_types:
-            resources = available_node_types[node_type].get("resources", {})
-            node_info[constants.CLOUDTIK_RESOURCE_CPU] = resources.get(
-                constants.CLOUDTIK_RESOURCE_CPU, 0)
-            node_info[constants.CLOUDTIK_RESOURCE_MEMORY] = resources.get(
-                constants.CLOUDTIK_RESOURCE_MEMORY, 0) / pow(1024, 3)
+        with_node_info_extras(node_info, available_node_types)
+
+    return node_info
 
+
+def with_node_info_extras(node_info, available_node_types: Dict[str, Any]):
+    node_type = node_info.get(CLOUDTIK_TAG_USER_NODE_TYPE)
+    if node_type is not None and node_type in available_node_types:
+        resources = available_node_types[node_type].get("resources", {})
+        node_info[constants.CLOUDTIK_RESOURCE_CPU] = resources.get(
+            constants.CLOUDTIK_RESOURCE_CPU, 0)
+        node_info[constants.CLOUDTIK_RESOURCE_MEMORY] = resources.get(
+            constants.CLOUDTIK_RESOURCE_MEMORY, 0) / pow(1024, 3)
     return node_info
 
 
@@ -1950,6 +2036,13 @@ def is_node_for_runtime(config: Dict[str, Any], node_id: str, runtime: str) -> b
     return False
 
 
+def is_node_type_for_runtime(config: Dict[str, Any], node_type: str, runtime: str) -> bool:
+    runtime_types = _get_node_type_specific_runtime_types(config, node_type)
+    if (runtime_types is not None) and (runtime in runtime_types):
+        return True
+    return False
+
+
 def get_nodes_for_runtime(config: Dict[str, Any], nodes: List[str], runtime: str) -> List[str]:
     return [node for node in nodes if is_node_for_runtime(config, node, runtime)]
 
@@ -34,7 +34,6 @@ from cloudtik.core._private.debug import log_once
 
 logger = logging.getLogger(__name__)
 
-RUN_ENV_TYPES = ["auto", "host", "docker"]
 
 POLL_INTERVAL = 5
 
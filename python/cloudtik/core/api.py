@@ -239,6 +239,34 @@ class Cluster:
             job_log=job_log
         )
 
+    def submit_many(self,
+                    jobs: List[Dict[str, Any]],
+                    max_concurrency: Optional[int] = None,
+                    wait: bool = False,
+                    wait_timeout: Optional[int] = None) -> List[str]:
+        """Submit a batch of jobs to the job queue of the cluster.
+
+        The script files of the jobs are uploaded once by content hash and
+        the jobs are run on head with the concurrency limit and priorities.
+
+        Args:
+            jobs (list): The job specs. Each job spec is a dict with either
+                "command" or "script" (local file or url), and optional "args",
+                "runtime", "runtime_options", "name" and "priority".
+            max_concurrency (int): The max number of jobs running concurrently.
+            wait (bool): Whether to wait for all the jobs to finish.
+            wait_timeout (int): The timeout for waiting the jobs to finish.
+        Returns:
+            The ids of the jobs in the order of the job specs.
+        """
+        return cluster_operator.submit_many_and_exec(
+            config=self.config,
+            call_context=self.call_context,
+            jobs=jobs,
+            max_concurrency=max_concurrency,
+            wait=wait,
+            timeout=wait_timeout)
+
     def rsync(self,
               *,
               source: Optional[str],
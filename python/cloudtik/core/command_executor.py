@@ -162,6 +162,15 @@ class CommandExecutor:
         """
         pass
 
+    def run_pre_init(self, *, as_head: bool) -> None:
+        """Used to start the preparations for initialization in background
+        as soon as the node is reachable, such as pulling the image.
+
+        Args:
+            as_head (bool): Run as head image or worker.
+        """
+        pass
+
     def bootstrap_data_disks(self) -> None:
         """Used to format and mount data disks on host."""
         pass
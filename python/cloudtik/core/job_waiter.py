@@ -1,5 +1,6 @@
 import logging
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -20,3 +21,31 @@ class JobWaiter:
 
     def wait_for_completion(self, node_id: str, cmd: str, session_name: str, timeout: Optional[int] = None):
         raise NotImplementedError
+
+    def wait_for_completion_of_jobs(
+            self, jobs: List[Tuple[str, str, str]], timeout: Optional[int] = None):
+        """Wait for the completion of multiple jobs.
+
+        Args:
+            jobs: The list of (node_id, cmd, session_name) of the jobs.
+            timeout: The timeout for all the jobs.
+
+        The default implementation waits for each job in parallel with
+        wait_for_completion. Override to wait for the jobs at once.
+        """
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            node_id, cmd, session_name = jobs[0]
+            self.wait_for_completion(node_id, cmd, session_name, timeout)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [
+                executor.submit(
+                    self.wait_for_completion,
+                    node_id, cmd, session_name, timeout)
+                for node_id, cmd, session_name in jobs]
+            # Raise the first error if any
+            for future in futures:
+                future.result()
@@ -129,6 +129,44 @@ class NodeProvider:
         """
         return self.create_node(node_config, tags, count)
 
+    def get_launch_placements(
+            self, node_config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Returns the placements to spread the launches of a node config.
+
+        Each placement (for example, a subnet or an availability zone) is a
+        dict of the node config values to override for launching in it.
+        Returns None if the provider doesn't support it.
+        """
+        return None
+
+    def is_capacity_error(self, error: Exception) -> bool:
+        """Returns whether creating nodes failed for insufficient capacity.
+
+        The launches failed for capacity will be retried with backoff (in
+        the next placement if supported).
+        """
+        return False
+
+    def supports_warm_pool(self) -> bool:
+        """Returns whether nodes can be stopped and resumed for the warm pool.
+
+        If supported, create_node() resumes the stopped nodes with the
+        same node kind, node type and launch config first.
+        """
+        return False
+
+    def stopped_nodes(self, tag_filters: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+        """Returns the stopped nodes matching the filters with their tags."""
+        return {}
+
+    def stop_nodes(self, node_ids: List[str]) -> None:
+        """Stops a set of nodes which can be resumed later by create_node()."""
+        raise NotImplementedError
+
+    def terminate_stopped_nodes(self, node_ids: List[str]) -> None:
+        """Terminates a set of stopped nodes (instead of keeping them stopped)."""
+        raise NotImplementedError
+
     def set_node_tags(self, node_id: str, tags: Dict[str, str]) -> None:
         """Sets the tag values (string dict) for the specified node."""
         raise NotImplementedError
@@ -169,6 +207,21 @@ class NodeProvider:
         """
         return None
 
+    def wait_for_terminated(self, node_ids: List[str],
+                            timeout: float) -> Optional[bool]:
+        """Wait for the nodes to be terminated with the waiter of the provider.
+
+        This may be overridden by the providers which can wait for the nodes
+        to disappear from the non-terminated nodes more efficiently than
+        polling them.
+
+        Returns:
+            None if waiting is not supported and the caller polls the
+            non-terminated nodes. Otherwise, whether all the nodes are
+            terminated before the timeout.
+        """
+        return None
+
     def get_command_executor(self,
                              call_context: CallContext,
                              log_prefix: str,
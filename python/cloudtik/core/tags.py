@@ -26,6 +26,18 @@ STATUS_SETTING_UP = "setting-up"
 STATUS_UPDATE_FAILED = "update-failed"
 STATUS_UP_TO_DATE = "up-to-date"
 
+# Tag for the nodes of the warm pool: the nodes being set up for the pool are
+# "filling" and the stopped nodes in the pool are "warm"
+CLOUDTIK_TAG_WARM_POOL = "cloudtik-warm-pool"
+WARM_POOL_FILLING = "filling"
+WARM_POOL_WARM = "warm"
+
+# The time (in seconds since the epoch) the node was stopped into the warm pool
+CLOUDTIK_TAG_WARM_POOL_TIME = "cloudtik-warm-pool-time"
+
+# The warm pool tags removed when a node is resumed from the warm pool
+WARM_POOL_TAGS = [CLOUDTIK_TAG_WARM_POOL, CLOUDTIK_TAG_WARM_POOL_TIME]
+
 # Hash of the node launch config, used to identify out-of-date nodes
 CLOUDTIK_TAG_LAUNCH_CONFIG = "cloudtik-launch-config"
 
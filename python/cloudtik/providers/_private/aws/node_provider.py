@@ -9,7 +9,8 @@ import botocore
 
 from cloudtik.core.node_provider import NodeProvider
 from cloudtik.core.tags import CLOUDTIK_TAG_CLUSTER_NAME, CLOUDTIK_TAG_NODE_NAME, \
-    CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_USER_NODE_TYPE
+    CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_USER_NODE_TYPE, \
+    CLOUDTIK_TAG_WARM_POOL, WARM_POOL_FILLING, WARM_POOL_TAGS
 
 from cloudtik.core._private.log_timer import LogTimer
 from cloudtik.core._private.cli_logger import cli_logger, cf
@@ -25,6 +26,13 @@ logger = logging.getLogger(__name__)
 
 TAG_BATCH_DELAY = 1
 
+# The error codes of creating instances for insufficient capacity
+CAPACITY_ERROR_CODES = {
+    "InsufficientInstanceCapacity",
+    "InstanceLimitExceeded",
+    "MaxSpotInstanceCountExceeded",
+}
+
 
 def to_aws_format(tags):
     """Convert the node name tag to the AWS-specific 'Name' tag."""
@@ -118,6 +126,49 @@ class AWSNodeProvider(NodeProvider):
         self.cached_nodes = {node.id: node for node in nodes}
         return [node.id for node in nodes]
 
+    def supports_warm_pool(self):
+        # The stopped nodes are resumed by create_node only if caching them
+        return self.cache_stopped_nodes
+
+    def stopped_nodes(self, tag_filters):
+        # The nodes still stopping are in the warm pool as well
+        tag_filters = to_aws_format(copy.deepcopy(tag_filters))
+        filters = [
+            {
+                "Name": "instance-state-name",
+                "Values": ["stopped", "stopping"],
+            },
+            {
+                "Name": "tag:{}".format(CLOUDTIK_TAG_CLUSTER_NAME),
+                "Values": [self.cluster_name],
+            },
+        ]
+        for k, v in tag_filters.items():
+            filters.append({
+                "Name": "tag:{}".format(k),
+                "Values": [v],
+            })
+
+        with boto_exception_handler(
+                "Failed to fetch stopped instances from AWS."):
+            nodes = list(self.ec2.instances.filter(Filters=filters))
+        return {node.id: from_aws_format(
+            {x["Key"]: x["Value"] for x in node.tags}) for node in nodes}
+
+    def stop_nodes(self, node_ids):
+        if not node_ids:
+            return
+        for start in range(0, len(node_ids), self.max_terminate_nodes):
+            self.ec2.meta.client.stop_instances(
+                InstanceIds=node_ids[start:start + self.max_terminate_nodes])
+
+    def terminate_stopped_nodes(self, node_ids):
+        if not node_ids:
+            return
+        for start in range(0, len(node_ids), self.max_terminate_nodes):
+            self.ec2.meta.client.terminate_instances(
+                InstanceIds=node_ids[start:start + self.max_terminate_nodes])
+
     def get_node_info(self, node_id):
         node = self._get_cached_node(node_id)
         return _get_node_info(node)
@@ -216,7 +267,9 @@ class AWSNodeProvider(NodeProvider):
 
         reused_nodes_dict = {}
         # Try to reuse previously stopped nodes with compatible configs
-        if self.cache_stopped_nodes:
+        # (but not for the nodes to fill the warm pool)
+        if self.cache_stopped_nodes and tags.get(
+                CLOUDTIK_TAG_WARM_POOL) != WARM_POOL_FILLING:
             # TODO(ekl) this is breaking the abstraction boundary a little by
             # peeking into the tag set.
             filters = [
@@ -269,6 +322,7 @@ class AWSNodeProvider(NodeProvider):
 
                 self.ec2.meta.client.start_instances(
                     InstanceIds=reuse_node_ids)
+                self._remove_warm_pool_tags(reuse_nodes)
                 for node_id in reuse_node_ids:
                     self.set_node_tags(node_id, tags)
                 count -= len(reuse_node_ids)
@@ -281,6 +335,20 @@ class AWSNodeProvider(NodeProvider):
         all_created_nodes.update(created_nodes_dict)
         return all_created_nodes
 
+    def _remove_warm_pool_tags(self, nodes):
+        # The nodes resumed are not in the warm pool anymore
+        node_ids = [node.id for node in nodes
+                    if any(tag in self.tag_cache[node.id] for tag in WARM_POOL_TAGS)]
+        if not node_ids:
+            return
+        self.ec2.meta.client.delete_tags(
+            Resources=node_ids,
+            Tags=[{"Key": tag} for tag in WARM_POOL_TAGS])
+        with self.tag_cache_lock:
+            for node_id in node_ids:
+                for tag in WARM_POOL_TAGS:
+                    self.tag_cache[node_id].pop(tag, None)
+
     @staticmethod
     def _merge_tag_specs(tag_specs: List[Dict[str, Any]],
                          user_tag_specs: List[Dict[str, Any]]) -> None:
@@ -416,6 +484,20 @@ class AWSNodeProvider(NodeProvider):
 
         return created_nodes_dict
 
+    def get_launch_placements(self, node_config):
+        if "NetworkInterfaces" in node_config:
+            return None
+        subnet_ids = node_config.get("SubnetIds") or []
+        if len(subnet_ids) < 2:
+            return None
+        # Prefer a different subnet for each placement and keep the others
+        # listed so that creating instances still falls back to them
+        return [{"SubnetIds": subnet_ids[i:] + subnet_ids[:i]}
+                for i in range(len(subnet_ids))]
+
+    def is_capacity_error(self, error):
+        return get_boto_error_code(error) in CAPACITY_ERROR_CODES
+
     def terminate_node(self, node_id):
         node = self._get_cached_node(node_id)
         if self.cache_stopped_nodes:
@@ -24,6 +24,12 @@ from cloudtik.providers._private.utils import validate_config_dict
 
 logger = logging.getLogger(__name__)
 
+# The error codes of creating instances for insufficient capacity
+CAPACITY_ERROR_CODES = (
+    "ZONE_RESOURCE_POOL_EXHAUSTED",
+    "QUOTA_EXCEEDED",
+)
+
 
 def _retry(method, max_tries=5, backoff_s=1):
     """Retry decorator for methods of GCPNodeProvider.
@@ -171,6 +177,10 @@ class GCPNodeProvider(NodeProvider):
 
             resource.create_instances(base_config, labels, count)
 
+    def is_capacity_error(self, error):
+        message = str(error)
+        return any(code in message for code in CAPACITY_ERROR_CODES)
+
     @_retry
     def terminate_node(self, node_id: str):
         with self.lock:
@@ -23,7 +23,8 @@ def _get_cloud_simulator_address(provider_config):
     return cloud_simulator_address
 
 
-def _get_http_response_from_simulator(cloud_simulator_address, request):
+def _get_http_response_from_simulator(cloud_simulator_address, request, session=None):
+    """Send the request to the simulator (with the session to reuse the connections)."""
     headers = {
         "Content-Type": "application/json",
     }
@@ -34,7 +35,7 @@ def _get_http_response_from_simulator(cloud_simulator_address, request):
         import requests  # `requests` is not part of stdlib.
         from requests.exceptions import ConnectionError
 
-        r = requests.get(
+        r = (session or requests).get(
             cloud_simulator_endpoint,
             data=request_message,
             headers=headers,
@@ -53,6 +54,9 @@ def _get_http_response_from_simulator(cloud_simulator_address, request):
         raise
 
     response = r.json()
+    if r.status_code != 200:
+        raise RuntimeError("Cloud Simulator failed to handle {}: {}".format(
+            request["type"], response.get("error")))
     return response
 
 
@@ -1,5 +1,6 @@
 from filelock import FileLock
 from threading import RLock
+import copy
 import json
 import os
 import socket
@@ -7,6 +8,9 @@ import logging
 from typing import Any, Dict
 
 from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.tags import CLOUDTIK_TAG_CLUSTER_NAME, CLOUDTIK_TAG_NODE_KIND, \
+    CLOUDTIK_TAG_USER_NODE_TYPE, CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_WARM_POOL, \
+    WARM_POOL_FILLING, WARM_POOL_TAGS
 
 from cloudtik.providers._private.local.config import get_cloud_simulator_lock_path, \
     get_cloud_simulator_state_path, _get_instance_types, \
@@ -17,23 +21,39 @@ logger = logging.getLogger(__name__)
 filelock_logger = logging.getLogger("filelock")
 filelock_logger.setLevel(logging.WARNING)
 
+# The tags of a stopped node to match for resuming it
+RESUME_MATCH_TAGS = [
+    CLOUDTIK_TAG_CLUSTER_NAME, CLOUDTIK_TAG_NODE_KIND,
+    CLOUDTIK_TAG_USER_NODE_TYPE, CLOUDTIK_TAG_LAUNCH_CONFIG]
+
 
 class ClusterState:
+    """The state of the nodes kept in memory and persisted with a journal.
+
+    The reads are served from memory. A mutation of a batch of nodes is
+    appended to the journal file as one line of the changed nodes. The
+    journal is compacted into the snapshot file (the full state) when it
+    grows larger than the state. The state is loaded from the snapshot
+    and the journal replayed on start.
+
+    The state is owned by a single process (the Cloud Simulator). The file
+    lock prevents another process from writing the files at the same time.
+    """
+
     def __init__(self, lock_path, save_path, provider_config):
         self.lock = RLock()
         self.file_lock = FileLock(lock_path)
         self.save_path = save_path
+        self.journal_path = save_path + ".journal"
+        self._num_journal_entries = 0
 
         with self.lock:
             with self.file_lock:
                 list_of_node_ips = get_list_of_node_ips(provider_config)
-                if os.path.exists(self.save_path):
-                    nodes = json.loads(open(self.save_path).read())
-                else:
-                    nodes = {}
+                nodes = self._load()
                 logger.info(
                     "Cluster State: "
-                    "Loaded cluster state: {}".format(nodes))
+                    "Loaded cluster state of {} nodes.".format(len(nodes)))
 
                 # Filter removed node ips.
                 for node_ip in list(nodes):
@@ -47,30 +67,83 @@ class ClusterState:
                             "state": "terminated",
                         }
                 assert len(nodes) == len(list_of_node_ips)
-                with open(self.save_path, "w") as f:
-                    logger.info(
-                        "Cluster State: "
-                        "Writing cluster state: {}".format(nodes))
-                    f.write(json.dumps(nodes))
+                self._nodes = nodes
+                self._write_snapshot()
+
+    def _load(self):
+        nodes = {}
+        if os.path.exists(self.save_path):
+            with open(self.save_path) as f:
+                nodes = json.loads(f.read())
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        nodes.update(json.loads(line))
+                    except ValueError:
+                        # A partially written entry at the end
+                        logger.warning("Cluster State: "
+                                       "Ignored an invalid journal entry.")
+                        break
+        return nodes
+
+    def _write_snapshot(self):
+        # Write to a temp file and rename so that the snapshot is never partial
+        temp_path = self.save_path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(json.dumps(self._nodes))
+        os.replace(temp_path, self.save_path)
+        with open(self.journal_path, "w"):
+            pass
+        self._num_journal_entries = 0
+        logger.debug("Cluster State: "
+                     "Wrote cluster state snapshot of {} nodes.".format(
+                        len(self._nodes)))
+
+    def _append_journal(self, changed_nodes):
+        if self._num_journal_entries + len(changed_nodes) > len(self._nodes):
+            self._write_snapshot()
+            return
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(changed_nodes) + "\n")
+        self._num_journal_entries += len(changed_nodes)
 
     def get(self):
+        """Return a copy of the state of all the nodes."""
         with self.lock:
-            with self.file_lock:
-                nodes = json.loads(open(self.save_path).read())
-                return nodes
+            return copy.deepcopy(self._nodes)
+
+    def get_node(self, node_id):
+        """Return a copy of the state of a node."""
+        with self.lock:
+            return copy.deepcopy(self._nodes[node_id])
+
+    def get_node_state(self, node_id):
+        with self.lock:
+            return self._nodes[node_id]["state"]
+
+    def filter_nodes(self, states, tag_filters):
+        """Return the ids of the nodes in the states with the matching tags."""
+        with self.lock:
+            return [node_id for node_id, info in self._nodes.items()
+                    if info["state"] in states and all(
+                        info["tags"].get(k) == v for k, v in tag_filters.items())]
 
     def put(self, node_id, info):
-        assert "tags" in info
-        assert "state" in info
+        self.put_nodes({node_id: info})
+
+    def put_nodes(self, nodes):
+        """Update the state of a batch of nodes in one journal entry."""
+        if not nodes:
+            return
+        for info in nodes.values():
+            assert "tags" in info
+            assert "state" in info
         with self.lock:
+            nodes = copy.deepcopy(nodes)
+            self._nodes.update(nodes)
             with self.file_lock:
-                nodes = self.get()
-                nodes[node_id] = info
-                with open(self.save_path, "w") as f:
-                    logger.debug("Cluster State: "
-                                 "Writing cluster state: {}".format(
-                                    list(nodes)))
-                    f.write(json.dumps(nodes))
+                self._append_journal(nodes)
 
 
 class LocalNodeProvider(NodeProvider):
@@ -98,28 +171,16 @@ class LocalNodeProvider(NodeProvider):
         self.node_id_mapping = _get_node_id_mapping(provider_config)
 
     def non_terminated_nodes(self, tag_filters):
-        nodes = self.state.get()
-        matching_ips = []
-        for node_ip, info in nodes.items():
-            if info["state"] == "terminated":
-                continue
-            ok = True
-            for k, v in tag_filters.items():
-                if info["tags"].get(k) != v:
-                    ok = False
-                    break
-            if ok:
-                matching_ips.append(node_ip)
-        return matching_ips
+        return self.state.filter_nodes(["running"], tag_filters)
 
     def is_running(self, node_id):
-        return self.state.get()[node_id]["state"] == "running"
+        return self.state.get_node_state(node_id) == "running"
 
     def is_terminated(self, node_id):
         return not self.is_running(node_id)
 
     def node_tags(self, node_id):
-        return self.state.get()[node_id]["tags"]
+        return self.state.get_node(node_id)["tags"]
 
     def external_ip(self, node_id):
         """Returns an external ip if the user has supplied one.
@@ -142,39 +203,73 @@ class LocalNodeProvider(NodeProvider):
         return socket.gethostbyname(node_id)
 
     def set_node_tags(self, node_id, tags):
-        with self.state.file_lock:
-            info = self.state.get()[node_id]
+        with self.state.lock:
+            info = self.state.get_node(node_id)
             info["tags"].update(tags)
             self.state.put(node_id, info)
 
     def create_node(self, node_config, tags, count):
-        """Creates min(count, currently available) nodes."""
-        instance_type = _get_request_instance_type(node_config)
-        with self.state.file_lock:
-            nodes = self.state.get()
-            for node_id, info in nodes.items():
-                if info["state"] != "terminated":
-                    continue
+        """Creates min(count, currently available) nodes.
 
+        The stopped nodes with the same node kind, node type and launch
+        config are resumed first (except for the nodes to fill the warm pool).
+        """
+        instance_type = _get_request_instance_type(node_config)
+        resume = tags.get(CLOUDTIK_TAG_WARM_POOL) != WARM_POOL_FILLING
+        created = {}
+        with self.state.lock:
+            if resume:
+                resume_filters = {k: tags.get(k) for k in RESUME_MATCH_TAGS}
+                for node_id in self.state.filter_nodes(["stopped"], resume_filters)[:count]:
+                    info = self.state.get_node(node_id)
+                    info["tags"].update(tags)
+                    # Not in the warm pool anymore
+                    for tag in WARM_POOL_TAGS:
+                        info["tags"].pop(tag, None)
+                    info["state"] = "running"
+                    created[node_id] = info
+
+            for node_id in self.state.filter_nodes(["terminated"], {}):
+                if len(created) >= count:
+                    break
                 node_instance_type = self.get_node_instance_type(node_id)
                 if instance_type != node_instance_type:
                     continue
+                created[node_id] = {"tags": dict(tags), "state": "running"}
 
-                info["tags"] = tags
-                info["state"] = "running"
-                self.state.put(node_id, info)
-                count = count - 1
-                if count == 0:
-                    return
+            # Allocate the nodes in one batch
+            self.state.put_nodes(created)
 
     def terminate_node(self, node_id):
-        nodes = self.state.get()
-        info = nodes[node_id]
-        info["state"] = "terminated"
-        self.state.put(node_id, info)
+        self._set_nodes_state([node_id], "terminated")
+
+    def terminate_nodes(self, node_ids):
+        self._set_nodes_state(node_ids, "terminated")
+
+    def supports_warm_pool(self):
+        return True
+
+    def stopped_nodes(self, tag_filters):
+        return {node_id: self.node_tags(node_id)
+                for node_id in self.state.filter_nodes(["stopped"], tag_filters)}
+
+    def stop_nodes(self, node_ids):
+        self._set_nodes_state(node_ids, "stopped")
+
+    def terminate_stopped_nodes(self, node_ids):
+        self._set_nodes_state(node_ids, "terminated")
+
+    def _set_nodes_state(self, node_ids, state):
+        with self.state.lock:
+            nodes = {}
+            for node_id in node_ids:
+                info = self.state.get_node(node_id)
+                info["state"] = state
+                nodes[node_id] = info
+            self.state.put_nodes(nodes)
 
     def get_node_info(self, node_id):
-        node = self.state.get()[node_id]
+        node = self.state.get_node(node_id)
         node_instance_type = self.get_node_instance_type(node_id)
         node_info = {"node_id": node_id,
                      "instance_type": node_instance_type,
@@ -1,5 +1,7 @@
+import copy
 import logging
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, List
 
 from cloudtik.core.node_provider import NodeProvider
 from cloudtik.core.tags import CLOUDTIK_TAG_CLUSTER_NAME
@@ -17,20 +19,58 @@ class CloudSimulatorNodeProvider(NodeProvider):
     should be provided in the provider section in the cluster config.
     The server receives HTTP requests from this class and uses
     LocalNodeProvider to get their responses.
+
+    The connections are kept alive and reused for the requests of a thread.
+    The tags of the non-terminated nodes are fetched in one batch request
+    and cached until the next non_terminated_nodes call. The node IPs are
+    static and cached.
     """
 
     def __init__(self, provider_config, cluster_name):
         NodeProvider.__init__(self, provider_config, cluster_name)
         self.cloud_simulator_address = _get_cloud_simulator_address(provider_config)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tag_cache = {}
+        self._internal_ip_cache = {}
+        self._external_ip_cache = {}
+
+    def _get_session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests  # `requests` is not part of stdlib.
+            session = self._local.session = requests.Session()
+        return session
 
     def _get_http_response(self, request):
-        return _get_http_response_from_simulator(self.cloud_simulator_address, request)
+        return _get_http_response_from_simulator(
+            self.cloud_simulator_address, request, session=self._get_session())
+
+    def batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        """Run a list of requests in one round trip and return their results."""
+        if not requests:
+            return []
+        responses = self._get_http_response({"type": "batch", "requests": requests})
+        results = []
+        for request, response in zip(requests, responses):
+            if "error" in response:
+                raise RuntimeError("Cloud Simulator failed to handle {}: {}".format(
+                    request["type"], response["error"]))
+            results.append(response["result"])
+        return results
 
     def non_terminated_nodes(self, tag_filters):
         # Only get the non terminated nodes associated with this cluster name.
         tag_filters[CLOUDTIK_TAG_CLUSTER_NAME] = self.cluster_name
         request = {"type": "non_terminated_nodes", "args": (tag_filters, )}
-        return self._get_http_response(request)
+        node_ids = self._get_http_response(request)
+
+        # Refresh the tags of the nodes in one round trip
+        all_tags = self.batch([
+            {"type": "node_tags", "args": (node_id, )} for node_id in node_ids])
+        with self._lock:
+            self._tag_cache.update(zip(node_ids, all_tags))
+        return node_ids
 
     def is_running(self, node_id):
         request = {"type": "is_running", "args": (node_id, )}
@@ -41,18 +81,28 @@ class CloudSimulatorNodeProvider(NodeProvider):
         return self._get_http_response(request)
 
     def node_tags(self, node_id):
-        request = {"type": "node_tags", "args": (node_id, )}
-        return self._get_http_response(request)
+        with self._lock:
+            tags = self._tag_cache.get(node_id)
+        if tags is None:
+            request = {"type": "node_tags", "args": (node_id, )}
+            tags = self._get_http_response(request)
+            with self._lock:
+                self._tag_cache[node_id] = tags
+        return copy.deepcopy(tags)
 
     def external_ip(self, node_id):
-        request = {"type": "external_ip", "args": (node_id, )}
-        response = self._get_http_response(request)
-        return response
+        ip = self._external_ip_cache.get(node_id)
+        if ip is None:
+            request = {"type": "external_ip", "args": (node_id, )}
+            ip = self._external_ip_cache[node_id] = self._get_http_response(request)
+        return ip
 
     def internal_ip(self, node_id):
-        request = {"type": "internal_ip", "args": (node_id, )}
-        response = self._get_http_response(request)
-        return response
+        ip = self._internal_ip_cache.get(node_id)
+        if ip is None:
+            request = {"type": "internal_ip", "args": (node_id, )}
+            ip = self._internal_ip_cache[node_id] = self._get_http_response(request)
+        return ip
 
     def create_node(self, node_config, tags, count):
         # Tag the newly created node with this cluster name. Helps to get
@@ -67,14 +117,43 @@ class CloudSimulatorNodeProvider(NodeProvider):
     def set_node_tags(self, node_id, tags):
         request = {"type": "set_node_tags", "args": (node_id, tags)}
         self._get_http_response(request)
+        with self._lock:
+            if node_id in self._tag_cache:
+                self._tag_cache[node_id].update(tags)
 
     def terminate_node(self, node_id):
         request = {"type": "terminate_node", "args": (node_id, )}
         self._get_http_response(request)
+        self._invalidate_tags([node_id])
 
     def terminate_nodes(self, node_ids):
         request = {"type": "terminate_nodes", "args": (node_ids, )}
         self._get_http_response(request)
+        self._invalidate_tags(node_ids)
+
+    def _invalidate_tags(self, node_ids):
+        with self._lock:
+            for node_id in node_ids:
+                self._tag_cache.pop(node_id, None)
+
+    def supports_warm_pool(self):
+        request = {"type": "supports_warm_pool", "args": ()}
+        return self._get_http_response(request)
+
+    def stopped_nodes(self, tag_filters):
+        # Only get the stopped nodes associated with this cluster name.
+        tag_filters[CLOUDTIK_TAG_CLUSTER_NAME] = self.cluster_name
+        request = {"type": "stopped_nodes", "args": (tag_filters, )}
+        return self._get_http_response(request)
+
+    def stop_nodes(self, node_ids):
+        request = {"type": "stop_nodes", "args": (node_ids, )}
+        self._get_http_response(request)
+        self._invalidate_tags(node_ids)
+
+    def terminate_stopped_nodes(self, node_ids):
+        request = {"type": "terminate_stopped_nodes", "args": (node_ids, )}
+        self._get_http_response(request)
 
     def get_node_info(self, node_id):
         request = {"type": "get_node_info", "args": (node_id,)}
@@ -3,7 +3,10 @@ import logging
 import multiprocessing as mp
 import os
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
+from queue import Empty
 from typing import Any, Callable, Dict, Optional, Tuple
 
 import kopf
@@ -23,8 +26,23 @@ from cloudtik.providers.kubernetes.cloudtik_operator.operator_utils import (
 
 logger = logging.getLogger(__name__)
 
+# The controller processes are spawned instead of forked from the operator
+# which runs the threads of kopf and the shared workers.
+mp_context = mp.get_context("spawn")
+
 # Queue to process cluster status updates.
-cluster_status_q = mp.Queue()  # type: mp.Queue[Optional[Tuple[str, str, str]]]
+cluster_status_q = mp_context.Queue()  # type: mp.Queue[Optional[Tuple[str, str, str]]]
+
+# Workers shared by all the clusters to create, update and tear down the clusters.
+cluster_worker_pool = ThreadPoolExecutor(
+    max_workers=operator_utils.OPERATOR_MAX_WORKERS,
+    thread_name_prefix="cluster_worker")
+
+# Cache of the cluster pods shared by all the clusters for the pod lookups of
+# the operator. The node provider creating the pods of a cluster and the
+# controller processes read the pods from the API server.
+pod_informer = operator_utils.PodInformer(
+    namespace=operator_utils.OPERATOR_NAMESPACE if operator_utils.NAMESPACED_OPERATOR else None)
 
 
 class CloudTikCluster:
@@ -32,7 +50,9 @@ class CloudTikCluster:
 
     Attributes:
         config: Cluster configuration dict.
-        subprocess: The subprocess used to create, update, and control the cluster.
+        future: The work to create, update or tear down the cluster
+            running with the shared workers.
+        subprocess: The subprocess used to control the cluster.
     """
 
     def __init__(self, config: Dict[str, Any]):
@@ -53,14 +73,19 @@ class CloudTikCluster:
             cluster_namespace=self.namespace, cluster_name=self.name
         )
 
+        # The work running with the shared workers. The works of a cluster
+        # run one after another.
+        self.future = None  # type: Optional[Future]
         # Controller subprocess
         # self.subprocess is non-null iff there's an active controller subprocess
         # or a finished controller subprocess in need of cleanup.
+        # The controller runs in a spawned subprocess because it uses the
+        # process-wide state client and signal handlers.
         self.subprocess = None  # type: Optional[mp.Process]
-        # Controller logs for this cluster will be prefixed by the controller
-        # subprocess name:
+        # Logs for this cluster will be prefixed by the controller subprocess
+        # name which is also the name of the worker thread running the work:
         self.subprocess_name = ",".join([self.name, self.namespace])
-        self.controller_stop_event = mp.Event()
+        self.controller_stop_event = mp_context.Event()
         self.setup_logging()
         self.call_context = CallContext()
         self.call_context.set_call_from_api(True)
@@ -68,30 +93,29 @@ class CloudTikCluster:
         # self.call_context.set_allow_interactive(False)
 
     def create_or_update(self, restart_head: bool = False) -> None:
-        """Create/update the Cluster and run the controller loop, all in a
-        subprocess.
+        """Create/update the Cluster with a shared worker and run the
+        controller loop in a subprocess.
 
         The main function of the Operator is managing the
-        subprocesses started by this method.
+        works and subprocesses started by this method.
 
         Args:
             restart_head: If True, restarts head to recover from failure.
         """
-        self.do_in_subprocess(self._create_or_update, args=(restart_head,))
+        self.do_in_worker(self._create_or_update, args=(restart_head,))
 
     def _create_or_update(self, restart_head: bool = False) -> None:
         try:
             self.start_head(restart_head=restart_head)
             self.start_controller()
         except Exception:
-            # Report failed cluster controller status to trigger cluster restart.
-            cluster_status_q.put(
-                (self.name, self.namespace, STATUS_RECOVERING)
-            )
-            # `status_handling_loop` will increment the
-            # `status.scalerRetries` of the CR. A restart will trigger
-            # at the subsequent "MODIFIED" event.
+            self.report_failure()
             raise
+        # Indicate in status.phase that the head is up and the controller is running.
+        cluster_status_q.put((self.name, self.namespace, STATUS_RUNNING))
+
+    def report_failure(self) -> None:
+        _report_failure(cluster_status_q, self.name, self.namespace)
 
     def start_head(self, restart_head: bool = False) -> None:
         self.write_config(self.config, self.config_path)
@@ -115,22 +139,26 @@ class CloudTikCluster:
 
     def start_controller(self) -> None:
         """Runs the cluster controller in operator instead of on head."""
-        head_pod_ip = _get_head_node_ip(self.controller_config)
+        head_pod_ip = pod_informer.get_head_pod_ip(self.namespace, self.name)
+        if head_pod_ip is None:
+            # The cache has not synced or seen the new head pod yet
+            head_pod_ip = _get_head_node_ip(self.controller_config)
         port = operator_utils.infer_head_port(self.controller_config)
         address = services.address(head_pod_ip, port)
-        controller = cluster_controller.ClusterController(
-            address,
-            cluster_scaling_config=self.controller_config_path,
-            redis_password=constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD,
-            stop_event=self.controller_stop_event,
-            retry_on_failure=False,
+        # The target and the arguments are pickled to the spawned process
+        self.subprocess = mp_context.Process(
+            name=self.subprocess_name, target=_run_controller,
+            args=(self.name, self.namespace, address,
+                  self.controller_config_path, self.controller_stop_event,
+                  cluster_status_q),
+            daemon=True
         )
-        controller.run()
+        self.subprocess.start()
 
     def teardown(self) -> None:
         """Attempt orderly tear-down of cluster processes before CloudTikCluster
         resource deletion."""
-        self.do_in_subprocess(self._teardown, args=(), block=True)
+        self.do_in_worker(self._teardown, args=(), block=True)
 
     def _teardown(self) -> None:
         cluster_operator.teardown_cluster(
@@ -141,38 +169,51 @@ class CloudTikCluster:
             keep_min_workers=False,
         )
 
-    def do_in_subprocess(
+    def do_in_worker(
         self, f: Callable[[], None], args: Tuple = (), block: bool = False
     ) -> None:
-        # First stop the subprocess if it's alive
-        self.clean_up_subprocess()
-        # Reinstantiate process with f as target and start.
-        self.subprocess = mp.Process(
-            name=self.subprocess_name, target=f, args=args, daemon=True
-        )
-        self.subprocess.start()
+        # First stop the controller and wait for the previous work
+        self.clean_up_work()
+        self.future = cluster_worker_pool.submit(self._run_in_worker, f, args)
         if block:
-            self.subprocess.join()
+            self.future.result()
+
+    def _run_in_worker(self, f: Callable[[], None], args: Tuple) -> None:
+        # Name the worker thread for the logging of this cluster
+        thread = threading.current_thread()
+        thread_name = thread.name
+        thread.name = self.subprocess_name
+        try:
+            f(*args)
+        except Exception:
+            logger.exception("Error running {} of the cluster.".format(f.__name__))
+        finally:
+            thread.name = thread_name
 
-    def clean_up_subprocess(self):
+    def clean_up_work(self):
         """
-        Clean up the monitor process.
+        Wait for the work and clean up the monitor process.
 
         Executed when CR for this cluster is "DELETED".
         Executed when Autoscaling monitor is restarted.
         """
 
-        if self.subprocess is None:
+        if self.future is None and self.subprocess is None:
             # Nothing to clean.
             return
 
         # Triggers graceful stop of the monitor loop.
         self.controller_stop_event.set()
-        self.subprocess.join()
+        if self.future is not None:
+            # The controller started by the work stops with the event set
+            self.future.result()
+            self.future = None
+        if self.subprocess is not None:
+            self.subprocess.join()
+            # Signal completed cleanup.
+            self.subprocess = None
         # Clears the event for subsequent runs of the monitor.
         self.controller_stop_event.clear()
-        # Signal completed cleanup.
-        self.subprocess = None
 
     def clean_up(self) -> None:
         """Executed when the CR for this cluster is "DELETED".
@@ -180,7 +221,7 @@ class CloudTikCluster:
         The key thing is to end the monitoring subprocess.
         """
         self.teardown()
-        self.clean_up_subprocess()
+        self.clean_up_work()
         self.clean_up_logging()
         self.delete_config()
 
@@ -189,8 +230,10 @@ class CloudTikCluster:
         cluster to the cluster's monitor logs.
         """
         self.handler = logging.StreamHandler()
-        # Filter by subprocess name to get this cluster's monitor logs.
-        self.handler.addFilter(lambda rec: rec.processName == self.subprocess_name)
+        # Filter by worker thread name to get this cluster's logs.
+        # The controller subprocess adds its own handler.
+        self.handler.addFilter(
+            lambda rec: rec.threadName == self.subprocess_name)
         # Lines start with "<cluster name>,<cluster namespace>:"
         logging_format = ":".join([self.subprocess_name, constants.LOGGER_FORMAT])
         self.handler.setFormatter(logging.Formatter(logging_format))
@@ -223,8 +266,43 @@ class CloudTikCluster:
             )
 
 
+def _report_failure(status_queue: mp.Queue, cluster_name: str, cluster_namespace: str) -> None:
+    # Report failed cluster controller status to trigger cluster restart.
+    status_queue.put(
+        (cluster_name, cluster_namespace, STATUS_RECOVERING)
+    )
+    # `status_handling_loop` will increment the
+    # `status.scalerRetries` of the CR. A restart will trigger
+    # at the subsequent "MODIFIED" event.
+
+
+def _run_controller(
+        cluster_name: str, cluster_namespace: str, address: str,
+        controller_config_path: str, stop_event: mp.Event,
+        status_queue: mp.Queue) -> None:
+    # The spawned process doesn't inherit the log handlers of the operator
+    handler = logging.StreamHandler()
+    log_prefix = ",".join([cluster_name, cluster_namespace])
+    logging_format = ":".join([log_prefix, constants.LOGGER_FORMAT])
+    handler.setFormatter(logging.Formatter(logging_format))
+    operator_utils.root_logger.addHandler(handler)
+    try:
+        controller = cluster_controller.ClusterController(
+            address,
+            cluster_scaling_config=controller_config_path,
+            redis_password=constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+            stop_event=stop_event,
+            retry_on_failure=False,
+        )
+        controller.run()
+    except Exception:
+        _report_failure(status_queue, cluster_name, cluster_namespace)
+        raise
+
+
 @kopf.on.startup()
 def start_background_worker(memo: kopf.Memo, **_):
+    pod_informer.start()
     memo.status_handler = threading.Thread(
         target=status_handling_loop, args=(cluster_status_q,)
     )
@@ -235,19 +313,54 @@ def start_background_worker(memo: kopf.Memo, **_):
 def stop_background_worker(memo: kopf.Memo, **_):
     cluster_status_q.put(None)
     memo.status_handler.join()
+    cluster_worker_pool.shutdown(wait=False)
+    pod_informer.stop()
 
 
 def status_handling_loop(queue: mp.Queue):
+    """Patch the status updates of the clusters in batches.
+
+    The updates of a cluster in a batch interval are coalesced into one patch
+    with the latest phase. The scalerRetries is incremented once if any of
+    the updates is Recovering so that the cluster is restarted once.
+    """
     # TODO: Status will not be set if Operator restarts after `queue.put`
     # but before `set_status`.
-    while True:
-        item = queue.get()
-        if item is None:
-            break
-
-        cluster_name, cluster_namespace, phase = item
+    # (cluster_name, cluster_namespace) -> [phase, recovering]
+    pending_status = {}
+    flush_time = None
+    stopping = False
+    while not stopping:
+        timeout = None
+        if pending_status:
+            timeout = max(flush_time - time.time(), 0)
         try:
-            operator_utils.set_status(cluster_name, cluster_namespace, phase)
+            item = queue.get(timeout=timeout)
+            if item is None:
+                stopping = True
+            else:
+                cluster_name, cluster_namespace, phase = item
+                if not pending_status:
+                    flush_time = time.time() + operator_utils.STATUS_BATCH_INTERVAL_S
+                status = pending_status.setdefault(
+                    (cluster_name, cluster_namespace), [phase, False])
+                status[0] = phase
+                if phase == STATUS_RECOVERING:
+                    status[1] = True
+        except Empty:
+            pass
+
+        if pending_status and (stopping or time.time() >= flush_time):
+            flush_status(pending_status)
+            pending_status = {}
+
+
+def flush_status(pending_status: Dict[Tuple[str, str], list]):
+    for (cluster_name, cluster_namespace), (phase, recovering) in pending_status.items():
+        try:
+            operator_utils.set_status(
+                cluster_name, cluster_namespace, phase,
+                scaler_retries_increment=1 if recovering else 0)
         except Exception:
             log_prefix = ",".join([cluster_name, cluster_namespace])
             logger.exception(f"{log_prefix}: Error setting CloudTikCluster status.")
@@ -312,12 +425,10 @@ def _create_or_update_cluster(
 
     # Launch the cluster by SSHing into the pod and running
     # the initialization commands. This will not restart the cluster
-    # unless there was a failure.
+    # unless there was a failure. The work reports the Running status
+    # when the head is up and the controller is running.
     cloudtik_cluster.create_or_update(restart_head=restart_head)
 
-    # Indicate in status.phase that the head is up and the monitor is running.
-    cluster_status_q.put((name, namespace, STATUS_RUNNING))
-
 
 @kopf.on.delete("cloudtikclusters")
 def delete_fn(memo: kopf.Memo, **kwargs):
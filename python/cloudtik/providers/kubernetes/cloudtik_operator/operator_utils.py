@@ -1,13 +1,16 @@
 import copy
 import logging
 import os
+import threading
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from kubernetes import watch
 from kubernetes.client.rest import ApiException
 
 from cloudtik.core._private import constants
-from cloudtik.providers._private._kubernetes import custom_objects_api
+from cloudtik.core.tags import CLOUDTIK_TAG_CLUSTER_NAME, CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD
+from cloudtik.providers._private._kubernetes import core_api, custom_objects_api
 from cloudtik.providers._private._kubernetes.config import _get_cluster_selector
 from cloudtik.providers._private._kubernetes.node_provider import head_service_selector
 from cloudtik.core._private.utils import _get_default_config
@@ -31,6 +34,17 @@ OPERATOR_NAMESPACE = os.environ.get("CLOUDTIK_OPERATOR_POD_NAMESPACE", "")
 # cluster-scoped otherwise:
 NAMESPACED_OPERATOR = OPERATOR_NAMESPACE != ""
 
+# The number of the workers shared by all the clusters for creating,
+# updating and tearing down the clusters
+OPERATOR_MAX_WORKERS = int(os.environ.get("CLOUDTIK_OPERATOR_MAX_WORKERS", 8))
+# The status updates of a cluster in the interval are patched once
+STATUS_BATCH_INTERVAL_S = float(
+    os.environ.get("CLOUDTIK_OPERATOR_STATUS_BATCH_INTERVAL_S", 1.0))
+
+POD_WATCH_TIMEOUT_S = 300
+DELAY_BEFORE_POD_RELIST = 5
+HTTP_STATUS_GONE = 410
+
 CLOUDTIK_CONFIG_DIR = os.environ.get("CLOUDTIK_CONFIG_DIR") or os.path.expanduser(
     "~/cloudtik_cluster_configs"
 )
@@ -348,7 +362,8 @@ def translate_pod_type_name(pod_type_name: str):
     return pod_type_name
 
 
-def set_status(cluster_name: str, cluster_namespace: str, status: str) -> None:
+def set_status(cluster_name: str, cluster_namespace: str, status: str,
+               scaler_retries_increment: Optional[int] = None) -> None:
     """Sets status.phase field for a CloudTikCluster with the given name and
     namespace.
 
@@ -359,11 +374,16 @@ def set_status(cluster_name: str, cluster_namespace: str, status: str) -> None:
         cluster_name: Name of the cluster.
         cluster_namespace: Namespace in which the cluster is running.
         status: String to set for the CloudTikCluster object's status.phase field.
+        scaler_retries_increment: The increment of status.scalerRetries. If None,
+            it is incremented by one for the Recovering status.
 
     """
+    if scaler_retries_increment is None:
+        scaler_retries_increment = 1 if status == STATUS_RECOVERING else 0
     for _ in range(MAX_STATUS_RETRIES - 1):
         try:
-            _set_status(cluster_name, cluster_namespace, status)
+            _set_status(
+                cluster_name, cluster_namespace, status, scaler_retries_increment)
             return
         except ApiException as e:
             if e.status == 409:
@@ -375,10 +395,11 @@ def set_status(cluster_name: str, cluster_namespace: str, status: str) -> None:
             else:
                 raise
     # One more try
-    _set_status(cluster_name, cluster_namespace, status)
+    _set_status(cluster_name, cluster_namespace, status, scaler_retries_increment)
 
 
-def _set_status(cluster_name: str, cluster_namespace: str, phase: str) -> None:
+def _set_status(cluster_name: str, cluster_namespace: str, phase: str,
+                scaler_retries_increment: int) -> None:
     cluster_cr = custom_objects_api().get_namespaced_custom_object(
         namespace=cluster_namespace,
         group=CLOUDTIK_API_GROUP,
@@ -387,9 +408,7 @@ def _set_status(cluster_name: str, cluster_namespace: str, phase: str) -> None:
         name=cluster_name,
     )
     status = cluster_cr.get("status", {})
-    scaler_retries = status.get(SCALER_RETRIES_FIELD, 0)
-    if phase == STATUS_RECOVERING:
-        scaler_retries += 1
+    scaler_retries = status.get(SCALER_RETRIES_FIELD, 0) + scaler_retries_increment
     cluster_cr["status"] = {
         "phase": phase,
         SCALER_RETRIES_FIELD: scaler_retries,
@@ -417,3 +436,127 @@ def infer_head_port(cluster_config: Dict[str, Any]) -> str:
     """
     return str(constants.CLOUDTIK_DEFAULT_PORT)
 
+
+class PodInformer:
+    """A cache of the pods of all the clusters shared by the operator.
+
+    The pods are listed once and a single watch from the resource version
+    of the list keeps the cache up to date instead of reading the pods
+    of each cluster from the API server. The pods are listed again when
+    the resource version is too old (410 Gone) or the watch fails.
+    """
+
+    def __init__(self, namespace: Optional[str] = None):
+        # Watch all the namespaces if namespace is None
+        self.namespace = namespace
+        self._pods = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stop_event = threading.Event()
+        self._watch = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="pod_informer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # The watch stops at the next event or timeout of the daemon thread
+        self._stop_event.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def has_synced(self) -> bool:
+        return self._synced.is_set()
+
+    def get_cluster_pods(self, cluster_namespace: str, cluster_name: str) -> List[Any]:
+        """The pods of a cluster which are not terminated or terminating."""
+        with self._lock:
+            pods = list(self._pods.values())
+        return [
+            pod for pod in pods
+            if pod.metadata.namespace == cluster_namespace
+            and (pod.metadata.labels or {}).get(CLOUDTIK_TAG_CLUSTER_NAME) == cluster_name
+            and pod.metadata.deletion_timestamp is None
+            and pod.status.phase not in ["Failed", "Unknown", "Succeeded"]
+        ]
+
+    def get_head_pod_ip(self, cluster_namespace: str, cluster_name: str) -> Optional[str]:
+        """The IP of the running head pod of a cluster or None if not in the cache.
+
+        A head pod being replaced is terminating and skipped. The newest
+        is used if the cache has not seen the deletion of the old one yet.
+        """
+        if not self.has_synced():
+            return None
+        head_pods = [
+            pod for pod in self.get_cluster_pods(cluster_namespace, cluster_name)
+            if pod.metadata.labels.get(CLOUDTIK_TAG_NODE_KIND) == NODE_KIND_HEAD
+            and pod.status.phase == "Running" and pod.status.pod_ip]
+        if not head_pods:
+            return None
+        head_pod = max(head_pods, key=lambda pod: pod.metadata.creation_timestamp)
+        return head_pod.status.pod_ip
+
+    def _get_list_args(self):
+        if self.namespace:
+            return core_api().list_namespaced_pod, (self.namespace,)
+        return core_api().list_pod_for_all_namespaces, ()
+
+    def _list(self) -> str:
+        list_func, args = self._get_list_args()
+        pod_list = list_func(*args, label_selector=CLOUDTIK_TAG_CLUSTER_NAME)
+        with self._lock:
+            self._pods = {
+                (pod.metadata.namespace, pod.metadata.name): pod
+                for pod in pod_list.items}
+        self._synced.set()
+        return pod_list.metadata.resource_version
+
+    def _watch_from(self, resource_version: str) -> str:
+        """Watch the changes from the resource version until the watch times out.
+
+        Returns the last resource version to watch from. ApiException of
+        410 Gone is raised if the resource version is too old.
+        """
+        list_func, args = self._get_list_args()
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+                list_func, *args, label_selector=CLOUDTIK_TAG_CLUSTER_NAME,
+                resource_version=resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=POD_WATCH_TIMEOUT_S):
+            pod = event["object"]
+            if event["type"] != "BOOKMARK":
+                key = (pod.metadata.namespace, pod.metadata.name)
+                with self._lock:
+                    if event["type"] == "DELETED":
+                        self._pods.pop(key, None)
+                    else:
+                        self._pods[key] = pod
+            resource_version = pod.metadata.resource_version
+        return resource_version
+
+    def _run(self):
+        resource_version = None
+        while not self._stop_event.is_set():
+            try:
+                if resource_version is None:
+                    resource_version = self._list()
+                resource_version = self._watch_from(resource_version)
+            except ApiException as e:
+                if self._stop_event.is_set():
+                    break
+                resource_version = None
+                if e.status == HTTP_STATUS_GONE:
+                    logger.info("The resource version of the pods is too old. Listing again...")
+                else:
+                    logger.exception("Error watching the pods. Listing again...")
+                    self._stop_event.wait(DELAY_BEFORE_POD_RELIST)
+            except Exception:
+                if self._stop_event.is_set():
+                    break
+                logger.exception("Error watching the pods. Listing again...")
+                resource_version = None
+                self._stop_event.wait(DELAY_BEFORE_POD_RELIST)
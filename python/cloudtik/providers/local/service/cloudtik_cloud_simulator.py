@@ -2,11 +2,15 @@
 different clusters for multiple users. It receives node provider function calls
 through HTTP requests from remote CloudSimulatorNodeProvider and runs them
 locally in LocalNodeProvider. To start the webserver the user runs:
-`python cloudtik_cloud_simulator.py --ips <comma separated ips> --port <PORT>`."""
+`python cloudtik_cloud_simulator.py --ips <comma separated ips> --port <PORT>`.
+
+The requests are handled concurrently with HTTP/1.1 keep-alive connections.
+A request of type "batch" runs a list of requests in one round trip and
+returns a list of {"result": ...} or {"error": ...} for each of them."""
 import argparse
 import logging
 import threading
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 import json
 import socket
 
@@ -27,6 +31,25 @@ def load_provider_config(config_file):
     return config_object
 
 
+def _call_provider(node_provider, request):
+    request_type = request["type"]
+    if request_type.startswith("_"):
+        raise ValueError("Invalid request type: {}".format(request_type))
+    return getattr(node_provider, request_type)(*request["args"])
+
+
+def _call_provider_batch(node_provider, requests):
+    responses = []
+    for request in requests:
+        try:
+            responses.append({"result": _call_provider(node_provider, request)})
+        except Exception as e:
+            logger.exception("Cloud Simulator failed to handle request: " +
+                             str(request["type"]))
+            responses.append({"error": str(e) or type(e).__name__})
+    return responses
+
+
 def runner_handler(node_provider):
     class Handler(SimpleHTTPRequestHandler):
         """A custom handler for Cloud Simulator.
@@ -34,6 +57,8 @@ def runner_handler(node_provider):
         Handles all requests and responses coming into and from the
         remote CloudSimulatorNodeProvider.
         """
+        # Keep the connections alive for the following requests
+        protocol_version = "HTTP/1.1"
 
         def _do_header(self, response_code=200, headers=None):
             """Sends the header portion of the HTTP response.
@@ -54,22 +79,41 @@ def runner_handler(node_provider):
             """HTTP HEAD handler method."""
             self._do_header()
 
+        def _do_response(self, response, response_code=200):
+            message = json.dumps(response).encode()
+            self._do_header(response_code=response_code, headers=[
+                ("Content-type", "application/json"),
+                ("Content-Length", str(len(message)))])
+            self.wfile.write(message)
+
         def do_GET(self):
             """Processes requests from remote CloudSimulatorNodeProvider."""
-            if self.headers["content-length"]:
-                raw_data = (self.rfile.read(
-                    int(self.headers["content-length"]))).decode("utf-8")
-                logger.info("Cloud Simulator received request: " +
-                            str(raw_data))
+            if not self.headers["content-length"]:
+                self._do_response({"error": "No request content."}, 400)
+                return
+
+            raw_data = (self.rfile.read(
+                int(self.headers["content-length"]))).decode("utf-8")
+            logger.debug("Cloud Simulator received request: " +
+                         str(raw_data))
+            try:
                 request = json.loads(raw_data)
-                response = getattr(node_provider,
-                                   request["type"])(*request["args"])
-                logger.info("Cloud Simulator response content: " +
-                            str(raw_data))
-                response_code = 200
-                message = json.dumps(response)
-                self._do_header(response_code=response_code)
-                self.wfile.write(message.encode())
+                if request["type"] == "batch":
+                    response = _call_provider_batch(
+                        node_provider, request["requests"])
+                else:
+                    response = _call_provider(node_provider, request)
+            except Exception as e:
+                logger.exception("Cloud Simulator failed to handle request.")
+                self._do_response({"error": str(e) or type(e).__name__}, 500)
+                return
+            logger.debug("Cloud Simulator response content: " +
+                         str(response))
+            self._do_response(response)
+
+        def log_message(self, format, *args):
+            # Access logs of each request at debug level
+            logger.debug("%s - %s" % (self.address_string(), format % args))
 
     return Handler
 
@@ -92,10 +136,11 @@ class CloudSimulator(threading.Thread):
         address = (host, self._port)
 
         provider_config = load_provider_config(config)
-        self._server = HTTPServer(
+        self._server = ThreadingHTTPServer(
             address,
             runner_handler(LocalNodeProvider(provider_config, cluster_name=None)),
         )
+        self._server.daemon_threads = True
         self.start()
 
     def run(self):
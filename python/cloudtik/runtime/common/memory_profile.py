@@ -0,0 +1,139 @@
+"""The memory profile model of the query engines (Presto and Trino).
+
+The JVM heap of a worker is sized with the memory left after the OS and the
+co-located runtimes. The heap headroom for the untracked allocations is
+capped instead of growing with the heap on large nodes. The query memory per
+node is sized for a target of concurrent queries unless spill is enabled with
+which the queries spill to disk under memory pressure instead of failing.
+
+The cluster-wide query max memory is computed from the configured worker
+counts instead of the running workers so that the coordinator and the
+workers started at any time by scaling compute the same value.
+"""
+from typing import Any, Dict, Optional
+
+from cloudtik.core._private.runtime_factory import BUILT_IN_RUNTIME_HDFS, BUILT_IN_RUNTIME_KAFKA, \
+    BUILT_IN_RUNTIME_ZOOKEEPER
+from cloudtik.core._private.utils import is_runtime_enabled
+
+# The memory reserved on a worker for the runtimes running with fixed heaps
+CO_LOCATED_RUNTIME_MEMORY = {
+    BUILT_IN_RUNTIME_HDFS: 1024,
+    BUILT_IN_RUNTIME_KAFKA: 1024,
+    BUILT_IN_RUNTIME_ZOOKEEPER: 512,
+}
+
+OS_RESERVED_MEMORY_RATIO = 0.05
+OS_RESERVED_MEMORY_MINIMUM = 1024
+# The JVM memory out of the heap: metaspace, thread stacks, direct buffers and others
+JVM_NON_HEAP_MEMORY_RATIO = 0.1
+JVM_NON_HEAP_MEMORY_MINIMUM = 512
+JVM_NON_HEAP_MEMORY_MAXIMUM = 8192
+MEMORY_HEAP_HEADROOM_RATIO = 0.25
+MEMORY_HEAP_HEADROOM_MAXIMUM = 16384
+# The query memory of a node is capped below the pool so that the general pool
+# is not empty when the largest query takes the reserved pool
+QUERY_MAX_MEMORY_POOL_RATIO = 0.9
+QUERY_MAX_TOTAL_MEMORY_PER_NODE_FACTOR = 1.4
+
+QUERY_MAX_MEMORY_WORKERS_MIN = "min"
+QUERY_MAX_MEMORY_WORKERS_MAX = "max"
+
+
+def get_co_located_runtime_memory(runtime_config: Dict[str, Any]) -> Dict[str, int]:
+    reserved_memory = {}
+    for runtime_type, runtime_memory in CO_LOCATED_RUNTIME_MEMORY.items():
+        if is_runtime_enabled(runtime_config, runtime_type):
+            reserved_memory[runtime_type] = runtime_memory
+    return reserved_memory
+
+
+def get_query_memory_profile(
+        memory_mb: int, runtime_config: Dict[str, Any],
+        memory_profile: Dict[str, Any]) -> Dict[str, int]:
+    """Compute the memory configurations in MB of a node with the memory profile.
+
+    The memory profile may set:
+    concurrency: the number of the concurrent queries to fit in memory (default 1)
+    spill_enabled: whether the queries spill to disk (default False)
+    reserved_memory_mb: the memory reserved for the other services (default 0)
+    heap_headroom_ratio: the heap headroom ratio of the heap (default 0.25)
+    """
+    reserved_memory = max(int(memory_mb * OS_RESERVED_MEMORY_RATIO), OS_RESERVED_MEMORY_MINIMUM)
+    reserved_memory += sum(get_co_located_runtime_memory(runtime_config).values())
+    reserved_memory += memory_profile.get("reserved_memory_mb", 0)
+    available_memory = memory_mb - reserved_memory
+
+    non_heap_memory = min(max(int(available_memory * JVM_NON_HEAP_MEMORY_RATIO),
+                              JVM_NON_HEAP_MEMORY_MINIMUM), JVM_NON_HEAP_MEMORY_MAXIMUM)
+    jvm_max_memory = available_memory - non_heap_memory
+    if jvm_max_memory <= 0:
+        raise RuntimeError(
+            "No memory left for the JVM of {}MB memory with {}MB reserved.".format(
+                memory_mb, reserved_memory))
+
+    heap_headroom_ratio = memory_profile.get("heap_headroom_ratio", MEMORY_HEAP_HEADROOM_RATIO)
+    memory_heap_headroom = min(int(jvm_max_memory * heap_headroom_ratio),
+                               MEMORY_HEAP_HEADROOM_MAXIMUM)
+    query_memory = int((jvm_max_memory - memory_heap_headroom) * QUERY_MAX_MEMORY_POOL_RATIO)
+
+    if memory_profile.get("spill_enabled", False):
+        # The queries spill when the pool is full, a query may use all the pool
+        query_max_memory_per_node = query_memory
+    else:
+        concurrency = max(memory_profile.get("concurrency", 1), 1)
+        query_max_memory_per_node = int(query_memory / concurrency)
+    query_max_total_memory_per_node = min(
+        int(query_max_memory_per_node * QUERY_MAX_TOTAL_MEMORY_PER_NODE_FACTOR), query_memory)
+
+    return {
+        "jvm_max_memory": jvm_max_memory,
+        "memory_heap_headroom_per_node": memory_heap_headroom,
+        "query_max_memory_per_node": query_max_memory_per_node,
+        "query_max_total_memory_per_node": query_max_total_memory_per_node,
+    }
+
+
+def _get_number_of_workers(node_type_config: Dict[str, Any], workers) -> int:
+    if workers == QUERY_MAX_MEMORY_WORKERS_MAX:
+        return node_type_config.get("max_workers", 0)
+    return node_type_config.get("min_workers", 0)
+
+
+def get_query_max_memory(
+        config: Dict[str, Any], runtime_config: Dict[str, Any],
+        memory_profile: Dict[str, Any]) -> Optional[int]:
+    """Compute the cluster-wide query max memory in MB of the worker types.
+
+    The number of workers is the min workers (default) or the max workers of
+    each worker type or a number given with query_max_memory_workers. With
+    the min workers, the queries fit in memory when scaled in to the minimum.
+    """
+    available_node_types = config.get("available_node_types", {})
+    head_node_type = config.get("head_node_type")
+    workers = memory_profile.get("query_max_memory_workers", QUERY_MAX_MEMORY_WORKERS_MIN)
+
+    query_max_memory = 0
+    min_query_max_memory_per_node = None
+    for node_type, node_type_config in available_node_types.items():
+        if node_type == head_node_type:
+            continue
+        memory_mb = int(node_type_config.get("resources", {}).get("memory", 0) / (1024 * 1024))
+        if memory_mb == 0:
+            continue
+        query_max_memory_per_node = get_query_memory_profile(
+            memory_mb, runtime_config, memory_profile)["query_max_memory_per_node"]
+        if min_query_max_memory_per_node is None or (
+                query_max_memory_per_node < min_query_max_memory_per_node):
+            min_query_max_memory_per_node = query_max_memory_per_node
+        if not isinstance(workers, int):
+            query_max_memory += query_max_memory_per_node * _get_number_of_workers(
+                node_type_config, workers)
+
+    if min_query_max_memory_per_node is None:
+        return None
+    if isinstance(workers, int):
+        # The given number of workers of the smallest worker type
+        return min_query_max_memory_per_node * max(workers, 1)
+    # At least the memory of a worker
+    return max(query_max_memory, min_query_max_memory_per_node)
@@ -0,0 +1,243 @@
+import copy
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+from cloudtik.runtime.ml.runner.cpu.launcher import CPULauncher
+from cloudtik.runtime.ml.runner.cpu.multi_instance_launcher import MultiInstanceLauncher
+
+logger = logging.getLogger(__name__)
+
+ALLOCATOR_DEFAULT = "default"
+ALLOCATOR_TCMALLOC = "tcmalloc"
+ALLOCATOR_JEMALLOC = "jemalloc"
+
+BINDING_NUMACTL = "numactl"
+BINDING_TASKSET = "taskset"
+
+# The args of the launch configuration in a profile
+PROFILE_LAUNCH_ARGS = [
+    "ncore_per_instance", "ninstances", "disable_numactl", "disable_taskset",
+    "enable_tcmalloc", "enable_jemalloc", "use_default_allocator"]
+
+
+def get_allocator_args(allocator):
+    return {
+        "enable_tcmalloc": allocator == ALLOCATOR_TCMALLOC,
+        "enable_jemalloc": allocator == ALLOCATOR_JEMALLOC,
+        "use_default_allocator": allocator == ALLOCATOR_DEFAULT,
+    }
+
+
+def get_binding_args(binding):
+    return {
+        "disable_numactl": binding != BINDING_NUMACTL,
+        "disable_taskset": binding != BINDING_TASKSET,
+    }
+
+
+def get_ncore_per_instance_choices(ncore_per_node, nodes):
+    """The powers of two up to the cores of a NUMA node, the cores of a node and all."""
+    choices = []
+    ncore = 1
+    while ncore < ncore_per_node:
+        choices.append(ncore)
+        ncore *= 2
+    choices.append(ncore_per_node)
+    if nodes > 1:
+        choices.append(ncore_per_node * nodes)
+    return choices
+
+
+def load_launch_profile(profile_file):
+    with open(profile_file) as f:
+        return json.load(f)
+
+
+def apply_launch_profile(args, profile):
+    """Apply the best launch configuration of a profile generated by autotune."""
+    launch_args = profile["launch_args"]
+    for name in PROFILE_LAUNCH_ARGS:
+        if name in launch_args:
+            setattr(args, name, launch_args[name])
+    # The profile decides the instances
+    args.latency_mode = False
+    args.throughput_mode = False
+    logger.info("Applied launch profile: {}".format(launch_args))
+
+
+class AutoTuneLauncher(CPULauncher):
+    r"""
+     Launcher running the program with a grid of the multi-instance configurations
+     of cores per instance, NUMA binding and memory allocator. The throughput and
+     latency of each configuration are recorded and the best configuration is
+     written as a launch profile.
+     """
+
+    def __init__(self, args):
+        super().__init__(args)
+
+    def _get_ncore_per_instance_choices(self):
+        args = self.args
+        if args.autotune_ncore_per_instance:
+            return [int(x) for x in args.autotune_ncore_per_instance.split(",")]
+        if args.use_logical_core:
+            node_cores = self.cpuinfo.node_logical_cores
+        else:
+            node_cores = self.cpuinfo.node_physical_cores
+        return get_ncore_per_instance_choices(len(node_cores[0]), self.cpuinfo.node_nums())
+
+    def _get_binding_choices(self):
+        if self.is_numactl_available():
+            return [BINDING_NUMACTL, BINDING_TASKSET]
+        return [BINDING_TASKSET]
+
+    def _is_allocator_available(self, allocator):
+        if allocator == ALLOCATOR_DEFAULT:
+            return True
+        env = os.environ.copy()
+        try:
+            return self.add_lib_preload(lib_type=allocator)
+        finally:
+            os.environ.clear()
+            os.environ.update(env)
+
+    def _get_allocator_choices(self):
+        allocators = []
+        for allocator in self.args.autotune_allocators.split(","):
+            allocator = allocator.strip()
+            if self._is_allocator_available(allocator):
+                allocators.append(allocator)
+            else:
+                logger.warning("Skip tuning with {} which is not found.".format(allocator))
+        return allocators
+
+    def get_configs(self):
+        configs = []
+        for ncore_per_instance in self._get_ncore_per_instance_choices():
+            for binding in self._get_binding_choices():
+                for allocator in self._get_allocator_choices():
+                    configs.append({
+                        "ncore_per_instance": ncore_per_instance,
+                        "binding": binding,
+                        "allocator": allocator,
+                    })
+        return configs
+
+    def _get_trial_args(self, config, log_path, log_file_prefix):
+        trial_args = copy.copy(self.args)
+        trial_args.program_args = list(self.args.program_args)
+        trial_args.ncore_per_instance = config["ncore_per_instance"]
+        trial_args.ninstances = -1
+        trial_args.instance_idx = -1
+        trial_args.core_list = None
+        trial_args.latency_mode = False
+        trial_args.throughput_mode = False
+        trial_args.skip_cross_node_cores = False
+        for name, value in get_binding_args(config["binding"]).items():
+            setattr(trial_args, name, value)
+        for name, value in get_allocator_args(config["allocator"]).items():
+            setattr(trial_args, name, value)
+        trial_args.log_path = log_path
+        trial_args.log_file_prefix = log_file_prefix
+        return trial_args
+
+    def _get_metric(self, log_path, log_file_prefix):
+        """Sum of the last metric value reported in the log of each instance."""
+        pattern = re.compile(self.args.autotune_metric)
+        log_files = glob.glob(os.path.join(
+            log_path, "{}_instance_*.log".format(log_file_prefix)))
+        if not log_files:
+            return None
+        total = 0.0
+        for log_file in log_files:
+            value = None
+            with open(log_file, errors="replace") as f:
+                for line in f:
+                    match = pattern.search(line)
+                    if match:
+                        value = float(match.group(1))
+            if value is None:
+                return None
+            total += value
+        return total
+
+    def run_trial(self, index, config, log_path):
+        log_file_prefix = "trial_{}".format(index)
+        # The logs of each trial are in its own new directory so that
+        # only the logs of the trial are counted for the metric
+        log_path = os.path.join(log_path, log_file_prefix)
+        os.makedirs(log_path)
+        trial_args = self._get_trial_args(config, log_path, log_file_prefix)
+        result = dict(config)
+        # The launcher sets the environment variables for the instances
+        env = os.environ.copy()
+        try:
+            launcher = MultiInstanceLauncher(trial_args)
+            start = time.time()
+            launcher.launch()
+            elapsed = time.time() - start
+        except (Exception, SystemExit) as e:
+            logger.warning("Trial {} with {} failed: {}".format(index, config, str(e)))
+            result["error"] = str(e)
+            return result
+        finally:
+            os.environ.clear()
+            os.environ.update(env)
+
+        result["ninstances"] = trial_args.ninstances
+        result["launch_args"] = {
+            name: getattr(trial_args, name) for name in PROFILE_LAUNCH_ARGS}
+        # All the instances run the same workload concurrently
+        result["latency"] = elapsed
+        if self.args.autotune_metric:
+            result["throughput"] = self._get_metric(log_path, log_file_prefix)
+            if result["throughput"] is None:
+                result["error"] = "No metric reported by some instances."
+        else:
+            result["throughput"] = trial_args.ninstances / elapsed
+        return result
+
+    def launch(self):
+        args = self.args
+        configs = self.get_configs()
+        logger.info("Auto tuning with {} configurations.".format(len(configs)))
+        results = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if args.log_path:
+                # Keep the logs in a new directory of each run
+                os.makedirs(args.log_path, exist_ok=True)
+                log_path = tempfile.mkdtemp(prefix="autotune_", dir=args.log_path)
+                logger.info("The logs of the trials are written to {}.".format(log_path))
+            else:
+                log_path = temp_dir
+            for index, config in enumerate(configs):
+                result = self.run_trial(index, config, log_path)
+                if "error" not in result:
+                    logger.info("Trial {}: {} instances with {}: throughput {:.4f}, latency {:.3f}s".format(
+                        index, result["ninstances"], config, result["throughput"], result["latency"]))
+                results.append(result)
+
+        succeeded = [result for result in results if "error" not in result]
+        if not succeeded:
+            raise RuntimeError("All the {} auto tuning trials failed.".format(len(results)))
+        best = max(succeeded, key=lambda result: (result["throughput"], -result["latency"]))
+        profile = {
+            "program": args.program,
+            "program_args": args.program_args,
+            "metric": args.autotune_metric if args.autotune_metric else "instances per second",
+            "launch_args": best["launch_args"],
+            "throughput": best["throughput"],
+            "latency": best["latency"],
+            "trials": results,
+        }
+        with open(args.autotune_profile, "w") as f:
+            json.dump(profile, f, indent=2)
+        logger.info("Best configuration: {} instances with {} (throughput {:.4f}). "
+                    "Profile written to {}. Run with --launch_profile {} to use it.".format(
+                        best["ninstances"], {k: best[k] for k in ["ncore_per_instance", "binding", "allocator"]},
+                        best["throughput"], args.autotune_profile, args.autotune_profile))
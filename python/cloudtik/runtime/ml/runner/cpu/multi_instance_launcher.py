@@ -4,9 +4,37 @@ import subprocess
 import sys
 
 from cloudtik.runtime.ml.runner.cpu.launcher import CPULauncher
+from cloudtik.runtime.ml.runner.util.safe_shell_exec import get_output_forwarder, \
+    terminate_executor_shell_and_children
 
 logger = logging.getLogger(__name__)
 
+INSTANCE_POLL_INTERVAL_S = 0.1
+
+
+def wait_for_instances(processes):
+    """Wait for the processes of the instances to exit. Once any of them fails
+    (or the wait is interrupted), the others are terminated before raising."""
+    try:
+        remaining = list(processes)
+        while remaining:
+            try:
+                remaining[0].wait(timeout=INSTANCE_POLL_INTERVAL_S)
+            except subprocess.TimeoutExpired:
+                pass
+            for process in [process for process in remaining if process.poll() is not None]:
+                remaining.remove(process)
+                if process.returncode != 0:
+                    raise subprocess.CalledProcessError(
+                        returncode=process.returncode, cmd=process.args)
+    except BaseException:
+        for process in processes:
+            if process.poll() is None:
+                terminate_executor_shell_and_children(process.pid)
+        for process in processes:
+            process.wait()
+        raise
+
 
 class MultiInstanceLauncher(CPULauncher):
     r"""
@@ -19,6 +47,8 @@ class MultiInstanceLauncher(CPULauncher):
     def launch(self):
         args = self.args
         processes = []
+        forwarded = []
+        log_streams = []
         cores = []
         set_kmp_affinity = True
         enable_taskset = False
@@ -203,25 +233,40 @@ class MultiInstanceLauncher(CPULauncher):
             cmd.extend(args.program_args)
             os.environ["LAUNCH_CMD"] += " ".join(cmd) + ",#"
             cmd_s = " ".join(cmd)
+            log_stream = None
             if args.log_path:
                 log_name = args.log_file_prefix + "_instance_{}_cores_".format(
                     i) + cur_process_cores.replace(',', '_') + ".log"
                 log_file = os.path.join(args.log_path, log_name)
-                cmd_s = "{} 2>&1 | tee {}".format(cmd_s, log_file)
+                log_stream = open(log_file, "w")
+                log_streams.append(log_stream)
             logger.info(cmd_s)
-            process = subprocess.Popen(cmd_s, env=os.environ, shell=True)
-            processes.append(process)
+            single_instance = args.ninstances == 1 or args.instance_idx != -1
+            if single_instance and log_stream is None:
+                # Nothing to prefix or tee, the instance writes to stdout directly
+                process = subprocess.Popen(cmd_s, env=os.environ, shell=True)
+                processes.append(process)
+            else:
+                # The output of the instances is forwarded with the instance prefixed
+                # to the lines by a single thread instead of a tee process for each
+                process = subprocess.Popen(cmd_s, env=os.environ, shell=True,
+                                           stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                processes.append(process)
+                instance_idx = i if args.instance_idx == -1 else args.instance_idx
+                forwarded.append(get_output_forwarder().add(
+                    process.stdout, sys.stdout, index=instance_idx, log_stream=log_stream))
 
             if args.instance_idx != -1: # launches single instance, instance_idx, only
                 break
 
         os.environ["LAUNCH_CMD"] = os.environ["LAUNCH_CMD"][:-2]
         try:
-            for process in processes:
-                process.wait()
-                if process.returncode != 0:
-                    raise subprocess.CalledProcessError(returncode=process.returncode, cmd=cmd_s)
+            wait_for_instances(processes)
+            for source in forwarded:
+                source.wait()
         finally:
+            for log_stream in log_streams:
+                log_stream.close()
             if args.auto_ipex:
                 # Clean the temp file
                 if os.path.exists(args.program) and args.program.endswith("_auto_ipex"):
@@ -3,16 +3,84 @@ import os
 import platform
 import re
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+# CloudTik: patch start
+# The CPU topology of the hosts cached for the process
+_cpu_topologies = {}
+_cpu_topologies_lock = threading.Lock()
+MAX_CPU_TOPOLOGY_FETCHES = 16
+
+
+def _get_published_cpu_topologies(host_ips):
+    """Read the CPU topology published by the node monitors in the cluster state."""
+    from cloudtik.core._private import services
+    from cloudtik.core._private.cpu_topology import get_published_cpu_topologies
+    from cloudtik.core._private.state.control_state import ControlState
+    try:
+        redis_ip, redis_port = services.get_address_to_use_or_die().split(":")
+        control_state = ControlState()
+        control_state.initialize_control_state(
+            redis_ip, redis_port, services.get_redis_password_to_use())
+        return get_published_cpu_topologies(control_state, host_ips)
+    except Exception as e:
+        logger.debug("Failed to get CPU topology from cluster state: {}".format(str(e)))
+        return {}
+
+
+def _get_remote_lscpu_info(host_ip):
+    from cloudtik.core._private.node.node_agent import get_node_agent_client, NodeAgentError
+    try:
+        return get_node_agent_client(host_ip).get_cpu_topology()
+    except NodeAgentError as e:
+        logger.debug("Failed to get CPU topology from node agent: {}".format(str(e)))
+        return None
+
+
+def _fetch_cpu_topology(host_ip):
+    # Query the remote node through the node agent if possible
+    # and fallback to the exec command through SSH
+    lscpu_info = _get_remote_lscpu_info(host_ip)
+    if lscpu_info is None:
+        env = os.environ.copy()
+        env["LANG"] = "C"
+        args = ["cloudtik", "head", "exec", "--node-ip", host_ip, "lscpu --parse=CPU,Core,Socket,Node"]
+        lscpu_info = subprocess.check_output(args, env=env, universal_newlines=True).split("\n")
+    return lscpu_info
+
+
+def get_cpu_topologies(host_ips):
+    """Get the CPU topology of the hosts in lscpu parse format. The topology
+    not published in the cluster state is fetched from the hosts in parallel."""
+    with _cpu_topologies_lock:
+        missing = [host_ip for host_ip in host_ips if host_ip not in _cpu_topologies]
+    if missing:
+        cpu_topologies = _get_published_cpu_topologies(missing)
+        remaining = [host_ip for host_ip in missing if host_ip not in cpu_topologies]
+        if remaining:
+            with ThreadPoolExecutor(
+                    max_workers=min(len(remaining), MAX_CPU_TOPOLOGY_FETCHES)) as executor:
+                cpu_topologies.update(
+                    zip(remaining, executor.map(_fetch_cpu_topology, remaining)))
+        with _cpu_topologies_lock:
+            _cpu_topologies.update(cpu_topologies)
+    with _cpu_topologies_lock:
+        return {host_ip: _cpu_topologies[host_ip] for host_ip in host_ips}
+# CloudTik: patch end
+
+
 class CPUinfo:
     """
     Get CPU information, such as cores list and NUMA information.
-    If host_ip is not None, we will use `cloudtik head exec --node-ip ip` command to get lscpu info.
+    The topology is read from sysfs (lscpu as fallback). If host_ip is not None, the topology
+    published in the cluster state is used, or queried from the node agent or with
+    `cloudtik head exec --node-ip ip` command.
     """
     def __init__(self, host_ip=None):
         self.cpuinfo = []
@@ -26,17 +94,11 @@ class CPUinfo:
         elif platform.system() == "Linux":
             # CloudTik: patch start
             if host_ip is None:
-                args = ["lscpu", "--parse=CPU,Core,Socket,Node"]
+                from cloudtik.core._private.cpu_topology import get_cpu_topology
+                lscpu_info = get_cpu_topology()
             else:
-                args = ["cloudtik", "head", "exec", "--node-ip", host_ip, "lscpu --parse=CPU,Core,Socket,Node"]
+                lscpu_info = get_cpu_topologies([host_ip])[host_ip]
             # CloudTik: patch end
-            env_lang = os.getenv('LANG', 'UNSET')
-            os.environ['LANG'] = 'C'
-            lscpu_info = subprocess.check_output(args, env=os.environ, universal_newlines=True).split("\n")
-            if env_lang == 'UNSET':
-                del os.environ['LANG']
-            else:
-                os.environ['LANG'] = env_lang
 
             # Get information about  cpu, core, socket and node
             for line in lscpu_info:
@@ -108,6 +108,16 @@ rank 0: *(IP: 192.168.10.10, and has a free port: 295000)*
 
 "--enable_tcmalloc" and "--enable_jemalloc" can be used to enable different memory allocator.
 
+*** Auto Tuning ***
+
+Run a short workload with a grid of cores per instance, NUMA binding and memory allocators
+and write the best launch configuration to a profile. Then launch with the profile.
+
+::
+
+   >>> cloudtik-ml-run --autotune --autotune_metric "throughput: ([0-9.]+)" python_script args
+   >>> cloudtik-ml-run --launch_profile launch_profile.json python_script args
+
 """
 
 
@@ -193,6 +203,26 @@ def add_multi_instance_params(parser):
                             "this MALLOC_CONF may cause Out-of-Memory crash.")
 
 
+def add_autotune_params(parser):
+    group = parser.add_argument_group("Auto Tuning Parameters")
+    group.add_argument("--autotune", action='store_true', default=False,
+                       help="Run the program (a short workload) with a grid of multi-instance configurations "
+                            "of cores per instance, NUMA binding and memory allocator, and write the best "
+                            "launch configuration to the profile.")
+    group.add_argument("--autotune_profile", metavar='\b', default="launch_profile.json", type=str,
+                       help="The file to write the launch profile with the tuning results.")
+    group.add_argument("--autotune_metric", metavar='\b', default="", type=str,
+                       help="The regex with one group to match the throughput reported by the program, "
+                            "such as 'throughput: ([0-9.]+)'. By default, the instances finished per second.")
+    group.add_argument("--autotune_ncore_per_instance", metavar='\b', default="", type=str,
+                       help="The cores per instance to tune separated with comma. By default, the powers of two "
+                            "up to the cores of a NUMA node, the cores of a NUMA node and all the cores.")
+    group.add_argument("--autotune_allocators", metavar='\b', default="default,tcmalloc,jemalloc", type=str,
+                       help="The memory allocators to tune separated with comma.")
+    group.add_argument("--launch_profile", metavar='\b', default="", type=str,
+                       help="Launch with the best configuration of a profile written by --autotune.")
+
+
 def add_kmp_iomp_params(parser):
     group = parser.add_argument_group("IOMP Parameters")
     group.add_argument("--disable_iomp", action='store_true', default=False,
@@ -279,6 +309,7 @@ def parse_args():
 
     add_distributed_training_params(parser)
     add_multi_instance_params(parser)
+    add_autotune_params(parser)
 
     add_auto_ipex_params(parser)
 
@@ -350,6 +381,14 @@ def _run(args):
     if not args.no_python and not args.program.endswith(".py"):
         raise RuntimeError("For non Python script, you should use '--no_python' parameter.")
 
+    if args.autotune and args.distributed:
+        raise RuntimeError("Auto tuning is not supported for distributed training")
+
+    if args.launch_profile:
+        from cloudtik.runtime.ml.runner.cpu.autotune_launcher \
+            import load_launch_profile, apply_launch_profile
+        apply_launch_profile(args, load_launch_profile(args.launch_profile))
+
     env_before = set(os.environ.keys())
 
     # Verify LD_PRELOAD
@@ -368,6 +407,10 @@ def _run(args):
             from cloudtik.runtime.ml.runner.cpu.optimized_training_launcher \
                 import OptimizedTrainingLauncher
             launcher = OptimizedTrainingLauncher(args)
+    elif args.autotune:
+        from cloudtik.runtime.ml.runner.cpu.autotune_launcher \
+            import AutoTuneLauncher
+        launcher = AutoTuneLauncher(args)
     else:
         from cloudtik.runtime.ml.runner.cpu.multi_instance_launcher \
             import MultiInstanceLauncher
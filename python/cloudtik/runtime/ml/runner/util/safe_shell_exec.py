@@ -17,6 +17,7 @@ import codecs
 import multiprocessing
 import os
 import re
+import selectors
 import signal
 import subprocess
 import sys
@@ -29,6 +30,9 @@ from cloudtik.runtime.ml.runner.util.threads import in_thread, on_event
 
 GRACEFUL_TERMINATION_TIME_S = 5
 
+FORWARD_READ_SIZE = 64 * 1024
+FORWARD_MAX_LINE_BUFFER_SIZE = 64 * 1024
+
 
 def terminate_executor_shell_and_children(pid):
     # If the shell already ends, no need to terminate its child.
@@ -80,69 +84,227 @@ def terminate_executor_shell_and_children(pid):
             pass
 
 
-def prefix_connection(src_connection, dst_stream, prefix, index, prefix_output_with_timestamp):
-    """
-    Prefixes the given source connection with timestamp, a prefix and an index.
-    Each line of the source will be prefix in this format, if index and prefix are not None:
-        {time}[{index}]<{prefix}>:{line}
-    The dst_stream must be text streams.
-
-    :param src_connection: source pipe connection
-    :param dst_stream: destination text stream
-    :param prefix: prefix string
-    :param index: index value
-    :param prefix_output_with_timestamp: prefix lines in dst_stream with timestamp
-    :return: None
-    """
-    def get_context(rank, prefix):
-        localtime = time.asctime(time.localtime(time.time())) if prefix_output_with_timestamp else ''
+class _ForwardedSource(object):
+    def __init__(self, src, dst_stream, prefix, index, prefix_output_with_timestamp, log_stream):
+        self.src = src
+        self.fd = src if isinstance(src, int) else src.fileno()
+        self.dst_stream = dst_stream
+        self.prefix = prefix
+        self.index = index
+        self.prefix_output_with_timestamp = prefix_output_with_timestamp
+        self.log_stream = log_stream
+        # the incremental decoder allows us to decode chunks of utf8 bytes
+        # with utf8 characters spread across the boundary chunks
+        self.decoder = codecs.getincrementaldecoder('utf8')()
+        self.line_buffer = ''
+        self.done = threading.Event()
+
+    def get_context(self):
+        localtime = time.asctime(time.localtime(time.time())) if self.prefix_output_with_timestamp else ''
+        if self.prefix is None:
+            return '{time}[{rank}]:'.format(time=localtime, rank=str(self.index))
         return '{time}[{rank}]<{prefix}>:'.format(
             time=localtime,
-            rank=str(rank),
-            prefix=prefix
+            rank=str(self.index),
+            prefix=self.prefix
         )
 
-    def write(text):
-        if index is not None and prefix is not None:
-            context = get_context(index, prefix)
-            text = context + text
-        dst_stream.write(text)
-        dst_stream.flush()
+    def close(self):
+        if isinstance(self.src, int):
+            os.close(self.src)
+        else:
+            self.src.close()
 
-    # the incremental encoder allows us to decode chunks of utf8 bytes
-    # with utf8 characters spread across the boundary chunks
-    decoder = codecs.getincrementaldecoder('utf8')()
+    def wait(self, timeout=None):
+        """Wait until the source reaches EOF and all its output is written."""
+        return self.done.wait(timeout)
 
-    line_buffer = ''
-    while True:
-        # read at most that many bytes, but do not wait until that many bytes become available
-        # waits for the first bytes so this is not a busy loop
-        buf = os.read(src_connection.fileno(), 1000)
 
-        # turn the bytes into string decoding them as utf8
+class OutputForwarder(object):
+    """
+    Forwards the output of any number of pipes to text streams in a single thread.
+    The pipes are multiplexed with selectors so that the thread overhead is constant
+    regardless of the number of processes. Each line is prefixed in this format
+    if index is not None:
+        {time}[{index}]<{prefix}>:{line}
+
+    The buffering is bounded: at most read_size bytes are read from a ready pipe
+    at a time and a partial line longer than max_line_buffer_size is written out
+    without waiting for its end. The output read in one round is written to each
+    destination stream with a single write and flush so that noisy processes don't
+    cost a flush per line.
+
+    The forwarding thread is started on demand and exits when there is nothing
+    to forward.
+    """
+
+    def __init__(self, read_size=FORWARD_READ_SIZE, max_line_buffer_size=FORWARD_MAX_LINE_BUFFER_SIZE):
+        self.read_size = read_size
+        self.max_line_buffer_size = max_line_buffer_size
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._pending = []
+        self._num_sources = 0
+        self._thread = None
+        # The pipe to wake up the forwarding thread for new sources
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+
+    def add(self, src, dst_stream, prefix=None, index=None,
+            prefix_output_with_timestamp=False, log_stream=None):
+        """
+        Forwards the source to the destination stream until EOF.
+        The source is closed at EOF.
+
+        :param src: source pipe connection, file object or file descriptor
+        :param dst_stream: destination text stream
+        :param prefix: prefix string
+        :param index: index value, lines are not prefixed if None
+        :param prefix_output_with_timestamp: prefix lines in dst_stream with timestamp
+        :param log_stream: optional text stream to write the output without prefix
+        :return: the forwarded source which can be waited for
+        """
+        source = _ForwardedSource(
+            src, dst_stream, prefix, index, prefix_output_with_timestamp, log_stream)
+        with self._lock:
+            self._pending.append(source)
+            if self._thread is None:
+                self._thread = in_thread(target=self._run, name="output-forwarder")
+            else:
+                os.write(self._wakeup_w, b'x')
+        return source
+
+    def close(self):
+        """Wait for the forwarded sources and release the resources."""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self._selector.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                for source in self._pending:
+                    self._selector.register(source.fd, selectors.EVENT_READ, source)
+                self._num_sources += len(self._pending)
+                self._pending = []
+                if not self._num_sources:
+                    self._thread = None
+                    return
+
+            writes = {}
+            for key, _ in self._selector.select():
+                if key.fd == self._wakeup_r:
+                    os.read(self._wakeup_r, self.read_size)
+                    continue
+                source = key.data
+                if not self._read(source, writes):
+                    self._selector.unregister(source.fd)
+                    self._num_sources -= 1
+                    self._finish(source, writes)
+
+            self._write(writes)
+            for source in writes.pop(None, []):
+                source.done.set()
+
+    def _read(self, source, writes):
+        try:
+            buf = os.read(source.fd, self.read_size)
+        except OSError:
+            buf = b''
+
         # we need to use an incremental decoder as characters can span multiple bytes
         # where the last character might not be completely in buf
         # see https://github.com/horovod/horovod/issues/2367
-        text = decoder.decode(buf or b'', final=not buf)
+        text = source.decoder.decode(buf, final=not buf)
+        if source.log_stream is not None and text:
+            self._append(writes, source.log_stream, text)
 
         # write line_buffer out when we reach an \n or \r
         # the latter is used to update the current line (e.g. progress bar)
         # which we want to flush out (and prefix) as soon as possible
+        context = None
         for line in re.split('([\r\n])', text):
-            line_buffer += line
-            if line == '\r' or line == '\n':
-                write(line_buffer)
-                line_buffer = ''
+            source.line_buffer += line
+            if line == '\r' or line == '\n' or len(source.line_buffer) > self.max_line_buffer_size:
+                if context is None:
+                    context = self._get_context(source)
+                self._append(writes, source.dst_stream, context + source.line_buffer)
+                source.line_buffer = ''
+        return len(buf) > 0
+
+    def _finish(self, source, writes):
+        # flush the line buffer if it is not empty
+        if len(source.line_buffer):
+            self._append(writes, source.dst_stream, self._get_context(source) + source.line_buffer)
+            source.line_buffer = ''
+        source.close()
+        # the source is done after its output is written
+        writes.setdefault(None, []).append(source)
+
+    @staticmethod
+    def _get_context(source):
+        if source.index is None:
+            return ''
+        return source.get_context()
+
+    @staticmethod
+    def _append(writes, stream, text):
+        entry = writes.get(id(stream))
+        if entry is None:
+            writes[id(stream)] = (stream, [text])
+        else:
+            entry[1].append(text)
+
+    @staticmethod
+    def _write(writes):
+        for key, entry in writes.items():
+            if key is None:
+                continue
+            stream, texts = entry
+            try:
+                stream.write(''.join(texts))
+                stream.flush()
+            except (OSError, ValueError):
+                # The stream is closed, the output is dropped
+                pass
+
+
+_output_forwarder = None
+_output_forwarder_lock = threading.Lock()
 
-        # not an empty text indicates EOF but an empty buf
-        if not buf:
-            break
 
-    # flush the line buffer if it is not empty
-    if len(line_buffer):
-        write(line_buffer)
+def get_output_forwarder():
+    """The output forwarder shared by the executions of this process."""
+    global _output_forwarder
+    with _output_forwarder_lock:
+        if _output_forwarder is None:
+            _output_forwarder = OutputForwarder()
+        return _output_forwarder
 
-    src_connection.close()
+
+def prefix_connection(src_connection, dst_stream, prefix, index, prefix_output_with_timestamp):
+    """
+    Prefixes the given source connection with timestamp, a prefix and an index.
+    Each line of the source will be prefix in this format, if index and prefix are not None:
+        {time}[{index}]<{prefix}>:{line}
+    The dst_stream must be text streams.
+
+    :param src_connection: source pipe connection
+    :param dst_stream: destination text stream
+    :param prefix: prefix string
+    :param index: index value
+    :param prefix_output_with_timestamp: prefix lines in dst_stream with timestamp
+    :return: None
+    """
+    if prefix is None:
+        index = None
+    source = get_output_forwarder().add(
+        src_connection, dst_stream, prefix, index, prefix_output_with_timestamp)
+    source.wait()
 
 
 def _exec_middleman(command, env, exit_event, stdout, stderr, rw):
@@ -186,7 +348,7 @@ def _create_event(ctx):
 
 
 def execute(command, env=None, stdout=None, stderr=None, index=None, events=None,
-            prefix_output_with_timestamp=False):
+            prefix_output_with_timestamp=False, log_stream=None, forwarder=None):
     """
     Execute the given command and forward stdout and stderr of the command to the given
     stdout and stderr text streams, or sys.stdout and sys.stderr, respectively, if None given.
@@ -201,6 +363,8 @@ def execute(command, env=None, stdout=None, stderr=None, index=None, events=None
     :param index: index used to prepend text streams
     :param events: events to terminate the command
     :param prefix_output_with_timestamp: prepend text streams with timestamp if True
+    :param log_stream: text stream to write stdout and stderr of the command without prefix
+    :param forwarder: the output forwarder to use, the one shared by the process if None
     :return: command's exit code
     """
     ctx = multiprocessing.get_context('spawn')
@@ -238,8 +402,11 @@ def execute(command, env=None, stdout=None, stderr=None, index=None, events=None
     if stderr is None:
         stderr = sys.stderr
 
-    stdout_fwd = in_thread(target=prefix_connection, args=(stdout_r, stdout, 'stdout', index, prefix_output_with_timestamp))
-    stderr_fwd = in_thread(target=prefix_connection, args=(stderr_r, stderr, 'stderr', index, prefix_output_with_timestamp))
+    # The output of all the commands is forwarded by a single thread
+    if forwarder is None:
+        forwarder = get_output_forwarder()
+    stdout_fwd = forwarder.add(stdout_r, stdout, 'stdout', index, prefix_output_with_timestamp, log_stream)
+    stderr_fwd = forwarder.add(stderr_r, stderr, 'stderr', index, prefix_output_with_timestamp, log_stream)
 
     # TODO: Currently this requires explicitly declaration of the events and signal handler to set
     #  the event (gloo_run.py:_launch_jobs()). Need to figure out a generalized way to hide this behind
@@ -264,7 +431,7 @@ def execute(command, env=None, stdout=None, stderr=None, index=None, events=None
     finally:
         stop.set()
 
-    stdout_fwd.join()
-    stderr_fwd.join()
+    stdout_fwd.wait()
+    stderr_fwd.wait()
 
     return middleman.exitcode
@@ -91,6 +91,38 @@ function update_presto_data_disks_config() {
     sed -i "s!{%node.data-dir%}!${presto_data_dir}!g" $output_dir/presto/node.properties
 }
 
+function update_presto_spill_config() {
+    if [ "$PRESTO_SPILL_ENABLED" != "true" ]; then
+        return
+    fi
+
+    # spill to all the data disks
+    spill_paths=""
+    if [ -d "/mnt/cloudtik" ]; then
+        for data_disk in /mnt/cloudtik/*; do
+            [ -d "$data_disk" ] || continue
+            spill_path=$data_disk/presto/spill
+            mkdir -p $spill_path
+            if [ -z "$spill_paths" ]; then
+                spill_paths=$spill_path
+            else
+                spill_paths="$spill_paths,$spill_path"
+            fi
+        done
+    fi
+
+    # if no disks mounted on /mnt/cloudtik
+    if [ -z "$spill_paths" ]; then
+        spill_paths="${RUNTIME_PATH}/shared/presto/spill"
+        mkdir -p $spill_paths
+    fi
+
+    for config_file in $output_dir/presto/config.properties $output_dir/presto/config.worker.properties; do
+        echo "experimental.spill-enabled=true" >> $config_file
+        echo "experimental.spiller-spill-path=$spill_paths" >> $config_file
+    done
+}
+
 function update_storage_config_for_aws() {
     # AWS_S3_ACCESS_KEY_ID
     # AWS_S3_SECRET_ACCESS_KEY
@@ -235,6 +267,7 @@ function configure_presto() {
 
     update_presto_memory_config
     update_presto_data_disks_config
+    update_presto_spill_config
 
     mkdir -p ${PRESTO_HOME}/etc
     if [ $IS_HEAD_NODE == "true" ]; then
@@ -7,6 +7,7 @@ from cloudtik.core._private.providers import _get_workspace_provider
 from cloudtik.core._private.runtime_factory import BUILT_IN_RUNTIME_METASTORE
 from cloudtik.core._private.utils import merge_rooted_config_hierarchy, _get_runtime_config_object, is_runtime_enabled, \
     get_node_type, get_resource_of_node_type, round_memory_size_to_gb, RUNTIME_CONFIG_KEY, get_node_type_config
+from cloudtik.runtime.common.memory_profile import get_query_memory_profile, get_query_max_memory
 
 RUNTIME_PROCESSES = [
     # The first element is the substring to filter.
@@ -41,6 +42,16 @@ def get_memory_heap_headroom_per_node(jvm_max_memory):
     return int(jvm_max_memory * MEMORY_HEAP_HEADROOM_PER_NODE_RATIO)
 
 
+def get_worker_jvm_max_memory(runtime_config: Dict[str, Any], total_memory):
+    """The JVM max memory of a worker with the memory profile if configured."""
+    presto_config = runtime_config.get(PRESTO_RUNTIME_CONFIG_KEY, {})
+    memory_profile = presto_config.get("memory_profile")
+    if memory_profile is None:
+        return get_jvm_max_memory(total_memory)
+    return get_query_memory_profile(
+        total_memory, runtime_config, memory_profile)["jvm_max_memory"]
+
+
 def _config_runtime_resources(cluster_config: Dict[str, Any]) -> Dict[str, Any]:
     return cluster_config
 
@@ -152,9 +163,20 @@ def _get_runtime_services(cluster_head_ip):
 def _with_memory_configurations(
         runtime_envs: Dict[str, Any], presto_config: Dict[str, Any],
         config: Dict[str, Any], provider, node_id: str):
+    runtime_config = config.get(RUNTIME_CONFIG_KEY)
+    memory_profile = presto_config.get("memory_profile")
+
     # Set query_max_memory
-    query_max_memory = presto_config.get("query_max_memory", "50GB")
-    runtime_envs["PRESTO_QUERY_MAX_MEMORY"] = query_max_memory
+    query_max_memory = presto_config.get("query_max_memory")
+    if query_max_memory is None and memory_profile is not None:
+        # The same value from the configured workers on the coordinator and all workers
+        query_max_memory_mb = get_query_max_memory(config, runtime_config, memory_profile)
+        if query_max_memory_mb:
+            query_max_memory = "{}MB".format(query_max_memory_mb)
+    runtime_envs["PRESTO_QUERY_MAX_MEMORY"] = query_max_memory if query_max_memory else "50GB"
+
+    if memory_profile is not None and memory_profile.get("spill_enabled", False):
+        runtime_envs["PRESTO_SPILL_ENABLED"] = True
 
     node_type = get_node_type(provider, node_id)
     if node_type is None:
@@ -169,6 +191,16 @@ def _with_memory_configurations(
     if memory_in_mb == 0:
         return
 
+    if memory_profile is not None:
+        memory_configs = get_query_memory_profile(memory_in_mb, runtime_config, memory_profile)
+        runtime_envs["PRESTO_JVM_MAX_MEMORY"] = memory_configs["jvm_max_memory"]
+        runtime_envs["PRESTO_MAX_MEMORY_PER_NODE"] = memory_configs["query_max_memory_per_node"]
+        runtime_envs["PRESTO_MAX_TOTAL_MEMORY_PER_NODE"] = \
+            memory_configs["query_max_total_memory_per_node"]
+        runtime_envs["PRESTO_HEAP_HEADROOM_PER_NODE"] = \
+            memory_configs["memory_heap_headroom_per_node"]
+        return
+
     jvm_max_memory = get_jvm_max_memory(memory_in_mb)
     query_max_memory_per_node = get_query_max_memory_per_node(jvm_max_memory)
     query_max_total_memory_per_node = get_query_max_total_memory_per_node(jvm_max_memory)
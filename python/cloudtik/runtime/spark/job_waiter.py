@@ -1,25 +1,59 @@
 import json
 import time
-from typing import Optional
+from typing import Any, Dict, Optional
 
+from cloudtik.core._private.call_context import CallContext
 from cloudtik.core._private.cli_logger import cli_logger
-from cloudtik.core._private.constants import CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S, CLOUDTIK_JOB_WAITER_TIMEOUT_MAX
+from cloudtik.core._private.constants import CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S, CLOUDTIK_JOB_WAITER_TIMEOUT_MAX, \
+    CLOUDTIK_JOB_EVENT_WAIT_S
+from cloudtik.core._private.job_waiter.job_event import wait_for_job_exits_on_cluster
 from cloudtik.core.job_waiter import JobWaiter
 from cloudtik.runtime.spark.utils import request_rest_yarn_with_retry
 
 
 class SparkJobWaiter(JobWaiter):
+    def __init__(self,
+                 config: Dict[str, Any]) -> None:
+        JobWaiter.__init__(self, config)
+        self.call_context = CallContext()
+        self.call_context.set_call_from_api(True)
+
     def _get_on_going_yarn_apps(self):
         response = request_rest_yarn_with_retry(self.config, None)
         json_object = json.loads(response)
         return json_object["clusterMetrics"]["appsPending"], json_object["clusterMetrics"]["appsRunning"]
 
+    def _wait_for_session_exit(self, session_name: str, start_time, timeout):
+        # Block on the exit event of the job session before checking YARN.
+        # Return when the session exits, the events are not available
+        # or there are no on-going YARN apps while waiting.
+        while time.time() - start_time < timeout:
+            # Check YARN in the interval in case the event is lost
+            wait_time = min(
+                CLOUDTIK_JOB_EVENT_WAIT_S, CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S,
+                timeout - (time.time() - start_time))
+            job_exits = wait_for_job_exits_on_cluster(
+                self.config, self.call_context, [session_name], wait_time)
+            if job_exits is None:
+                return
+            if session_name in job_exits:
+                cli_logger.print(
+                    "Session {} finished with exit code {}.",
+                    session_name, job_exits[session_name])
+                return
+            apps_pending, apps_running = self._get_on_going_yarn_apps()
+            if apps_pending == 0 and apps_running == 0:
+                return
+
     def wait_for_completion(self, node_id: str, cmd: str, session_name: str, timeout: Optional[int] = None):
         start_time = time.time()
         if timeout is None:
             timeout = CLOUDTIK_JOB_WAITER_TIMEOUT_MAX
         interval = CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S
 
+        if session_name:
+            self._wait_for_session_exit(session_name, start_time, timeout)
+
         apps_pending, apps_running = self._get_on_going_yarn_apps()
         while time.time() - start_time < timeout:
             if apps_pending == 0 and apps_running == 0:
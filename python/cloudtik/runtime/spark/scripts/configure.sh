@@ -93,6 +93,14 @@ function set_resources_for_spark() {
     total_memory=${total_memory%.*}
     total_vcores=$(cloudtik resources --cpu)
 
+    # The resources sized with the measured facts of the node type
+    if [ ! -z "${YARN_NODEMANAGER_MEMORY}" ]; then
+        total_memory=${YARN_NODEMANAGER_MEMORY}
+    fi
+    if [ ! -z "${YARN_NODEMANAGER_VCORES}" ]; then
+        total_vcores=${YARN_NODEMANAGER_VCORES}
+    fi
+
     # For Head Node
     if [ $IS_HEAD_NODE == "true" ];then
         spark_executor_cores=$(cat ~/cloudtik_bootstrap_config.yaml | jq '."runtime"."spark"."spark_executor_resource"."spark_executor_cores"')
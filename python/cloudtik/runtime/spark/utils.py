@@ -1,3 +1,4 @@
+import logging
 import os
 import time
 from typing import Any, Dict, Optional
@@ -5,18 +6,22 @@ from typing import Any, Dict, Optional
 from cloudtik.core._private.cli_logger import cli_logger
 from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
 from cloudtik.core._private.cluster.cluster_tunnel_request import _request_rest_to_head
+from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
 from cloudtik.core._private.core_utils import double_quote
 from cloudtik.core._private.runtime_factory import BUILT_IN_RUNTIME_HDFS, BUILT_IN_RUNTIME_METASTORE, \
-    BUILT_IN_RUNTIME_SPARK
+    BUILT_IN_RUNTIME_SPARK, BUILT_IN_RUNTIME_PRESTO, BUILT_IN_RUNTIME_TRINO
 from cloudtik.core._private.utils import merge_rooted_config_hierarchy, \
     _get_runtime_config_object, is_runtime_enabled, round_memory_size_to_gb, load_head_cluster_config, \
     RUNTIME_CONFIG_KEY, load_properties_file, save_properties_file, is_use_managed_cloud_storage, get_node_type_config, \
-    print_json_formatted
+    print_json_formatted, get_node_type
 from cloudtik.core._private.workspace.workspace_operator import _get_workspace_provider
 from cloudtik.core.scaling_policy import ScalingPolicy
+from cloudtik.runtime.common.memory_profile import get_co_located_runtime_memory
 from cloudtik.runtime.common.utils import get_runtime_services_of, get_runtime_default_storage_of
 from cloudtik.runtime.spark.scaling_policy import SparkScalingPolicy
 
+logger = logging.getLogger(__name__)
+
 RUNTIME_PROCESSES = [
     # The first element is the substring to filter.
     # The second element, if True, is to filter ps results by command name.
@@ -42,12 +47,26 @@ SPARK_ADDITIONAL_OVERHEAD = 1024
 SPARK_EXECUTOR_OVERHEAD_MINIMUM = 384
 SPARK_EXECUTOR_OVERHEAD_RATIO = 0.1
 
+# The executor sizing modes: the formula over the declared resources of the
+# worker type or the facts measured and published by the node monitors
+SPARK_EXECUTOR_SIZING_FORMULA = "formula"
+SPARK_EXECUTOR_SIZING_MEASURED = "measured"
+
+SPARK_OS_RESERVED_MEMORY_RATIO = 0.05
+SPARK_OS_RESERVED_MEMORY_MINIMUM = 1024
+
+# The published node facts are read once for the nodes set up in a short while,
+# for example, in an update pass of the cluster scaler.
+SPARK_NODE_FACTS_CACHE_TTL_S = 10
+
 SPARK_YARN_WEB_API_PORT = 8088
 SPARK_HISTORY_SERVER_API_PORT = 18080
 
 YARN_REQUEST_REST_RETRY_DELAY_S = 5
 YARN_REQUEST_REST_RETRY_COUNT = 36
 
+_published_node_facts_cache = ConcurrentObjectCache(ttl_s=SPARK_NODE_FACTS_CACHE_TTL_S)
+
 
 def get_yarn_resource_memory_ratio(cluster_config: Dict[str, Any]):
     yarn_resource_memory_ratio = YARN_RESOURCE_MEMORY_RATIO
@@ -153,7 +172,290 @@ def _config_depended_services(cluster_config: Dict[str, Any]) -> Dict[str, Any]:
     return cluster_config
 
 
+def _get_spark_executor_cores_of_numa_node(numa_node_cores: int) -> int:
+    if numa_node_cores <= SPARK_EXECUTOR_CORES_SINGLE_BOUND:
+        return max(numa_node_cores, 1)
+    # The cores closest to the default which divide the cores of a NUMA node
+    # so that the executors of a node pack the NUMA nodes without remainder
+    candidates = sorted(range(2, SPARK_EXECUTOR_CORES_SINGLE_BOUND + 1),
+                        key=lambda cores: (abs(cores - SPARK_EXECUTOR_CORES_DEFAULT), -cores))
+    for cores in candidates:
+        if numa_node_cores % cores == 0:
+            return cores
+    return SPARK_EXECUTOR_CORES_DEFAULT
+
+
+def _get_co_located_runtime_memory(
+        runtime_config: Dict[str, Any], memory_mb: int) -> Dict[str, int]:
+    reserved_memory = get_co_located_runtime_memory(runtime_config)
+    # Presto and Trino workers take a share of the node memory for the JVM
+    if is_runtime_enabled(runtime_config, BUILT_IN_RUNTIME_PRESTO):
+        from cloudtik.runtime.presto.utils import get_worker_jvm_max_memory
+        reserved_memory[BUILT_IN_RUNTIME_PRESTO] = get_worker_jvm_max_memory(
+            runtime_config, memory_mb)
+    if is_runtime_enabled(runtime_config, BUILT_IN_RUNTIME_TRINO):
+        from cloudtik.runtime.trino.utils import get_worker_jvm_max_memory
+        reserved_memory[BUILT_IN_RUNTIME_TRINO] = get_worker_jvm_max_memory(
+            runtime_config, memory_mb)
+    return reserved_memory
+
+
+def get_spark_executor_sizing(
+        node_facts: Dict[str, int], runtime_config: Dict[str, Any],
+        options: Dict[str, Any]) -> Dict[str, Any]:
+    """Size the YARN container and Spark executors of a node with its facts.
+
+    The options may set use_logical_cores, executor_cores and
+    reserved_memory_mb which is reserved in addition to the OS and
+    the co-located runtimes.
+    """
+    report = []
+    use_logical_cores = options.get("use_logical_cores", True)
+    if use_logical_cores:
+        cores = node_facts["logical_cores"]
+    else:
+        cores = node_facts["physical_cores"]
+    numa_nodes = max(node_facts.get("numa_nodes", 1), 1)
+    report.append("{} logical and {} physical cores in {} NUMA nodes: use {} {} cores.".format(
+        node_facts["logical_cores"], node_facts["physical_cores"], numa_nodes,
+        cores, "logical" if use_logical_cores else "physical"))
+
+    memory_mb = node_facts["memory_mb"]
+    reserved_memory = {"os": max(int(memory_mb * SPARK_OS_RESERVED_MEMORY_RATIO),
+                                 SPARK_OS_RESERVED_MEMORY_MINIMUM)}
+    reserved_memory.update(_get_co_located_runtime_memory(runtime_config, memory_mb))
+    if options.get("reserved_memory_mb"):
+        reserved_memory["user"] = options["reserved_memory_mb"]
+    memory_available = memory_mb - sum(reserved_memory.values())
+    if memory_available < 1024:
+        raise RuntimeError(
+            "No memory left for YARN with {}MB memory and {}MB reserved. "
+            "Reduce the reserved memory or the co-located runtimes.".format(
+                memory_mb, sum(reserved_memory.values())))
+    memory_for_yarn = round_memory_size_to_gb(memory_available)
+    report.append("{}MB memory with {}MB reserved ({}): {}MB for YARN.".format(
+        memory_mb, sum(reserved_memory.values()),
+        ", ".join(["{} {}MB".format(name, memory) for name, memory in reserved_memory.items()]),
+        memory_for_yarn))
+
+    spark_executor_cores = options.get("executor_cores")
+    if spark_executor_cores:
+        report.append("Executor cores {} as configured.".format(spark_executor_cores))
+    else:
+        spark_executor_cores = _get_spark_executor_cores_of_numa_node(cores // numa_nodes)
+        report.append("Executor cores {} to pack the {} cores of each NUMA node.".format(
+            spark_executor_cores, cores // numa_nodes))
+    spark_executor_cores = min(spark_executor_cores, cores)
+    number_of_executors = max(cores // spark_executor_cores, 1)
+
+    spark_overhead = round_memory_size_to_gb(get_spark_overhead(memory_for_yarn))
+    spark_executor_memory_all = round_memory_size_to_gb(
+        int((memory_for_yarn - spark_overhead) / number_of_executors))
+    spark_executor_memory = \
+        spark_executor_memory_all - get_spark_executor_overhead(spark_executor_memory_all)
+    if spark_executor_memory <= 0:
+        raise RuntimeError(
+            "No memory left for Spark executors with {}MB for YARN. "
+            "Reduce the reserved memory or the co-located runtimes.".format(memory_for_yarn))
+    report.append("{} executors of {} cores and {}MB memory ({}MB with overhead) "
+                  "after {}MB for the application master and others.".format(
+                      number_of_executors, spark_executor_cores, spark_executor_memory,
+                      spark_executor_memory_all, spark_overhead))
+
+    data_disks = node_facts.get("data_disks", 0)
+    if data_disks:
+        report.append("{} local data disks for the shuffle of the executors.".format(data_disks))
+    else:
+        report.append("No local data disks: the shuffle of the executors uses the system disk.")
+
+    return {
+        "yarn_container_maximum_vcores": cores,
+        "yarn_container_maximum_memory": memory_for_yarn,
+        "spark_executor_cores": spark_executor_cores,
+        "spark_executor_memory": spark_executor_memory,
+        "number_of_executors": number_of_executors,
+        "report": report,
+    }
+
+
+def _load_published_node_facts(provider) -> Dict[str, Dict[str, Any]]:
+    """Read the node facts published by the node monitors if running in the cluster.
+
+    The facts of the terminated nodes are deleted.
+    """
+    from cloudtik.core._private import services
+    from cloudtik.core._private.node_facts import get_published_node_facts
+    from cloudtik.core._private.state.control_state import ControlState
+
+    def get_node_ips():
+        return {provider.internal_ip(node_id)
+                for node_id in provider.non_terminated_nodes({})}
+
+    try:
+        redis_ip, redis_port = services.get_address_to_use_or_die().split(":")
+        control_state = ControlState()
+        control_state.initialize_control_state(
+            redis_ip, redis_port, services.get_redis_password_to_use())
+        return get_published_node_facts(control_state, get_node_ips)
+    except Exception as e:
+        logger.debug("Failed to get node facts from cluster state: {}".format(str(e)))
+        return {}
+
+
+def _get_published_node_facts(provider) -> Dict[str, Dict[str, Any]]:
+    return _published_node_facts_cache.get(
+        "node_facts", _load_published_node_facts, provider=provider)
+
+
+def _get_declared_node_facts(resources: Dict[str, Any]) -> Dict[str, int]:
+    cpu_total = int(resources.get("CPU", 0))
+    return {
+        "logical_cores": cpu_total,
+        "physical_cores": cpu_total,
+        "sockets": 1,
+        "numa_nodes": 1,
+        "memory_mb": int(resources.get("memory", 0) / (1024 * 1024)),
+        "data_disks": 0,
+    }
+
+
+def _get_worker_node_types(cluster_config: Dict[str, Any]):
+    available_node_types = cluster_config["available_node_types"]
+    head_node_type = cluster_config["head_node_type"]
+    worker_node_types = [node_type for node_type in available_node_types
+                         if node_type != head_node_type]
+    # If there is only one node type, worker type uses the head type
+    return worker_node_types if worker_node_types else [head_node_type]
+
+
+def _get_node_type_sizing(
+        cluster_config: Dict[str, Any], node_type: str,
+        node_facts: Dict[str, int], source: str):
+    """Size a worker type with the node facts and the overrides of the type.
+
+    Returns the sizing and the report lines.
+    """
+    from cloudtik.core._private.node_facts import NODE_FACT_KEYS
+
+    runtime_config = cluster_config[RUNTIME_CONFIG_KEY]
+    spark_config = runtime_config[SPARK_RUNTIME_CONFIG_KEY]
+    sizing_options = spark_config.get("executor_sizing_options", {})
+    overrides = spark_config.get("executor_sizing_node_types", {}).get(node_type, {})
+    fact_overrides = {key: overrides[key] for key in NODE_FACT_KEYS if key in overrides}
+    if fact_overrides:
+        node_facts = dict(node_facts, **fact_overrides)
+        source += ", overridden"
+    options = dict(sizing_options)
+    options.update({key: value for key, value in overrides.items()
+                    if key not in NODE_FACT_KEYS})
+
+    sizing = get_spark_executor_sizing(node_facts, runtime_config, options)
+    report = ["Node type {} (facts: {}):".format(node_type, source)]
+    report.extend(["  " + line for line in sizing["report"]])
+    return sizing, report
+
+
+def _config_measured_runtime_resources(cluster_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Size the executors with the node facts of each worker type.
+
+    The cluster config is bootstrapped before any node is running, so the
+    executors are sized with the declared resources of the worker types here
+    and fit the nodes of all of them. The NodeManager of each worker is sized
+    with the facts measured by the node monitors of its node type once they
+    are published (see _get_measured_yarn_node_resource). The facts and sizing
+    options of each worker type can be overridden with executor_sizing_node_types.
+    """
+    runtime_config = cluster_config[RUNTIME_CONFIG_KEY]
+    spark_config = runtime_config[SPARK_RUNTIME_CONFIG_KEY]
+    available_node_types = cluster_config["available_node_types"]
+
+    node_type_sizing = {}
+    report = []
+    for node_type in _get_worker_node_types(cluster_config):
+        node_facts = _get_declared_node_facts(
+            available_node_types[node_type].get("resources", {}))
+        sizing, node_type_report = _get_node_type_sizing(
+            cluster_config, node_type, node_facts, "declared")
+        node_type_sizing[node_type] = sizing
+        report.extend(node_type_report)
+
+    # The executor settings are for the cluster, the executors must fit any worker type
+    spark_executor_cores = min(
+        sizing["spark_executor_cores"] for sizing in node_type_sizing.values())
+    spark_executor_memory = min(
+        sizing["spark_executor_memory"] for sizing in node_type_sizing.values())
+    container_resource = {
+        "yarn_container_maximum_vcores": max(
+            sizing["yarn_container_maximum_vcores"] for sizing in node_type_sizing.values()),
+        "yarn_container_maximum_memory": max(
+            sizing["yarn_container_maximum_memory"] for sizing in node_type_sizing.values()),
+    }
+    cluster_resource = _get_cluster_resources(cluster_config)
+    executor_resource = {
+        "spark_driver_memory": get_spark_driver_memory(cluster_resource),
+        "spark_executor_cores": spark_executor_cores,
+        "spark_executor_memory": spark_executor_memory,
+    }
+    report.append("spark.executor.cores={} spark.executor.memory={}M spark.driver.memory={}M "
+                  "yarn.scheduler.maximum-allocation-vcores={} "
+                  "yarn.scheduler.maximum-allocation-mb={}".format(
+                      spark_executor_cores, spark_executor_memory,
+                      executor_resource["spark_driver_memory"],
+                      container_resource["yarn_container_maximum_vcores"],
+                      container_resource["yarn_container_maximum_memory"]))
+    for line in report:
+        cli_logger.verbose(line)
+
+    spark_config["yarn_container_resource"] = container_resource
+    spark_config["spark_executor_resource"] = executor_resource
+    # The NodeManager of each worker type offers the resources sized for the type
+    spark_config["yarn_node_type_resource"] = {
+        node_type: {
+            "yarn_container_maximum_vcores": sizing["yarn_container_maximum_vcores"],
+            "yarn_container_maximum_memory": sizing["yarn_container_maximum_memory"],
+        } for node_type, sizing in node_type_sizing.items()}
+    spark_config["executor_sizing_report"] = report
+    return cluster_config
+
+
+def _get_measured_yarn_node_resource(
+        cluster_config: Dict[str, Any], provider, node_type: str) -> Optional[Dict[str, int]]:
+    """Size the NodeManager of a worker with the facts published for its node type.
+
+    The facts are published by the node monitors when the nodes start, so they
+    are available on head when setting up the nodes after the first nodes of
+    the type have registered. Return None if there are no facts of the type.
+    """
+    published_node_facts = _get_published_node_facts(provider)
+    if node_type not in published_node_facts:
+        return None
+    sizing, report = _get_node_type_sizing(
+        cluster_config, node_type, published_node_facts[node_type], "measured")
+    for line in report:
+        logger.info(line)
+
+    # The executors are sized for the cluster at bootstrap
+    spark_config = cluster_config[RUNTIME_CONFIG_KEY][SPARK_RUNTIME_CONFIG_KEY]
+    executor_resource = spark_config.get("spark_executor_resource", {})
+    executor_cores = executor_resource.get("spark_executor_cores", 0)
+    executor_memory = executor_resource.get("spark_executor_memory", 0)
+    if (sizing["yarn_container_maximum_vcores"] < executor_cores or
+            sizing["yarn_container_maximum_memory"] <
+            executor_memory + SPARK_EXECUTOR_OVERHEAD_MINIMUM):
+        logger.warning("The measured resources of node type {} cannot hold an executor "
+                       "of the cluster. Use the declared resources.".format(node_type))
+        return None
+    return {
+        "yarn_container_maximum_vcores": sizing["yarn_container_maximum_vcores"],
+        "yarn_container_maximum_memory": sizing["yarn_container_maximum_memory"],
+    }
+
+
 def _config_runtime_resources(cluster_config: Dict[str, Any]) -> Dict[str, Any]:
+    spark_config = cluster_config.get(RUNTIME_CONFIG_KEY, {}).get(SPARK_RUNTIME_CONFIG_KEY, {})
+    if spark_config.get("executor_sizing") == SPARK_EXECUTOR_SIZING_MEASURED:
+        return _config_measured_runtime_resources(cluster_config)
+
     cluster_resource = _get_cluster_resources(cluster_config)
     worker_cpu = cluster_resource["worker_cpu"]
 
@@ -284,6 +586,19 @@ def _with_runtime_environment_variables(runtime_config, config, provider, node_i
     if yarn_scheduler:
         runtime_envs["YARN_SCHEDULER"] = yarn_scheduler
 
+    # export the node manager resources sized for the node type
+    yarn_node_type_resource = spark_config.get("yarn_node_type_resource")
+    if yarn_node_type_resource:
+        node_type = get_node_type(provider, node_id)
+        if node_type in yarn_node_type_resource:
+            # Use the measured facts of the node type if published and
+            # the sizing with the declared resources otherwise
+            node_resource = _get_measured_yarn_node_resource(config, provider, node_type)
+            if node_resource is None:
+                node_resource = yarn_node_type_resource[node_type]
+            runtime_envs["YARN_NODEMANAGER_MEMORY"] = node_resource["yarn_container_maximum_memory"]
+            runtime_envs["YARN_NODEMANAGER_VCORES"] = node_resource["yarn_container_maximum_vcores"]
+
     # 1) Try to use local hdfs first;
     # 2) Try to use defined hdfs_namenode_uri;
     # 3) Try to use provider storage;
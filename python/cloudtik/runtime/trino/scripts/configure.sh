@@ -98,6 +98,38 @@ function update_trino_data_disks_config() {
     sed -i "s!{%node.data-dir%}!${trino_data_dir}!g" $output_dir/trino/node.properties
 }
 
+function update_trino_spill_config() {
+    if [ "$TRINO_SPILL_ENABLED" != "true" ]; then
+        return
+    fi
+
+    # spill to all the data disks
+    spill_paths=""
+    if [ -d "/mnt/cloudtik" ]; then
+        for data_disk in /mnt/cloudtik/*; do
+            [ -d "$data_disk" ] || continue
+            spill_path=$data_disk/trino/spill
+            mkdir -p $spill_path
+            if [ -z "$spill_paths" ]; then
+                spill_paths=$spill_path
+            else
+                spill_paths="$spill_paths,$spill_path"
+            fi
+        done
+    fi
+
+    # if no disks mounted on /mnt/cloudtik
+    if [ -z "$spill_paths" ]; then
+        spill_paths="${RUNTIME_PATH}/shared/trino/spill"
+        mkdir -p $spill_paths
+    fi
+
+    for config_file in $output_dir/trino/config.properties $output_dir/trino/config.worker.properties; do
+        echo "spill-enabled=true" >> $config_file
+        echo "spiller-spill-path=$spill_paths" >> $config_file
+    done
+}
+
 function update_storage_config_for_aws() {
     # AWS_S3_ACCESS_KEY_ID
     # AWS_S3_SECRET_ACCESS_KEY
@@ -278,6 +310,7 @@ function configure_trino() {
 
     update_trino_memory_config
     update_trino_data_disks_config
+    update_trino_spill_config
 
     mkdir -p ${TRINO_HOME}/etc
     if [ $IS_HEAD_NODE == "true" ]; then
@@ -1,3 +1,4 @@
+import json
 import logging
 from typing import Optional
 
@@ -7,18 +8,21 @@ from cloudtik.core._private import services
 from cloudtik.core._private.cli_logger import (add_click_logging_options,
                                                cli_logger)
 from cloudtik.core._private.cluster.cluster_operator import (
-    debug_status_string, get_cluster_dump_archive_on_head,
+    debug_status_string, debug_timeline_string, get_cluster_dump_archive_on_head,
     RUN_ENV_TYPES, teardown_cluster_on_head, cluster_process_status_on_head, rsync_node_on_head, attach_node_on_head,
     start_node_on_head, stop_node_on_head, kill_node_on_head, scale_cluster_on_head,
     _wait_for_ready, _get_worker_node_ips, _get_head_node_ip,
     _show_cluster_status, _monitor_cluster, _show_cluster_info, _show_worker_cpus, _show_worker_memory,
     cli_call_context, _exec_node_on_head, do_health_check, cluster_resource_metrics_on_head,
-    _show_cpus_per_worker, _show_memory_per_worker, _show_total_workers, _show_sockets_per_worker)
-from cloudtik.core._private.constants import CLOUDTIK_REDIS_DEFAULT_PASSWORD
+    _show_cpus_per_worker, _show_memory_per_worker, _show_total_workers, _show_sockets_per_worker,
+    submit_jobs_on_head, list_jobs_on_head, cancel_jobs_on_head)
+from cloudtik.core._private.constants import CLOUDTIK_REDIS_DEFAULT_PASSWORD, CLOUDTIK_JOB_EVENT_WAIT_S
+from cloudtik.core._private.job_waiter.job_event import wait_for_job_exits
 from cloudtik.core._private.state import kv_store
+from cloudtik.core._private.state.job_queue import JOB_STATUSES
 from cloudtik.core._private.state.kv_store import kv_initialize_with_address
 from cloudtik.core._private.utils import CLOUDTIK_CLUSTER_SCALING_ERROR, \
-    CLOUDTIK_CLUSTER_SCALING_STATUS, get_head_bootstrap_config, \
+    CLOUDTIK_CLUSTER_SCALING_STATUS, CLOUDTIK_NODE_TIMELINE, get_head_bootstrap_config, \
     load_head_cluster_config
 from cloudtik.scripts.utils import NaturalOrderGroup, add_command_alias
 
@@ -491,6 +495,40 @@ def debug_status(address, redis_password):
     print(debug_status_string(status, error))
 
 
+@head.command()
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+@click.option(
+    "--limit",
+    required=False,
+    type=int,
+    default=10,
+    help="The number of the most recent nodes to show.")
+@click.option(
+    "--node-ip",
+    required=False,
+    type=str,
+    default=None,
+    help="Show the timeline of the node with this IP only.")
+@add_click_logging_options
+def debug_timeline(address, redis_password, limit, node_ip):
+    """Print the bring-up timeline of the recent nodes by phases."""
+    if not address:
+        address = services.get_address_to_use_or_die()
+    kv_initialize_with_address(address, redis_password)
+    timeline = kv_store.kv_get(CLOUDTIK_NODE_TIMELINE)
+    print(debug_timeline_string(timeline, limit, node_ip))
+
+
 @head.command()
 @click.option(
     "--address",
@@ -562,13 +600,27 @@ def resource_metrics(address, redis_password):
     is_flag=True,
     default=False,
     help="Whether to show detailed information.")
+@click.option(
+    "--output-format",
+    required=False,
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="The output format.")
+@click.option(
+    "--cache-ttl",
+    required=False,
+    type=int,
+    default=None,
+    help="The seconds to reuse the result of a recent check. 0 to disable.")
 @add_click_logging_options
-def health_check(address, redis_password, component, with_details):
+def health_check(address, redis_password, component, with_details,
+                 output_format, cache_ttl):
     """
     Health check a cluster or a specific component. Exit code 0 is healthy.
     """
     do_health_check(
-        address, redis_password, component, with_details)
+        address, redis_password, component, with_details,
+        json_output=(output_format == "json"), cache_ttl=cache_ttl)
 
 
 @head.command()
@@ -631,6 +683,40 @@ def health_check(address, redis_password, component, with_details):
     default=None,
     type=int,
     help="The integer verbosity to set.")
+@click.option(
+    "--max-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="The max bytes of the data collected from each node.")
+@click.option(
+    "--tail-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="Collect only the last bytes of each log file.")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Collect only the logs changed since the last dump.")
+@click.option(
+    "--compress/--no-compress",
+    is_flag=True,
+    default=True,
+    help="Compress the archive")
+@click.option(
+    "--compress-threads",
+    required=False,
+    type=int,
+    default=None,
+    help="The number of threads for compressing the archive (with pigz).")
+@click.option(
+    "--parallel",
+    required=False,
+    type=int,
+    default=None,
+    help="The max number of nodes to collect data from in parallel.")
 @add_click_logging_options
 def cluster_dump(host: Optional[str] = None,
                  stream: bool = False,
@@ -641,7 +727,13 @@ def cluster_dump(host: Optional[str] = None,
                  processes: bool = True,
                  processes_verbose: bool = False,
                  tempfile: Optional[str] = None,
-                 verbosity: int = None):
+                 verbosity: int = None,
+                 max_bytes: Optional[int] = None,
+                 tail_bytes: Optional[int] = None,
+                 incremental: bool = False,
+                 compress: bool = True,
+                 compress_threads: Optional[int] = None,
+                 parallel: Optional[int] = None):
     """Collect cluster data and package into an archive on head.
 
         Usage:
@@ -662,7 +754,160 @@ def cluster_dump(host: Optional[str] = None,
         pip=pip,
         processes=processes,
         processes_verbose=processes_verbose,
-        tempfile=tempfile)
+        tempfile=tempfile,
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental,
+        compress=compress,
+        compress_threads=compress_threads,
+        parallel=parallel)
+
+
+@head.command(hidden=True)
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+@click.option(
+    "--session-names",
+    required=True,
+    type=str,
+    help="The session names of the jobs to wait. Comma separated list.")
+@click.option(
+    "--timeout",
+    required=False,
+    type=int,
+    default=CLOUDTIK_JOB_EVENT_WAIT_S,
+    help="The max time in seconds to wait.")
+def wait_jobs(address, redis_password, session_names, timeout):
+    """Wait for any of the jobs to exit and print the exit codes in JSON."""
+    if not address:
+        address = services.get_address_to_use_or_die()
+    redis_client = services.create_redis_client(address, redis_password)
+    job_exits = wait_for_job_exits(
+        redis_client, session_names.split(","), timeout)
+    click.echo(json.dumps(job_exits))
+
+
+@click.group(cls=NaturalOrderGroup)
+def job():
+    """
+    Commands running on head for the job queue
+    """
+    pass
+
+
+@job.command(name="submit")
+@click.option(
+    "--jobs-file",
+    required=True,
+    type=str,
+    help="The JSON (list or lines) file of the job specs with the commands.")
+@click.option(
+    "--max-concurrency",
+    required=False,
+    type=int,
+    help="The max number of jobs running concurrently.")
+@click.option(
+    "--remove-jobs-file",
+    is_flag=True,
+    default=False,
+    help="Remove the jobs file after the jobs are read.")
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+def job_submit(jobs_file, max_concurrency, remove_jobs_file, address, redis_password):
+    """Submit a batch of jobs to the job queue and print the job ids in JSON."""
+    job_ids = submit_jobs_on_head(
+        jobs_file, max_concurrency=max_concurrency,
+        address=address, redis_password=redis_password,
+        remove_jobs_file=remove_jobs_file)
+    click.echo(json.dumps(job_ids))
+
+
+@job.command(name="list")
+@click.option(
+    "--job-ids",
+    required=False,
+    type=str,
+    default=None,
+    help="The ids of the jobs to list. Comma separated list.")
+@click.option(
+    "--status",
+    required=False,
+    type=click.Choice(JOB_STATUSES),
+    default=None,
+    help="List only the jobs in the status.")
+@click.option(
+    "--limit",
+    required=False,
+    type=int,
+    default=None,
+    help="List only the latest number of jobs.")
+@click.option(
+    "--output-format",
+    required=False,
+    type=click.Choice(["table", "json"]),
+    default="table",
+    help="The output format.")
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+@add_click_logging_options
+def job_list(job_ids, status, limit, output_format, address, redis_password):
+    """List the jobs in the job queue with status, exit code and log offset."""
+    list_jobs_on_head(
+        job_ids=job_ids.split(",") if job_ids else None,
+        status=status, limit=limit, output_format=output_format,
+        address=address, redis_password=redis_password)
+
+
+@job.command(name="cancel")
+@click.argument("job_ids", required=True, type=str)
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+@add_click_logging_options
+def job_cancel(job_ids, address, redis_password):
+    """Cancel the pending jobs. Comma separated list of job ids."""
+    cancel_jobs_on_head(
+        job_ids.split(","), address=address, redis_password=redis_password)
+
+
+job.add_command(job_submit)
+job.add_command(job_list)
+job.add_command(job_cancel)
 
 
 @click.group(cls=NaturalOrderGroup)
@@ -797,8 +1042,13 @@ head.add_command(wait_for_ready)
 # runtime commands
 head.add_command(runtime)
 
+# job queue commands
+head.add_command(job)
+
 head.add_command(debug_status)
+head.add_command(debug_timeline)
 head.add_command(process_status)
 head.add_command(resource_metrics)
 head.add_command(health_check)
 head.add_command(cluster_dump)
+head.add_command(wait_jobs)
@@ -7,46 +7,40 @@ import sys
 import traceback
 import urllib
 import urllib.parse
-import urllib.request
-import urllib.error
 from socket import socket
 from typing import Optional
 from shlex import quote
 
 import click
-import psutil
 
 from cloudtik.core._private import constants
-from cloudtik.core._private import services, utils, logging_utils
+from cloudtik.core._private import logging_utils
 from cloudtik.core._private.cli_logger import (add_click_logging_options,
                                                cli_logger, cf)
-from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
-from cloudtik.core._private.cluster.cluster_operator import (
-    attach_cluster, create_or_update_cluster, monitor_cluster,
-    teardown_cluster, get_head_node_ip, kill_node_from_head, get_worker_node_ips,
-    get_cluster_dump_archive, get_local_dump_archive, RUN_ENV_TYPES,
-    show_worker_cpus, show_worker_memory, show_cluster_info, show_cluster_status,
-    start_proxy, stop_proxy, cluster_debug_status,
-    cluster_health_check, cluster_process_status, attach_worker, scale_cluster,
-    exec_on_nodes, submit_and_exec, _wait_for_ready, _rsync, cli_call_context, cluster_resource_metrics,
-    show_cpus_per_worker, show_memory_per_worker)
 from cloudtik.core._private.constants import CLOUDTIK_PROCESSES, \
     CLOUDTIK_REDIS_DEFAULT_PASSWORD, \
-    CLOUDTIK_DEFAULT_PORT
-from cloudtik.core._private.node.node_services import NodeServicesStarter
-from cloudtik.core._private.parameter import StartParams
-from cloudtik.core._private.resource_spec import ResourceSpec
-from cloudtik.core._private.utils import with_script_args
-from cloudtik.scripts.utils import NaturalOrderGroup, add_command_alias
-from cloudtik.scripts.workspace import workspace
-from cloudtik.scripts.runtime_scripts import runtime
-from cloudtik.scripts.head_scripts import head
+    CLOUDTIK_DEFAULT_PORT, RUN_ENV_TYPES
+from cloudtik.scripts.utils import LazyGroup, add_command_alias
 
+# NOTE: Only the lightweight modules are imported at module level.
+# The heavy modules (cluster operator, node services, providers and so on)
+# are imported inside the commands which use them so that simple commands
+# don't pay the import cost of the whole package. The command groups
+# are loaded on demand through the LazyGroup.
 
 logger = logging.getLogger(__name__)
 
 
-@click.group(cls=NaturalOrderGroup)
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        # workspace commands
+        "workspace": "cloudtik.scripts.workspace.workspace",
+        # runtime commands
+        "runtime": "cloudtik.scripts.runtime_scripts.runtime",
+        # head commands
+        "head": "cloudtik.scripts.head_scripts.head",
+    })
 @click.option(
     "--logging-level",
     required=False,
@@ -176,6 +170,11 @@ def node_start(node_ip_address, address, port, head,
           cluster_scaling_config, temp_dir, metrics_export_port,
           no_redirect_output, runtimes, no_controller):
     """Start the main daemon processes on the local machine."""
+    from cloudtik.core._private import services
+    from cloudtik.core._private import utils
+    from cloudtik.core._private.node.node_services import NodeServicesStarter
+    from cloudtik.core._private.parameter import StartParams
+
     # Convert hostnames to numerical IP address.
     if node_ip_address is not None:
         node_ip_address = services.address_to_ip(node_ip_address)
@@ -325,6 +324,8 @@ def node_start(node_ip_address, address, port, head,
 @add_click_logging_options
 def node_stop(force):
     """Stop CloudTik processes manually on the local machine."""
+    import psutil
+    from cloudtik.core._private import utils
 
     is_linux = sys.platform.startswith("linux")
     processes_to_kill = CLOUDTIK_PROCESSES
@@ -469,6 +470,11 @@ def start(cluster_config_file, min_workers, max_workers, no_restart, restart_onl
        yes, cluster_name, workspace_name, redirect_command_output,
        use_login_shells):
     """Start or update a cluster."""
+    import urllib.request
+    import urllib.error
+    from cloudtik.core._private.cluster.cluster_operator import (
+        cli_call_context, create_or_update_cluster)
+
     if restart_only or no_restart:
         cli_logger.doassert(restart_only != no_restart,
                             "`{}` is incompatible with `{}`.",
@@ -537,6 +543,8 @@ def start(cluster_config_file, min_workers, max_workers, no_restart, restart_onl
 def stop(cluster_config_file, yes, workers_only, cluster_name,
          keep_min_workers, hard):
     """Stop a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import teardown_cluster
+
     teardown_cluster(cluster_config_file, yes, workers_only, cluster_name,
                      keep_min_workers, proxy_stop=True, hard=hard)
 
@@ -579,6 +587,8 @@ def stop(cluster_config_file, yes, workers_only, cluster_name,
 def attach(cluster_config_file, screen, tmux, cluster_name,
            no_config_cache, new, port_forward, node_ip, host):
     """Create or attach to SH session to a cluster or a worker node."""
+    from cloudtik.core._private.cluster.cluster_operator import attach_cluster, attach_worker
+
     port_forward = [(port, port) for port in list(port_forward)]
     try:
         if not node_ip:
@@ -706,6 +716,9 @@ def exec(cluster_config_file, cmd, cluster_name, run_env, screen, tmux, stop, st
          force_update, wait_for_workers, min_workers, wait_timeout,
          no_config_cache, port_forward, node_ip, all_nodes, parallel, yes, job_waiter):
     """Execute a command via SSH on a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import cli_call_context, exec_on_nodes
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
+
     port_forward = [(port, port) for port in list(port_forward)]
 
     try:
@@ -841,6 +854,9 @@ def submit(cluster_config_file, cluster_name, screen, tmux, stop, start,
     Example:
         >>> cloudtik submit [CLUSTER.YAML] experiment.py -- --smoke-test
     """
+    from cloudtik.core._private.cluster.cluster_operator import cli_call_context, submit_and_exec
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
+
     # Don't use config cache so that we will run a full bootstrap needed for start
     if start:
         no_config_cache = True
@@ -870,6 +886,64 @@ def submit(cluster_config_file, cluster_name, screen, tmux, stop, start,
         )
 
 
+@cli.command()
+@click.argument("cluster_config_file", required=True, type=str)
+@click.argument("jobs_file", required=True, type=str)
+@click.option(
+    "--cluster-name",
+    "-n",
+    required=False,
+    type=str,
+    help="Override the configured cluster name.")
+@click.option(
+    "--no-config-cache",
+    is_flag=True,
+    default=False,
+    help="Disable the local cluster config cache.")
+@click.option(
+    "--max-concurrency",
+    required=False,
+    type=int,
+    help="The max number of jobs running concurrently on the cluster.")
+@click.option(
+    "--wait",
+    is_flag=True,
+    default=False,
+    help="Whether to wait for all the jobs to finish.")
+@click.option(
+    "--wait-timeout",
+    required=False,
+    type=int,
+    help="The timeout seconds to wait for the jobs to finish.")
+@add_click_logging_options
+def submit_many(cluster_config_file, jobs_file, cluster_name, no_config_cache,
+                max_concurrency, wait, wait_timeout):
+    """Submits a batch of jobs to the job queue of the cluster.
+
+    The jobs file is a JSON list or JSON lines of job specs. Each job spec
+    specifies either "command" or "script" with optional "args", "runtime",
+    "runtime_options", "name" and "priority".
+
+    Example:
+        >>> cloudtik submit-many [CLUSTER.YAML] jobs.json --max-concurrency 16
+    """
+    from cloudtik.core._private.cluster.cluster_operator import cli_call_context, submit_many_and_exec, \
+        _load_job_specs
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
+
+    with open(jobs_file, "r") as f:
+        jobs = _load_job_specs(f.read())
+    config = _load_cluster_config(
+        cluster_config_file, cluster_name, no_config_cache=no_config_cache)
+    submit_many_and_exec(
+        config,
+        call_context=cli_call_context(),
+        jobs=jobs,
+        max_concurrency=max_concurrency,
+        wait=wait,
+        timeout=wait_timeout)
+
+
 @cli.command()
 @click.argument("cluster_config_file", required=True, type=str)
 @click.option(
@@ -897,6 +971,8 @@ def submit(cluster_config_file, cluster_name, screen, tmux, stop, start,
 @add_click_logging_options
 def scale(cluster_config_file, yes, cluster_name, cpus, workers):
     """Scale the cluster with a specific number cpus or nodes."""
+    from cloudtik.core._private.cluster.cluster_operator import scale_cluster
+
     scale_cluster(cluster_config_file, yes, cluster_name, cpus, workers)
 
 
@@ -924,6 +1000,8 @@ def scale(cluster_config_file, yes, cluster_name, cpus, workers):
 @add_click_logging_options
 def rsync_up(cluster_config_file, source, target, cluster_name, node_ip, all_nodes):
     """Upload specific files to a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import _rsync, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
 
     try:
         config = _load_cluster_config(
@@ -963,6 +1041,9 @@ def rsync_up(cluster_config_file, source, target, cluster_name, node_ip, all_nod
 @add_click_logging_options
 def rsync_down(cluster_config_file, source, target, cluster_name, node_ip):
     """Download specific files from a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import _rsync, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
+
     try:
         config = _load_cluster_config(
             cluster_config_file, cluster_name)
@@ -989,6 +1070,8 @@ def rsync_down(cluster_config_file, source, target, cluster_name, node_ip):
 @add_click_logging_options
 def status(cluster_config_file, cluster_name):
     """Show cluster summary status."""
+    from cloudtik.core._private.cluster.cluster_operator import show_cluster_status
+
     show_cluster_status(
         cluster_config_file,
         cluster_name)
@@ -1028,6 +1111,10 @@ def info(
         worker_cpus, worker_memory,
         cpus_per_worker, memory_per_worker):
     """Show cluster summary information and useful links to use the cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import (
+        show_cluster_info, show_cpus_per_worker, show_memory_per_worker, show_worker_cpus,
+        show_worker_memory)
+
     if worker_cpus:
         return show_worker_cpus(cluster_config_file, cluster_name)
 
@@ -1061,6 +1148,8 @@ def info(
 @add_click_logging_options
 def head_ip(cluster_config_file, cluster_name, public):
     """Return the head node IP of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_head_node_ip
+
     try:
         click.echo(get_head_node_ip(cluster_config_file, cluster_name, public))
     except RuntimeError as re:
@@ -1103,6 +1192,8 @@ def worker_ips(
         cluster_config_file, cluster_name,
         runtime, node_status, separator):
     """Return the list of worker IPs of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_worker_node_ips
+
     workers = get_worker_node_ips(
         cluster_config_file, cluster_name, runtime=runtime, node_status=node_status)
     if len(workers) > 0:
@@ -1135,6 +1226,8 @@ def worker_ips(
 @add_click_logging_options
 def monitor(cluster_config_file, lines, cluster_name, file_type):
     """Tails the monitor logs of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import monitor_cluster
+
     try:
         monitor_cluster(cluster_config_file, lines, cluster_name, file_type=file_type)
     except RuntimeError as re:
@@ -1168,6 +1261,8 @@ def monitor(cluster_config_file, lines, cluster_name, file_type):
 def enable_proxy(cluster_config_file, no_config_cache, cluster_name,
                  bind_address):
     """Start the SOCKS5 proxy to the cluster through SSH tunnel forwarding to the head."""
+    from cloudtik.core._private.cluster.cluster_operator import start_proxy
+
     start_proxy(
         cluster_config_file,
         override_cluster_name=cluster_name,
@@ -1186,6 +1281,8 @@ def enable_proxy(cluster_config_file, no_config_cache, cluster_name,
 @add_click_logging_options
 def disable_proxy(cluster_config_file, cluster_name):
     """Stop the SOCKS5 proxy to the cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import stop_proxy
+
     stop_proxy(cluster_config_file, cluster_name)
 
 
@@ -1217,6 +1314,8 @@ def disable_proxy(cluster_config_file, cluster_name):
 @add_click_logging_options
 def kill_node(cluster_config_file, yes, hard, cluster_name, node_ip):
     """Kills a specified node or a random node."""
+    from cloudtik.core._private.cluster.cluster_operator import kill_node_from_head
+
     kill_node_from_head(
         cluster_config_file, yes, hard, cluster_name,
         node_ip)
@@ -1251,6 +1350,9 @@ def kill_node(cluster_config_file, yes, hard, cluster_name, node_ip):
 def wait_for_ready(cluster_config_file, cluster_name, no_config_cache,
                    min_workers, timeout):
     """Wait for the minimum number of workers to be ready."""
+    from cloudtik.core._private.cluster.cluster_operator import _wait_for_ready, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
+
     config = _load_cluster_config(cluster_config_file, cluster_name,
                                   no_config_cache=no_config_cache)
     call_context = cli_call_context()
@@ -1279,6 +1381,8 @@ def wait_for_ready(cluster_config_file, cluster_name, no_config_cache,
 @add_click_logging_options
 def process_status(cluster_config_file, cluster_name, no_config_cache, runtimes):
     """Show process status of cluster nodes."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_process_status
+
     try:
         cluster_process_status(
             cluster_config_file, cluster_name,
@@ -1307,6 +1411,8 @@ def process_status(cluster_config_file, cluster_name, no_config_cache, runtimes)
 @add_click_logging_options
 def resource_metrics(cluster_config_file, cluster_name, no_config_cache):
     """Show cluster resource metrics and the metrics for each node."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_resource_metrics
+
     try:
         cluster_resource_metrics(
             cluster_config_file, cluster_name,
@@ -1335,6 +1441,8 @@ def resource_metrics(cluster_config_file, cluster_name, no_config_cache):
 @add_click_logging_options
 def debug_status(cluster_config_file, cluster_name, no_config_cache):
     """Show debug status of cluster scaling."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_debug_status
+
     try:
         cluster_debug_status(
             cluster_config_file, cluster_name,
@@ -1365,13 +1473,23 @@ def debug_status(cluster_config_file, cluster_name, no_config_cache):
     is_flag=True,
     default=False,
     help="Whether to show detailed information.")
+@click.option(
+    "--output-format",
+    required=False,
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="The output format.")
 @add_click_logging_options
-def health_check(cluster_config_file, cluster_name, no_config_cache, with_details):
+def health_check(cluster_config_file, cluster_name, no_config_cache, with_details,
+                 output_format):
     """Do cluster health check."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_health_check
+
     try:
         cluster_health_check(
             cluster_config_file, cluster_name,
-            no_config_cache, with_details)
+            no_config_cache, with_details,
+            output_format=output_format)
     except RuntimeError as re:
         cli_logger.error("Cluster health check failed. " + str(re))
         if cli_logger.verbosity == 0:
@@ -1461,6 +1579,35 @@ def health_check(cluster_config_file, cluster_name, no_config_cache, with_detail
     type=str,
     default=None,
     help="Temporary file to use")
+@click.option(
+    "--max-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="The max bytes of the data collected from each node.")
+@click.option(
+    "--tail-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="Collect only the last bytes of each log file.")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Collect only the logs changed since the last dump.")
+@click.option(
+    "--compress-threads",
+    required=False,
+    type=int,
+    default=None,
+    help="The number of threads for compressing the archive (with pigz).")
+@click.option(
+    "--parallel",
+    required=False,
+    type=int,
+    default=None,
+    help="The max number of nodes to collect data from in parallel.")
 @add_click_logging_options
 def cluster_dump(cluster_config_file: Optional[str] = None,
                  cluster_name: str = None,
@@ -1475,7 +1622,12 @@ def cluster_dump(cluster_config_file: Optional[str] = None,
                  pip: bool = True,
                  processes: bool = True,
                  processes_verbose: bool = False,
-                 tempfile: Optional[str] = None):
+                 tempfile: Optional[str] = None,
+                 max_bytes: Optional[int] = None,
+                 tail_bytes: Optional[int] = None,
+                 incremental: bool = False,
+                 compress_threads: Optional[int] = None,
+                 parallel: Optional[int] = None):
     """Get log data from one or more nodes.
 
     Best used with cluster configs:
@@ -1488,7 +1640,13 @@ def cluster_dump(cluster_config_file: Optional[str] = None,
 
     You can also manually specify a list of hosts using the
     ``--host <host1,host2,...>`` parameter.
+
+    For large clusters, use ``--max-bytes`` and ``--tail-bytes`` to limit
+    the data of each node and ``--incremental`` to collect only the logs
+    changed since the last dump.
     """
+    from cloudtik.core._private.cluster.cluster_operator import get_cluster_dump_archive
+
     archive_path = get_cluster_dump_archive(
         config_file=cluster_config_file,
         override_cluster_name=cluster_name,
@@ -1503,7 +1661,12 @@ def cluster_dump(cluster_config_file: Optional[str] = None,
         pip=pip,
         processes=processes,
         processes_verbose=processes_verbose,
-        tempfile=tempfile)
+        tempfile=tempfile,
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental,
+        compress_threads=compress_threads,
+        parallel=parallel)
     if archive_path:
         click.echo(f"Created archive: {archive_path}")
     else:
@@ -1570,6 +1733,34 @@ def cluster_dump(cluster_config_file: Optional[str] = None,
     type=str,
     default=None,
     help="The list of runtimes to collect logs from")
+@click.option(
+    "--max-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="The max bytes of the data collected from each node.")
+@click.option(
+    "--tail-bytes",
+    required=False,
+    type=int,
+    default=None,
+    help="Collect only the last bytes of each log file.")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Collect only the logs changed since the last dump.")
+@click.option(
+    "--compress/--no-compress",
+    is_flag=True,
+    default=True,
+    help="Compress the archive")
+@click.option(
+    "--compress-threads",
+    required=False,
+    type=int,
+    default=None,
+    help="The number of threads for compressing the archive (with pigz).")
 @add_click_logging_options
 def local_dump(stream: bool = False,
                output: Optional[str] = None,
@@ -1580,7 +1771,12 @@ def local_dump(stream: bool = False,
                processes_verbose: bool = False,
                tempfile: Optional[str] = None,
                verbosity: int = None,
-               runtimes: str = None):
+               runtimes: str = None,
+               max_bytes: Optional[int] = None,
+               tail_bytes: Optional[int] = None,
+               incremental: bool = False,
+               compress: bool = True,
+               compress_threads: Optional[int] = None):
     """Collect local data and package into an archive.
 
     Usage:
@@ -1589,6 +1785,8 @@ def local_dump(stream: bool = False,
 
     This script is called on remote nodes to fetch their data.
     """
+    from cloudtik.core._private.cluster.cluster_operator import get_local_dump_archive
+
     # This may stream data to stdout, so no printing here
     if verbosity is not None:
         cli_logger.set_verbosity(verbosity)
@@ -1602,7 +1800,12 @@ def local_dump(stream: bool = False,
         processes=processes,
         processes_verbose=processes_verbose,
         tempfile=tempfile,
-        runtimes=runtimes)
+        runtimes=runtimes,
+        max_bytes=max_bytes,
+        tail_bytes=tail_bytes,
+        incremental=incremental,
+        compress=compress,
+        compress_threads=compress_threads)
 
 
 @cli.command(hidden=True, context_settings={"ignore_unknown_options": True})
@@ -1610,6 +1813,8 @@ def local_dump(stream: bool = False,
 @click.argument("script_args", nargs=-1)
 def run_script(script, script_args):
     """Runs a bash script within this python package."""
+    from cloudtik.core._private.core_utils import with_script_args
+
     root_path = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     target = os.path.join(root_path, script)
     command_parts = ["bash", quote(target)]
@@ -1620,6 +1825,39 @@ def run_script(script, script_args):
     os.system(final_cmd)
 
 
+@cli.command(hidden=True)
+@click.option(
+    "--address",
+    required=False,
+    type=str,
+    help="Override the address to connect to.")
+@click.option(
+    "--redis-password",
+    required=False,
+    type=str,
+    default=CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+    help="Connect with redis password.")
+@click.option(
+    "--session-name",
+    required=True,
+    type=str,
+    help="The session name of the job.")
+@click.option(
+    "--exit-code",
+    required=True,
+    type=int,
+    help="The exit code of the job.")
+def job_exit(address, redis_password, session_name, exit_code):
+    """Publish the exit event of a job to notify the job waiters."""
+    from cloudtik.core._private import services
+    from cloudtik.core._private.job_waiter.job_event import publish_job_exit
+
+    if not address:
+        address = services.get_address_to_use_or_die()
+    redis_client = services.create_redis_client(address, redis_password)
+    publish_job_exit(redis_client, session_name, exit_code)
+
+
 @cli.command()
 @click.option(
     "--cpu",
@@ -1644,6 +1882,8 @@ def run_script(script, script_args):
     help="Show total memory in MB.")
 def resources(cpu, memory, in_mb):
     """Show system resource information"""
+    from cloudtik.core._private.resource_spec import ResourceSpec
+
     resource_spec = ResourceSpec().resolve(is_head=False, available_memory=False)
     if cpu:
         click.echo(resource_spec.num_cpus)
@@ -1675,6 +1915,7 @@ _add_command_alias(stop, name="down", hidden=True)
 cli.add_command(attach)
 cli.add_command(exec)
 cli.add_command(submit)
+cli.add_command(submit_many)
 cli.add_command(scale)
 
 cli.add_command(rsync_up)
@@ -1713,17 +1954,9 @@ _add_command_alias(cluster_dump, name="cluster_dump", hidden=True)
 cli.add_command(local_dump)
 _add_command_alias(local_dump, name="local_dump", hidden=True)
 cli.add_command(run_script)
+cli.add_command(job_exit)
 cli.add_command(resources)
 
-# workspace commands
-cli.add_command(workspace)
-
-# runtime commands
-cli.add_command(runtime)
-
-# head commands
-cli.add_command(head)
-
 
 def main():
     return cli()
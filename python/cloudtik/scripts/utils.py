@@ -1,11 +1,14 @@
 import copy
+import importlib
 from collections import OrderedDict
 
 import click
 
 
 def add_command_alias(group, command, name, hidden):
-    new_command = copy.deepcopy(command)
+    # A shallow copy is enough since only the hidden flag differs and
+    # it avoids the significant cost of deep copying at CLI startup
+    new_command = copy.copy(command)
     new_command.hidden = hidden
     group.add_command(new_command, name=name)
 
@@ -22,3 +25,40 @@ class NaturalOrderGroup(click.Group):
 
     def list_commands(self, ctx):
         return self.commands.keys()
+
+
+class LazyGroup(NaturalOrderGroup):
+    """A group which imports the modules of (some of) its sub-commands on demand.
+
+    The lazy sub-commands are specified as a mapping from the command name to
+    the full path of the command object such as "cloudtik.scripts.head_scripts.head".
+    The module will be imported only when the command is actually invoked so that
+    simple commands don't need to pay the import cost of all the other commands.
+    """
+    def __init__(self, name=None, commands=None, lazy_subcommands=None, **attrs):
+        NaturalOrderGroup.__init__(self, name=name,
+                                   commands=commands,
+                                   **attrs)
+        self.lazy_subcommands = OrderedDict(lazy_subcommands or {})
+
+    def list_commands(self, ctx):
+        commands = list(self.commands.keys())
+        commands += [cmd_name for cmd_name in self.lazy_subcommands.keys()
+                     if cmd_name not in self.commands]
+        return commands
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            self.add_command(self._load_lazy_command(cmd_name), name=cmd_name)
+        return NaturalOrderGroup.get_command(self, ctx, cmd_name)
+
+    def _load_lazy_command(self, cmd_name):
+        command_path = self.lazy_subcommands[cmd_name]
+        module_name, attr_name = command_path.rsplit(".", 1)
+        module = importlib.import_module(module_name)
+        command = getattr(module, attr_name)
+        if not isinstance(command, click.Command):
+            raise ValueError(
+                "Lazy loading of {} failed: {} is not a click command.".format(
+                    cmd_name, command_path))
+        return command
@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+
+import pytest
+
+import cloudtik.core._private.constants as constants
+from cloudtik.core._private.cluster import cluster_operator
+from cloudtik.core._private.cluster.cluster_operator import _get_queued_job_command, _load_job_specs
+from cloudtik.core._private.job_waiter.job_event import wait_for_job_exits
+from cloudtik.core._private.services import start_cloudtik_process, wait_for_redis_to_start, \
+    create_redis_client
+from cloudtik.core._private.state.job_queue import JobQueue, JOB_STATUS_CANCELLED, \
+    JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED, JOB_STATUS_RUNNING, JOB_ALL_KEY, _get_job_key
+
+EXE_SUFFIX = ".exe" if sys.platform == "win32" else ""
+CLOUDTIK_PATH = os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))))
+CLOUDTIK_REDIS_EXECUTABLE = os.path.join(
+    CLOUDTIK_PATH, "core/thirdparty/redis/cloudtik-redis-server" + EXE_SUFFIX)
+
+TEST_REDIS_PORT = 52346
+
+
+@pytest.fixture(scope="module")
+def redis_client():
+    command = [CLOUDTIK_REDIS_EXECUTABLE,
+               "--requirepass", constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+               "--port", str(TEST_REDIS_PORT)]
+    process_info = start_cloudtik_process(
+        command,
+        constants.PROCESS_TYPE_REDIS_SERVER,
+        fate_share=False)
+    wait_for_redis_to_start(
+        "127.0.0.1", TEST_REDIS_PORT, constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD)
+    yield create_redis_client(
+        "127.0.0.1:{}".format(TEST_REDIS_PORT), constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD)
+    process_info.process.terminate()
+    process_info.process.wait()
+
+
+class TestJobQueue:
+    def test_priority_order(self, redis_client):
+        redis_client.flushall()
+        job_queue = JobQueue(redis_client)
+        job_ids = job_queue.submit_jobs([
+            {"command": "echo 1"},
+            {"command": "echo 2", "priority": 10},
+            {"command": "echo 3"},
+            {"command": "echo 4", "priority": 10},
+        ])
+        assert len(job_ids) == 4
+        claimed = [job_queue.claim_pending_job()["id"] for _ in range(4)]
+        assert claimed == [job_ids[1], job_ids[3], job_ids[0], job_ids[2]]
+        assert job_queue.claim_pending_job() is None
+
+    def test_claim_pending_job(self, redis_client):
+        redis_client.flushall()
+        job_queue = JobQueue(redis_client)
+        job_ids = job_queue.submit_jobs([{"command": "true"}, {"command": "true"}])
+        # The job without the hash is dropped
+        redis_client.delete(_get_job_key(job_ids[0]))
+        job = job_queue.claim_pending_job()
+        assert job["id"] == job_ids[1]
+        assert job["status"] == JOB_STATUS_RUNNING
+        assert job["start_time"] > 0
+        # The job claimed is running before it is started
+        assert job_queue.get_running_job_ids() == [job_ids[1]]
+        assert job_queue.get_num_pending_jobs() == 0
+
+        job_queue.start_job(job_ids[1], 1234, "job.log")
+        job = job_queue.get_job(job_ids[1])
+        assert job["pid"] == 1234
+        assert job["status"] == JOB_STATUS_RUNNING
+
+    def test_prune_jobs(self, redis_client):
+        redis_client.flushall()
+        job_queue = JobQueue(redis_client, retention_s=100)
+        job_ids = job_queue.submit_jobs([{"command": "true"} for _ in range(5)])
+        for _ in range(3):
+            job = job_queue.claim_pending_job()
+            job_queue.finish_job(job["id"], 0)
+        job_queue.cancel_jobs([job_ids[3]])
+        for job_id in job_ids[:4]:
+            assert 0 < redis_client.ttl(_get_job_key(job_id)) <= 100
+        assert redis_client.ttl(_get_job_key(job_ids[4])) == -1
+
+        assert job_queue.prune_jobs() == 0
+        # Expire the finished jobs except the second one
+        for job_id in [job_ids[0], job_ids[2], job_ids[3]]:
+            redis_client.delete(_get_job_key(job_id))
+        assert job_queue.prune_jobs() == 3
+        assert redis_client.zcard(JOB_ALL_KEY) == 2
+        assert [job["id"] for job in job_queue.list_jobs()] == [job_ids[1], job_ids[4]]
+
+    def test_cancel_jobs(self, redis_client):
+        redis_client.flushall()
+        job_queue = JobQueue(redis_client)
+        job_ids = job_queue.submit_jobs([{"command": "true"}, {"command": "true"}])
+        job_queue.claim_pending_job()
+        assert job_queue.cancel_jobs(job_ids) == [job_ids[1]]
+        jobs = job_queue.get_jobs(job_ids)
+        assert jobs[0]["status"] == JOB_STATUS_RUNNING
+        assert jobs[1]["status"] == JOB_STATUS_CANCELLED
+
+    def test_job_scheduler(self, redis_client, tmp_path):
+        from cloudtik.core._private.service.cloudtik_job_scheduler import JobScheduler
+
+        redis_client.flushall()
+        job_scheduler = JobScheduler(
+            "127.0.0.1:{}".format(TEST_REDIS_PORT),
+            redis_password=constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD,
+            max_concurrency=2,
+            job_logs_dir=str(tmp_path))
+        threading.Thread(target=job_scheduler._run, daemon=True).start()
+
+        job_queue = JobQueue(redis_client)
+        job_ids = job_queue.submit_jobs(
+            [{"command": "echo job-{}".format(i)} for i in range(5)] +
+            [{"command": "exit 3"}])
+
+        job_exits = {}
+        for _ in range(30):
+            job_exits.update(wait_for_job_exits(
+                redis_client, [job_id for job_id in job_ids if job_id not in job_exits], 1))
+            if len(job_exits) == len(job_ids):
+                break
+        assert len(job_exits) == len(job_ids)
+
+        jobs = job_queue.get_jobs(job_ids)
+        for job in jobs[:5]:
+            assert job["status"] == JOB_STATUS_SUCCEEDED
+            assert job["exit_code"] == 0
+            assert job["log_offset"] > 0
+        assert jobs[5]["status"] == JOB_STATUS_FAILED
+        assert jobs[5]["exit_code"] == 3
+        assert not job_queue.get_running_job_ids()
+
+
+@pytest.fixture
+def job_files_dir(tmp_path, monkeypatch):
+    job_files_dir = str(tmp_path / "files")
+    monkeypatch.setattr(cluster_operator, "JOB_FILES_DIR", job_files_dir)
+    return job_files_dir
+
+
+class TestJobSpecs:
+    def test_load_job_specs(self):
+        jobs = _load_job_specs('[{"command": "a"}, {"command": "b"}]')
+        assert len(jobs) == 2
+        jobs = _load_job_specs('{"command": "a"}\n\n{"command": "b"}\n')
+        assert len(jobs) == 2
+
+    def test_script_dedup(self, tmp_path, job_files_dir):
+        script = tmp_path / "job.sh"
+        script.write_text("echo $1")
+        staging_dir = tmp_path / "staging"
+        staging_dir.mkdir()
+
+        commands = [_get_queued_job_command(
+            {}, {"script": str(script), "args": [str(i)]}, str(staging_dir))
+            for i in range(3)]
+        # The same content is staged once
+        assert len(os.listdir(staging_dir)) == 1
+        assert all(command.startswith("bash ") and job_files_dir + "/" in command
+                   for command in commands)
+        assert commands[0].endswith(" 0")
+
+        with pytest.raises(ValueError):
+            _get_queued_job_command({}, {"args": ["1"]}, str(staging_dir))
+
+    def test_script_url(self, tmp_path, job_files_dir):
+        command = _get_queued_job_command(
+            {}, {"script": "https://example.com/scripts/job.sh", "args": ["1"]},
+            str(tmp_path))
+        # Downloaded to the directory of the job and run only if succeeded
+        assert "mktemp -d" in command
+        assert ";" not in command
+        assert command.endswith(
+            'wget -q https://example.com/scripts/job.sh '
+            '-O "$__cloudtik_job_dir/job.sh" && bash "$__cloudtik_job_dir/job.sh" 1')
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -79,6 +79,10 @@ class TestNodeTable:
         for key in TEST_KEYS:
             assert key in res.keys()
 
+    def test_iter_all(self):
+        res = dict(self.node_table.iter_all())
+        assert res == self.node_table.get_all()
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,101 @@
+import sys
+import threading
+
+import pytest
+import yaml
+
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_WORKER
+from cloudtik.providers._private.local.node_provider import CloudSimulatorNodeProvider
+from cloudtik.providers.local.service.cloudtik_cloud_simulator import CloudSimulator
+
+NUM_NODES = 8
+
+
+@pytest.fixture
+def simulator(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "cloudtik.core._private.utils.get_user_temp_dir", lambda: str(tmp_path))
+    config_file = str(tmp_path / "nodes.yaml")
+    with open(config_file, "w") as f:
+        yaml.safe_dump({
+            "nodes": [{"ip": "127.0.0.{}".format(i), "instance_type": "m"}
+                      for i in range(1, NUM_NODES + 1)]}, f)
+    simulator = CloudSimulator(config=config_file, host="127.0.0.1", port=0)
+    yield simulator
+    simulator.shutdown()
+
+
+def _new_provider(simulator):
+    port = simulator._server.server_address[1]
+    return CloudSimulatorNodeProvider(
+        {"type": "local", "cloud_simulator_address": "127.0.0.1:{}".format(port)},
+        "test")
+
+
+class _CountingProvider(CloudSimulatorNodeProvider):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.num_requests = 0
+
+    def _get_http_response(self, request):
+        self.num_requests += 1
+        return super()._get_http_response(request)
+
+
+def test_batch_and_tag_cache(simulator):
+    port = simulator._server.server_address[1]
+    provider = _CountingProvider(
+        {"type": "local", "cloud_simulator_address": "127.0.0.1:{}".format(port)},
+        "test")
+    provider.create_node(
+        {"instance_type": "m"}, {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER}, 4)
+
+    provider.num_requests = 0
+    node_ids = provider.non_terminated_nodes({})
+    assert len(node_ids) == 4
+    for node_id in node_ids:
+        assert provider.node_tags(node_id)[CLOUDTIK_TAG_NODE_KIND] == NODE_KIND_WORKER
+    # The tags of all the nodes in one batch
+    assert provider.num_requests == 2
+
+    provider.set_node_tags(node_ids[0], {"a": "1"})
+    assert provider.node_tags(node_ids[0])["a"] == "1"
+    assert _new_provider(simulator).node_tags(node_ids[0])["a"] == "1"
+
+    results = provider.batch([
+        {"type": "is_running", "args": (node_ids[0], )},
+        {"type": "node_tags", "args": (node_ids[1], )},
+    ])
+    assert results[0] is True
+    assert results[1][CLOUDTIK_TAG_NODE_KIND] == NODE_KIND_WORKER
+    with pytest.raises(RuntimeError):
+        provider.batch([{"type": "node_tags", "args": ("unknown", )}])
+    with pytest.raises(RuntimeError):
+        provider.node_tags("unknown")
+
+
+def test_concurrent_requests(simulator):
+    provider = _new_provider(simulator)
+    errors = []
+
+    def create():
+        try:
+            provider.create_node(
+                {"instance_type": "m"}, {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER}, 1)
+            for _ in range(10):
+                provider.non_terminated_nodes({})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=create) for _ in range(NUM_NODES)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    # Each node allocated once
+    assert len(provider.non_terminated_nodes({})) == NUM_NODES
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,89 @@
+import io
+import os
+import sys
+import tarfile
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_dump import Archive, get_local_logs_for, \
+    copy_archive_stream, get_last_dump_time, set_last_dump_time
+
+
+def _read_archive(file):
+    with tarfile.open(file, "r:*") as tar:
+        return {member.name: tar.extractfile(member).read()
+                for member in tar.getmembers() if member.isreg()}
+
+
+def _create_logs(log_dir, num_files, size):
+    os.makedirs(log_dir)
+    now = time.time()
+    for i in range(num_files):
+        log_file = os.path.join(log_dir, "log-{}.log".format(i))
+        with open(log_file, "wb") as f:
+            f.write(b"x" * (size - 4) + b"%04d" % i)
+        # The later files are the more recent
+        os.utime(log_file, (now - num_files + i, now - num_files + i))
+
+
+class TestClusterDump:
+    @pytest.mark.parametrize("compress_threads", [1, 4])
+    def test_tail_and_budget(self, tmp_path, compress_threads):
+        log_dir = str(tmp_path / "logs")
+        _create_logs(log_dir, 10, 1000)
+        archive_file = str(tmp_path / "archive.tar.gz")
+        with Archive(file=archive_file, compress_threads=compress_threads,
+                     max_bytes=500) as archive:
+            get_local_logs_for(archive, "cloudtik", log_dir, tail_bytes=100)
+        assert archive.bytes_added == 500
+        assert archive.files_skipped == 5
+
+        files = _read_archive(archive_file)
+        # The most recent files are kept in the budget
+        assert sorted(files) == ["cloudtik/log-{}.log".format(i) for i in range(5, 10)]
+        assert files["cloudtik/log-9.log"] == b"x" * 96 + b"0009"
+
+    def test_incremental(self, tmp_path):
+        log_dir = str(tmp_path / "logs")
+        _create_logs(log_dir, 4, 10)
+        assert get_last_dump_time(str(tmp_path)) is None
+        set_last_dump_time(time.time() - 2.5, str(tmp_path))
+
+        archive_file = str(tmp_path / "archive.tar.gz")
+        with Archive(file=archive_file) as archive:
+            get_local_logs_for(
+                archive, "cloudtik", log_dir, since=get_last_dump_time(str(tmp_path)))
+        assert sorted(_read_archive(archive_file)) == [
+            "cloudtik/log-2.log", "cloudtik/log-3.log"]
+
+    @pytest.mark.parametrize("mode", ["w|", "w|gz"])
+    def test_copy_archive_stream(self, tmp_path, mode):
+        stream = io.BytesIO()
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            for name, data in [("logs/a.log", b"a" * 10), ("meta/b.txt", b"b")]:
+                tarinfo = tarfile.TarInfo(name)
+                tarinfo.size = len(data)
+                tar.addfile(tarinfo, io.BytesIO(data))
+        stream.seek(0)
+
+        archive_file = str(tmp_path / "archive.tar.gz")
+        with Archive(file=archive_file) as archive:
+            copy_archive_stream(archive, stream, "cloudtik_node_10.0.0.1")
+        assert _read_archive(archive_file) == {
+            "cloudtik_node_10.0.0.1/logs/a.log": b"a" * 10,
+            "cloudtik_node_10.0.0.1/meta/b.txt": b"b",
+        }
+
+    def test_stream_to_fileobj(self, tmp_path):
+        out = io.BytesIO()
+        with Archive(fileobj=out, compress=False) as archive:
+            archive.add_bytes(b"data", "meta/info.txt")
+        assert archive.file is None
+        out.seek(0)
+        with tarfile.open(fileobj=out, mode="r:") as tar:
+            assert tar.extractfile("meta/info.txt").read() == b"data"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,86 @@
+import json
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_health import decode_node_state, \
+    index_node_states, check_nodes_health
+from cloudtik.core._private.cluster.node_inventory import NodeInventory
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_STATUS, STATUS_SETTING_UP
+from cloudtik.tests.unit.core.test_node_inventory import CONFIG, FakeNodeProvider
+
+HEAD_PROCESSES = ["ClusterController", "NodeMonitor", "LogMonitor", "NodeAgent",
+                  "JobScheduler", "RedisServer", "ResourceManager", "SparkHistoryServer"]
+WORKER_PROCESSES = ["NodeMonitor", "LogMonitor", "NodeAgent", "NodeManager"]
+
+
+def _node_state(node_ip, processes, heartbeat_time=None):
+    return {
+        "node_id": node_ip,
+        "node_ip": node_ip,
+        "process": {process: "running" for process in processes},
+        "last_heartbeat_time": heartbeat_time or time.time(),
+    }
+
+
+class TestClusterHealth:
+    def test_decode_node_state(self):
+        node_state = _node_state("10.0.0.1", ["NodeMonitor"])
+        assert decode_node_state(json.dumps(node_state)) == node_state
+        assert decode_node_state(json.dumps(node_state).encode()) == node_state
+        # The Python literal form is decoded without evaluation
+        assert decode_node_state(str(node_state)) == node_state
+        assert decode_node_state("__import__('os').getpid()") is None
+        assert decode_node_state("{invalid") is None
+        assert decode_node_state("[1, 2]") is None
+
+    def test_index_node_states(self):
+        node_states = index_node_states([
+            json.dumps(_node_state("10.0.0.1", [])),
+            json.dumps(_node_state("10.0.0.2", [], heartbeat_time=1)),
+            "{invalid",
+        ])
+        assert list(node_states) == ["10.0.0.1"]
+
+    def test_check_nodes_health(self):
+        provider = FakeNodeProvider(5, num_not_ready=1, latency=0)
+        node_inventory = NodeInventory(provider)
+        node_states = {"10.0.0.0": _node_state("10.0.0.0", HEAD_PROCESSES)}
+        for i in range(1, 6):
+            node_ip = "10.0.0.{}".format(i)
+            node_states[node_ip] = _node_state(node_ip, WORKER_PROCESSES)
+
+        result = check_nodes_health(CONFIG, node_inventory, node_states)
+        assert result["healthy"]
+        # The worker setting up is not checked
+        assert result["total"] == 5
+        assert result["healthy_nodes"] == 5
+        assert "details" not in result
+
+        node_states["10.0.0.2"]["process"]["NodeManager"] = "zombie"
+        del node_states["10.0.0.3"]
+        result = check_nodes_health(
+            CONFIG, node_inventory, node_states, with_details=True)
+        assert not result["healthy"]
+        assert result["healthy_nodes"] == 3
+        unhealthy_nodes = {
+            node_health["node_ip"]: node_health for node_health in result["unhealthy_nodes"]}
+        assert unhealthy_nodes["10.0.0.2"]["unhealthy_processes"] == ["NodeManager"]
+        assert unhealthy_nodes["10.0.0.3"]["reason"] == "No states reported."
+        assert len(result["details"]) == 5
+        assert {process["name"] for process in result["details"][0]["processes"]} == set(
+            HEAD_PROCESSES)
+        # The result is for JSON output
+        json.dumps(result)
+
+    def test_head_not_running(self):
+        provider = FakeNodeProvider(1, latency=0)
+        provider._nodes["head"][CLOUDTIK_TAG_NODE_STATUS] = STATUS_SETTING_UP
+        result = check_nodes_health(CONFIG, NodeInventory(provider), {})
+        assert not result["healthy"]
+        assert result["unhealthy_nodes"][0]["reason"] == "Head node is not running."
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
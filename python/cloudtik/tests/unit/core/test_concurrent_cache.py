@@ -0,0 +1,83 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+
+
+def test_single_flight_per_key():
+    cache = ConcurrentObjectCache()
+    slow_started = threading.Event()
+    release_slow = threading.Event()
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        if name == "slow":
+            slow_started.set()
+            release_slow.wait(5)
+        return name.upper()
+
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.append(cache.get("slow", load, name="slow")))
+        for _ in range(4)]
+    for t in threads:
+        t.start()
+    assert slow_started.wait(5)
+    # The other keys are not blocked by the slow load
+    assert cache.get("fast", load, name="fast") == "FAST"
+    release_slow.set()
+    for t in threads:
+        t.join()
+    assert results == ["SLOW"] * 4
+    assert loads.count("slow") == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_load_error_not_cached():
+    cache = ConcurrentObjectCache()
+    attempts = []
+
+    def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("failed")
+        return "value"
+
+    with pytest.raises(RuntimeError):
+        cache.get("key", load)
+    assert cache.get("key", load) == "value"
+    assert cache.get("key", load) == "value"
+    assert len(attempts) == 2
+
+
+def test_lru_eviction_and_ttl():
+    cache = ConcurrentObjectCache(max_size=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    # Recently used
+    cache.get("a", lambda: 0)
+    cache.get("c", lambda: 3)
+    assert cache.get("b", lambda: 20) == 20
+    assert cache.get("a", lambda: 10) == 10
+    assert cache.stats() == {
+        "size": 2, "hits": 1, "misses": 5, "evictions": 3, "expirations": 0}
+
+    cache = ConcurrentObjectCache(ttl_s=0.05)
+    assert cache.get("a", lambda: 1) == 1
+    assert cache.get("a", lambda: 2) == 1
+    time.sleep(0.1)
+    assert cache.get("a", lambda: 3) == 3
+    assert cache.stats()["expirations"] == 1
+
+    cache.invalidate("a")
+    assert cache.get("a", lambda: 4) == 4
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
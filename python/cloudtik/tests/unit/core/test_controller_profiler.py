@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.controller_profiler import StepTimer, ControllerProfiler, \
+    PROFILE_FILE_PREFIX
+from cloudtik.core._private.prometheus_metrics import ClusterPrometheusMetrics
+
+
+def _run_cycle(profiler, step_timer, seconds):
+    step_timer.reset()
+    with profiler.cycle(step_timer):
+        with step_timer.step("list_nodes"):
+            time.sleep(seconds)
+        with step_timer.step("update_nodes"):
+            sum(range(1000))
+
+
+class TestControllerProfiler:
+    def test_step_timer(self):
+        prometheus_metrics = ClusterPrometheusMetrics(session_name="test")
+        step_timer = StepTimer(prometheus_metrics)
+        with step_timer.step("list_nodes"):
+            time.sleep(0.01)
+        with pytest.raises(ValueError):
+            with step_timer.step("update_nodes"):
+                raise ValueError()
+        assert step_timer.step_times["list_nodes"] >= 0.01
+        assert "update_nodes" in step_timer.step_times
+
+        if hasattr(prometheus_metrics, "registry"):
+            count = prometheus_metrics.registry.get_sample_value(
+                "cloudtik_controller_step_time_seconds_count",
+                {"SessionName": "test", "step": "list_nodes"})
+            assert count == 1
+
+    def test_slowest_cycles(self, tmp_path):
+        profiler = ControllerProfiler(str(tmp_path), enabled=True, top_n=2)
+        step_timer = StepTimer()
+        for seconds in [0.03, 0.01, 0.05, 0.02]:
+            _run_cycle(profiler, step_timer, seconds)
+
+        # The profiles of cycle 1 and 3 are kept
+        files = sorted(os.listdir(tmp_path))
+        assert files == [
+            "{}_1.prof".format(PROFILE_FILE_PREFIX), "{}_1.txt".format(PROFILE_FILE_PREFIX),
+            "{}_3.prof".format(PROFILE_FILE_PREFIX), "{}_3.txt".format(PROFILE_FILE_PREFIX)]
+        with open(tmp_path / "{}_3.txt".format(PROFILE_FILE_PREFIX)) as f:
+            summary = f.read()
+        assert summary.startswith("Cycle 3 took")
+        assert "list_nodes" in summary
+        assert "cumulative" in summary
+
+    def test_sampling_and_disabled(self, tmp_path):
+        profiler = ControllerProfiler(
+            str(tmp_path), enabled=True, sample_interval=2, top_n=5)
+        step_timer = StepTimer()
+        for _ in range(4):
+            _run_cycle(profiler, step_timer, 0)
+        assert len(os.listdir(tmp_path)) == 4
+
+        disabled_dir = tmp_path / "disabled"
+        disabled_dir.mkdir()
+        profiler = ControllerProfiler(str(disabled_dir), enabled=False)
+        _run_cycle(profiler, step_timer, 0)
+        assert not os.listdir(disabled_dir)
+        assert not ControllerProfiler(None, enabled=True).enabled
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
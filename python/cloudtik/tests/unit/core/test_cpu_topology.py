@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+from cloudtik.core._private.cpu_topology import get_sysfs_cpu_topology, parse_cpu_list, \
+    publish_cpu_topology, get_published_cpu_topologies
+
+
+def _make_sysfs(root, cpus, numa_nodes=None):
+    """cpus: list of (socket, core_id) by cpu. numa_nodes: node -> cpu list."""
+    cpu_path = root / "cpu"
+    cpu_path.mkdir(parents=True)
+    (cpu_path / "online").write_text("0-{}\n".format(len(cpus) - 1))
+    for cpu, (socket, core_id) in enumerate(cpus):
+        topology_path = cpu_path / "cpu{}".format(cpu) / "topology"
+        topology_path.mkdir(parents=True)
+        (topology_path / "physical_package_id").write_text("{}\n".format(socket))
+        (topology_path / "core_id").write_text("{}\n".format(core_id))
+    for node, cpu_list in (numa_nodes or {}).items():
+        node_path = root / "node" / "node{}".format(node)
+        node_path.mkdir(parents=True)
+        (node_path / "cpulist").write_text(cpu_list + "\n")
+    return str(root)
+
+
+def _parsed(lines):
+    return [line for line in lines if not line.startswith("#")]
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpu_list("") == []
+
+
+def test_sysfs_cpu_topology(tmp_path):
+    # 2 sockets of 2 cores with hyper-threading. The core ids are not
+    # contiguous and are unique in a socket only
+    cpus = [(0, 0), (0, 4), (1, 0), (1, 4), (0, 0), (0, 4), (1, 0), (1, 4)]
+    sysfs_path = _make_sysfs(tmp_path, cpus, {0: "0-1,4-5", 1: "2-3,6-7"})
+    assert _parsed(get_sysfs_cpu_topology(sysfs_path)) == [
+        "0,0,0,0", "1,1,0,0", "2,2,1,1", "3,3,1,1",
+        "4,0,0,0", "5,1,0,0", "6,2,1,1", "7,3,1,1"]
+
+
+def test_sysfs_cpu_topology_without_numa(tmp_path):
+    sysfs_path = _make_sysfs(tmp_path, [(0, 0), (0, 1)])
+    assert _parsed(get_sysfs_cpu_topology(sysfs_path)) == ["0,0,0,", "1,1,0,"]
+    assert get_sysfs_cpu_topology(str(tmp_path / "none")) is None
+
+
+class _StateTable:
+    def __init__(self):
+        self.values = {}
+
+    def put(self, key, value):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+
+class _ControlState:
+    def __init__(self):
+        self.tables = {}
+
+    def get_user_state_table(self, table_name):
+        return self.tables.setdefault(table_name, _StateTable())
+
+
+def test_published_cpu_topologies():
+    control_state = _ControlState()
+    publish_cpu_topology(control_state, "10.0.0.1", ["0,0,0,0"])
+    assert get_published_cpu_topologies(
+        control_state, ["10.0.0.1", "10.0.0.2"]) == {"10.0.0.1": ["0,0,0,0"]}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
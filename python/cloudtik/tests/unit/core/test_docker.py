@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cloudtik.core._private.docker import docker_status_script, parse_docker_status, \
+    get_mirrored_image, docker_pull_cmd, docker_pre_pull_cmd
+
+# A fake docker command printing the responses of the inspect and info commands
+FAKE_DOCKER = """#!/bin/bash
+echo "$@" >> "$FAKE_DOCKER_CALLS"
+case "$*" in
+    pull*) echo "Pulling $2" ;;
+    *State.Running*) echo true ;;
+    *Config.Image*) echo example:latest ;;
+    *Mounts*) echo '[{"Destination": "/root/data"}]' ;;
+    *Config.Env*) echo '["PATH=/usr/bin", "HOME=/home/user"]' ;;
+    *Runtimes*) echo 'map[runc:{runc [] <nil>}]' ;;
+    exec*) echo /home/user ;;
+    *) exit 1 ;;
+esac
+"""
+
+
+@pytest.fixture
+def fake_docker(tmp_path):
+    docker = tmp_path / "fake-docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    return str(docker)
+
+
+def _run_script(script, calls_file):
+    env = os.environ.copy()
+    env["FAKE_DOCKER_CALLS"] = calls_file
+    return subprocess.check_output(
+        ["bash", "-c", script], env=env, stderr=subprocess.STDOUT).decode()
+
+
+class TestDockerStatus:
+    def test_status_script(self, fake_docker, tmp_path):
+        data_disk_dir = tmp_path / "disks"
+        (data_disk_dir / "data_disk_1").mkdir(parents=True)
+        (data_disk_dir / "data_disk_2").mkdir()
+        calls_file = str(tmp_path / "calls")
+        container_name = "test-{}".format(os.getpid())
+        script = docker_status_script(
+            "example:latest", container_name, fake_docker,
+            docker_pull_cmd("example:latest", fake_docker), str(data_disk_dir))
+
+        output = _run_script(script, calls_file)
+        # The pulling output is before the status
+        assert "Pulling example:latest" in output
+        docker_status = parse_docker_status(output)
+        assert docker_status["installed"]
+        assert docker_status["running"] == "true"
+        assert docker_status["running_image"] == "example:latest"
+        assert json.loads(docker_status["mounts"])[0]["Destination"] == "/root/data"
+        assert "HOME=/home/user" in json.loads(docker_status["image_env"])
+        assert docker_status["home"] == "/home/user"
+        assert docker_status["data_disks"].split() == ["data_disk_1", "data_disk_2"]
+        assert not docker_status["gpu_available"]
+        assert int(docker_status["mem_available"]) > 0
+
+        # The pulling is skipped if the image was pre-pulled successfully
+        subprocess.check_call(
+            ["bash", "-c", docker_pre_pull_cmd(container_name, "true")])
+        os.remove(calls_file)
+        docker_status = parse_docker_status(_run_script(script, calls_file))
+        assert docker_status["installed"]
+        with open(calls_file) as f:
+            assert not any(call.startswith("pull") for call in f)
+        os.remove("/tmp/cloudtik-docker-pull-{}.log".format(container_name))
+
+    def test_status_not_installed(self, tmp_path):
+        script = docker_status_script(
+            "example:latest", "test", str(tmp_path / "no-docker"),
+            "true", str(tmp_path))
+        docker_status = parse_docker_status(
+            _run_script(script, str(tmp_path / "calls")))
+        assert docker_status == {"installed": False}
+
+    def test_parse_docker_status(self):
+        assert parse_docker_status("some output\r\n") is None
+        assert parse_docker_status(
+            "Pulling\r\nCLOUDTIK_DOCKER_STATUS:{\"installed\": false}\r\n") == {
+            "installed": False}
+        assert parse_docker_status("CLOUDTIK_DOCKER_STATUS:{invalid") is None
+
+    def test_mirrored_image(self):
+        assert get_mirrored_image("ubuntu:20.04", None) == "ubuntu:20.04"
+        assert get_mirrored_image(
+            "ubuntu:20.04", "mirror:5000") == "mirror:5000/library/ubuntu:20.04"
+        assert get_mirrored_image(
+            "cloudtik/spark-runtime:1.0", "mirror:5000/") == "mirror:5000/cloudtik/spark-runtime:1.0"
+        assert get_mirrored_image(
+            "registry.example.com/team/image:1.0", "mirror:5000") == "mirror:5000/team/image:1.0"
+
+    def test_pull_cmd(self):
+        pull_cmd = docker_pull_cmd(
+            "image:1.0", "docker", image_mirror="mirror:5000",
+            image_tarball="/tmp/image.tar")
+        assert pull_cmd.startswith("([ -f /tmp/image.tar ] && docker load -i /tmp/image.tar)")
+        assert "docker tag mirror:5000/library/image:1.0 image:1.0" in pull_cmd
+        assert pull_cmd.endswith("|| docker pull image:1.0")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -1,7 +1,12 @@
+import os
+import signal
+import subprocess
+import time
 from typing import Optional, Any, Dict
 
 import pytest
 
+from cloudtik.core._private.job_waiter.job_event import with_job_exit_event, _parse_job_exits
 from cloudtik.core._private.job_waiter.job_waiter_factory import _parse_built_in_chain, create_job_waiter
 from cloudtik.core.job_waiter import JobWaiter
 
@@ -13,7 +18,7 @@ class JobWaiterTest(JobWaiter):
         self.job_waiters_in_chain = []
 
     def wait_for_completion(self, node_id: str, cmd: str, session_name: str, timeout: Optional[int] = None):
-        pass
+        self.job_waiters_in_chain.append(session_name)
 
 
 class TestJobWaiter:
@@ -38,6 +43,75 @@ class TestJobWaiter:
         assert job_waiter_chain is not None
         assert len(job_waiter_chain.job_waiters_in_chain) == 1
 
+    def test_wait_for_completion_of_jobs(self):
+        config = {}
+
+        job_waiter_name = "chain[cloudtik.tests.unit.core.test_job_waiter.JobWaiterTest]"
+        job_waiter_chain = create_job_waiter(config, job_waiter_name)
+        jobs = [("node-{}".format(i), "cmd", "session-{}".format(i)) for i in range(4)]
+        job_waiter_chain.wait_for_completion_of_jobs(jobs)
+        job_waiter = job_waiter_chain.job_waiters_in_chain[0]
+        assert sorted(job_waiter.job_waiters_in_chain) == [
+            "session-{}".format(i) for i in range(4)]
+
+    @staticmethod
+    def _with_fake_cloudtik(tmp_path):
+        # A fake cloudtik command records the published exit code
+        published_file = tmp_path / "published"
+        bin_path = tmp_path / "bin"
+        bin_path.mkdir()
+        fake_cloudtik = bin_path / "cloudtik"
+        fake_cloudtik.write_text(
+            "#!/bin/bash\necho \"$@\" > {}\n".format(published_file))
+        fake_cloudtik.chmod(0o755)
+        env = {"PATH": "{}:/bin:/usr/bin".format(bin_path)}
+        return env, published_file
+
+    def test_with_job_exit_event(self, tmp_path):
+        env, published_file = self._with_fake_cloudtik(tmp_path)
+
+        def run(cmd):
+            if published_file.exists():
+                published_file.unlink()
+            exit_code = subprocess.call(
+                ["bash", "-c", with_job_exit_event(cmd, "session-1")], env=env)
+            return exit_code, published_file.read_text().split()
+
+        assert run("true") == (
+            0, ["job-exit", "--session-name=session-1", "--exit-code=0"])
+        # The exit and errexit of the command don't skip the event
+        assert run("exit 3") == (
+            3, ["job-exit", "--session-name=session-1", "--exit-code=3"])
+        exit_code, published = run("set -e; false; echo not-here")
+        assert exit_code == 1
+        assert published[-1] == "--exit-code=1"
+        # The commands ending with a separator or a comment
+        for cmd in ["sleep 0.1 &", "true;", "true # comment"]:
+            exit_code, published = run(cmd)
+            assert exit_code == 0, cmd
+            assert published[-1] == "--exit-code=0", cmd
+
+        # The exit code is kept even when the event cannot be published
+        cmd = with_job_exit_event("exit 3", "session-1")
+        assert subprocess.call(["bash", "-c", cmd], env={"PATH": "/bin:/usr/bin"}) == 3
+
+    def test_with_job_exit_event_killed(self, tmp_path):
+        env, published_file = self._with_fake_cloudtik(tmp_path)
+        # Kill the process group as the session is killed
+        process = subprocess.Popen(
+            ["bash", "-c", with_job_exit_event("sleep 30", "session-1")],
+            start_new_session=True, env=env)
+        time.sleep(0.5)
+        os.killpg(process.pid, signal.SIGHUP)
+        assert process.wait(timeout=10) == 129
+        assert published_file.read_text().split()[-1] == "--exit-code=129"
+
+    def test_parse_job_exits(self):
+        output = "Warning: Permanently added the host.\n{\"session-1\": 0, \"session-2\": 1}\n"
+        assert _parse_job_exits(output) == {"session-1": 0, "session-2": 1}
+        assert _parse_job_exits("{}") == {}
+        assert _parse_job_exits("No Redis found.") is None
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,118 @@
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
+from cloudtik.core._private.cluster.launch_scheduler import LaunchScheduler
+from cloudtik.core._private.cluster.node_launcher import NodeLauncher
+from cloudtik.core._private.core_utils import ConcurrentCounter
+from cloudtik.core.tags import CLOUDTIK_TAG_USER_NODE_TYPE
+
+CONFIG = {
+    "cluster_name": "test",
+    "auth": {},
+    "available_node_types": {
+        "cpu": {"node_config": {"SubnetIds": ["a", "b"]}, "resources": {"CPU": 4}},
+        "gpu": {"node_config": {}, "resources": {"GPU": 1}},
+    },
+}
+
+
+class CapacityError(Exception):
+    pass
+
+
+class MockProvider:
+    def __init__(self, capacity_failures=0):
+        self.capacity_failures = capacity_failures
+        self.created = []
+
+    def get_launch_placements(self, node_config):
+        subnet_ids = node_config.get("SubnetIds")
+        if not subnet_ids:
+            return None
+        return [{"SubnetIds": [subnet_id]} for subnet_id in subnet_ids]
+
+    def is_capacity_error(self, error):
+        return isinstance(error, CapacityError)
+
+    def create_node_with_resources(self, node_config, tags, count, resources):
+        if self.capacity_failures > 0:
+            self.capacity_failures -= 1
+            raise CapacityError("insufficient capacity")
+        self.created.append(
+            (tags[CLOUDTIK_TAG_USER_NODE_TYPE], count, node_config.get("SubnetIds")))
+
+
+def test_fair_between_node_types():
+    scheduler = LaunchScheduler(MockProvider(), max_launch_batch=5)
+    scheduler.add(CONFIG, 20, "cpu")
+    scheduler.add(CONFIG, 10, "cpu")
+    scheduler.add(CONFIG, 2, "gpu")
+
+    batches = [scheduler.get(timeout=0) for _ in range(3)]
+    assert [(b.node_type, b.count) for b in batches] == [
+        ("cpu", 5), ("gpu", 2), ("cpu", 5)]
+    # Spread across the placements
+    assert batches[0].placement != batches[2].placement
+    assert batches[1].placement is None
+
+    for batch in batches:
+        scheduler.complete(batch)
+    # The merged requests of cpu are all launched
+    counts = []
+    batch = scheduler.get(timeout=0)
+    while batch is not None:
+        counts.append(batch.count)
+        scheduler.complete(batch)
+        batch = scheduler.get(timeout=0)
+    assert counts == [5, 5, 5, 5]
+
+
+def test_capacity_retry():
+    scheduler = LaunchScheduler(
+        MockProvider(), max_launch_batch=5, capacity_retries=1, retry_backoff_s=0.05)
+    scheduler.add(CONFIG, 5, "cpu")
+    batch = scheduler.get(timeout=0)
+    assert scheduler.complete(batch, CapacityError())
+
+    # Backed off
+    assert scheduler.get(timeout=0) is None
+    retried = scheduler.get(timeout=1)
+    assert retried.attempt == 2
+    assert retried.count == 5
+    assert retried.placement != batch.placement
+    # Given up after the max retries
+    assert not scheduler.complete(retried, CapacityError())
+    assert scheduler.get(timeout=0.1) is None
+
+    # Not retried for other errors
+    scheduler.add(CONFIG, 1, "gpu")
+    batch = scheduler.get(timeout=0)
+    assert not scheduler.complete(batch, RuntimeError())
+    assert scheduler.get(timeout=0) is None
+
+
+def test_node_launcher_retry():
+    provider = MockProvider(capacity_failures=1)
+    scheduler = LaunchScheduler(provider, max_launch_batch=5, retry_backoff_s=0.05)
+    pending = ConcurrentCounter()
+    launcher = NodeLauncher(
+        provider=provider, scheduler=scheduler, pending=pending,
+        event_summarizer=EventSummarizer(), node_types=CONFIG["available_node_types"],
+        daemon=True)
+    launcher.start()
+
+    pending.inc("cpu", 3)
+    scheduler.add(CONFIG, 3, "cpu")
+    deadline = time.time() + 5
+    while pending.value > 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert pending.value == 0
+    # Launched in the other subnet after the capacity error
+    assert provider.created == [("cpu", 3, ["b"])]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_WORKER
+from cloudtik.providers._private.local.local_node_provider import ClusterState, \
+    LocalNodeProvider
+
+NUM_NODES = 10
+
+
+def _provider_config():
+    return {
+        "type": "local",
+        "nodes": [{"ip": "127.0.0.{}".format(i), "instance_type": "m"}
+                  for i in range(1, NUM_NODES + 1)],
+    }
+
+
+def _journal_lines(state):
+    with open(state.journal_path) as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "cloudtik.core._private.utils.get_user_temp_dir", lambda: str(tmp_path))
+    return str(tmp_path / "cluster.state")
+
+
+def _new_state(state_path):
+    return ClusterState(state_path + ".lock", state_path, _provider_config())
+
+
+def test_journal_and_reload(state_path):
+    state = _new_state(state_path)
+    assert _journal_lines(state) == []
+    state.put("127.0.0.1", {"tags": {"a": "1"}, "state": "running"})
+    state.put_nodes({
+        "127.0.0.2": {"tags": {"b": "2"}, "state": "running"},
+        "127.0.0.3": {"tags": {}, "state": "stopped"},
+    })
+    # One journal entry for each batch
+    assert len(_journal_lines(state)) == 2
+
+    # The copy returned is not the state
+    state.get_node("127.0.0.1")["tags"]["a"] = "changed"
+    assert state.get_node("127.0.0.1")["tags"] == {"a": "1"}
+    assert state.filter_nodes(["running"], {}) == ["127.0.0.1", "127.0.0.2"]
+    assert state.filter_nodes(["running"], {"b": "2"}) == ["127.0.0.2"]
+
+    # A partially written entry is ignored
+    with open(state.journal_path, "a") as f:
+        f.write('{"127.0.0.4": {"tags"')
+    reloaded = _new_state(state_path)
+    assert reloaded.get() == state.get()
+    # Compacted into the snapshot on load
+    assert _journal_lines(reloaded) == []
+
+
+def test_journal_compaction(state_path):
+    state = _new_state(state_path)
+    for i in range(NUM_NODES + 1):
+        state.put("127.0.0.1", {"tags": {"n": str(i)}, "state": "running"})
+    # Compacted once the journal is larger than the state
+    assert len(_journal_lines(state)) < NUM_NODES
+    assert _new_state(state_path).get_node("127.0.0.1")["tags"] == {"n": str(NUM_NODES)}
+
+
+def test_provider_batch_mutations(state_path):
+    provider = LocalNodeProvider(_provider_config(), "test")
+    journal_size = len(_journal_lines(provider.state))
+    provider.create_node(
+        {"instance_type": "m"}, {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER}, 4)
+    assert len(_journal_lines(provider.state)) == journal_size + 1
+    node_ids = provider.non_terminated_nodes({CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER})
+    assert len(node_ids) == 4
+    assert all(provider.is_running(node_id) for node_id in node_ids)
+
+    provider.terminate_nodes(node_ids[:3])
+    assert len(_journal_lines(provider.state)) == journal_size + 2
+    assert provider.non_terminated_nodes({}) == node_ids[3:]
+    assert os.path.exists(provider.state.save_path)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
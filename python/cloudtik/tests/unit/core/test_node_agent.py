@@ -0,0 +1,224 @@
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+from cloudtik.core._private.constants import CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN
+from cloudtik.core._private.call_context import CallContext
+from cloudtik.core._private.cluster import cluster_operator
+from cloudtik.core._private.node.node_agent import NodeAgentClient, NodeAgentError, \
+    NodeAgentConnectionError, NodeAgentRequestError, get_node_agent_token, \
+    get_or_create_node_agent_token
+from cloudtik.core._private.service.cloudtik_node_agent_service import NodeAgent
+
+TEST_TOKEN = "test-token"
+
+
+@pytest.fixture
+def node_agent():
+    agent = NodeAgent("127.0.0.1", TEST_TOKEN, port=0)
+    thread = threading.Thread(target=agent._server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield agent
+    agent.shutdown()
+
+
+class DisconnectingServer:
+    """A server answering the requests with the actions in order: a response
+    or closing the connection after reading the request."""
+
+    def __init__(self, actions):
+        self.actions = list(actions)
+        self.requests = []
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen(8)
+        self.port = self._socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _read_request(self, reader):
+        content_length = 0
+        while True:
+            line = reader.readline()
+            if not line:
+                return None
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.strip().lower() == "content-length":
+                content_length = int(value.strip())
+        return json.loads(reader.read(content_length))
+
+    def _serve(self):
+        while self.actions:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            reader = conn.makefile("rb")
+            while self.actions:
+                request = self._read_request(reader)
+                if request is None:
+                    break
+                self.requests.append(request["type"])
+                if self.actions.pop(0) == "close":
+                    break
+                body = json.dumps({"result": {"pid": 1}}).encode()
+                conn.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            reader.close()
+            conn.close()
+
+    def close(self):
+        self._socket.close()
+
+
+class TestNodeAgent:
+    def test_exec(self, node_agent):
+        client = NodeAgentClient(
+            "127.0.0.1", port=node_agent.port, token=TEST_TOKEN)
+        exit_code, output = client.exec("echo hello")
+        assert exit_code == 0
+        assert "hello" in output
+
+        exit_code, output = client.exec("exit 3")
+        assert exit_code == 3
+
+        # The same connection is reused for the requests
+        connection = client._connection
+        assert client.ping()["pid"] > 0
+        assert client._connection is connection
+        client.close()
+
+    def test_file_stat(self, node_agent, tmp_path):
+        client = NodeAgentClient(
+            "127.0.0.1", port=node_agent.port, token=TEST_TOKEN)
+        test_file = tmp_path / "test.txt"
+        test_file.write_text("abc")
+        stat = client.file_stat(str(test_file))
+        assert stat["size"] == 3
+        assert not stat["is_dir"]
+        assert client.file_stat(str(tmp_path / "not-exists")) is None
+        assert client.session_exists("cloudtik-not-exists") is False
+        client.close()
+
+    def test_invalid_token(self, node_agent):
+        client = NodeAgentClient(
+            "127.0.0.1", port=node_agent.port, token="wrong")
+        with pytest.raises(NodeAgentError):
+            client.ping()
+        client.close()
+
+    def test_connection_error(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        # Nothing listening on the port
+        sock.close()
+        client = NodeAgentClient("127.0.0.1", port=port, token=TEST_TOKEN)
+        with pytest.raises(NodeAgentConnectionError):
+            client.exec("echo hello")
+
+    def test_exec_not_retried(self):
+        server = DisconnectingServer(["respond", "close", "respond"])
+        client = NodeAgentClient(
+            "127.0.0.1", port=server.port, token=TEST_TOKEN, timeout=5)
+        try:
+            assert client.ping()["pid"] == 1
+            # The exec may have been executed when the connection is closed
+            with pytest.raises(NodeAgentRequestError):
+                client.exec("echo hello")
+            assert server.requests == ["ping", "exec"]
+        finally:
+            client.close()
+            server.close()
+
+    def test_idempotent_retried(self):
+        server = DisconnectingServer(["respond", "close", "respond"])
+        client = NodeAgentClient(
+            "127.0.0.1", port=server.port, token=TEST_TOKEN, timeout=5)
+        try:
+            assert client.ping()["pid"] == 1
+            # Retried with a new connection
+            assert client.ping()["pid"] == 1
+            assert server.requests == ["ping", "ping", "ping"]
+        finally:
+            client.close()
+            server.close()
+
+    def test_exec_fallback(self, monkeypatch):
+        class Provider:
+            def internal_ip(self, node_id):
+                return "127.0.0.1"
+
+        def exec_with_node_agent(*args, **kwargs):
+            raise exec_error
+
+        def create_node_updater_for_exec(*args, **kwargs):
+            raise RuntimeError("Fallback to SSH")
+
+        monkeypatch.setattr(
+            cluster_operator, "_exec_with_node_agent", exec_with_node_agent)
+        monkeypatch.setattr(
+            cluster_operator, "create_node_updater_for_exec",
+            create_node_updater_for_exec)
+        call_context = CallContext()
+        call_context.set_allow_interactive(False)
+
+        # Fallback to SSH only if the command was not sent
+        exec_error = NodeAgentConnectionError("Connection refused")
+        with pytest.raises(RuntimeError, match="Fallback to SSH"):
+            cluster_operator._exec_cmd_on_head(
+                {}, call_context, Provider(), "node-1", cmd="echo hello")
+
+        exec_error = NodeAgentRequestError("Connection reset")
+        with pytest.raises(NodeAgentRequestError):
+            cluster_operator._exec_cmd_on_head(
+                {}, call_context, Provider(), "node-1", cmd="echo hello")
+
+    def test_authorized_clients(self):
+        agent = NodeAgent("127.0.0.1", TEST_TOKEN, port=0, head_ip="10.0.0.1")
+        try:
+            assert agent.is_authorized("10.0.0.1", TEST_TOKEN)
+            assert agent.is_authorized("127.0.0.1", TEST_TOKEN)
+            assert not agent.is_authorized("10.0.0.2", TEST_TOKEN)
+            assert not agent.is_authorized("10.0.0.1", None)
+        finally:
+            # Not serving
+            agent._server.server_close()
+
+        with pytest.raises(ValueError):
+            NodeAgent("127.0.0.1", None, port=0)
+
+    def test_token(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.delenv(CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN, raising=False)
+        assert get_node_agent_token() is None
+        client = NodeAgentClient("127.0.0.1", port=1)
+        with pytest.raises(NodeAgentError):
+            client.ping()
+
+        # A random token created on head is kept for the restarts
+        token = get_or_create_node_agent_token()
+        assert len(token) == 64
+        assert get_or_create_node_agent_token() == token
+        assert get_node_agent_token() == token
+        token_files = list(tmp_path.iterdir())
+        assert len(token_files) == 1
+        assert stat.S_IMODE(os.stat(token_files[0]).st_mode) == 0o600
+
+        # The workers get the token from the environment
+        monkeypatch.setenv(CLOUDTIK_RUNTIME_ENV_NODE_AGENT_TOKEN, "worker-token")
+        assert get_node_agent_token() == "worker-token"
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-v", __file__]))
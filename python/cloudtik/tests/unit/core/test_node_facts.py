@@ -0,0 +1,73 @@
+import json
+import sys
+
+import pytest
+
+from cloudtik.core._private.node_facts import get_cpu_facts, get_published_node_facts, \
+    publish_node_facts, NODE_FACTS_TABLE
+
+
+def test_cpu_facts():
+    # 2 sockets of 2 cores with hyper-threading in 2 NUMA nodes
+    cpu_topology = ["# CPU,Core,Socket,Node",
+                    "0,0,0,0", "1,1,0,0", "2,2,1,1", "3,3,1,1",
+                    "4,0,0,0", "5,1,0,0", "6,2,1,1", "7,3,1,1", ""]
+    assert get_cpu_facts(cpu_topology) == {
+        "logical_cores": 8, "physical_cores": 4, "sockets": 2, "numa_nodes": 2}
+    # Without NUMA
+    assert get_cpu_facts(["0,0,0,", "1,1,0,"])["numa_nodes"] == 1
+
+
+class _StateTable:
+    def __init__(self):
+        self.values = {}
+
+    def put(self, key, value):
+        self.values[key] = value
+
+    def get_all(self):
+        return dict(self.values)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class _ControlState:
+    def __init__(self):
+        self.tables = {}
+
+    def get_user_state_table(self, table_name):
+        return self.tables.setdefault(table_name, _StateTable())
+
+
+def test_published_node_facts():
+    control_state = _ControlState()
+    facts = {"logical_cores": 8, "physical_cores": 4, "memory_mb": 32000}
+    publish_node_facts(control_state, "10.0.0.1", "worker.default", facts)
+    publish_node_facts(control_state, "10.0.0.2", "worker.default", dict(facts, memory_mb=31000))
+    publish_node_facts(control_state, "10.0.0.3", "worker.large", dict(facts, logical_cores=16))
+    assert json.loads(control_state.tables[NODE_FACTS_TABLE].values["10.0.0.1"]) == {
+        "node_type": "worker.default", "facts": facts}
+    # The minimum of the nodes of a type
+    assert get_published_node_facts(control_state) == {
+        "worker.default": dict(facts, memory_mb=31000),
+        "worker.large": dict(facts, logical_cores=16),
+    }
+
+
+
+def test_terminated_node_facts():
+    control_state = _ControlState()
+    facts = {"logical_cores": 8, "physical_cores": 4, "memory_mb": 32000}
+    publish_node_facts(control_state, "10.0.0.1", "worker.default", facts)
+    publish_node_facts(control_state, "10.0.0.2", "worker.default", dict(facts, memory_mb=16000))
+    # The facts of the terminated node are not counted and deleted
+    assert get_published_node_facts(control_state, lambda: {"10.0.0.1"}) == {
+        "worker.default": facts}
+    assert list(control_state.tables[NODE_FACTS_TABLE].values) == ["10.0.0.1"]
+    assert get_published_node_facts(control_state, lambda: set()) == {}
+    assert not control_state.tables[NODE_FACTS_TABLE].values
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
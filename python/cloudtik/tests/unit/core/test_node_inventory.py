@@ -0,0 +1,177 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_operator import _get_cluster_info, \
+    _get_worker_node_ips, _get_cluster_nodes_info
+from cloudtik.core._private.cluster.node_inventory import NodeInventory
+from cloudtik.core._private.utils import get_running_head_node, get_head_working_ip, \
+    get_nodes_info, HeadNotRunningError
+from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD, NODE_KIND_WORKER, \
+    CLOUDTIK_TAG_NODE_STATUS, STATUS_UP_TO_DATE, STATUS_SETTING_UP, CLOUDTIK_TAG_USER_NODE_TYPE
+
+CONFIG = {
+    "cluster_name": "test",
+    "provider": {
+        "type": "fake",
+        "use_internal_ips": True,
+    },
+    "available_node_types": {
+        "head.default": {
+            "resources": {"CPU": 4, "memory": 16 * 1024 ** 3},
+        },
+        "worker.default": {
+            "resources": {"CPU": 8, "memory": 32 * 1024 ** 3},
+        },
+    },
+    "runtime": {
+        "types": ["spark"],
+    },
+}
+
+# The latency of each provider call, such as an API request
+PROVIDER_CALL_LATENCY_S = 0.002
+
+
+class FakeNodeProvider(NodeProvider):
+    """A provider with the latency of each call and the calls counted."""
+
+    def __init__(self, num_workers, num_not_ready=0, latency=PROVIDER_CALL_LATENCY_S):
+        super().__init__(CONFIG["provider"], CONFIG["cluster_name"])
+        self.latency = latency
+        self.num_calls = 0
+        self._lock = threading.Lock()
+        self._nodes = {"head": self._create_node(NODE_KIND_HEAD, "head.default", 0)}
+        for i in range(num_workers):
+            status = STATUS_SETTING_UP if i < num_not_ready else STATUS_UP_TO_DATE
+            self._nodes["worker-{}".format(i)] = self._create_node(
+                NODE_KIND_WORKER, "worker.default", i + 1, status)
+
+    @staticmethod
+    def _create_node(node_kind, node_type, index, status=STATUS_UP_TO_DATE):
+        return {
+            "private_ip": "10.0.{}.{}".format(index // 256, index % 256),
+            "public_ip": None,
+            "instance_type": "fake",
+            "instance_status": "running",
+            CLOUDTIK_TAG_NODE_KIND: node_kind,
+            CLOUDTIK_TAG_USER_NODE_TYPE: node_type,
+            CLOUDTIK_TAG_NODE_STATUS: status,
+        }
+
+    def _call(self):
+        with self._lock:
+            self.num_calls += 1
+        time.sleep(self.latency)
+
+    def non_terminated_nodes(self, tag_filters):
+        self._call()
+        return [node for node, node_info in self._nodes.items()
+                if all(node_info.get(k) == v for k, v in tag_filters.items())]
+
+    def node_tags(self, node_id):
+        self._call()
+        return dict(self._nodes[node_id])
+
+    def get_node_info(self, node_id):
+        self._call()
+        node_info = dict(self._nodes[node_id])
+        node_info["node_id"] = node_id
+        return node_info
+
+    def internal_ip(self, node_id):
+        self._call()
+        return self._nodes[node_id]["private_ip"]
+
+    def external_ip(self, node_id):
+        self._call()
+        return self._nodes[node_id]["public_ip"]
+
+
+def _get_cluster_info_by_calls(config, provider):
+    # The provider calls of getting the cluster info node by node
+    head_node = get_running_head_node(config, _provider=provider)
+    get_head_working_ip(config, provider, head_node)
+    workers = provider.non_terminated_nodes({CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER})
+    return get_nodes_info(provider, workers)
+
+
+class TestNodeInventory:
+    def test_node_inventory(self):
+        provider = FakeNodeProvider(10, num_not_ready=3, latency=0)
+        node_inventory = NodeInventory(provider)
+        # One listing and one info query for each node
+        assert provider.num_calls == 12
+
+        assert node_inventory.get_head_node("test") == "head"
+        assert len(node_inventory.get_worker_nodes()) == 10
+        assert len(node_inventory.get_worker_nodes(STATUS_UP_TO_DATE)) == 7
+        assert node_inventory.get_node_cluster_ip("worker-0") == "10.0.0.1"
+        assert node_inventory.get_node_working_ip(CONFIG, "head") == "10.0.0.0"
+
+        node_info = node_inventory.get_node_info(
+            "worker-0", True, CONFIG["available_node_types"])
+        assert node_info["CPU"] == 8
+        assert node_info["memory"] == 32
+        # The extras are not kept in the inventory
+        assert "CPU" not in node_inventory.get_node_info("worker-0")
+
+        workers = node_inventory.get_worker_nodes()
+        assert node_inventory.get_nodes_for_runtime(CONFIG, workers, "spark") == workers
+        assert node_inventory.get_nodes_for_runtime(CONFIG, workers, "kafka") == []
+
+        worker_ips = _get_worker_node_ips(
+            CONFIG, node_status=STATUS_UP_TO_DATE, node_inventory=node_inventory)
+        assert len(worker_ips) == 7
+        nodes_info = _get_cluster_nodes_info(CONFIG, node_inventory=node_inventory)
+        assert nodes_info[0]["node"] == "head"
+        # No more provider calls with the inventory
+        assert provider.num_calls == 12
+
+    def test_head_not_running(self):
+        provider = FakeNodeProvider(2, latency=0)
+        provider._nodes["head"][CLOUDTIK_TAG_NODE_STATUS] = STATUS_SETTING_UP
+        node_inventory = NodeInventory(provider)
+        with pytest.raises(HeadNotRunningError):
+            node_inventory.get_head_node("test")
+        assert node_inventory.get_head_node(
+            "test", allow_uninitialized_state=True) == "head"
+
+    def test_cluster_info(self, monkeypatch):
+        monkeypatch.setattr(
+            "cloudtik.core._private.cluster.cluster_operator.get_default_cloud_storage",
+            lambda config: None)
+        provider = FakeNodeProvider(10, num_not_ready=3, latency=0)
+        cluster_info = _get_cluster_info(CONFIG, provider)
+        assert cluster_info["head-id"] == "head"
+        assert cluster_info["head-ssh-ip"] == "10.0.0.0"
+        assert cluster_info["total-workers"] == 10
+        assert cluster_info["total-workers-ready"] == 7
+        assert cluster_info["total-worker-cpus"] == 80
+        assert cluster_info["total-worker-cpus-ready"] == 56
+        assert provider.num_calls == 12
+
+    def test_benchmark_1000_nodes(self):
+        num_workers = 1000
+        provider = FakeNodeProvider(num_workers)
+        start = time.time()
+        workers_info = _get_cluster_info_by_calls(CONFIG, provider)
+        by_calls_time = time.time() - start
+        by_calls_num_calls = provider.num_calls
+        assert len(workers_info) == num_workers
+
+        provider = FakeNodeProvider(num_workers)
+        start = time.time()
+        cluster_info = _get_cluster_info(CONFIG, provider, simple_config=True)
+        inventory_time = time.time() - start
+        assert cluster_info["total-workers"] == num_workers
+        assert provider.num_calls == num_workers + 2
+        assert provider.num_calls < by_calls_num_calls
+        assert inventory_time < by_calls_time
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
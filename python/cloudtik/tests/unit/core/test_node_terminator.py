@@ -0,0 +1,111 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.node_terminator import NodeTerminator, \
+    wait_for_nodes_terminated, get_terminate_batch_size, split_batches
+from cloudtik.core.node_provider import NodeProvider
+
+# The latency of a terminate request
+TERMINATE_LATENCY_S = 0.05
+# The seconds for a terminated node to disappear from the listing
+TERMINATE_DELAY_S = 0.3
+
+
+class FakeNodeProvider(NodeProvider):
+    """A provider terminating nodes with latency and delay."""
+
+    def __init__(self, num_nodes, max_terminate_nodes=None):
+        super().__init__({}, "test")
+        self._max_terminate_nodes = max_terminate_nodes
+        self.nodes = {"node-{}".format(i): None for i in range(num_nodes)}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def max_terminate_nodes(self):
+        return self._max_terminate_nodes
+
+    def non_terminated_nodes(self, tag_filters):
+        now = time.time()
+        with self._lock:
+            return [node for node, terminate_time in self.nodes.items()
+                    if terminate_time is None or now < terminate_time]
+
+    def terminate_nodes(self, node_ids):
+        assert self._max_terminate_nodes is None or len(
+            node_ids) <= self._max_terminate_nodes
+        time.sleep(TERMINATE_LATENCY_S)
+        with self._lock:
+            self.requests.append(len(node_ids))
+            for node_id in node_ids:
+                if self.nodes[node_id] is None:
+                    self.nodes[node_id] = time.time() + TERMINATE_DELAY_S
+
+
+class OneByOneNodeProvider(FakeNodeProvider):
+    terminate_nodes = NodeProvider.terminate_nodes
+
+    def terminate_node(self, node_id):
+        FakeNodeProvider.terminate_nodes(self, [node_id])
+
+
+class TestNodeTerminator:
+    def test_batch_size(self):
+        assert get_terminate_batch_size(FakeNodeProvider(1)) is None
+        assert get_terminate_batch_size(FakeNodeProvider(1, 100)) == 100
+        assert get_terminate_batch_size(OneByOneNodeProvider(1)) == 1
+        assert split_batches(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+        assert split_batches(list(range(5)), None) == [list(range(5))]
+        assert split_batches([], None) == []
+
+    def test_batches(self):
+        provider = FakeNodeProvider(500, max_terminate_nodes=200)
+        with NodeTerminator(provider) as terminator:
+            for node in list(provider.nodes):
+                terminator.add(node)
+        assert sorted(provider.requests) == [100, 200, 200]
+        assert all(terminate_time is not None
+                   for terminate_time in provider.nodes.values())
+
+    def test_linger(self):
+        provider = FakeNodeProvider(10)
+        with NodeTerminator(provider, linger=0.05) as terminator:
+            terminator.add("node-0")
+            time.sleep(0.3)
+            # The node is terminated before closing
+            assert provider.requests == [1]
+            for i in range(1, 10):
+                terminator.add("node-{}".format(i))
+        assert sum(provider.requests) == 10
+
+    def test_wait_for_terminated(self):
+        provider = OneByOneNodeProvider(500)
+        start = time.time()
+        num_polls, waited = wait_for_nodes_terminated(
+            provider, lambda: provider.non_terminated_nodes({}))
+        elapsed = time.time() - start
+        assert not provider.non_terminated_nodes({})
+        assert len(provider.requests) == 500
+        # The nodes are terminated by parallel requests and
+        # with the polling backoff from a short interval
+        assert elapsed < 500 * TERMINATE_LATENCY_S / 4
+        assert num_polls <= 4
+
+    def test_wait_for_requested(self):
+        provider = OneByOneNodeProvider(500)
+        with NodeTerminator(provider) as terminator:
+            for node in list(provider.nodes):
+                terminator.add(node)
+        assert len(terminator.requested) == 500
+        wait_for_nodes_terminated(
+            provider, lambda: provider.non_terminated_nodes({}),
+            requested=terminator.requested)
+        assert not provider.non_terminated_nodes({})
+        # The nodes requested by the terminator are not requested again
+        assert len(provider.requests) == 500
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,157 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.call_context import CallContext
+from cloudtik.core._private.parallel_executor import AdaptiveParallelExecutor, \
+    ConcurrencyController, get_retry_delay, TASK_SUCCEEDED, TASK_FAILED, TASK_TIMEOUT, \
+    TASK_RETRYING
+from cloudtik.core._private.subprocess_output_util import ProcessRunnerError
+from cloudtik.core._private.utils import run_in_parallel_on_nodes, ParallelTaskSkipped, \
+    is_node_connection_error
+
+
+class _RunningCounter:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.running -= 1
+
+
+class TestConcurrencyController:
+    def test_slow_start_and_decrease(self):
+        controller = ConcurrencyController(64, initial_concurrency=4)
+        for _ in range(20):
+            controller.on_complete(0.1, failed=False)
+        assert controller.concurrency == 24
+
+        # Halved once in a round for the errors
+        for _ in range(6):
+            controller.on_complete(0.1, failed=True)
+        assert controller.concurrency == 12
+        assert not controller.slow_start
+        for _ in range(12):
+            controller.on_complete(0.1, failed=True)
+        assert controller.concurrency == 6
+
+        controller = ConcurrencyController(64, initial_concurrency=16)
+        controller.on_complete(0.1, failed=False)
+        for _ in range(32):
+            controller.on_complete(1.0, failed=False)
+        # Decreased for the degraded latency
+        assert controller.concurrency < 17
+
+    def test_min_concurrency(self):
+        controller = ConcurrencyController(8, min_concurrency=2, initial_concurrency=8)
+        for _ in range(100):
+            controller.on_complete(0.1, failed=True)
+        assert controller.concurrency == 2
+
+    def test_retry_delay(self):
+        for attempt in range(1, 10):
+            delay = get_retry_delay(attempt, 1.0)
+            assert min(30.0, 2 ** (attempt - 1)) / 2 <= delay <= min(30.0, 2 ** (attempt - 1))
+
+
+class TestAdaptiveParallelExecutor:
+    def test_completion_order(self):
+        completed = []
+
+        def task(item):
+            time.sleep(0.2 if item == 0 else 0.01)
+            return item * 2
+
+        executor = AdaptiveParallelExecutor(
+            max_workers=8, on_progress=lambda r: completed.append(r.item))
+        results = executor.run(task, list(range(8)))
+        assert all(results[i].result == i * 2 for i in range(8))
+        # The slow one is reported last
+        assert completed[-1] == 0
+
+    def test_concurrency_limited_with_errors(self):
+        counter = _RunningCounter()
+
+        def task(item):
+            with counter:
+                time.sleep(0.01)
+                raise RuntimeError("error")
+
+        executor = AdaptiveParallelExecutor(max_workers=32, initial_workers=16)
+        results = executor.run(task, list(range(200)))
+        assert all(r.status == TASK_FAILED for r in results.values())
+        assert executor.controller.concurrency == 1
+        assert counter.max_running <= 16
+
+    def test_timeout_and_retry(self):
+        attempts = {}
+        reported = []
+
+        def task(item):
+            attempts[item] = attempts.get(item, 0) + 1
+            if item == "slow":
+                time.sleep(1.5)
+            elif item == "flaky" and attempts[item] < 3:
+                raise ValueError("flaky")
+            return item
+
+        executor = AdaptiveParallelExecutor(
+            max_workers=4, timeout=0.5, retries=2, retry_backoff=0.01,
+            retry_on=lambda e: isinstance(e, ValueError),
+            on_progress=lambda r: reported.append(r.status))
+        results = executor.run(task, ["slow", "flaky", "ok"])
+        assert results["slow"].status == TASK_TIMEOUT
+        assert results["flaky"].status == TASK_SUCCEEDED
+        assert results["flaky"].attempts == 3
+        assert results["ok"].succeeded
+        assert reported.count(TASK_RETRYING) == 2
+
+
+class TestRunInParallelOnNodes:
+    def test_run_in_parallel_on_nodes(self):
+        attempts = {}
+
+        def run_exec(node_id, call_context):
+            assert call_context.is_output_redirected()
+            attempts[node_id] = attempts.get(node_id, 0) + 1
+            if node_id == "skipped":
+                raise ParallelTaskSkipped("skipped")
+            if node_id == "failed":
+                raise RuntimeError("failed")
+            if node_id == "unreachable" and attempts[node_id] == 1:
+                raise ProcessRunnerError(
+                    "ssh failed", "ssh_command_failed", code=255,
+                    special_case="ssh_conn_refused")
+
+        call_context = CallContext()
+        nodes = ["node-{}".format(i) for i in range(10)] + [
+            "skipped", "failed", "unreachable"]
+        succeeded, failures, skipped = run_in_parallel_on_nodes(
+            run_exec, call_context, nodes)
+        assert (succeeded, failures, skipped) == (11, 1, 1)
+        # Retried only for the connection error
+        assert attempts["unreachable"] == 2
+        assert attempts["failed"] == 1
+        assert attempts["skipped"] == 1
+        assert not call_context.is_output_redirected()
+
+    def test_is_node_connection_error(self):
+        assert is_node_connection_error(ProcessRunnerError(
+            "ssh failed", "ssh_command_failed", special_case="ssh_timeout"))
+        assert not is_node_connection_error(ProcessRunnerError(
+            "ssh failed", "ssh_command_failed", code=1))
+        assert not is_node_connection_error(RuntimeError())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,49 @@
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.scaling_simulator import ScalingSimulator, \
+    SimulatedClock, SimulatedNodeProvider, get_simulation_config, step_demand_trace, \
+    run_benchmark
+
+WORKER_RESOURCES = {"CPU": 4}
+
+
+def test_scale_up_and_down():
+    report = run_benchmark(10, boot_delay_s=30)
+    assert report.peak_workers == 10
+    assert report.num_launched == 10
+    assert len(report.time_to_capacity_s) == 1
+    # Not before the nodes booted
+    assert 30 <= report.time_to_capacity_s[0] < 300
+    assert report.over_provisioning_peak == 0
+    assert report.provider_calls["create_node"] >= 1
+    assert report.cycle_latency_max_s >= report.cycle_latency_p50_s > 0
+    assert "10 nodes" in report.summary()
+
+
+def test_failures():
+    duration_s = 1200
+    clock = SimulatedClock(time.time() - duration_s - 1)
+    provider = SimulatedNodeProvider(
+        clock, boot_delay_s=lambda node_type, rng: rng.uniform(10, 60),
+        boot_failure_rate=0.5, create_failures=1, seed=1)
+    simulator = ScalingSimulator(
+        get_simulation_config(8, WORKER_RESOURCES),
+        provider,
+        step_demand_trace(8, WORKER_RESOURCES, hold_s=500, num_steps=2))
+    report = simulator.run(duration_s)
+
+    assert report.num_boot_failures > 0
+    # The failed nodes are replaced
+    assert report.num_launched == 8 + report.num_boot_failures
+    assert all(t is not None for t in report.time_to_capacity_s)
+    assert len(report.time_to_capacity_s) == 2
+    # Scaled down after the demands are gone
+    assert provider.get_nodes(["pending", "running"]) == {
+        simulator.head_id: provider.get_nodes(["running"])[simulator.head_id]}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
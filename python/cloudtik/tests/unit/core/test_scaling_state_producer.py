@@ -0,0 +1,114 @@
+import dataclasses
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
+from cloudtik.core._private.cluster.cluster_metrics_updater import ClusterMetricsUpdater
+from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
+from cloudtik.core._private.cluster.scaling_state_producer import ScalingStateProducer
+from cloudtik.core._private.state.scaling_state import ClusterHeartbeatState, NodeHeartbeatState
+from cloudtik.core.scaling_policy import ScalingState
+
+
+class FakeScalingStateClient:
+    def __init__(self, num_nodes=3):
+        self.num_nodes = num_nodes
+        self.fail = False
+
+    def get_cluster_heartbeat_state(self, timeout=None):
+        if self.fail:
+            raise ConnectionError("Redis is down.")
+        cluster_heartbeat_state = ClusterHeartbeatState()
+        for i in range(self.num_nodes):
+            node_id = "node-{}".format(i)
+            cluster_heartbeat_state.add_heartbeat_state(
+                node_id, NodeHeartbeatState(node_id, "10.0.0.{}".format(i), time.time()))
+        return cluster_heartbeat_state
+
+    def get_scaling_state(self, timeout=None):
+        scaling_state = ScalingState()
+        scaling_state.add_node_resource_state("node-0", {
+            "node_ip": "10.0.0.0",
+            "resource_time": time.time(),
+            "total_resources": {"CPU": 4},
+            "available_resources": {"CPU": 1},
+            "resource_load": {},
+        })
+        return scaling_state
+
+
+class SlowResourceScalingPolicy:
+    """A scaling policy blocking on a slow endpoint."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.num_updates = 0
+        self.release = threading.Event()
+
+    def update(self, step_timer=None):
+        self.num_updates += 1
+        if self.num_updates > 1:
+            self.release.wait(self.delay)
+
+
+def _new_updater(scaling_state_client):
+    return ClusterMetricsUpdater(
+        ClusterMetrics(), EventSummarizer(), scaling_state_client)
+
+
+class TestScalingStateProducer:
+    def test_collect_and_apply(self):
+        updater = _new_updater(FakeScalingStateClient())
+        snapshot = updater.collect()
+        # Nothing is applied by collecting
+        assert not updater.cluster_metrics.last_heartbeat_time_by_ip
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.time = 0
+
+        updater.apply(snapshot)
+        assert len(updater.cluster_metrics.last_heartbeat_time_by_ip) == 3
+        assert updater.cluster_metrics.static_resources_by_ip["10.0.0.0"] == {"CPU": 4}
+
+    def test_collect_failure(self):
+        client = FakeScalingStateClient()
+        client.fail = True
+        updater = _new_updater(client)
+        snapshot = updater.collect()
+        assert snapshot.cluster_heartbeat_state is None
+        updater.apply(snapshot)
+        assert not updater.cluster_metrics.last_heartbeat_time_by_ip
+        assert updater.cluster_metrics_failures == 1
+
+    def test_not_blocked_by_slow_policy(self):
+        policy = SlowResourceScalingPolicy(delay=10)
+        updater = _new_updater(FakeScalingStateClient())
+        producer = ScalingStateProducer(policy, updater, update_interval_s=0.01)
+        producer.start()
+        try:
+            first = producer.get_latest(timeout=5)
+            assert first is not None
+            # The producer is blocked in the second round by the slow endpoint
+            while policy.num_updates < 2:
+                time.sleep(0.01)
+            start = time.time()
+            latest = producer.get_latest()
+            assert time.time() - start < 0.1
+            assert latest is first
+
+            # A new snapshot is published once the endpoint returns
+            policy.release.set()
+            while producer.get_latest() is first:
+                time.sleep(0.01)
+            assert producer.get_latest().time > first.time
+        finally:
+            producer.stop()
+            policy.release.set()
+            producer.join(5)
+        assert not producer.is_alive()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,106 @@
+import json
+import sys
+import threading
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_operator import debug_timeline_string
+from cloudtik.core._private.tracing import Tracer, TraceRecorder, format_trace_timeline, \
+    SPAN_STATUS_OK, SPAN_STATUS_ERROR
+
+
+def _trace_update(node_ip, fail=False):
+    tracer = Tracer("update_node", {"node_id": "node-" + node_ip})
+    tracer.set_attribute("node_ip", node_ip)
+    with tracer.span("wait_for_ssh"):
+        time.sleep(0.02)
+    with tracer.span("sync_file_mounts"):
+        time.sleep(0.01)
+    try:
+        with tracer.span("setup_commands"):
+            with tracer.span("setup_command", command="pip install"):
+                if fail:
+                    raise RuntimeError("Setup command failed.")
+        tracer.finish()
+    except RuntimeError as e:
+        tracer.finish(e)
+    return tracer
+
+
+class TestTracing:
+    def test_spans(self):
+        tracer = _trace_update("10.0.0.1")
+        trace = tracer.to_dict()
+        assert trace["status"] == SPAN_STATUS_OK
+        names = [span["name"] for span in trace["spans"]]
+        assert names == ["wait_for_ssh", "sync_file_mounts", "setup_commands", "setup_command"]
+        # Nested under the innermost open span
+        spans = {span["name"]: span for span in trace["spans"]}
+        assert spans["wait_for_ssh"]["parent_id"] == trace["span_id"]
+        assert spans["setup_command"]["parent_id"] == spans["setup_commands"]["span_id"]
+        assert spans["setup_command"]["attributes"]["command"] == "pip install"
+
+        durations = tracer.get_phase_durations()
+        assert durations["wait_for_ssh"] >= 0.02
+        assert durations["wait_for_ssh"] > durations["setup_commands"]
+        # Can be serialized as JSON
+        json.dumps(trace)
+
+    def test_span_error(self):
+        trace = _trace_update("10.0.0.2", fail=True).to_dict()
+        assert trace["status"] == SPAN_STATUS_ERROR
+        assert trace["error"] == "Setup command failed."
+        assert all(span["status"] == SPAN_STATUS_ERROR
+                   for span in trace["spans"] if span["name"].startswith("setup"))
+
+    def test_threads(self):
+        tracer = Tracer("launch")
+
+        def run(i):
+            with tracer.span("outer-{}".format(i)):
+                time.sleep(0.01)
+                with tracer.span("inner-{}".format(i)):
+                    pass
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        spans = {span.name: span for span in tracer.spans}
+        for i in range(4):
+            # The spans of other threads are not parents
+            assert spans["inner-{}".format(i)].parent_id == spans["outer-{}".format(i)].span_id
+
+    def test_recorder(self):
+        recorder = TraceRecorder(max_traces=2)
+        assert recorder.get_changed_traces() is None
+        for i in range(3):
+            recorder.add(_trace_update("10.0.0.{}".format(i)).to_dict())
+        traces = recorder.get_changed_traces()
+        assert [t["attributes"]["node_ip"] for t in traces] == ["10.0.0.1", "10.0.0.2"]
+        assert recorder.get_changed_traces() is None
+
+    def test_timeline(self):
+        trace = _trace_update("10.0.0.1").to_dict()
+        lines = format_trace_timeline(trace, bar_width=20)
+        assert lines[0].startswith("update_node")
+        assert len(lines) == 5
+        assert all(line.count("|") == 2 for line in lines[1:])
+        # The first phase starts at the beginning
+        assert lines[1].split("|")[1].startswith("#")
+
+        timeline = json.dumps([
+            trace, _trace_update("10.0.0.2", fail=True).to_dict()]).encode()
+        output = debug_timeline_string(timeline)
+        assert "Phase summary of 2 traces" in output
+        assert "wait_for_ssh" in output
+        output = debug_timeline_string(timeline, node_ip="10.0.0.2")
+        assert "Phase summary of 1 traces" in output
+        assert "Setup command failed." in output
+        assert debug_timeline_string(None) == "No node timeline recorded."
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
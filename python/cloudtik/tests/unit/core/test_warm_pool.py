@@ -0,0 +1,139 @@
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_scaler import NonTerminatedNodes
+from cloudtik.core._private.cluster.event_summarizer import EventSummarizer
+from cloudtik.core._private.cluster.warm_pool import WarmPool
+from cloudtik.core._private.utils import hash_launch_conf
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_STATUS, CLOUDTIK_TAG_RUNTIME_CONFIG, \
+    CLOUDTIK_TAG_WARM_POOL, CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_USER_NODE_TYPE, \
+    CLOUDTIK_TAG_LAUNCH_CONFIG, CLOUDTIK_TAG_WARM_POOL_TIME, STATUS_UP_TO_DATE, STATUS_UNINITIALIZED, \
+    WARM_POOL_FILLING, WARM_POOL_WARM, NODE_KIND_WORKER, NODE_KIND_HEAD
+from cloudtik.providers._private.local.local_node_provider import LocalNodeProvider
+
+RUNTIME_HASH = "runtime-hash"
+NODE_CONFIG = {"instance_type": "m"}
+CONFIG = {
+    "cluster_name": "test",
+    "auth": {},
+    "available_node_types": {
+        "worker": {
+            "node_config": NODE_CONFIG,
+            "resources": {},
+            "warm_pool_size": 2,
+            "warm_pool_max_age": 600,
+        },
+    },
+}
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "cloudtik.core._private.utils.get_user_temp_dir", lambda: str(tmp_path))
+    provider_config = {
+        "type": "local",
+        "nodes": [{"ip": "127.0.0.{}".format(i), "instance_type": "m"}
+                  for i in range(1, 6)],
+    }
+    provider = LocalNodeProvider(provider_config, "test")
+    # The head node
+    provider.create_node(NODE_CONFIG, {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_HEAD}, 1)
+    return provider
+
+
+def _wait_for_launches(warm_pool):
+    deadline = time.time() + 5
+    while warm_pool.pending.value > 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert warm_pool.pending.value == 0
+
+
+def _set_up(provider, node_ids):
+    # What the node updaters do
+    for node_id in node_ids:
+        provider.set_node_tags(node_id, {
+            CLOUDTIK_TAG_NODE_STATUS: STATUS_UP_TO_DATE,
+            CLOUDTIK_TAG_RUNTIME_CONFIG: RUNTIME_HASH})
+
+
+def test_warm_pool(provider):
+    warm_pool = WarmPool(
+        provider, EventSummarizer(),
+        is_node_up_to_date=lambda node_id, node_tags: node_tags.get(
+            CLOUDTIK_TAG_RUNTIME_CONFIG) == RUNTIME_HASH)
+
+    # Fill the pool
+    assert warm_pool.update(CONFIG, [], {}) == []
+    _wait_for_launches(warm_pool)
+    nodes = NonTerminatedNodes(provider)
+    assert len(nodes.warm_pool_ids) == 2
+    # Not regarded as the workers of the cluster
+    assert nodes.worker_ids == []
+    assert nodes.all_node_ids == [nodes.head_id]
+    for node_id in nodes.warm_pool_ids:
+        assert provider.node_tags(node_id)[CLOUDTIK_TAG_WARM_POOL] == WARM_POOL_FILLING
+
+    # Stopped after set up
+    assert warm_pool.update(CONFIG, nodes.warm_pool_ids, {nodes.warm_pool_ids[0]: None}) == []
+    _set_up(provider, nodes.warm_pool_ids)
+    stopped = warm_pool.update(CONFIG, nodes.warm_pool_ids, {})
+    assert sorted(stopped) == sorted(nodes.warm_pool_ids)
+    assert warm_pool.pending.value == 0
+    assert NonTerminatedNodes(provider).warm_pool_ids == []
+    warm_nodes = provider.stopped_nodes({CLOUDTIK_TAG_USER_NODE_TYPE: "worker"})
+    assert len(warm_nodes) == 2
+    assert all(tags[CLOUDTIK_TAG_WARM_POOL] == WARM_POOL_WARM for tags in warm_nodes.values())
+
+    # Resumed first when scaling up with the setup applied
+    launch_tags = {
+        CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER,
+        CLOUDTIK_TAG_USER_NODE_TYPE: "worker",
+        CLOUDTIK_TAG_NODE_STATUS: STATUS_UNINITIALIZED,
+        CLOUDTIK_TAG_LAUNCH_CONFIG: hash_launch_conf(NODE_CONFIG, {}),
+    }
+    provider.create_node(NODE_CONFIG, launch_tags, 1)
+    nodes = NonTerminatedNodes(provider)
+    assert len(nodes.worker_ids) == 1
+    assert nodes.worker_ids[0] in warm_nodes
+    assert provider.node_tags(nodes.worker_ids[0])[CLOUDTIK_TAG_RUNTIME_CONFIG] == RUNTIME_HASH
+    # Not in the warm pool anymore
+    assert CLOUDTIK_TAG_WARM_POOL not in provider.node_tags(nodes.worker_ids[0])
+    assert CLOUDTIK_TAG_WARM_POOL_TIME not in provider.node_tags(nodes.worker_ids[0])
+
+    # Refilled
+    warm_pool.update(CONFIG, [], {})
+    _wait_for_launches(warm_pool)
+    assert len(NonTerminatedNodes(provider).warm_pool_ids) == 1
+
+
+def test_warm_pool_prune(provider):
+    warm_pool = WarmPool(
+        provider, EventSummarizer(),
+        is_node_up_to_date=lambda node_id, node_tags: node_tags.get(
+            CLOUDTIK_TAG_RUNTIME_CONFIG) == RUNTIME_HASH)
+    warm_pool.update(CONFIG, [], {})
+    _wait_for_launches(warm_pool)
+    filling = NonTerminatedNodes(provider).warm_pool_ids
+    _set_up(provider, filling)
+    now = time.time()
+    warm_pool.update(CONFIG, filling, {}, now=now)
+
+    # Outdated
+    provider.set_node_tags(filling[0], {CLOUDTIK_TAG_RUNTIME_CONFIG: "outdated"})
+    warm_pool.update(CONFIG, [], {}, now=now)
+    _wait_for_launches(warm_pool)
+    assert list(provider.stopped_nodes({})) == [filling[1]]
+    assert len(NonTerminatedNodes(provider).warm_pool_ids) == 1
+
+    # Expired
+    warm_pool.update(CONFIG, NonTerminatedNodes(provider).warm_pool_ids, {}, now=now + 1000)
+    _wait_for_launches(warm_pool)
+    assert provider.stopped_nodes({}) == {}
+    assert len(NonTerminatedNodes(provider).warm_pool_ids) == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
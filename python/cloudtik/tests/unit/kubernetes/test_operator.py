@@ -0,0 +1,245 @@
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from cloudtik.core.tags import CLOUDTIK_TAG_CLUSTER_NAME, CLOUDTIK_TAG_NODE_KIND, \
+    NODE_KIND_HEAD, NODE_KIND_WORKER
+from cloudtik.providers.kubernetes.cloudtik_operator import operator, operator_utils
+from cloudtik.providers.kubernetes.cloudtik_operator.operator_utils import (
+    STATUS_RECOVERING,
+    STATUS_RUNNING,
+    STATUS_UPDATING,
+)
+
+
+POD_CREATION_TIME = datetime(2024, 1, 1)
+
+
+def _pod(name, node_kind, pod_ip=None, phase="Running", age=0,
+         terminating=False, cluster_name="c1", namespace="ns", resource_version="1"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(
+            name=name, namespace=namespace, resource_version=resource_version,
+            creation_timestamp=POD_CREATION_TIME - timedelta(seconds=age),
+            deletion_timestamp=POD_CREATION_TIME if terminating else None,
+            labels={CLOUDTIK_TAG_CLUSTER_NAME: cluster_name,
+                    CLOUDTIK_TAG_NODE_KIND: node_kind}),
+        status=SimpleNamespace(phase=phase, pod_ip=pod_ip))
+
+
+def _bookmark(resource_version):
+    return {"type": "BOOKMARK", "object": SimpleNamespace(
+        metadata=SimpleNamespace(resource_version=resource_version))}
+
+
+class FakeCoreApi:
+    """Return the pod lists in order and the last one for the further lists."""
+
+    def __init__(self, pod_lists):
+        self.pod_lists = pod_lists
+        self.lists = 0
+
+    def list_namespaced_pod(self, namespace, label_selector=None, **kwargs):
+        pods, resource_version = self.pod_lists[min(self.lists, len(self.pod_lists) - 1)]
+        self.lists += 1
+        return SimpleNamespace(
+            items=pods, metadata=SimpleNamespace(resource_version=resource_version))
+
+
+class FakeWatch:
+    """Stream the events or raise the errors of each watch in order."""
+    watches = []
+    resource_versions = []
+
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def stream(self, func, *args, **kwargs):
+        FakeWatch.resource_versions.append(kwargs["resource_version"])
+        events = FakeWatch.watches.pop(0) if FakeWatch.watches else []
+        if isinstance(events, Exception):
+            raise events
+        for event in events:
+            yield event
+
+
+@pytest.fixture
+def core_api(monkeypatch):
+    def set_pod_lists(*pod_lists):
+        api = FakeCoreApi(list(pod_lists))
+        monkeypatch.setattr(operator_utils, "core_api", lambda: api)
+        return api
+
+    FakeWatch.watches = []
+    FakeWatch.resource_versions = []
+    monkeypatch.setattr(operator_utils.watch, "Watch", FakeWatch)
+    return set_pod_lists
+
+
+@pytest.fixture
+def status_calls(monkeypatch):
+    calls = []
+
+    def set_status(cluster_name, cluster_namespace, status, scaler_retries_increment=None):
+        calls.append((cluster_name, cluster_namespace, status, scaler_retries_increment))
+
+    monkeypatch.setattr(operator_utils, "set_status", set_status)
+    return calls
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+class TestStatusHandling:
+    def test_flush_status(self, status_calls, monkeypatch):
+        operator.flush_status({
+            ("c1", "ns"): [STATUS_RUNNING, True],
+            ("c2", "ns"): [STATUS_UPDATING, False],
+        })
+        assert sorted(status_calls) == [
+            ("c1", "ns", STATUS_RUNNING, 1),
+            ("c2", "ns", STATUS_UPDATING, 0)]
+
+    def test_flush_status_error(self, status_calls, monkeypatch):
+        set_status = operator_utils.set_status
+
+        def set_status_with_error(cluster_name, *args, **kwargs):
+            if cluster_name == "c1":
+                raise RuntimeError("Patch failed")
+            set_status(cluster_name, *args, **kwargs)
+
+        monkeypatch.setattr(operator_utils, "set_status", set_status_with_error)
+        # The error of a cluster doesn't stop the others
+        operator.flush_status({
+            ("c1", "ns"): [STATUS_RUNNING, False],
+            ("c2", "ns"): [STATUS_RUNNING, False],
+        })
+        assert status_calls == [("c2", "ns", STATUS_RUNNING, 0)]
+
+    def test_coalesce(self, status_calls, monkeypatch):
+        monkeypatch.setattr(operator_utils, "STATUS_BATCH_INTERVAL_S", 60)
+        status_queue = queue.Queue()
+        for item in [("c1", "ns", STATUS_UPDATING),
+                     ("c2", "ns", STATUS_UPDATING),
+                     ("c1", "ns", STATUS_RECOVERING),
+                     ("c1", "ns", STATUS_UPDATING),
+                     ("c2", "ns", STATUS_RUNNING),
+                     None]:
+            status_queue.put(item)
+        # The pending updates are flushed on stop
+        operator.status_handling_loop(status_queue)
+        # One patch per cluster with the latest phase and one retry
+        # for the recovering in between
+        assert sorted(status_calls) == [
+            ("c1", "ns", STATUS_UPDATING, 1),
+            ("c2", "ns", STATUS_RUNNING, 0)]
+
+    def test_batch_interval(self, status_calls, monkeypatch):
+        monkeypatch.setattr(operator_utils, "STATUS_BATCH_INTERVAL_S", 0.1)
+        status_queue = queue.Queue()
+        handler = threading.Thread(
+            target=operator.status_handling_loop, args=(status_queue,))
+        handler.start()
+        try:
+            status_queue.put(("c1", "ns", STATUS_UPDATING))
+            # Flushed after the interval without waiting for more updates
+            _wait_for(lambda: len(status_calls) == 1)
+            assert status_calls == [("c1", "ns", STATUS_UPDATING, 0)]
+
+            status_queue.put(("c1", "ns", STATUS_RECOVERING))
+            _wait_for(lambda: len(status_calls) == 2)
+            assert status_calls[1] == ("c1", "ns", STATUS_RECOVERING, 1)
+        finally:
+            status_queue.put(None)
+            handler.join()
+        assert len(status_calls) == 2
+
+
+class TestPodInformer:
+    def test_list_and_watch(self, core_api):
+        core_api(([_pod("head-1", NODE_KIND_HEAD, "10.0.0.1"),
+                   _pod("worker-1", NODE_KIND_WORKER, "10.0.0.2")], "10"))
+        informer = operator_utils.PodInformer("ns")
+        assert informer.get_head_pod_ip("ns", "c1") is None
+        assert informer._list() == "10"
+        assert informer.has_synced()
+        assert informer.get_head_pod_ip("ns", "c1") == "10.0.0.1"
+        assert informer.get_head_pod_ip("ns", "c2") is None
+        assert informer.get_head_pod_ip("other", "c1") is None
+
+        # The head is replaced: the old one is terminating and then deleted
+        FakeWatch.watches = [[
+            {"type": "MODIFIED", "object": _pod(
+                "head-1", NODE_KIND_HEAD, "10.0.0.1", terminating=True,
+                resource_version="11")},
+            {"type": "ADDED", "object": _pod(
+                "head-2", NODE_KIND_HEAD, phase="Pending", resource_version="12")},
+        ], [
+            {"type": "DELETED", "object": _pod(
+                "head-1", NODE_KIND_HEAD, "10.0.0.1", resource_version="13")},
+            {"type": "MODIFIED", "object": _pod(
+                "head-2", NODE_KIND_HEAD, "10.0.0.3", resource_version="14")},
+            _bookmark("20"),
+        ]]
+        assert informer._watch_from("10") == "12"
+        # The terminating head is not returned
+        assert informer.get_head_pod_ip("ns", "c1") is None
+        # Watch from the last resource version
+        assert informer._watch_from("12") == "20"
+        assert FakeWatch.resource_versions == ["10", "12"]
+        assert informer.get_head_pod_ip("ns", "c1") == "10.0.0.3"
+        assert [pod.metadata.name for pod in informer.get_cluster_pods("ns", "c1")] == [
+            "worker-1", "head-2"]
+
+    def test_newest_head(self, core_api):
+        core_api(([_pod("head-1", NODE_KIND_HEAD, "10.0.0.1", age=60),
+                   _pod("head-2", NODE_KIND_HEAD, "10.0.0.2"),
+                   _pod("head-3", NODE_KIND_HEAD, "10.0.0.3", phase="Failed", age=-60)],
+                  "10"))
+        informer = operator_utils.PodInformer("ns")
+        informer._list()
+        # The deletion of the old head is not seen yet
+        assert informer.get_head_pod_ip("ns", "c1") == "10.0.0.2"
+
+    def test_relist_on_gone(self, core_api, monkeypatch):
+        # No delay before listing again for the resource version too old
+        monkeypatch.setattr(operator_utils, "DELAY_BEFORE_POD_RELIST", 60)
+        api = core_api(([_pod("head-1", NODE_KIND_HEAD, "10.0.0.1")], "10"),
+                       ([_pod("head-2", NODE_KIND_HEAD, "10.0.0.2")], "30"))
+        informer = operator_utils.PodInformer("ns")
+        FakeWatch.watches = [
+            [_bookmark("20")],
+            ApiException(status=operator_utils.HTTP_STATUS_GONE, reason="Gone"),
+        ]
+        informer.start()
+        try:
+            _wait_for(lambda: informer.get_head_pod_ip("ns", "c1") == "10.0.0.2")
+            assert api.lists == 2
+            _wait_for(lambda: len(FakeWatch.resource_versions) >= 3)
+            assert FakeWatch.resource_versions[:3] == ["10", "20", "30"]
+        finally:
+            informer.stop()
+            informer._thread.join(5)
+        assert not informer._thread.is_alive()
+
+
+def test_controller_process_spawned():
+    # The controllers are not forked from the threads of the operator
+    assert operator.mp_context.get_start_method() == "spawn"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,132 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cloudtik.runtime.ml.runner.cpu import autotune_launcher
+from cloudtik.runtime.ml.runner.cpu.autotune_launcher import AutoTuneLauncher, \
+    get_ncore_per_instance_choices, apply_launch_profile, get_allocator_args, \
+    get_binding_args, ALLOCATOR_DEFAULT, ALLOCATOR_TCMALLOC, ALLOCATOR_JEMALLOC, \
+    BINDING_NUMACTL, BINDING_TASKSET
+from cloudtik.runtime.ml.runner.cpu.multi_instance_launcher import wait_for_instances
+
+METRIC_PATTERN = r"throughput: ([0-9.]+)"
+
+
+def _get_launcher(autotune_metric):
+    # Without the CPU info which is not used for the metric
+    launcher = AutoTuneLauncher.__new__(AutoTuneLauncher)
+    launcher.args = argparse.Namespace(
+        autotune_metric=autotune_metric, program_args=[])
+    return launcher
+
+
+class FakeMultiInstanceLauncher:
+    """Write a log with the metric for each instance instead of running."""
+
+    def __init__(self, args):
+        self.args = args
+
+    def launch(self):
+        self.args.ninstances = 2
+        for i in range(self.args.ninstances):
+            _write_log(
+                self.args.log_path,
+                "{}_instance_{}_cores_{}.log".format(self.args.log_file_prefix, i, i),
+                ["throughput: 1"])
+
+
+def _write_log(log_path, name, lines):
+    with open(os.path.join(log_path, name), "w") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+class TestAutoTuneLauncher:
+    def test_ncore_per_instance_choices(self):
+        assert get_ncore_per_instance_choices(8, 2) == [1, 2, 4, 8, 16]
+        assert get_ncore_per_instance_choices(6, 1) == [1, 2, 4, 6]
+        assert get_ncore_per_instance_choices(1, 1) == [1]
+        assert get_ncore_per_instance_choices(1, 4) == [1, 4]
+
+    def test_allocator_and_binding_args(self):
+        assert get_allocator_args(ALLOCATOR_TCMALLOC) == {
+            "enable_tcmalloc": True, "enable_jemalloc": False, "use_default_allocator": False}
+        assert get_allocator_args(ALLOCATOR_JEMALLOC) == {
+            "enable_tcmalloc": False, "enable_jemalloc": True, "use_default_allocator": False}
+        assert get_allocator_args(ALLOCATOR_DEFAULT) == {
+            "enable_tcmalloc": False, "enable_jemalloc": False, "use_default_allocator": True}
+        assert get_binding_args(BINDING_NUMACTL) == {
+            "disable_numactl": False, "disable_taskset": True}
+        assert get_binding_args(BINDING_TASKSET) == {
+            "disable_numactl": True, "disable_taskset": False}
+
+    def test_apply_launch_profile(self):
+        args = argparse.Namespace(
+            ncore_per_instance=-1, ninstances=-1, enable_jemalloc=False,
+            latency_mode=True, throughput_mode=False)
+        apply_launch_profile(args, {"launch_args": {
+            "ncore_per_instance": 4, "ninstances": 2,
+            "enable_jemalloc": True, "unknown": 1}})
+        assert args.ncore_per_instance == 4
+        assert args.ninstances == 2
+        assert args.enable_jemalloc
+        # The profile decides the instances
+        assert not args.latency_mode
+        assert not args.throughput_mode
+        # Only the launch args are applied
+        assert not hasattr(args, "unknown")
+
+    def test_metric(self, tmp_path):
+        launcher = _get_launcher(METRIC_PATTERN)
+        assert launcher._get_metric(str(tmp_path), "trial_0") is None
+
+        # The last value of each instance is summed
+        _write_log(tmp_path, "trial_0_instance_0_cores_0-3.log",
+                   ["throughput: 1.5", "other", "throughput: 2.5"])
+        _write_log(tmp_path, "trial_0_instance_1_cores_4-7.log",
+                   ["throughput: 3"])
+        _write_log(tmp_path, "trial_1_instance_0_cores_0-7.log",
+                   ["throughput: 100"])
+        assert launcher._get_metric(str(tmp_path), "trial_0") == 5.5
+
+        # An instance without the metric fails the trial
+        _write_log(tmp_path, "trial_1_instance_1_cores_8-15.log", ["error"])
+        assert launcher._get_metric(str(tmp_path), "trial_1") is None
+
+    def test_trial_logs(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            autotune_launcher, "MultiInstanceLauncher", FakeMultiInstanceLauncher)
+        launcher = _get_launcher(METRIC_PATTERN)
+        # The logs of a previous run in the log path are not counted
+        _write_log(tmp_path, "trial_0_instance_0_cores_0.log", ["throughput: 100"])
+        config = {"ncore_per_instance": 1, "binding": BINDING_TASKSET,
+                  "allocator": ALLOCATOR_DEFAULT}
+        result = launcher.run_trial(0, config, str(tmp_path))
+        assert "error" not in result
+        assert result["throughput"] == 2
+        assert len(os.listdir(os.path.join(str(tmp_path), "trial_0"))) == 2
+
+
+class TestWaitForInstances:
+    def test_succeeded(self):
+        processes = [subprocess.Popen("exit 0", shell=True) for _ in range(3)]
+        wait_for_instances(processes)
+        assert all(process.returncode == 0 for process in processes)
+
+    def test_failed(self):
+        processes = [subprocess.Popen("sleep 30", shell=True),
+                     subprocess.Popen("sleep 0.2; exit 3", shell=True)]
+        start = time.time()
+        with pytest.raises(subprocess.CalledProcessError) as e:
+            wait_for_instances(processes)
+        assert e.value.returncode == 3
+        # The other instance is terminated without waiting for it
+        assert time.time() - start < 10
+        assert processes[0].poll() is not None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
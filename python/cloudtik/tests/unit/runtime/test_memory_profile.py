@@ -0,0 +1,101 @@
+import sys
+
+import pytest
+
+from cloudtik.runtime.common.memory_profile import get_query_memory_profile, \
+    get_query_max_memory, MEMORY_HEAP_HEADROOM_MAXIMUM
+
+NODE_MEMORY_MB = 131072
+MEMORY_PROFILES = [
+    {},
+    {"concurrency": 4},
+    {"spill_enabled": True},
+    {"reserved_memory_mb": 8192},
+    {"heap_headroom_ratio": 0.5},
+]
+
+
+def _get_runtime_config(*runtime_types):
+    return {"types": list(runtime_types)}
+
+
+def _get_config(memory_mb, min_workers, max_workers):
+    return {
+        "head_node_type": "head",
+        "available_node_types": {
+            "head": {"resources": {"memory": 4 * memory_mb * 1024 * 1024}},
+            "worker": {
+                "resources": {"memory": memory_mb * 1024 * 1024},
+                "min_workers": min_workers,
+                "max_workers": max_workers,
+            },
+        },
+    }
+
+
+class TestMemoryProfile:
+    @pytest.mark.parametrize("memory_profile", MEMORY_PROFILES)
+    @pytest.mark.parametrize("runtime_config", [
+        _get_runtime_config(), _get_runtime_config("hdfs", "kafka", "zookeeper")])
+    @pytest.mark.parametrize("memory_mb", [16384, 32768, NODE_MEMORY_MB])
+    def test_heap_invariant(self, memory_mb, runtime_config, memory_profile):
+        memory_configs = get_query_memory_profile(memory_mb, runtime_config, memory_profile)
+        jvm_max_memory = memory_configs["jvm_max_memory"]
+        headroom = memory_configs["memory_heap_headroom_per_node"]
+        assert 0 < jvm_max_memory < memory_mb
+        assert headroom <= MEMORY_HEAP_HEADROOM_MAXIMUM
+        assert 0 < memory_configs["query_max_memory_per_node"] <= \
+            memory_configs["query_max_total_memory_per_node"]
+        # The query memory and the headroom fit in the heap
+        assert memory_configs["query_max_memory_per_node"] + headroom <= jvm_max_memory
+        assert memory_configs["query_max_total_memory_per_node"] + headroom <= jvm_max_memory
+
+    def test_node_memory(self):
+        memory_configs = get_query_memory_profile(NODE_MEMORY_MB, _get_runtime_config(), {})
+        # 5% for the OS and the JVM non-heap memory capped at 8GB
+        assert memory_configs["jvm_max_memory"] == NODE_MEMORY_MB - 6553 - 8192
+        # The headroom is capped on large nodes
+        assert memory_configs["memory_heap_headroom_per_node"] == MEMORY_HEAP_HEADROOM_MAXIMUM
+        assert memory_configs["query_max_memory_per_node"] == int(
+            (memory_configs["jvm_max_memory"] - MEMORY_HEAP_HEADROOM_MAXIMUM) * 0.9)
+
+        concurrent = get_query_memory_profile(
+            NODE_MEMORY_MB, _get_runtime_config(), {"concurrency": 4})
+        assert concurrent["query_max_memory_per_node"] == int(
+            memory_configs["query_max_memory_per_node"] / 4)
+        # Spill allows a query to use all the query memory
+        spill = get_query_memory_profile(
+            NODE_MEMORY_MB, _get_runtime_config(), {"concurrency": 4, "spill_enabled": True})
+        assert spill["query_max_memory_per_node"] == memory_configs["query_max_memory_per_node"]
+
+        co_located = get_query_memory_profile(
+            NODE_MEMORY_MB, _get_runtime_config("hdfs", "kafka"), {})
+        assert co_located["jvm_max_memory"] == memory_configs["jvm_max_memory"] - 2048
+
+    def test_no_memory(self):
+        with pytest.raises(RuntimeError):
+            get_query_memory_profile(2048, _get_runtime_config(), {"reserved_memory_mb": 1024})
+
+    def test_query_max_memory(self):
+        runtime_config = _get_runtime_config()
+        config = _get_config(NODE_MEMORY_MB, 2, 10)
+        query_max_memory_per_node = get_query_memory_profile(
+            NODE_MEMORY_MB, runtime_config, {})["query_max_memory_per_node"]
+        # The head is not counted
+        assert get_query_max_memory(config, runtime_config, {}) == 2 * query_max_memory_per_node
+        assert get_query_max_memory(
+            config, runtime_config, {"query_max_memory_workers": "max"}) == \
+            10 * query_max_memory_per_node
+        assert get_query_max_memory(
+            config, runtime_config, {"query_max_memory_workers": 5}) == \
+            5 * query_max_memory_per_node
+        # At least the memory of a worker
+        assert get_query_max_memory(
+            _get_config(NODE_MEMORY_MB, 0, 10), runtime_config, {}) == query_max_memory_per_node
+        # No worker memory declared
+        assert get_query_max_memory(
+            _get_config(0, 2, 10), runtime_config, {}) is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
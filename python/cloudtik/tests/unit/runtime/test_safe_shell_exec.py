@@ -0,0 +1,99 @@
+import io
+import os
+import sys
+import time
+
+import pytest
+
+from cloudtik.runtime.ml.runner.util.safe_shell_exec import OutputForwarder
+
+
+@pytest.fixture
+def forwarder():
+    forwarder = OutputForwarder()
+    yield forwarder
+    forwarder.close()
+
+
+class TestOutputForwarder:
+    def test_eof(self, forwarder):
+        r, w = os.pipe()
+        dst = io.StringIO()
+        source = forwarder.add(r, dst, index=0)
+        os.write(w, b"a\nb")
+        os.close(w)
+        assert source.wait(5)
+        # The partial line left is written at EOF
+        assert dst.getvalue() == "[0]:a\n[0]:b"
+
+        # Not prefixed without the index
+        r, w = os.pipe()
+        dst = io.StringIO()
+        source = forwarder.add(r, dst)
+        os.close(w)
+        assert source.wait(5)
+        assert dst.getvalue() == ""
+
+    def test_partial_lines(self, forwarder):
+        r, w = os.pipe()
+        dst = io.StringIO()
+        source = forwarder.add(r, dst, index=1)
+        os.write(w, b"abc")
+        time.sleep(0.2)
+        # Wait for the end of the line
+        assert dst.getvalue() == ""
+        # The utf8 character is split across the reads
+        os.write(w, b"def\xc3")
+        time.sleep(0.2)
+        os.write(w, b"\xa9\rnext\n")
+        os.close(w)
+        assert source.wait(5)
+        assert dst.getvalue() == "[1]:abcdefé\r[1]:next\n"
+
+    def test_max_line_buffer_size(self):
+        forwarder = OutputForwarder(max_line_buffer_size=4)
+        try:
+            r, w = os.pipe()
+            dst = io.StringIO()
+            source = forwarder.add(r, dst, index=0)
+            os.write(w, b"abcdefgh")
+            deadline = time.time() + 5
+            while not dst.getvalue() and time.time() < deadline:
+                time.sleep(0.01)
+            # The long partial line is written without waiting for its end
+            assert dst.getvalue() == "[0]:abcdefgh"
+            os.close(w)
+            assert source.wait(5)
+        finally:
+            forwarder.close()
+
+    def test_multiple_streams(self, forwarder):
+        dst = io.StringIO()
+        other_dst = io.StringIO()
+        log_stream = io.StringIO()
+        pipes = [os.pipe() for _ in range(3)]
+        sources = [
+            forwarder.add(pipes[0][0], dst, index=0, log_stream=log_stream),
+            forwarder.add(pipes[1][0], dst, index=1),
+            forwarder.add(pipes[2][0], other_dst, index=2, prefix="p"),
+        ]
+        for i, (_, w) in enumerate(pipes):
+            os.write(w, "line {}\n".format(i).encode())
+        for i, (_, w) in enumerate(pipes):
+            os.write(w, "end {}\n".format(i).encode())
+            os.close(w)
+        for source in sources:
+            assert source.wait(5)
+
+        lines = dst.getvalue().splitlines()
+        # The lines of each source are in order
+        assert [line for line in lines if line.startswith("[0]:")] == ["[0]:line 0", "[0]:end 0"]
+        assert [line for line in lines if line.startswith("[1]:")] == ["[1]:line 1", "[1]:end 1"]
+        assert len(lines) == 4
+        assert other_dst.getvalue() == "[2]<p>:line 2\n[2]<p>:end 2\n"
+        # The log stream gets the output without prefix
+        assert log_stream.getvalue() == "line 0\nend 0\n"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,236 @@
+import sys
+
+import pytest
+
+from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+from cloudtik.core.tags import CLOUDTIK_TAG_USER_NODE_TYPE
+from cloudtik.runtime.spark import utils as spark_utils
+from cloudtik.runtime.spark.utils import get_spark_executor_sizing, \
+    _config_measured_runtime_resources, _get_node_type_sizing, \
+    _get_measured_yarn_node_resource, _with_runtime_environment_variables, \
+    get_spark_executor_overhead, SPARK_EXECUTOR_SIZING_MEASURED
+
+MB_PER_GB = 1024
+
+DECLARED_WORKER_CPU = 16
+DECLARED_WORKER_MEMORY_MB = 64 * MB_PER_GB
+
+# 2 sockets of 8 cores with hyper-threading in 2 NUMA nodes
+MEASURED_NODE_FACTS = {
+    "logical_cores": 32, "physical_cores": 16, "sockets": 2,
+    "numa_nodes": 2, "memory_mb": 128 * MB_PER_GB, "data_disks": 2,
+}
+
+
+def _get_node_facts(logical_cores, numa_nodes=1, memory_mb=64 * MB_PER_GB):
+    return {
+        "logical_cores": logical_cores, "physical_cores": logical_cores // 2,
+        "sockets": numa_nodes, "numa_nodes": numa_nodes,
+        "memory_mb": memory_mb, "data_disks": 0,
+    }
+
+
+def _get_runtime_config(*runtime_types):
+    return {"types": list(runtime_types) + ["spark"]}
+
+
+def _get_config(spark_config=None):
+    spark_config = dict(spark_config or {})
+    spark_config["executor_sizing"] = SPARK_EXECUTOR_SIZING_MEASURED
+    return {
+        "head_node_type": "head",
+        "available_node_types": {
+            "head": {"resources": {"CPU": 4, "memory": 16 * MB_PER_GB * 1024 * 1024}},
+            "worker": {"resources": {
+                "CPU": DECLARED_WORKER_CPU,
+                "memory": DECLARED_WORKER_MEMORY_MB * 1024 * 1024}},
+        },
+        "runtime": {"types": ["hdfs", "spark"], "spark": spark_config},
+    }
+
+
+class Provider:
+    def __init__(self, node_types):
+        self._node_types = node_types
+
+    def node_tags(self, node_id):
+        return {CLOUDTIK_TAG_USER_NODE_TYPE: self._node_types[node_id]}
+
+
+def _assert_executors_fit(sizing):
+    executor_memory_all = sizing["spark_executor_memory"] + \
+        get_spark_executor_overhead(sizing["spark_executor_memory"])
+    assert sizing["number_of_executors"] * sizing["spark_executor_cores"] <= \
+        sizing["yarn_container_maximum_vcores"]
+    assert sizing["number_of_executors"] * executor_memory_all <= \
+        sizing["yarn_container_maximum_memory"]
+
+
+class TestExecutorSizing:
+    @pytest.mark.parametrize("logical_cores,numa_nodes,executor_cores,executors", [
+        # 12 cores of each NUMA node are packed by executors of 4 cores
+        (24, 2, 4, 6),
+        # 18 cores of each NUMA node are packed by executors of 3 cores
+        (36, 2, 3, 12),
+        # 10 cores of each NUMA node are packed by executors of 5 cores
+        (40, 4, 5, 8),
+        # A single executor for a small node
+        (6, 1, 6, 1),
+    ])
+    def test_numa_packing(self, logical_cores, numa_nodes, executor_cores, executors):
+        sizing = get_spark_executor_sizing(
+            _get_node_facts(logical_cores, numa_nodes), _get_runtime_config(), {})
+        assert sizing["yarn_container_maximum_vcores"] == logical_cores
+        assert sizing["spark_executor_cores"] == executor_cores
+        assert sizing["number_of_executors"] == executors
+        assert (logical_cores // numa_nodes) % executor_cores == 0
+        _assert_executors_fit(sizing)
+
+    def test_physical_cores(self):
+        sizing = get_spark_executor_sizing(
+            MEASURED_NODE_FACTS, _get_runtime_config(), {"use_logical_cores": False})
+        assert sizing["yarn_container_maximum_vcores"] == 16
+        # An executor for the 8 cores of each NUMA node
+        assert sizing["spark_executor_cores"] == 8
+        assert sizing["number_of_executors"] == 2
+        _assert_executors_fit(sizing)
+
+    def test_memory_reservations(self):
+        memory_mb = 64 * MB_PER_GB
+        node_facts = _get_node_facts(16, memory_mb=memory_mb)
+        # 5% for the OS
+        sizing = get_spark_executor_sizing(node_facts, _get_runtime_config(), {})
+        assert sizing["yarn_container_maximum_memory"] == 60 * MB_PER_GB
+        _assert_executors_fit(sizing)
+
+        # The co-located runtimes
+        sizing = get_spark_executor_sizing(
+            node_facts, _get_runtime_config("hdfs", "kafka"), {})
+        assert sizing["yarn_container_maximum_memory"] == 58 * MB_PER_GB
+        _assert_executors_fit(sizing)
+
+        # The memory reserved by user in addition
+        sizing = get_spark_executor_sizing(
+            node_facts, _get_runtime_config("hdfs"), {"reserved_memory_mb": 4096})
+        assert sizing["yarn_container_maximum_memory"] == 55 * MB_PER_GB
+        _assert_executors_fit(sizing)
+
+        with pytest.raises(RuntimeError):
+            get_spark_executor_sizing(
+                node_facts, _get_runtime_config(), {"reserved_memory_mb": memory_mb})
+
+    def test_executor_cores_option(self):
+        sizing = get_spark_executor_sizing(
+            MEASURED_NODE_FACTS, _get_runtime_config(), {"executor_cores": 8})
+        assert sizing["spark_executor_cores"] == 8
+        assert sizing["number_of_executors"] == 4
+        # Not more than the cores of the node
+        sizing = get_spark_executor_sizing(
+            _get_node_facts(4), _get_runtime_config(), {"executor_cores": 8})
+        assert sizing["spark_executor_cores"] == 4
+
+    def test_node_type_overrides(self):
+        config = _get_config({
+            "executor_sizing_options": {"executor_cores": 2},
+            "executor_sizing_node_types": {
+                "worker": {"memory_mb": 32 * MB_PER_GB, "executor_cores": 8}},
+        })
+        sizing, report = _get_node_type_sizing(
+            config, "worker", MEASURED_NODE_FACTS, "measured")
+        # The user overrides of the type win over the measured facts and the options
+        assert sizing["yarn_container_maximum_vcores"] == 32
+        assert sizing["yarn_container_maximum_memory"] < 32 * MB_PER_GB
+        assert sizing["spark_executor_cores"] == 8
+        assert report[0] == "Node type worker (facts: measured, overridden):"
+
+        sizing, report = _get_node_type_sizing(
+            config, "other", MEASURED_NODE_FACTS, "measured")
+        assert sizing["spark_executor_cores"] == 2
+        assert report[0] == "Node type other (facts: measured):"
+
+    def test_config_declared_resources(self):
+        config = _config_measured_runtime_resources(_get_config())
+        spark_config = config["runtime"]["spark"]
+        # The workers only and sized with the declared resources
+        assert list(spark_config["yarn_node_type_resource"]) == ["worker"]
+        node_resource = spark_config["yarn_node_type_resource"]["worker"]
+        assert node_resource["yarn_container_maximum_vcores"] == DECLARED_WORKER_CPU
+        assert node_resource["yarn_container_maximum_memory"] < DECLARED_WORKER_MEMORY_MB
+        executor_resource = spark_config["spark_executor_resource"]
+        assert executor_resource["spark_executor_cores"] == 4
+        assert executor_resource["spark_executor_memory"] > 0
+
+
+class TestMeasuredNodeResource:
+    @pytest.fixture
+    def published_node_facts(self, monkeypatch):
+        published_node_facts = {}
+        monkeypatch.setattr(
+            spark_utils, "_get_published_node_facts",
+            lambda provider: published_node_facts)
+        return published_node_facts
+
+    def test_measured(self, published_node_facts):
+        config = _config_measured_runtime_resources(_get_config())
+        provider = Provider({"head-1": "head", "worker-1": "worker"})
+        runtime_config = config["runtime"]
+        declared = runtime_config["spark"]["yarn_node_type_resource"]["worker"]
+
+        # Fallback to the declared resources without the facts
+        assert _get_measured_yarn_node_resource(config, provider, "worker") is None
+        runtime_envs = _with_runtime_environment_variables(
+            runtime_config, config, provider, "worker-1")
+        assert runtime_envs["YARN_NODEMANAGER_VCORES"] == \
+            declared["yarn_container_maximum_vcores"]
+        assert runtime_envs["YARN_NODEMANAGER_MEMORY"] == \
+            declared["yarn_container_maximum_memory"]
+
+        published_node_facts["worker"] = MEASURED_NODE_FACTS
+        runtime_envs = _with_runtime_environment_variables(
+            runtime_config, config, provider, "worker-1")
+        assert runtime_envs["YARN_NODEMANAGER_VCORES"] == 32
+        assert runtime_envs["YARN_NODEMANAGER_MEMORY"] > \
+            declared["yarn_container_maximum_memory"]
+
+        # Fallback to the declared resources if an executor doesn't fit
+        published_node_facts["worker"] = _get_node_facts(2)
+        assert _get_measured_yarn_node_resource(config, provider, "worker") is None
+        runtime_envs = _with_runtime_environment_variables(
+            runtime_config, config, provider, "worker-1")
+        assert runtime_envs["YARN_NODEMANAGER_VCORES"] == \
+            declared["yarn_container_maximum_vcores"]
+
+    def test_no_facts_lookup_for_others(self, monkeypatch):
+        def get_published_node_facts(provider):
+            raise AssertionError("The node facts are looked up.")
+
+        monkeypatch.setattr(
+            spark_utils, "_get_published_node_facts", get_published_node_facts)
+        config = _config_measured_runtime_resources(_get_config())
+        provider = Provider({"head-1": "head"})
+        runtime_envs = _with_runtime_environment_variables(
+            config["runtime"], config, provider, "head-1")
+        assert "YARN_NODEMANAGER_VCORES" not in runtime_envs
+
+    def test_facts_loaded_once(self, monkeypatch):
+        loads = []
+
+        def load_published_node_facts(provider):
+            loads.append(provider)
+            return {"worker": MEASURED_NODE_FACTS}
+
+        monkeypatch.setattr(
+            spark_utils, "_published_node_facts_cache", ConcurrentObjectCache(ttl_s=60))
+        monkeypatch.setattr(
+            spark_utils, "_load_published_node_facts", load_published_node_facts)
+        config = _config_measured_runtime_resources(_get_config())
+        provider = Provider({"worker-{}".format(i): "worker" for i in range(5)})
+        for i in range(5):
+            runtime_envs = _with_runtime_environment_variables(
+                config["runtime"], config, provider, "worker-{}".format(i))
+            assert runtime_envs["YARN_NODEMANAGER_VCORES"] == 32
+        assert len(loads) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
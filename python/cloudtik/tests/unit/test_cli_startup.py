@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+CLI_MODULE = "cloudtik.scripts.scripts"
+
+# The cumulative import time budget (in microseconds) of the CLI module.
+# The best of the runs is checked to tolerate a loaded CI machine,
+# the budget can be relaxed through the environment variable.
+CLI_IMPORT_TIME_BUDGET_US = int(
+    os.environ.get("CLOUDTIK_CLI_IMPORT_TIME_BUDGET_US", 100000))
+CLI_IMPORT_TIME_RUNS = 3
+
+# These modules should only be imported when a command needs them
+CLI_LAZY_MODULES = [
+    "cloudtik.core._private.cluster.cluster_operator",
+    "cloudtik.core._private.cluster.cluster_config",
+    "cloudtik.core._private.cluster.cluster_scaler",
+    "cloudtik.core._private.node.node_services",
+    "cloudtik.core._private.workspace.workspace_operator",
+    "cloudtik.core._private.services",
+    "cloudtik.core._private.utils",
+    "cloudtik.core._private.providers",
+    "cloudtik.scripts.head_scripts",
+    "cloudtik.scripts.runtime_scripts",
+    "cloudtik.scripts.workspace",
+    "redis",
+    "paramiko",
+    "psutil",
+]
+
+
+def _get_import_times(module):
+    """Run the import of the module in a fresh interpreter with -X importtime
+    and return a dict of the imported modules to the cumulative time in us."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import {}".format(module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            # The header line
+            continue
+        import_times[fields[2].strip()] = int(fields[1].strip())
+    return import_times
+
+
+class TestCLIStartup:
+    def test_cli_lazy_imports(self):
+        import_times = _get_import_times(CLI_MODULE)
+        assert CLI_MODULE in import_times
+        eager_modules = [
+            module for module in CLI_LAZY_MODULES if module in import_times]
+        assert not eager_modules, \
+            "Modules imported eagerly by CLI: {}".format(eager_modules)
+
+    def test_cli_import_time(self):
+        best_import_time = min(
+            _get_import_times(CLI_MODULE)[CLI_MODULE]
+            for _ in range(CLI_IMPORT_TIME_RUNS))
+        assert best_import_time < CLI_IMPORT_TIME_BUDGET_US, \
+            "CLI import time {}us exceeds the budget {}us.".format(
+                best_import_time, CLI_IMPORT_TIME_BUDGET_US)
+
+    def test_cli_lazy_subcommands(self):
+        from cloudtik.scripts.scripts import cli
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--help"])
+        assert result.exit_code == 0
+        for group_name in ["workspace", "runtime", "head"]:
+            assert group_name in result.output
+
+        result = runner.invoke(cli, ["head", "--help"])
+        assert result.exit_code == 0
+        assert "Commands running on head node only." in result.output
+
+    def test_run_script_lazy_imports(self):
+        # run_script is on the hot path of the runtime scripts.
+        # The psutil is light and needed by core_utils.
+        lazy_modules = [
+            module for module in CLI_LAZY_MODULES if module != "psutil"]
+        code = (
+            "import sys\n"
+            "from click.testing import CliRunner\n"
+            "from cloudtik.scripts.scripts import cli\n"
+            "CliRunner().invoke(cli, ['run-script', 'non-existent.sh', 'arg'])\n"
+            "print(','.join(m for m in {} if m in sys.modules))\n".format(
+                lazy_modules))
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True)
+        assert not result.stdout.strip(), \
+            "Modules imported by run-script: {}".format(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -420,6 +420,8 @@ SMALL_CLUSTER = {
         "enabled": True,
         "image": "example",
         "container_name": "mock",
+        # The tests respond to the docker commands one by one
+        "fast_init": False,
     },
     "auth": {
         "ssh_user": "ubuntu",
@@ -1332,7 +1334,8 @@ class CloudTikTest(unittest.TestCase):
     def testSetupCommandsWithStoppedNodeCachingNoDocker(self):
         file_mount_dir = tempfile.mkdtemp()
         config = copy.deepcopy(SMALL_CLUSTER)
-        del config["docker"]
+        # Use the default docker config, responding to the docker commands one by one
+        config["docker"] = {"fast_init": False}
         config["file_mounts"] = {"/root/test-folder": file_mount_dir}
         config["file_mounts_sync_continuously"] = True
         config["min_workers"] = 1